@@ -42,9 +42,17 @@ parser.add_option('', 'gencat', 'string', 'gencat',
 parser.add_option('m', 'module', 'list2', 'modules',
     _("Optional: the restricted list of module(s) to include in the "
       "application"))
+parser.add_option('', 'frozen', 'boolean', 'frozen',
+    _("Optional: Create an application whose salome context file "
+      "(env_launch.cfg) has the resolved values of the variables, "
+      "one line per variable."))
 parser.add_option('', 'use_mesa', 'boolean', 'use_mesa',
     _("Optional: Create a launcher that will use mesa products\n\t"
       "It can be usefull whan salome is used on a remote machine through ssh"))
+parser.add_option('', 'library_farm', 'boolean', 'library_farm',
+    _("Optional: Create an application whose LD_LIBRARY_PATH and PYTHONPATH "
+      "are\n\ta farm of links to the libraries and the python modules of the "
+      "products\n\t(see sat launcher --library_farm)"))
 
 ##
 # Creates an alias for runAppli.
@@ -227,7 +235,8 @@ def write_step(logger, message, level=3, pad=50):
 
 ##
 # Creates a SALOME application.
-def create_application(config, appli_dir, catalog, logger, display=True):
+def create_application(config, appli_dir, catalog, logger, display=True,
+                       frozen=False):
       
     SALOME_modules = get_SALOME_modules(config)
     
@@ -243,7 +252,8 @@ def create_application(config, appli_dir, catalog, logger, display=True):
                                    appli_dir,
                                    catalog,
                                    logger,
-                                   SALOME_modules)
+                                   SALOME_modules,
+                                   frozen)
     
     if retcode == 0:
         cmd = src.printcolors.printcLabel("%s/salome" % appli_dir)
@@ -267,7 +277,8 @@ def get_SALOME_modules(config):
 ##
 # Obsolescent way of creating the application.
 # This method will use appli_gen to create the application directory.
-def generate_launch_file(config, appli_dir, catalog, logger, l_SALOME_modules):
+def generate_launch_file(config, appli_dir, catalog, logger, l_SALOME_modules,
+                         frozen=False):
     retcode = -1
 
     if len(catalog) > 0 and not os.path.exists(catalog):
@@ -281,7 +292,10 @@ def generate_launch_file(config, appli_dir, catalog, logger, l_SALOME_modules):
     VersionSalome = src.get_salome_version(config)
     if VersionSalome>=820:
         # for salome 8+ we use a salome context file for the virtual app
-        app_shell=["cfg", "bash"]
+        if frozen:
+            app_shell=["cfgFrozen", "bash"]
+        else:
+            app_shell=["cfg", "bash"]
         env_files=[env_file+".cfg", env_file+".sh"]
     else:
         app_shell=["bash"]
@@ -436,6 +450,10 @@ def run(args, runner, logger):
     if options.use_mesa:
         src.activate_mesa_property(runner.cfg)
 
+    # use a library farm in the environment of the application
+    if options.library_farm:
+        src.activate_library_farm_property(runner.cfg)
+
     # set name and application_name
     if options.name:
         runner.cfg.APPLICATION.virtual_app['name'] = options.name
@@ -506,7 +524,8 @@ def run(args, runner, logger):
     # generate the application
     try:
         try: # try/except/finally not supported in all version of python
-            retcode = create_application(runner.cfg, appli_dir, catalog, logger)
+            retcode = create_application(runner.cfg, appli_dir, catalog, logger,
+                                         frozen=options.frozen)
         except Exception as exc:
             details.append(str(exc))
             raise
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import time
+
+import src
+import src.binaryCache
+import src.buildResources
+
+# Define all possible option for the cache command :  sat cache <options>
+parser = src.options.Options()
+parser.add_option('s', 'stats', 'boolean', 'stats',
+    _("Optional: print the statistics of the binary cache (the default)."))
+parser.add_option('l', 'list', 'boolean', 'list',
+    _("Optional: list the archives of the binary cache, "
+      "the least recently used first."))
+parser.add_option('', 'purge', 'boolean', 'purge',
+    _("Optional: remove all the archives of the binary cache."))
+
+def description():
+    '''method that is called when salomeTools is called with --help option.
+
+    :return: The text to display for the cache command description.
+    :rtype: str
+    '''
+    return _("""\
+The cache command manages the binary cache of the compiled products.
+sat compile stores the install directories of the products in the cache,
+and restores them instead of compiling the products again.
+The cache is enabled by the directory LOCAL.binary_cache (sat init --binary_cache),
+and limited by LOCAL.binary_cache_size (in MB).
+
+example:
+>> sat cache --stats
+>> sat cache --purge""")
+
+def run(args, runner, logger):
+    '''method that is called when salomeTools is called with cache parameter.
+    '''
+    # Parse the options
+    (options, args) = parser.parse_args(args)
+
+    cache = src.binaryCache.get_binary_cache(runner.cfg)
+    if cache is None:
+        msg = _("The binary cache is not enabled: set the directory "
+                "LOCAL.binary_cache (sat init --binary_cache <dir>)\n")
+        logger.write(src.printcolors.printcWarning(msg), 1)
+        return 1
+
+    if options.purge:
+        nb = cache.purge()
+        logger.write(_("%d archive(s) removed from the binary cache\n") % nb, 1)
+        return 0
+
+    entries = cache.get_entries()
+    if options.list:
+        for last_use, size, key in entries:
+            info = cache.get_info(key)
+            logger.write("%s  %s  %-10s %s-%s\n" % (
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(last_use)),
+                key[:12], src.buildResources.get_size_str(size // 1024),
+                info.get("product", "?"), info.get("version", "?")), 1)
+        logger.write("\n", 1)
+
+    total = sum(size for last_use, size, key in entries)
+    info = [(_("directory"), cache.cache_dir),
+            (_("archives"), len(entries)),
+            (_("size"), src.buildResources.get_size_str(total // 1024)),
+            (_("size limit"), src.buildResources.get_size_str(
+                                          cache.size_limit // 1024))]
+    src.print_info(logger, info)
+    return 0
@@ -251,5 +251,9 @@ try 'sat --help clean' and 'sat clean ... --products ... --sources --build --ins
     
     # Suppress the list of paths
     suppress_directories(l_dir_to_suppress, logger)
+
+    # the install directories of the products in base depend 
+    # on the existing directories
+    src.product.clear_product_config_cache(runner.cfg)
     
     return 0
@@ -18,6 +18,8 @@
 
 import os
 import re
+import sys
+import time
 import subprocess
 import src
 import src.debug as DBG
@@ -62,65 +64,31 @@ parser.add_option('', 'check', 'boolean', 'check', _(
 
 parser.add_option('', 'clean_build_after', 'boolean', 'clean_build_after', 
                   _('Optional: remove the build directory after successful compilation'), False)
+parser.add_option('', 'no_binary_cache', 'boolean', 'no_binary_cache',
+    _("Optional: do not restore nor store the products in the binary cache "
+      "(LOCAL.binary_cache)."), False)
+parser.add_option('', 'report', 'boolean', 'report',
+    _("Optional: DO NOT COMPILE, print the report of the last compilations of the "
+      "products: the critical path and the longest compilations and steps."), False)
+parser.add_option('', 'plan', 'boolean', 'plan',
+    _("Optional: DO NOT COMPILE, print the products that would be built, skipped or "
+      "blocked, and the estimated duration of the compilation."), False)
+parser.add_option('', 'timeline', 'string', 'timeline',
+    _("Optional: the JSON file where to write the timeline of the compilation "
+      "(by default, next to the xml log)."))
+parser.add_option('j', 'jobs', 'int', 'jobs',
+    _("Optional: the maximum number of products compiled simultaneously. "
+      "A product is compiled as soon as all its dependencies are installed."), 1)
+parser.add_option('', 'concurrent_builds', 'int', 'concurrent_builds',
+    _("Optional: the number of products compiled simultaneously, which share "
+      "the cores and the memory for the jobs of make (given by the parent "
+      "sat compile --jobs)."), 1)
 
 
-# from sat product infos, represent the product dependencies in a simple python graph
-# keys are nodes, the list of dependencies are values
-def get_dependencies_graph(p_infos, compile_time=True):
-    graph={}
-    for (p_name,p_info) in p_infos:
-        depprod=[]
-        for d in p_info.depend:
-            depprod.append(d)
-        if compile_time and "build_depend" in p_info:
-            for d in p_info.build_depend:
-                depprod.append(d)
-        graph[p_name]=depprod
-    return graph
-
-# this recursive function calculates all the dependencies of node start
-def depth_search_graph(graph, start, visited=[]):
-    visited= visited+ [start]
-    for node in graph[start]:  # for all nodes in start dependencies
-        if node not in visited:
-            visited=depth_search_graph(graph, node, visited)
-    return visited
-
-# find a path from start node to end (a group of nodes)
-def find_path_graph(graph, start, end, path=[]):
-    path = path + [start]
-    if start in end:
-        return path
-    if start not in graph:
-        return None
-    for node in graph[start]:
-        if node not in path:
-            newpath = find_path_graph(graph, node, end, path)
-            if newpath: return newpath
-    return None
-
-# Topological sorting algo
-# return in sorted_nodes the list of sorted nodes
-def depth_first_topo_graph(graph, start, visited=[], sorted_nodes=[]):
-    visited = visited + [start]
-    if start not in graph:
-        # get more explicit error
-        where = [k for k in graph if start in graph[k]]
-        raise src.SatException('Error in product dependencies : %s product is referenced in products dependencies, but is not present in the application, from %s' % (start, where))
-        # may be in debug mode, continue loop to get all problems, (if comment raise)
-        # print("WARNING : %s product is referenced in products dependencies but is not present in the application, from %s" % (start, where))
-        # sorted_nodes = sorted_nodes + [start]
-        # return visited, sorted_nodes
-    for node in graph[start]:
-        if node not in visited:
-            visited,sorted_nodes=depth_first_topo_graph(graph, node, visited,sorted_nodes)
-        else:
-            if node not in sorted_nodes:
-                raise src.SatException('Error in product dependencies : cycle detection for node %s and %s' % (start,node))
-    
-    sorted_nodes = sorted_nodes + [start]
-    return visited, sorted_nodes
-
+# the number of products and steps in the report of sat compile --report
+REPORT_SIZE = 10
+# the numbers of jobs of the estimates of sat compile --plan, without --jobs
+PLAN_JOBS = [2, 4, 8]
 
 # check for p_name that all dependencies are installed
 def check_dependencies(config, p_name_p_info, all_products_dict):
@@ -145,6 +113,123 @@ def log_res_step(logger, res):
         logger.write("%s \n" % src.printcolors.printcError("KO"), 4)
         logger.flush()
 
+def get_log_header(p_name, len_end_line):
+    '''Get the header to display when logging the compilation of a product
+    
+    :param p_name str: The name of the product
+    :param len_end_line int: the length of the end of the header (dots)
+    :return: the header
+    :rtype: str
+    '''
+    header = _("Compilation of %s") % src.printcolors.printcLabel(p_name)
+    header += " %s " % ("." * (len_end_line - len(p_name)))
+    return header
+
+def get_product_compile_status(config, options, p_name_info):
+    '''Do the checks that precede the compilation of a product, 
+       without logging nor running anything.
+    
+    :param config Config: The global configuration
+    :param options OptResult: the options of the compile command
+    :param p_name_info tuple: (str, Config) => (product_name, product_info)
+    :return: (status, p_info) status is one of "ignored", "native", "fixed",
+             "no sources", "installed" or "to compile", p_info is the 
+             recomputed product information (for the last three)
+    :rtype: tuple
+    '''
+    p_name, p_info = p_name_info
+
+    # Do nothing if the product is not compilable
+    if not src.product.product_compiles(p_info):
+        return "ignored", p_info
+
+    # Do nothing if the product is native
+    if src.product.product_is_native(p_info):
+        return "native", p_info
+
+    # Do nothing if the product is fixed (already compiled by third party)
+    if src.product.product_is_fixed(p_info):
+        return "fixed", p_info
+
+    # Recompute the product information to get the right install_dir
+    # (it could change if there is a clean of the install directory)
+    p_info = src.product.get_product_config(config, p_name)
+    
+    # Check if sources was already successfully installed
+    check_source = src.product.check_source(p_info)
+    is_pip= (src.appli_test_property(config,"pip", "yes") and src.product.product_test_property(p_info,"pip", "yes"))
+    # don't check sources with option --show 
+    # or for products managed by pip (there sources are in wheels stored in LOCAL.ARCHIVE
+    if not (options.no_compile or is_pip): 
+        if not check_source:
+            return "no sources", p_info
+    
+    # if we don't force compilation, check if the was already successfully installed.
+    # we don't compile in this case.
+    if (not options.force) and src.product.check_installation(config, p_info):
+        return "installed", p_info
+
+    return "to compile", p_info
+
+def check_product_to_compile(config, options, p_name_info, header, logger):
+    '''Do the checks that precede the compilation of a product 
+       and log the reason why the product is not compiled, if any.
+    
+    :param config Config: The global configuration
+    :param options OptResult: the options of the compile command
+    :param p_name_info tuple: (str, Config) => (product_name, product_info)
+    :param header Str: the header to display when logging
+    :param logger Logger: The logger instance to use for the display and logging
+    :return: (p_info, res) p_info is the recomputed product information, or 
+             None if the product has not to be compiled.
+             res is 1 if the check failed, else 0.
+    :rtype: tuple
+    '''
+    status, p_info = get_product_compile_status(config, options, p_name_info)
+
+    if status in ["ignored", "native", "fixed"]:
+        # fixed products are shown as native
+        log_step(logger, header, "ignored" if status == "ignored" else "native")
+        logger.write("\n", 3, False)
+        return None, 0
+
+    if status == "no sources":
+        logger.write(_("Sources of product not found (try 'sat -h prepare') \n"))
+        return None, 1 # one more error
+    
+    if status == "installed":
+        logger.write(_("Already installed"))
+        logger.write(_(" in %s" % p_info.install_dir), 4)
+        logger.write(_("\n"))
+        return None, 0
+    
+    # If the show option was called, do not launch the compilation
+    if options.no_compile:
+        logger.write(_("Not installed in %s\n" % p_info.install_dir))
+        return None, 0
+
+    return p_info, 0
+
+def check_sources_changed(p_info):
+    '''Check if the sources of an installed VCS product changed since its
+       compilation (sat compile --update)
+
+    :param p_info Config: The specific config of the product
+    :rtype: boolean
+    '''
+    if not (src.product.product_is_vcs(p_info) and 
+            os.path.isdir(p_info.source_dir) and 
+            os.path.isdir(p_info.install_dir)):
+        return False
+    # compare the sources with the fingerprint recorded at the installation 
+    unchanged = src.product.check_source_fingerprint(p_info)
+    if unchanged is None:
+        # installed by an older sat, without fingerprint
+        source_time=os.path.getmtime(p_info.source_dir)
+        install_time=os.path.getmtime(p_info.install_dir)
+        unchanged = install_time>=source_time
+    return not unchanged
+
 def compile_all_products(sat, config, options, products_infos, all_products_dict, all_products_graph, logger):
     '''Execute the proper configuration commands 
        in each product build directory.
@@ -153,7 +238,7 @@ def compile_all_products(sat, config, options, products_infos, all_products_dict
     :param products_info list: List of 
                                  (str, Config) => (product_name, product_info)
     :param all_products_dict: Dict of all products 
-    :param all_products_graph: graph of all products 
+    :param all_products_graph DependencyGraph: graph of all products 
     :param logger Logger: The logger instance to use for the display and logging
     :return: the number of failing commands.
     :rtype: int
@@ -181,7 +266,8 @@ def compile_all_products(sat, config, options, products_infos, all_products_dict
                       " --build --install",
                       batch=True,
                       verbose=0,
-                      logger_add_link = logger)
+                      logger_add_link = logger,
+                      reuse_config = True)
 
         else:
             # Clean the the install directory 
@@ -192,7 +278,8 @@ def compile_all_products(sat, config, options, products_infos, all_products_dict
                           " --install",
                           batch=True,
                           verbose=0,
-                          logger_add_link = logger)
+                          logger_add_link = logger,
+                          reuse_config = True)
             
             # Clean the the install directory 
             # if the corresponding option was called
@@ -202,25 +289,23 @@ def compile_all_products(sat, config, options, products_infos, all_products_dict
                           " --build",
                           batch=True,
                           verbose=0,
-                          logger_add_link = logger)
+                          logger_add_link = logger,
+                          reuse_config = True)
 
-            if options.update and src.product.product_is_vcs(p_info):
-            # only VCS products are concerned by update option
+            if options.update:
+            # the VCS products which sources changed are updated, 
+            # and all the products which depend on them
                 try: 
                     do_update=False
                     if len(updated_products)>0:
                         # if other products where updated, check that the current product is a child 
                         # in this case it will be also updated
-                        if find_path_graph(all_products_graph, p_name, updated_products):
+                        if all_products_graph.depends_on(p_name, updated_products):
                             logger.write("\nUpdate product %s (child)" % p_name, 5)
                             do_update=True
-                    if (not do_update) and os.path.isdir(p_info.source_dir) \
-                                       and os.path.isdir(p_info.install_dir):
-                        source_time=os.path.getmtime(p_info.source_dir)
-                        install_time=os.path.getmtime(p_info.install_dir)
-                        if install_time<source_time:
-                            logger.write("\nupdate product %s" % p_name, 5)
-                            do_update=True
+                    if (not do_update) and check_sources_changed(p_info):
+                        logger.write("\nupdate product %s" % p_name, 5)
+                        do_update=True
                     if do_update:
                         updated_products.append(p_name) 
                         sat.clean(config.VARS.application + 
@@ -228,7 +313,8 @@ def compile_all_products(sat, config, options, products_infos, all_products_dict
                                   " --build --install",
                                   batch=True,
                                   verbose=0,
-                                  logger_add_link = logger)
+                                  logger_add_link = logger,
+                                  reuse_config = True)
                 except:
                     pass
 
@@ -258,6 +344,15 @@ def compile_all_products(sat, config, options, products_infos, all_products_dict
         if res>0:
             return res  # error configure dependency : we stop the compilation
 
+    # with the jobs option, products are compiled simultaneously
+    if options.jobs is not None and options.jobs > 1 and not options.no_compile:
+        return compile_all_products_parallel(sat,
+                                             config,
+                                             options,
+                                             products_infos,
+                                             all_products_dict,
+                                             logger)
+
     # second loop to compile
     res = 0
     for p_name_info in products_infos:
@@ -266,57 +361,19 @@ def compile_all_products(sat, config, options, products_infos, all_products_dict
         
         # Logging
         len_end_line = 30
-        header = _("Compilation of %s") % src.printcolors.printcLabel(p_name)
-        header += " %s " % ("." * (len_end_line - len(p_name)))
+        header = get_log_header(p_name, len_end_line)
         logger.write(header, 3)
         logger.flush()
 
-        # Do nothing if the product is not compilable
-        if not src.product.product_compiles(p_info):
-            log_step(logger, header, "ignored")
-            logger.write("\n", 3, False)
+        p_info, res_check = check_product_to_compile(config,
+                                                     options,
+                                                     p_name_info,
+                                                     header,
+                                                     logger)
+        res += res_check
+        if p_info is None:
             continue
-
-        # Do nothing if the product is native
-        if src.product.product_is_native(p_info):
-            log_step(logger, header, "native")
-            logger.write("\n", 3, False)
-            continue
-
-        # Do nothing if the product is fixed (already compiled by third party)
-        if src.product.product_is_fixed(p_info):
-            log_step(logger, header, "native")
-            logger.write("\n", 3, False)
-            continue
-
-
-        # Recompute the product information to get the right install_dir
-        # (it could change if there is a clean of the install directory)
-        p_info = src.product.get_product_config(config, p_name)
-        
-        # Check if sources was already successfully installed
-        check_source = src.product.check_source(p_info)
         is_pip= (src.appli_test_property(config,"pip", "yes") and src.product.product_test_property(p_info,"pip", "yes"))
-        # don't check sources with option --show 
-        # or for products managed by pip (there sources are in wheels stored in LOCAL.ARCHIVE
-        if not (options.no_compile or is_pip): 
-            if not check_source:
-                logger.write(_("Sources of product not found (try 'sat -h prepare') \n"))
-                res += 1 # one more error
-                continue
-        
-        # if we don't force compilation, check if the was already successfully installed.
-        # we don't compile in this case.
-        if (not options.force) and src.product.check_installation(config, p_info):
-            logger.write(_("Already installed"))
-            logger.write(_(" in %s" % p_info.install_dir), 4)
-            logger.write(_("\n"))
-            continue
-        
-        # If the show option was called, do not launch the compilation
-        if options.no_compile:
-            logger.write(_("Not installed in %s\n" % p_info.install_dir))
-            continue
         
         # Check if the dependencies are installed
         l_depends_not_installed = check_dependencies(config, p_name_info, all_products_dict)
@@ -330,8 +387,11 @@ def compile_all_products(sat, config, options, products_infos, all_products_dict
             continue
         
         # Call the function to compile the product
+        start = time.time()
         res_prod, len_end_line, error_step = compile_product(
              sat, p_name_info, config, options, logger, header, len_end_line)
+        src.buildResources.get_timeline().add_timed_step(p_name, "compile",
+                                                         start, res_prod)
         
         if res_prod != 0:
             res += 1
@@ -358,7 +418,8 @@ def compile_all_products(sat, config, options, products_infos, all_products_dict
                           " --install",
                           batch=True,
                           verbose=0,
-                          logger_add_link = logger)
+                          logger_add_link = logger,
+                          reuse_config = True)
         else:
             # Clean the build directory if the compilation and tests succeed
             if options.clean_build_after:
@@ -368,7 +429,8 @@ def compile_all_products(sat, config, options, products_infos, all_products_dict
                           " --build",
                           batch=True,
                           verbose=0,
-                          logger_add_link = logger)
+                          logger_add_link = logger,
+                          reuse_config = True)
 
         # Log the result
         if res_prod > 0:
@@ -397,6 +459,214 @@ def compile_all_products(sat, config, options, products_infos, all_products_dict
         
     return res
 
+def get_compile_command(sat, config, options, p_name):
+    '''Get the sat command line that compiles one product in a child process.
+       The cleaning options are not passed, the cleaning is done before.
+    
+    :param sat Sat: The Sat instance
+    :param config Config: The global configuration
+    :param options OptResult: the options of the compile command
+    :param p_name str: The name of the product to compile
+    :return: the command as a list of arguments
+    :rtype: list
+    '''
+    cmd = [sys.executable, 
+           os.path.join(config.VARS.salometoolsway, "sat"),
+           "-b",
+           "-v", str(max(config.USER.output_verbose_level, 3))]
+    if sat.options.overwrite:
+        for overwrite in sat.options.overwrite:
+            cmd += ["-o", overwrite]
+    cmd += ["compile", config.VARS.application, "--products", p_name]
+    if options.force:
+        cmd.append("--force")
+    if options.makeflags:
+        cmd += ["--make_flags", options.makeflags]
+    if options.check:
+        cmd.append("--check")
+    if options.clean_build_after:
+        cmd.append("--clean_build_after")
+    if options.no_binary_cache:
+        cmd.append("--no_binary_cache")
+    return cmd
+
+def compile_all_products_parallel(sat,
+                                  config,
+                                  options,
+                                  products_infos,
+                                  all_products_dict,
+                                  logger):
+    '''Compile the products with at most options.jobs compilations running 
+       at the same time. Each compilation is a "sat compile" child process, 
+       started as soon as all the products of its "depend_all" list 
+       are installed. The output of a child is captured in its own file 
+       and written in the log in one block when it ends.
+
+    :param config Config: The global configuration
+    :param options OptResult: the options of the compile command
+    :param products_info list: List of 
+                                 (str, Config) => (product_name, product_info)
+                                 topologically sorted
+    :param all_products_dict: Dict of all products 
+    :param logger Logger: The logger instance to use for the display and logging
+    :return: the number of failing products (not counting the products 
+             blocked by a failed or missing dependency, as the serial mode).
+    :rtype: int
+    '''
+    res = 0
+    len_end_line = 30
+
+    # the products that have to be compiled, in topological order
+    l_to_compile = []
+    d_install_dir = {}
+    for p_name_info in products_infos:
+        p_name = p_name_info[0]
+        header = get_log_header(p_name, len_end_line)
+        logger.write(header, 3)
+        logger.flush()
+        p_info, res_check = check_product_to_compile(config,
+                                                     options,
+                                                     p_name_info,
+                                                     header,
+                                                     logger)
+        res += res_check
+        if p_info is None:
+            continue
+        log_step(logger, header, _("to compile"))
+        logger.write("\n", 3, False)
+        l_to_compile.append(p_name)
+        d_install_dir[p_name] = p_info.install_dir
+    d_infos = dict(products_infos)
+
+    logger.write(_("\nCompilation of %(nb)d product(s) with %(jobs)d jobs\n") %
+                 {"nb" : len(l_to_compile), "jobs" : options.jobs}, 3)
+
+    # the cores and the memory are shared by the running compilations
+    concurrent_builds = min(options.jobs, max(len(l_to_compile), 1))
+    out_dir = os.path.dirname(logger.txtFilePath)
+    out_prefix = os.path.splitext(logger.txtFileName)[0]
+    pending = list(l_to_compile)
+    running = {}  # product name -> (process, output file, start time, timeline)
+    status = {}   # product name -> "OK", "KO", "BLOCKED"
+    durations = {}
+    waiting_memory = set()
+    stop = False
+    while (pending and not stop) or running:
+        # start the products whose dependencies are compiled
+        for p_name in list(pending):
+            if stop or len(running) >= options.jobs:
+                break
+            depend_all = d_infos[p_name].depend_all
+            failed = [d for d in depend_all if status.get(d) in ["KO", "BLOCKED"]]
+            # a blocked product is not counted as a failure, as in the 
+            # serial mode (the failure is the one of its dependency)
+            if len(failed) > 0:
+                pending.remove(p_name)
+                status[p_name] = "BLOCKED"
+                header = get_log_header(p_name, len_end_line)
+                logger.write(header + src.printcolors.printcError(
+                        _("ERROR : not compiled, because of failed product(s): %s")
+                        % " ".join(failed)) + "\n", 3)
+                continue
+            if [d for d in depend_all if d in pending or d in running]:
+                continue  # wait for the compilation of the dependencies
+            # the memory is sampled again before starting a compilation
+            # beside the running ones: under memory pressure, wait for them
+            if running:
+                total, available = src.buildResources.get_meminfo()
+                if not src.buildResources.has_memory_for_build(config, 
+                                                        d_infos[p_name],
+                                                        available):
+                    if p_name not in waiting_memory:
+                        waiting_memory.add(p_name)
+                        logger.write(_("Wait for memory to compile %s\n") % 
+                                     src.printcolors.printcLabel(p_name), 4)
+                    break
+
+            # the dependencies that are not compiled here have to be installed
+            l_depends_not_installed = []
+            for d in depend_all:
+                if d in l_to_compile:
+                    continue
+                if not src.product.check_installation(config, all_products_dict[d][1]):
+                    l_depends_not_installed.append(d)
+            pending.remove(p_name)
+            if len(l_depends_not_installed) > 0:
+                status[p_name] = "BLOCKED"
+                header = get_log_header(p_name, len_end_line)
+                logger.write(header + src.printcolors.printcError(
+                    _("ERROR : the following mandatory product(s) is(are) not installed: ")
+                    + " ".join(l_depends_not_installed)) + "\n", 3)
+                continue
+
+            out_path = os.path.join(out_dir, "%s_%s.txt" % (out_prefix, p_name))
+            out_file = open(out_path, "w")
+            logger.l_logFiles.append(out_path)
+            cmd = get_compile_command(sat, config, options, p_name)
+            timeline_path = os.path.join(out_dir, "%s_%s.timeline.json" % 
+                                                  (out_prefix, p_name))
+            logger.l_logFiles.append(timeline_path)
+            cmd += ["--timeline", timeline_path]
+            cmd += ["--concurrent_builds", str(concurrent_builds)]
+            logger.write(_("Start compilation of %s\n") % 
+                         src.printcolors.printcLabel(p_name), 4)
+            DBG.write("compile command", " ".join(cmd))
+            proc = subprocess.Popen(cmd,
+                                    cwd=config.LOCAL.workdir,
+                                    stdout=out_file,
+                                    stderr=subprocess.STDOUT)
+            running[p_name] = (proc, out_file, time.time(), timeline_path)
+
+        # get the compilations that are over
+        l_done = [p for p in running if running[p][0].poll() is not None]
+        if len(l_done) == 0:
+            time.sleep(0.5)
+            continue
+        for p_name in l_done:
+            proc, out_file, start, timeline_path = running.pop(p_name)
+            out_file.close()
+            durations[p_name] = time.time() - start
+            src.buildResources.get_timeline().extend(
+                        src.buildResources.BuildTimeline.read(timeline_path))
+            header = get_log_header(p_name, len_end_line)
+            with open(out_file.name) as f:
+                output = f.read()
+            logger.write("\n==== output of compilation of %s\n%s==== end of "
+                         "output of compilation of %s\n" % (p_name, output, p_name), 4)
+            if proc.returncode == 0:
+                status[p_name] = "OK"
+                logger.write(header + src.printcolors.printcSuccess("OK"), 3)
+                logger.write(_("\nINSTALL directory = %s" % 
+                    src.printcolors.printcInfo(d_install_dir[p_name])), 3)
+            else:
+                status[p_name] = "KO"
+                res += 1
+                logger.write(header + src.printcolors.printcError("KO"), 3)
+                logger.write(_("\nsee the log file %s") % 
+                             src.printcolors.printcInfo(out_file.name), 3)
+                if options.stop_first_fail:
+                    stop = True
+            logger.write("\n", 3, False)
+            logger.flush()
+
+    # final summary, in the compilation order
+    logger.write(_("\nSummary of the compilation (the BLOCKED products are "
+                   "not counted as failures):\n"), 3)
+    for p_name in l_to_compile:
+        p_status = status.get(p_name, "NOT STARTED")
+        if p_status == "OK":
+            p_status = src.printcolors.printcSuccess(p_status)
+        else:
+            p_status = src.printcolors.printcError(p_status)
+        duration = ""
+        if p_name in durations:
+            duration = " (%is)" % durations[p_name]
+        logger.write("  %s %s %s%s\n" % (src.printcolors.printcLabel(p_name),
+                                          "." * (len_end_line - len(p_name)),
+                                          p_status,
+                                          duration), 3)
+    return res
+
 def compile_product(sat, p_name_info, config, options, logger, header, len_end):
     '''Execute the proper configuration command(s) 
        in the product build directory.
@@ -420,9 +690,39 @@ def compile_product(sat, p_name_info, config, options, logger, header, len_end):
     # build_sources : script    -> script executions
     res = 0
 
+    # the binary cache, if any and if the product can be cached
+    # (not with --check: the unit tests need the build directory)
+    cache = None
+    cache_key = None
+    restored = False
+    if (not options.no_binary_cache and not options.check and
+            src.binaryCache.is_cacheable(p_info)):
+        cache = src.binaryCache.get_binary_cache(config)
+
+    # the fingerprint of the sources before the compilation, computed once
+    # for the key of the binary cache and for sat compile --update (recorded 
+    # in the install directory, its manifest is reused by the next ones)
+    source_state = None
+    if src.product.product_is_vcs(p_info) or cache is not None:
+        source_state = src.product.get_source_state(p_info)
+    if cache is not None:
+        cache_key = src.binaryCache.get_product_key(config, p_info,
+                                                    source_state[0])
     
+    if cache_key is not None and cache.has(cache_key):
+        log_step(logger, header, "RESTORE FROM BINARY CACHE")
+        start = time.time()
+        restored = cache.restore(cache_key, p_info.install_dir)
+        src.buildResources.get_timeline().add_timed_step(p_name, "restore",
+                                                   start, 0 if restored else 1)
+        log_res_step(logger, 0 if restored else 1)
+        len_end_line = len_end
+        error_step = ""
+
+    if restored:
+        pass
     # check if pip should be used : the application and product have pip property
-    if (src.appli_test_property(config,"pip", "yes") and 
+    elif (src.appli_test_property(config,"pip", "yes") and 
        src.product.product_test_property(p_info,"pip", "yes")):
             res, len_end_line, error_step = compile_product_pip(sat,
                                                                 p_name_info,
@@ -465,6 +765,20 @@ def compile_product(sat, p_name_info, config, options, logger, header, len_end):
     if res==0:       
         logger.write(_("Add the config file in installation directory\n"), 5)
         src.product.add_compile_config_file(p_info, config)
+        if source_state is not None:
+            src.product.add_source_fingerprint_file(p_info, source_state)
+
+        if cache_key is not None and not restored:
+            logger.write(_("Store the installation directory in the binary cache\n"), 5)
+            try:
+                cache.store(cache_key, p_info.install_dir,
+                            {"product": p_name, "version": str(p_info.version),
+                             "application": config.VARS.application})
+            except Exception as e:
+                # the product is compiled anyway
+                logger.write(src.printcolors.printcWarning(
+                    _("WARNING: the binary cache cannot store %s: %s\n") % 
+                    (p_name, str(e))), 3)
         
         if options.check:
             # Do the unit tests (call the check command)
@@ -472,7 +786,8 @@ def compile_product(sat, p_name_info, config, options, logger, header, len_end):
             res_check = sat.check(
                               config.VARS.application + " --products " + p_name,
                               verbose = 0,
-                              logger_add_link = logger)
+                              logger_add_link = logger,
+                              reuse_config = True)
             if res_check != 0:
                 error_step = "CHECK"
                 
@@ -555,12 +870,14 @@ def compile_product_pip(sat,
     len_end_line = len_end + 3
     error_step = ""
 
-    res_pip = (subprocess.call(pip_install_cmd, 
+    res_pip, usage = src.buildResources.run_measured(pip_install_cmd, 
                                shell=True, 
                                cwd=config.LOCAL.workdir,
                                env=build_environ.environ.environ,
                                stdout=logger.logTxtFile, 
-                               stderr=subprocess.STDOUT) == 0)        
+                               stderr=subprocess.STDOUT)
+    src.buildResources.get_timeline().add_step(p_name, "pip", usage)
+    res_pip = (res_pip == 0)
     if res_pip:
         res=0
     else:
@@ -603,7 +920,8 @@ def compile_product_cmake_autotools(sat,
     log_step(logger, header, "CONFIGURE")
     res_c = sat.configure(config.VARS.application + " --products " + p_name,
                           verbose = 0,
-                          logger_add_link = logger)
+                          logger_add_link = logger,
+                          reuse_config = True)
     log_res_step(logger, res_c)
     res += res_c
     
@@ -628,7 +946,8 @@ def compile_product_cmake_autotools(sat,
             make_arguments += " --option -j" + options.makeflags
         res_m = sat.make(make_arguments,
                          verbose = 0,
-                         logger_add_link = logger)
+                         logger_add_link = logger,
+                         reuse_config = True)
         log_res_step(logger, res_m)
         res += res_m
         
@@ -641,7 +960,8 @@ def compile_product_cmake_autotools(sat,
                                      " --products " + 
                                      p_name,
                                     verbose = 0,
-                                    logger_add_link = logger)
+                                    logger_add_link = logger,
+                                    reuse_config = True)
 
             log_res_step(logger, res_mi)
             res += res_mi
@@ -680,12 +1000,214 @@ def compile_product_script(sat,
     len_end_line = len_end + len(scrit_path_display)
     res = sat.script(config.VARS.application + " --products " + p_name,
                      verbose = 0,
-                     logger_add_link = logger)
+                     logger_add_link = logger,
+                     reuse_config = True)
     log_res_step(logger, res)
               
     return res, len_end_line, error_step 
 
     
+def get_compile_plan(config, options, products_infos, all_products_dict):
+    '''Get what sat compile would do for each product, without running 
+       anything: the checks of the compilation (sources, installation, 
+       dependencies), and the products updated by --update.
+
+    :param config Config: The global configuration
+    :param options OptResult: the options of the compile command
+    :param products_info list: List of 
+                                 (str, Config) => (product_name, product_info)
+                                 topologically sorted, with "depend_all"
+    :param all_products_dict: Dict of all products 
+    :return: the list of (product name, action, reason), the action is
+             "build", "skip" or "blocked"
+    :rtype: list
+    '''
+    plan = []
+    actions = {}
+    updated_products = []
+    parallel = (options.jobs is not None and options.jobs > 1)
+    for p_name_info in products_infos:
+        p_name = p_name_info[0]
+        status, p_info = get_product_compile_status(config, options, p_name_info)
+        if status in ["ignored", "native", "fixed"]:
+            action, reason = "skip", status
+        elif status == "no sources":
+            action, reason = "blocked", _("sources not found")
+        elif status == "installed" and (options.clean_all or options.clean_install):
+            action, reason = "build", _("install directory cleaned")
+        elif status == "installed" and options.update and \
+             [d for d in p_name_info[1].depend_all if d in updated_products]:
+            action, reason = "build", _("dependency updated")
+            updated_products.append(p_name)
+        elif status == "installed" and options.update and \
+             check_sources_changed(p_info):
+            action, reason = "build", _("sources changed")
+            updated_products.append(p_name)
+        elif status == "installed":
+            action, reason = "skip", _("installed")
+        else:
+            action, reason = "build", _("not installed")
+
+        if action == "build":
+            blocked = []
+            not_installed = []
+            for d in p_name_info[1].depend_all:
+                if d in actions and actions[d] != "blocked":
+                    continue
+                installed = src.product.check_installation(config, 
+                                                        all_products_dict[d][1])
+                if d in actions and (parallel or not installed):
+                    # with --jobs, the failed dependencies block the product,
+                    # else it is compiled if they are installed
+                    blocked.append(d)
+                elif not installed:
+                    not_installed.append(d)
+            if blocked:
+                action, reason = "blocked", _("blocked by %s") % " ".join(blocked)
+            elif not_installed:
+                action, reason = "blocked", (_("not installed: %s") % 
+                                             " ".join(not_installed))
+        actions[p_name] = action
+        plan.append((p_name, action, reason))
+    return plan
+
+def get_duration_str(duration):
+    '''Get a readable duration
+
+    :param duration float: the duration in s
+    :rtype: str
+    '''
+    duration = int(round(duration))
+    if duration >= 3600:
+        return "%dh%02dm" % (duration // 3600, (duration % 3600) // 60)
+    if duration >= 60:
+        return "%dm%02ds" % (duration // 60, duration % 60)
+    return "%ds" % duration
+
+def print_compile_plan(config, options, products_infos, all_products_dict,
+                       all_products_graph, logger):
+    '''Print the plan of the compilation: the products to build, skip or 
+       blocked, with the durations of their last compilations, and the
+       estimated duration of the compilation, serial and parallel.
+
+    :param config Config: The global configuration
+    :param options OptResult: the options of the compile command
+    :param products_info list: List of 
+                                 (str, Config) => (product_name, product_info)
+                                 topologically sorted, with "depend_all"
+    :param all_products_dict: Dict of all products 
+    :param all_products_graph DependencyGraph: graph of all products 
+    :param logger Logger: The logger instance to use for the display 
+    :return: 1 if some products are blocked, else 0
+    :rtype: int
+    '''
+    plan = get_compile_plan(config, options, products_infos, all_products_dict)
+    timeline_file = src.buildResources.get_application_timeline_file(config)
+    durations = src.buildResources.BuildTimeline.read(timeline_file).get_durations()
+
+    logger.write(_("\nPlan of the compilation:\n"), 1)
+    colors = {"build": src.printcolors.printcInfo,
+              "skip": src.printcolors.printcSuccess,
+              "blocked": src.printcolors.printcError}
+    for p_name, action, reason in plan:
+        duration = ""
+        if action == "build":
+            duration = "?"
+            if p_name in durations:
+                duration = get_duration_str(durations[p_name])
+        logger.write("  %s %s %s %8s  %s\n" % (src.printcolors.printcLabel(p_name),
+                                               "." * (30 - len(p_name)),
+                                               colors[action]("%-7s" % action),
+                                               duration, reason), 1)
+
+    to_build = [p_name for p_name, action, reason in plan if action == "build"]
+    nb_blocked = len([p for p, action, r in plan if action == "blocked"])
+    unknown = [p_name for p_name in to_build if p_name not in durations]
+    logger.write(_("\n%(build)d product(s) to build, %(skip)d to skip, "
+                   "%(blocked)d blocked\n") % 
+                 {"build": len(to_build), 
+                  "skip": len(plan) - len(to_build) - nb_blocked,
+                  "blocked": nb_blocked}, 1)
+    if len(to_build) == 0:
+        return 1 if nb_blocked else 0
+    if unknown:
+        logger.write(_("No recorded duration (counted as 0) for: %s\n") % 
+                     " ".join(unknown), 1)
+
+    weights = dict((p_name, durations.get(p_name, 0)) for p_name in to_build)
+    info = [(_("serial"), get_duration_str(sum(weights.values())))]
+    if options.jobs is not None and options.jobs > 1:
+        l_jobs = [options.jobs]
+    else:
+        l_jobs = PLAN_JOBS
+    for jobs in l_jobs:
+        length = all_products_graph.get_parallel_length(to_build, weights, jobs)
+        info.append((_("with --jobs %d") % jobs, get_duration_str(length)))
+    length, path = all_products_graph.get_critical_path(weights)
+    info.append((_("critical path"), get_duration_str(length)))
+    logger.write(_("Estimated duration of the compilation:\n"), 1)
+    src.print_info(logger, info)
+    return 1 if nb_blocked else 0
+
+def print_compile_report(config, all_products_graph, logger, nb=REPORT_SIZE):
+    '''Print the report of the last compilation of the products of the 
+       application: the critical path through the dependency graph, and 
+       the longest compilations and steps.
+
+    :param config Config: The global configuration
+    :param all_products_graph DependencyGraph: graph of all products 
+    :param logger Logger: The logger instance to use for the display 
+    :param nb int: the number of products and steps to print
+    :return: 1 if there is no timeline, else 0
+    :rtype: int
+    '''
+    timeline_file = src.buildResources.get_application_timeline_file(config)
+    timeline = src.buildResources.BuildTimeline.read(timeline_file)
+    if len(timeline) == 0:
+        logger.write(src.printcolors.printcWarning(
+            _("No compilation recorded in %s\n") % timeline_file), 1)
+        return 1
+    logger.write(_("Timeline of the last compilations: %s\n") % 
+                 src.printcolors.printcInfo(timeline_file), 3)
+
+    def get_usage_str(step):
+        res = "%8.1fs" % step["wall"]
+        if step.get("cpu") is not None:
+            res += _("  cpu %8.1fs") % step["cpu"]
+        if step.get("peak_rss"):
+            res += _("  peak %s") % src.buildResources.get_size_str(step["peak_rss"])
+        if step.get("status"):
+            res += "  " + src.printcolors.printcError("KO")
+        return res
+
+    durations = timeline.get_durations()
+    products = [p for p in all_products_graph if p in durations]
+    length, path = all_products_graph.get_critical_path(durations)
+    logger.write(_("\nCritical path of the compilation: %.1fs (%d/%d products "
+                   "compiled)\n") % (length, len(products), len(all_products_graph)), 1)
+    for p_name in path:
+        if p_name in durations:
+            logger.write("  %s %s %8.1fs\n" % (src.printcolors.printcLabel(p_name),
+                                               "." * (30 - len(p_name)),
+                                               durations[p_name]), 1)
+
+    logger.write(_("\nThe %d longest compilations:\n") % nb, 1)
+    products.sort(key=lambda p: -durations[p])
+    for p_name in products[:nb]:
+        logger.write("  %s %s %8.1fs\n" % (src.printcolors.printcLabel(p_name),
+                                           "." * (30 - len(p_name)),
+                                           durations[p_name]), 1)
+
+    logger.write(_("\nThe %d longest steps:\n") % nb, 1)
+    steps = [s for s in timeline.steps if s["step"] != "compile"]
+    steps.sort(key=lambda s: -s["wall"])
+    for step in steps[:nb]:
+        name = "%s %s" % (step["product"], step["step"])
+        logger.write("  %s %s %s\n" % (src.printcolors.printcLabel(name),
+                                       "." * (30 - len(name)),
+                                       get_usage_str(step)), 1)
+    return 0
+
 def description():
     '''method that is called when salomeTools is called with --help option.
     
@@ -715,6 +1237,9 @@ def run(args, runner, logger):
     if options.update and (options.clean_all or options.force or options.clean_install):
         options.update=False  # update is useless in this case
 
+    if options.concurrent_builds is not None:
+        src.buildResources.set_concurrent_builds(options.concurrent_builds)
+
     # check that the command has been called with an application
     src.check_config_has_application( runner.cfg )
 
@@ -735,10 +1260,13 @@ def run(args, runner, logger):
     # Get the list of all application products, and create its dependency graph
     all_products_infos = src.product.get_products_infos(runner.cfg.APPLICATION.products,
                                                         runner.cfg)
-    all_products_graph=get_dependencies_graph(all_products_infos)
+    all_products_graph = src.product.get_dependencies_graph(runner.cfg)
     #logger.write("Dependency graph of all application products : %s\n" % all_products_graph, 6)
     DBG.write("Dependency graph of all application products : ", all_products_graph)
 
+    if options.report:
+        return print_compile_report(runner.cfg, all_products_graph, logger)
+
     # Get the list of products we have to compile
     products_infos = src.product.get_products_list(options, runner.cfg, logger)
     products_list = [pi[0] for pi in products_infos]
@@ -746,33 +1274,19 @@ def run(args, runner, logger):
     logger.write("Product we have to compile (as specified by user) : %s\n" % products_list, 5)
     if options.fathers:
         # Extend the list with all recursive dependencies of the given products
-        visited=[]
-        for p_name in products_list:
-            visited=depth_search_graph(all_products_graph, p_name, visited)
-        products_list = visited
+        products_list = all_products_graph.depth_search(products_list)
 
     logger.write("Product list to compile with fathers : %s\n" % products_list, 5)
     if options.children:
         # Extend the list with all products that depends upon the given products
-        children=[]
-        for n in all_products_graph:
-            # for all products (that are not in products_list):
-            # if we we find a path from the product to the product list,
-            # then we product is a child and we add it to the children list 
-            if (n not in children) and (n not in products_list):
-                if find_path_graph(all_products_graph, n, products_list):
-                    children = children + [n]
+        children = all_products_graph.get_all_children(products_list)
         # complete products_list (the products we have to compile) with the list of children
         products_list = products_list + children
         logger.write("Product list to compile with children : %s\n" % products_list, 5)
 
     # Sort the list of all products (topological sort).
     # the products listed first do not depend upon products listed after
-    visited_nodes=[]
-    sorted_nodes=[]
-    for n in all_products_graph:
-        if n not in visited_nodes:
-            visited_nodes,sorted_nodes=depth_first_topo_graph(all_products_graph, n, visited_nodes,sorted_nodes)
+    sorted_nodes = all_products_graph.get_sorted_nodes()
     logger.write("Complete dependency graph topological search (sorting): %s\n" % sorted_nodes, 6)
 
     #  Create a dict of all products to facilitate products_infos sorting
@@ -799,14 +1313,33 @@ def run(args, runner, logger):
     # for all products to compile, store in "depend_all" field the complete dependencies (recursive) 
     # (will be used by check_dependencies function)
     for pi in products_infos:
-        dep_prod=[]
-        dep_prod=depth_search_graph(all_products_graph,pi[0], dep_prod)
-        pi[1]["depend_all"]=dep_prod[1:]
+        pi[1]["depend_all"] = all_products_graph.get_all_dependencies(pi[0])
         
 
+    if options.plan:
+        return print_compile_plan(runner.cfg, options, products_infos, 
+                                  all_products_dict, all_products_graph, logger)
+
     # Call the function that will loop over all the products and execute
-    # the right command(s)
+    # the right command(s), and record the timeline of their steps
+    src.buildResources.get_timeline().clear()
     res = compile_all_products(runner, runner.cfg, options, products_infos, all_products_dict, all_products_graph, logger)
+
+    # Write the timeline of the compilation, next to the xml log (or in the
+    # file given by the parent sat compile --jobs), and record it in the
+    # timeline of the application
+    timeline = src.buildResources.get_timeline()
+    if len(timeline) > 0 and not options.no_compile:
+        if options.timeline:
+            timeline.write(options.timeline, runner.cfg.VARS.application)
+        else:
+            timeline_path = os.path.splitext(logger.logFilePath)[0] + ".timeline.json"
+            timeline.write(timeline_path, runner.cfg.VARS.application)
+            logger.l_logFiles.append(timeline_path)
+            timeline_file = src.buildResources.get_application_timeline_file(runner.cfg)
+            application_timeline = src.buildResources.BuildTimeline.read(timeline_file)
+            application_timeline.update(timeline)
+            application_timeline.write(timeline_file, runner.cfg.VARS.application)
     
     # Print the final state
     nb_products = len(products_infos)
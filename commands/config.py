@@ -22,6 +22,9 @@ import platform
 import datetime
 import shutil
 import gettext
+import pickle
+import hashlib
+import tempfile
 import pprint as PP
 
 import src
@@ -33,6 +36,9 @@ logger = LOG.getDefaultLogger()
 
 verbose = False # True for debug
 
+# the number of merged configurations kept in the cache
+MAX_CACHED_CONFIGS = 50
+
 # internationalization
 satdir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
 gettext.install('salomeTools', os.path.join(satdir, 'src', 'i18n'))
@@ -59,6 +65,8 @@ parser.add_option('', 'show_properties', 'boolean', 'show_properties',
     _("Optional: synthetic list of all properties used in the application"))
 parser.add_option('', 'check_system', 'boolean', 'check_system',
     _("Optional: check if system products are installed"))
+parser.add_option('', 'index_base', 'boolean', 'index_base',
+    _("Optional: rebuild the index of the product installations in the base"))
 parser.add_option('c', 'copy', 'boolean', 'copy',
     _("""Optional: copy a config file to the personal config files directory.
 WARNING: the included files are not copied.
@@ -81,27 +89,56 @@ def osJoin(*args):
       logger.info("osJoin %-80s in %s" % (res, CALN.caller_name(1)))
   return res
 
+def evict_cached_configs(cache_dir, max_configs=MAX_CACHED_CONFIGS):
+    '''Remove the least recently used configurations of the cache
+    
+    :param cache_dir str: The directory of the cache.
+    :param max_configs int: The number of configurations to keep.
+    :return: the number of removed configurations.
+    :rtype: int
+    '''
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.startswith("config_") and name.endswith(".pickle"):
+            path = os.path.join(cache_dir, name)
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except OSError:
+                pass # removed by a concurrent salomeTools
+    entries.sort()
+    removed = 0
+    for last_use, path in entries[:max(len(entries) - max_configs, 0)]:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass # removed by a concurrent salomeTools
+    return removed
+
 class ConfigOpener:
     '''Class that helps to find an application pyconf 
        in all the possible directories (pathList)
     '''
-    def __init__(self, pathList):
+    def __init__(self, pathList, opened_files=None):
         '''Initialization
         
         :param pathList list: The list of paths where to search a pyconf.
+        :param opened_files list: If not None, the list where to append 
+                                  the path of the pyconf files opened.
         '''
         self.pathList = pathList
+        self.opened_files = opened_files
         if verbose:
           for path in pathList:
             if not os.path.isdir(path):
               logger.warning("ConfigOpener inexisting directory: %s" % path)
 
     def __call__(self, name):
-        if os.path.isabs(name):
-            return src.pyconf.ConfigInputStream(open(name, 'rb'))
-        else:
-            return src.pyconf.ConfigInputStream(open(osJoin(self.get_path(name), name), 'rb'))
-        raise IOError(_("Configuration file '%s' not found") % name)
+        if not os.path.isabs(name):
+            name = osJoin(self.get_path(name), name)
+        if self.opened_files is not None:
+            self.opened_files.append(name)
+        return src.pyconf.ConfigInputStream(open(name, 'rb'))
 
     def get_path( self, name ):
         '''The method that returns the entire path of the pyconf searched
@@ -118,7 +155,10 @@ class ConfigManager:
     '''Class that manages the read of all the configuration files of salomeTools
     '''
     def __init__(self, datadir=None):
-        pass
+        # the files and directories read to build the config, 
+        # and the messages written, that are stored in the config cache
+        self.config_files = []
+        self.config_messages = []
 
     def _create_vars(self, application=None, command=None, datadir=None):
         '''Create a dictionary that stores all information about machine,
@@ -202,6 +242,203 @@ class ConfigManager:
         
         return var
 
+    def set_command_vars(self, config, command):
+        '''Set in a config already loaded by a calling command the values
+           that are specific to the called command: the command name, 
+           the date and the output level. The called command can then
+           use this config instead of reading all the pyconf files again.
+        
+        :param config Config: The config of the calling command.
+        :param command str: The called command.
+        :return: The values of the calling command, 
+                 to restore with restore_command_vars.
+        :rtype: dict
+        '''
+        saved_vars = {}
+        for key in ['command', 'date', 'datehour', 'hour']:
+            saved_vars[key] = config.VARS[key]
+        saved_vars['output_verbose_level'] = config.USER.output_verbose_level
+
+        dt = datetime.datetime.now()
+        config.VARS.command = str(command)
+        config.VARS.date = dt.strftime('%Y%m%d')
+        config.VARS.datehour = dt.strftime('%Y%m%d_%H%M%S')
+        config.VARS.hour = dt.strftime('%H%M%S')
+        return saved_vars
+
+    def restore_command_vars(self, config, saved_vars):
+        '''Restore the values of the calling command in a config 
+           modified by set_command_vars.
+        
+        :param config Config: The config of the calling command.
+        :param saved_vars dict: The values returned by set_command_vars.
+        '''
+        for key in ['command', 'date', 'datehour', 'hour']:
+            config.VARS[key] = saved_vars[key]
+        config.USER.output_verbose_level = saved_vars['output_verbose_level']
+
+    def use_config_cache(self, options):
+        '''Check if the config can be read from (and written to) the cache
+           of the merged configurations, in ~/.salomeTools/cache.
+        
+        :param options: the options from salomeTools class initialization.
+        :return: False if the --no_config_cache option is set.
+        :rtype: boolean
+        '''
+        if options is None:
+            return True
+        try:
+            return not options.no_config_cache
+        except AttributeError:
+            return True
+
+    def get_config_cache_path(self, var, options):
+        '''Get the path of the file where the merged config is cached.
+           The name of the file depends on everything that is not a pyconf 
+           file but changes the config: the salomeTools directory, the data 
+           directory, the application, the overwrites of the command line, 
+           the machine and the python version.
+        
+        :param var dict: The VARS created by _create_vars.
+        :param options: the options from salomeTools class initialization.
+        :return: The path of the cache file.
+        :rtype: str
+        '''
+        overwrite = []
+        if options is not None and options.overwrite is not None:
+            overwrite = list(options.overwrite)
+        key = repr((var['salometoolsway'],
+                    var['datadir'],
+                    var['application'],
+                    overwrite,
+                    var['node'],
+                    sys.version_info[:2]))
+        key_hash = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return osJoin(var['personalDir'], "cache", "config_%s.pickle" % key_hash)
+
+    def get_files_status(self, files):
+        '''Get the modification time and the size of files and directories.
+        
+        :param files list: The paths of the files and directories.
+        :return: the list of (path, modification time, size), 
+                 (path, None, None) for a path that does not exist.
+        :rtype: list
+        '''
+        status = []
+        for path in files:
+            try:
+                st = os.stat(path)
+                status.append((path, src.get_mtime_ns(st), st.st_size))
+            except OSError:
+                status.append((path, None, None))
+        return status
+
+    def write_message(self, msg):
+        '''Write a message on the standard output while reading the config,
+           and record it to write it again when the config is read from 
+           the cache.
+        
+        :param msg str: The message to write.
+        '''
+        sys.stdout.write(msg)
+        self.config_messages.append(msg)
+
+    def get_cached_config(self, cache_path, var, options):
+        '''Get the config from the cache, if no file read to build it 
+           has changed. The VARS section, that depends on the date, 
+           the command and the machine, and the git tags are computed again.
+        
+        :param cache_path str: The path of the cache file.
+        :param var dict: The VARS created by _create_vars.
+        :param options: the options from salomeTools class initialization.
+        :return: The config, or None if it is not in the cache.
+        :rtype: class 'src.pyconf.Config'
+        '''
+        if not os.path.isfile(cache_path):
+            return None
+        try:
+            with open(cache_path, "rb") as f:
+                cached = pickle.load(f)
+            if self.get_files_status([s[0] for s in cached["files"]]) != \
+                                                               cached["files"]:
+                DBG.write("config cache outdated", cache_path)
+                return None
+            cfg = cached["config"]
+        except Exception as e:
+            DBG.write("config cache unreadable", "%s: %s" % (cache_path, e))
+            return None
+        DBG.write("config read from cache", cache_path)
+        # last use, for the eviction
+        try:
+            os.utime(cache_path, None)
+        except OSError:
+            pass
+
+        for msg in cached["messages"]:
+            sys.stdout.write(msg)
+
+        for variable in var:
+            cfg.VARS[variable] = var[variable]
+        for rule in self.get_command_line_overrides(options, ["VARS"]):
+            exec('cfg.' + rule) # this cannot be factorized because of the exec
+
+        # the git tags are not in the files status, get them again
+        if cached["sat_tag_from_git"]:
+            sat_version=src.system.git_describe(cfg.VARS.salometoolsway) 
+            if sat_version == False:
+                sat_version=cfg.INTERNAL.sat_version
+            cfg.LOCAL.tag=sat_version
+            for rule in self.get_command_line_overrides(options, ["LOCAL"]):
+                exec('cfg.' + rule) # this cannot be factorized because of the exec
+        for project_name in cfg.PROJECTS.projects:
+            project_cfg = cfg.PROJECTS.projects[project_name]
+            product_project_git_tag = src.system.git_describe(
+                                        os.path.dirname(project_cfg.file_path))
+            if product_project_git_tag:
+                project_cfg["git_tag"] = product_project_git_tag
+            else:
+                project_cfg["git_tag"] = "unknown"
+        for rule in self.get_command_line_overrides(options, ["PROJECTS"]):
+            exec('cfg.' + rule) # this cannot be factorized because of the exec
+
+        # same state as after a complete read
+        if 'APPLICATION' in cfg:
+            src.pyconf.streamOpener = ConfigOpener(cfg.PATHS.PRODUCTPATH)
+        else:
+            src.pyconf.streamOpener = ConfigOpener([cfg.VARS.datadir])
+        self.set_user_config_file(cfg)
+        return cfg
+
+    def set_cached_config(self, cache_path, cfg, sat_tag_from_git):
+        '''Store the config in the cache, with the status of all the files 
+           and directories read to build it. The file is written in a 
+           temporary file and then renamed, so that a concurrent 
+           salomeTools never reads a partial file.
+        
+        :param cache_path str: The path of the cache file.
+        :param cfg class 'src.pyconf.Config': The config to store.
+        :param sat_tag_from_git boolean: True if LOCAL.tag was got with git.
+        '''
+        cache_dir = os.path.dirname(cache_path)
+        tmp_path = None
+        try:
+            cached = {"files": self.get_files_status(self.config_files),
+                      "messages": self.config_messages,
+                      "sat_tag_from_git": sat_tag_from_git,
+                      "config": cfg}
+            src.ensure_path_exists(cache_dir)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(cached, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_path, cache_path)
+        except Exception as e:
+            # the cache is only an optimization
+            logger.warning("config cache not written: %s: %s" % (cache_path, e))
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        evict_cached_configs(cache_dir)
+
     def get_command_line_overrides(self, options, sections):
         '''get all the overwrites that are in the command line
         
@@ -237,16 +474,31 @@ class ConfigManager:
         :rtype: class 'src.pyconf.Config'
         '''        
         
+        # =====================================================================
+        # create VARS section
+        var = self._create_vars(application=application, command=command, datadir=datadir)
+        # DBG.write("create_vars", var, DBG.isDeveloper())
+
+        # =====================================================================
+        # get the config from the cache if none of the files read 
+        # to build it has changed
+        cache_path = None
+        if self.use_config_cache(options):
+            cache_path = self.get_config_cache_path(var, options)
+            cfg = self.get_cached_config(cache_path, var, options)
+            if cfg is not None:
+                return cfg
+        self.config_files = [os.path.realpath(__file__), 
+                             os.path.realpath(src.pyconf.__file__)]
+        self.config_messages = []
+        sat_tag_from_git = False
+        do_merge = True
+
         # create a ConfigMerger to handle merge
         merger = src.pyconf.ConfigMerger()#MergeHandler())
         
         # create the configuration instance
         cfg = src.pyconf.Config()
-        
-        # =====================================================================
-        # create VARS section
-        var = self._create_vars(application=application, command=command, datadir=datadir)
-        # DBG.write("create_vars", var, DBG.isDeveloper())
 
         # add VARS to config
         cfg.VARS = src.pyconf.Mapping(cfg)
@@ -261,14 +513,17 @@ class ConfigManager:
         # Load INTERNAL config
         # read src/internal_config/salomeTools.pyconf
         src.pyconf.streamOpener = ConfigOpener([
-                             osJoin(cfg.VARS.srcDir, 'internal_config')])
+                             osJoin(cfg.VARS.srcDir, 'internal_config')],
+                                               self.config_files)
+        if src.architecture.is_windows(): # special internal config for windows
+            internal_cfg_file = osJoin(cfg.VARS.srcDir,
+                                       'internal_config', 'salomeTools_win.pyconf')
+        else:
+            internal_cfg_file = osJoin(cfg.VARS.srcDir,
+                                       'internal_config', 'salomeTools.pyconf')
+        self.config_files.append(internal_cfg_file)
         try:
-            if src.architecture.is_windows(): # special internal config for windows
-                internal_cfg = src.pyconf.Config(open( osJoin(cfg.VARS.srcDir,
-                                        'internal_config', 'salomeTools_win.pyconf')))
-            else:
-                internal_cfg = src.pyconf.Config(open( osJoin(cfg.VARS.srcDir,
-                                        'internal_config', 'salomeTools.pyconf')))
+            internal_cfg = src.pyconf.Config(open(internal_cfg_file))
         except src.pyconf.ConfigError as e:
             raise src.SatException(_("Error in configuration file:"
                                      " salomeTools.pyconf\n  %(error)s") % \
@@ -283,10 +538,12 @@ class ConfigManager:
         # =====================================================================
         # Load LOCAL config file
         # search only in the data directory
-        src.pyconf.streamOpener = ConfigOpener([cfg.VARS.datadir])
+        src.pyconf.streamOpener = ConfigOpener([cfg.VARS.datadir],
+                                               self.config_files)
+        local_cfg_file = osJoin(cfg.VARS.datadir, 'local.pyconf')
+        self.config_files.append(local_cfg_file)
         try:
-            local_cfg = src.pyconf.Config(open( osJoin(cfg.VARS.datadir,
-                                                           'local.pyconf')),
+            local_cfg = src.pyconf.Config(open(local_cfg_file),
                                          PWD = ('LOCAL', cfg.VARS.datadir) )
         except src.pyconf.ConfigError as e:
             raise src.SatException(_("Error in configuration file: "
@@ -315,6 +572,7 @@ class ConfigManager:
             if sat_version == False:
                 sat_version=cfg.INTERNAL.sat_version
             cfg.LOCAL.tag=sat_version
+            sat_tag_from_git = True
                 
 
         # apply overwrite from command line if needed
@@ -336,10 +594,11 @@ class ConfigManager:
                 # for a relative path (archive case) we complete with sat path
                 project_pyconf_path = os.path.join(cfg.VARS.salometoolsway,
                                                   project_pyconf_path)
+            self.config_files.append(project_pyconf_path)
             if not os.path.exists(project_pyconf_path):
                 msg = _("WARNING: The project file %s cannot be found. "
                         "It will be ignored\n" % project_pyconf_path)
-                sys.stdout.write(msg)
+                self.write_message(msg)
                 continue
             project_name = os.path.basename(
                                     project_pyconf_path)[:-len(".pyconf")]
@@ -351,7 +610,7 @@ class ConfigManager:
                 msg = _("ERROR: Error in configuration file: "
                                  "%(file_path)s\n  %(error)s\n") % \
                             {'file_path' : project_pyconf_path, 'error': str(e) }
-                sys.stdout.write(msg)
+                self.write_message(msg)
                 continue
             projects_cfg.PROJECTS.projects.addMapping(project_name,
                              src.pyconf.Mapping(projects_cfg.PROJECTS.projects),
@@ -425,8 +684,9 @@ class ConfigManager:
         if application is not None:
             # search APPLICATION file in all directories in configPath
             cp = cfg.PATHS.APPLICATIONPATH
-            src.pyconf.streamOpener = ConfigOpener(cp)
-            do_merge = True
+            src.pyconf.streamOpener = ConfigOpener(cp, self.config_files)
+            # a new application file would hide the one found
+            self.config_files.extend(cp)
             try:
                 application_cfg = src.pyconf.Config(application + '.pyconf')
             except IOError as e:
@@ -472,29 +732,29 @@ class ConfigManager:
                                 src.pyconf.Mapping(products_cfg),
                                 "The products\n")
         if application is not None:
-            src.pyconf.streamOpener = ConfigOpener(cfg.PATHS.PRODUCTPATH)
+            src.pyconf.streamOpener = ConfigOpener(cfg.PATHS.PRODUCTPATH,
+                                                   self.config_files)
+            # a new product file would hide the one found
+            self.config_files.extend(cfg.PATHS.PRODUCTPATH)
             for product_name in application_cfg.APPLICATION.products.keys():
                 # Loop on all files that are in softsDir directory
                 # and read their config
                 product_file_name = product_name + ".pyconf"
                 product_file_path = src.find_file_in_lpath(product_file_name, cfg.PATHS.PRODUCTPATH)
                 if product_file_path:
+                    self.config_files.append(product_file_path)
                     products_dir = os.path.dirname(product_file_path)
                     # for a relative path (archive case) we complete with sat path
                     if not os.path.isabs(products_dir):
                         products_dir = os.path.join(cfg.VARS.salometoolsway,
                                                     products_dir)
-                    try:
-                        prod_cfg = src.pyconf.Config(open(product_file_path),
-                                                     PWD=("", products_dir))
-                        prod_cfg.from_file = product_file_path
-                        products_cfg.PRODUCTS[product_name] = prod_cfg
-                    except Exception as e:
-                        msg = _(
-                            "WARNING: Error in configuration file"
-                            ": %(prod)s\n  %(error)s" % \
-                            {'prod' :  product_name, 'error': str(e) })
-                        sys.stdout.write(msg)
+                    # the file is read when the product is first accessed
+                    msg = _("WARNING: Error in configuration file"
+                            ": %(prod)s\n  " % {'prod' :  product_name})
+                    products_cfg.PRODUCTS[product_name] = src.pyconf.LazyConfig(
+                                                    product_file_path,
+                                                    PWD=("", products_dir),
+                                                    error_message=msg)
             
             merger.merge(cfg, products_cfg)
             
@@ -520,6 +780,7 @@ class ConfigManager:
         # load USER config
         self.set_user_config_file(cfg)
         user_cfg_file = self.get_user_config_file()
+        self.config_files.append(user_cfg_file)
         user_cfg = src.pyconf.Config(open(user_cfg_file))
         merger.merge(cfg, user_cfg)
 
@@ -533,6 +794,10 @@ class ConfigManager:
                 cfg.APPLICATION.products.__delitem__(prod_to_remove)
             # remove rm_products section after usage
             cfg.APPLICATION.__delitem__("rm_products")
+
+        # a config with an application in error is not stored in the cache
+        if cache_path is not None and do_merge:
+            self.set_cached_config(cache_path, cfg, sat_tag_from_git)
         return cfg
 
     def set_user_config_file(self, config):
@@ -811,6 +1076,19 @@ def check_install_system(config, logger):
   pkgmgr=check_cmd[0]
   run_dep_ko=[] # list of missing run time dependencies
   build_dep_ko=[] # list of missing compile time dependencies
+
+  # query the package manager once for the packages of all the products
+  all_pkgs=[]
+  for product in config.APPLICATION.products:
+    try:
+      product_info = src.product.get_product_config(config, product)
+    except Exception:
+      continue  # reported below
+    if src.product.product_is_native(product_info):
+      run_pkgs,build_pkgs=src.product.get_system_dep(config.VARS.dist, check_cmd, product_info)
+      all_pkgs+=run_pkgs + build_pkgs
+  src.system.check_system_pkgs(check_cmd, all_pkgs)
+
   for product in sorted(config.APPLICATION.products):
     try:
       product_info = src.product.get_product_config(config, product)
@@ -1218,3 +1496,14 @@ def run(args, runner, logger):
     if options.check_system:
        check_install_system(runner.cfg, logger)
        pass 
+
+    # rebuild the index files of the base
+    if options.index_base:
+        base_path = src.get_base_path(runner.cfg)
+        logger.write(_('Index of the base %s\n') % 
+                     src.printcolors.printcLabel(base_path), 3)
+        if os.path.isdir(base_path):
+            nb = src.product.rebuild_base_index(base_path, logger)
+        else:
+            nb = 0
+        logger.write(_("%d product directories indexed\n") % nb, 3)
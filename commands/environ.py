@@ -23,7 +23,8 @@ import src
 parser = src.options.Options()
 parser.add_option('', 'shell', 'list2', 'shell',
     _("Optional: Generates the environment files for the given format: "
-      "bash (default), bat (for windows), cfg (salome context file) or all."), [])
+      "bash (default), bat (for windows), cfg (salome context file), "
+      "cfgFrozen (salome context file with the resolved values) or all."), [])
 parser.add_option('p', 'products', 'list2', 'products',
     _("Optional: Includes only the specified products."))
 parser.add_option('', 'prefix', 'string', 'prefix',
@@ -34,7 +35,7 @@ parser.add_option('t', 'target', 'string', 'out_dir',
     None)
 
 # list of available shells with extensions
-C_SHELLS = { "bash": "sh", "bat": "bat", "cfg" : "cfg", "tcl" : ""}
+C_SHELLS = { "bash": "sh", "bat": "bat", "cfg" : "cfg", "cfgFrozen" : "cfg", "tcl" : ""}
 C_ALL_SHELL = [ "bash", "bat", "cfg", "tcl" ]
 
 
@@ -82,7 +83,7 @@ def write_all_source_files(config,
     if "all" in shells:
         shells = all_shells
     else:
-        shells = filter(lambda l: l in all_shells, shells)
+        shells = filter(lambda l: l in C_SHELLS, shells)
 
     for shell in shells:
         if shell not in C_SHELLS:
@@ -139,9 +140,8 @@ def run(args, runner, logger):
     else:
         # add products specified by user (only products 
         # included in the application)
-        environ_info = filter(lambda l:
-                              l in runner.cfg.APPLICATION.products.keys(),
-                              options.products)
+        environ_info = [p for p in options.products
+                        if p in runner.cfg.APPLICATION.products.keys()]
     
     if options.shell == []:
         shell = ["bash"]
@@ -389,7 +389,8 @@ def run(args, runner, logger):
                   " --generated",
                   batch=True,
                   verbose=0,
-                  logger_add_link = logger)
+                  logger_add_link = logger,
+                  reuse_config = True)
         nbgen += 1
         try:
             result = generate_component_list(runner.cfg,
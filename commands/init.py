@@ -41,6 +41,9 @@ parser.add_option('t', 'tag', 'string', 'tag',
                   _('Optional: The tag of SAT (only informative)'))
 parser.add_option('l', 'log_dir', 'string', 'log_dir', 
                   _('Optional: The directory where to put all the logs of SAT'))
+parser.add_option('', 'binary_cache', 'string', 'binary_cache', 
+                  _('Optional: The directory of the binary cache of the '
+                    'compiled products (sat compile, sat cache)'))
 
 def set_local_value(config, key, value, logger):
     """ Edit the site.pyconf file and change a value.
@@ -143,6 +146,8 @@ def display_local_values(config, logger):
             ("workdir", config.LOCAL.workdir),
             ("log_dir", config.LOCAL.log_dir),
             ("archive_dir", config.LOCAL.archive_dir),
+            ("binary_cache", config.LOCAL.binary_cache 
+                             if "binary_cache" in config.LOCAL else "no"),
             ("VCS", config.LOCAL.VCS),
             ("tag", config.LOCAL.tag),
             ("projects", config.PROJECTS.project_file_paths)]
@@ -207,7 +212,8 @@ def run(args, runner, logger):
     for opt in [("base" , options.base),
                 ("workdir", options.workdir),
                 ("log_dir", options.log_dir),
-                ("archive_dir", options.archive_dir)]:
+                ("archive_dir", options.archive_dir),
+                ("binary_cache", options.binary_cache)]:
         key, value = opt
         if value:
             res_check = check_path(value, logger)
@@ -237,8 +237,7 @@ def run(args, runner, logger):
     # Get the list of all application products, and create its dependency graph
     all_products_infos = src.product.get_products_infos(runner.cfg.APPLICATION.products,
                                                         runner.cfg)
-    from compile import get_dependencies_graph,depth_search_graph
-    all_products_graph=get_dependencies_graph(all_products_infos)
+    all_products_graph = src.product.get_dependencies_graph(runner.cfg)
     #logger.write("Dependency graph of all application products : %s\n" % all_products_graph, 6)
     DBG.write("Dependency graph of all application products : ", all_products_graph)
 
@@ -252,10 +251,7 @@ def run(args, runner, logger):
         # we evaluate the complete list including dependencies (~ to the --with-fathers of sat compile)
 
         # Extend the list with all recursive dependencies of the given products
-        visited=[]
-        for p_name in products_list:
-            visited=depth_search_graph(all_products_graph, p_name, visited)
-        products_list = visited
+        products_list = all_products_graph.depth_search(products_list)
         logger.write("Product we have to compile (as specified by user) : %s\n" % products_list, 5)
 
         #  Create a dict of all products to facilitate products_infos sorting
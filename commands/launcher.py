@@ -49,6 +49,15 @@ parser.add_option('', 'no_path_init', 'boolean', 'no_path_init',
                    "By default only PATH is not reinitialised (its value is inherited from "
                    "user's environment)\n\tUse no_path_init option to suppress the reinitilisation"
                    " of every paths (LD_LIBRARY_PATH, PYTHONPATH, ...)"))
+parser.add_option('', 'frozen', 'boolean', 'frozen',
+                 _("Optional: Create a launcher that loads a frozen environment\n\t"
+                   "The resolved values of the variables are written in the file "
+                   "<launcher>.env.json,\n\tand set at once when the launcher "
+                   "starts (not used with the option --exe)"))
+parser.add_option('', 'library_farm', 'boolean', 'library_farm',
+                 _("Optional: Create a launcher whose LD_LIBRARY_PATH and PYTHONPATH "
+                   "are a farm of links\n\tto the libraries and the python modules "
+                   "of the products, in <workdir>/LIBRARY_FARM"))
 
 
 def generate_launch_file(config,
@@ -59,7 +68,8 @@ def generate_launch_file(config,
                          env_info,
                          display=True,
                          additional_env={},
-                         no_path_init=False):
+                         no_path_init=False,
+                         frozen=False):
     '''Generates the launcher file.
     
     :param config Config: The global configuration
@@ -73,6 +83,8 @@ def generate_launch_file(config,
     :param additional_env dict: The dict giving additional 
                                 environment variables
     :param env_info str: The list of products to add in the files.
+    :param frozen boolean: If True, the launcher loads a frozen environment
+                           written next to it (salome launchers only)
     :return: The launcher file path.
     :rtype: str
     '''
@@ -80,6 +92,9 @@ def generate_launch_file(config,
     filepath = os.path.join(pathlauncher, launcher_name)
     if os.path.exists(filepath):
         os.remove(filepath)
+    frozen_filepath = filepath + src.fileEnviron.FROZEN_EXTENSION
+    if os.path.exists(frozen_filepath):
+        os.remove(frozen_filepath)
     kernel_root_dir=None
     cmd=None
     salome_application_name=None
@@ -108,7 +123,10 @@ def generate_launch_file(config,
 
     else:
         #case of a salome python2/3 launcher
-        shell="cfgForPy"
+        if frozen:
+            shell="cfgForPyFrozen"
+        else:
+            shell="cfgForPy"
 
         # get KERNEL bin installation path 
         # (in order for the launcher to get python salomeContext API)
@@ -311,9 +329,8 @@ def run(args, runner, logger):
     else:
         # add products specified by user (only products 
         # included in the application)
-        environ_info = filter(lambda l:
-                              l in runner.cfg.APPLICATION.products.keys(),
-                              options.products)
+        environ_info = [l for l in options.products
+                        if l in runner.cfg.APPLICATION.products.keys()]
     if options.name:
         launcher_name = options.name
     else:
@@ -342,6 +359,10 @@ def run(args, runner, logger):
     if options.use_mesa:
         src.activate_mesa_property(runner.cfg)
 
+    # use a library farm in the environment of the launcher
+    if options.library_farm:
+        src.activate_library_farm_property(runner.cfg)
+
     # option -e has precedence over section profile
     if not options.path_exe and src.get_launcher_exe(runner.cfg):
         options.path_exe=src.get_launcher_exe(runner.cfg)
@@ -354,6 +375,7 @@ def run(args, runner, logger):
                          options.path_exe,
                          additional_env = additional_environ,
                          env_info=environ_info,
-                         no_path_init = no_path_initialisation )
+                         no_path_init = no_path_initialisation,
+                         frozen = options.frozen )
 
     return 0
@@ -107,6 +107,8 @@ def make_product(p_name_info, make_option, config, logger):
     len_end_line = 20
 
     nb_proc, make_opt_without_j = get_nb_proc(p_info, config, make_option)
+    # adapted to the available memory, if not given on the command line
+    nb_proc = builder.get_make_jobs(nb_proc, "-j" in make_option)
     log_step(logger, header, "MAKE -j" + str(nb_proc))
     if src.architecture.is_windows():
         res = builder.wmake(nb_proc, make_opt_without_j)
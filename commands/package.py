@@ -108,6 +108,13 @@ parser.add_option('', 'ftp', 'boolean', 'ftp',
     False)
 parser.add_option('e', 'exe', 'string', 'exe',
     _('Optional: Produce an extra launcher based upon the exe given as argument.'), "")
+parser.add_option('', 'frozen', 'boolean', 'frozen',
+    _('Optional: Only binary package: produce launchers that load a frozen '
+      'environment (see sat launcher --frozen).'), False)
+parser.add_option('', 'library_farm', 'boolean', 'library_farm',
+    _('Optional: Only binary package: the launchers and the environment files '
+      'use a farm of links\n\tto the libraries and the python modules of the '
+      'products (see sat launcher --library_farm).'), False)
 parser.add_option('p', 'project', 'string', 'project',
     _('Optional: Produce an archive that contains a project.'), "")
 parser.add_option('t', 'salometools', 'boolean', 'sat',
@@ -213,7 +220,9 @@ def produce_relative_launcher(config,
                               logger,
                               file_dir,
                               file_name,
-                              binaries_dir_name):
+                              binaries_dir_name,
+                              frozen=False,
+                              library_farm=None):
     '''Create a specific SALOME launcher for the binary package. This launcher 
        uses relative paths.
     
@@ -223,6 +232,10 @@ def produce_relative_launcher(config,
     :param file_name str: The launcher name
     :param binaries_dir_name str: the name of the repository where the binaries
                                   are, in the archive.
+    :param frozen boolean: if True, the launcher loads a frozen environment
+                           written next to it (<launcher>.env.json)
+    :param library_farm LibraryFarm: if not None, the library farm of the 
+                                     package used by the launcher
     :return: the path of the produced launcher
     :rtype: str
     '''
@@ -289,12 +302,17 @@ def produce_relative_launcher(config,
                                            file_dir,
                                            src_root=None,
                                            env_info=None)
+    writer.library_farm = library_farm
     
     filepath = os.path.join(file_dir, file_name)
+    if frozen:
+        shell = "cfgForPyFrozen"
+    else:
+        shell = "cfgForPy"
     # Write
     writer.write_env_file(filepath,
                           False,  # for launch
-                          "cfgForPy",
+                          shell,
                           additional_env=additional_env,
                           no_path_init="False",
                           for_package = binaries_dir_name)
@@ -374,7 +392,8 @@ def produce_relative_env_files(config,
                               logger,
                               file_dir,
                               binaries_dir_name,
-                              exe_name=None):
+                              exe_name=None,
+                              library_farm=None):
     '''Create some specific environment files for the binary package. These 
        files use relative paths.
     
@@ -384,6 +403,8 @@ def produce_relative_env_files(config,
     :param binaries_dir_name str: the name of the repository where the binaries
                                   are, in the archive.
     :param exe_name str: if given generate a launcher executing exe_name
+    :param library_farm LibraryFarm: if not None, the library farm of the 
+                                     package used by the files
     :return: the list of path of the produced environment files
     :rtype: List
     '''  
@@ -400,6 +421,7 @@ def produce_relative_env_files(config,
                                            logger,
                                            file_dir,
                                            src_root=None)
+    writer.library_farm = library_farm
     
     if src.architecture.is_windows():
       shell = "bat"
@@ -449,6 +471,39 @@ def produce_relative_env_files(config,
 
     return filepath
 
+def get_package_library_farm(config, file_dir, binaries_dir_name, d_products):
+    '''Get the library farm used by the launchers and the environment files
+       of the binary package, and add it to the files to add in the archive.
+       The links of the farm are relative.
+    
+    :param config Config: The global configuration.
+    :param file_dir str: the directory where to put the farm
+    :param binaries_dir_name str: the name of the repository where the binaries
+                                  are, in the archive.
+    :param d_products dict: The directories and files to add in the archive,
+                            with the binaries of the products
+    :return: the library farm, None if the application does not use it
+    :rtype: LibraryFarm
+    '''
+    if not src.libraryFarm.use_library_farm(config):
+        return None
+    farm_dirname = src.libraryFarm.get_farm_dirname(config)
+    # the install directories of the products in the archive
+    roots = {}
+    for label in d_products:
+        if label.endswith(" (bin)"):
+            install_dir, path_in_archive = d_products[label]
+            roots[os.path.join("out_dir_Path", path_in_archive)] = install_dir
+    library_farm = src.libraryFarm.LibraryFarm(
+                                   os.path.join(file_dir, farm_dirname),
+                                   roots,
+                                   link_dir=os.path.join("out_dir_Path",
+                                                         farm_dirname),
+                                   for_package=binaries_dir_name)
+    d_products["library farm (%s)" % farm_dirname] = (library_farm.farm_dir,
+                                                      farm_dirname)
+    return library_farm
+
 def produce_install_bin_file(config,
                              logger,
                              file_dir,
@@ -770,6 +825,14 @@ WARNING: existing binaries directory from previous detar installation:
         path_in_archive = os.path.join("SOURCES", prod_name)
         d_products[prod_name + " (sources)"] = (source_dir, path_in_archive)
 
+    # the library farm of the launchers and of the environment files
+    if options.library_farm:
+        src.activate_library_farm_property(config)
+    library_farm = get_package_library_farm(config,
+                                            tmp_working_dir,
+                                            binaries_dir_name,
+                                            d_products)
+
     # for packages of SALOME applications including KERNEL, 
     # we produce a salome launcher or a virtual application (depending on salome version)
     if 'KERNEL' in config.APPLICATION.products:
@@ -782,8 +845,14 @@ WARNING: existing binaries directory from previous detar installation:
                                                  logger,
                                                  tmp_working_dir,
                                                  launcher_name,
-                                                 binaries_dir_name)
+                                                 binaries_dir_name,
+                                                 options.frozen,
+                                                 library_farm)
             d_products["launcher"] = (launcher_package, launcher_name)
+            if options.frozen:
+                d_products["launcher (environment)"] = (
+                    launcher_package + src.fileEnviron.FROZEN_EXTENSION,
+                    launcher_name + src.fileEnviron.FROZEN_EXTENSION)
 
             # if the application contains mesa products, we generate in addition to the 
             # classical salome launcher a launcher using mesa and called mesa_salome 
@@ -798,12 +867,22 @@ WARNING: existing binaries directory from previous detar installation:
                 # activate mesa property, and generate a mesa launcher
                 src.activate_mesa_property(config)  #activate use_mesa property
                 launcher_mesa_name="mesa_"+launcher_name
+                library_farm_mesa = get_package_library_farm(config,
+                                                     tmp_working_dir,
+                                                     binaries_dir_name,
+                                                     d_products)
                 launcher_package_mesa = produce_relative_launcher(config,
                                                      logger,
                                                      tmp_working_dir,
                                                      launcher_mesa_name,
-                                                     binaries_dir_name)
+                                                     binaries_dir_name,
+                                                     options.frozen,
+                                                     library_farm_mesa)
                 d_products["launcher (mesa)"] = (launcher_package_mesa, launcher_mesa_name)
+                if options.frozen:
+                    d_products["launcher (mesa environment)"] = (
+                        launcher_package_mesa + src.fileEnviron.FROZEN_EXTENSION,
+                        launcher_mesa_name + src.fileEnviron.FROZEN_EXTENSION)
 
                 # if there was a use_mesa value, we restore it
                 # else we set it to the default value "no"
@@ -820,8 +899,14 @@ WARNING: existing binaries directory from previous detar installation:
                                                      logger,
                                                      tmp_working_dir,
                                                      launcher_copy_name,
-                                                     binaries_dir_name)
+                                                     binaries_dir_name,
+                                                     options.frozen,
+                                                     library_farm)
                 d_products["launcher (copy)"] = (launcher_package_copy, launcher_copy_name)
+                if options.frozen:
+                    d_products["launcher (copy environment)"] = (
+                        launcher_package_copy + src.fileEnviron.FROZEN_EXTENSION,
+                        launcher_copy_name + src.fileEnviron.FROZEN_EXTENSION)
         else:
             # Provide a script for the creation of an application EDF style
             appli_script = product_appli_creation_script(config,
@@ -835,7 +920,8 @@ WARNING: existing binaries directory from previous detar installation:
     env_file = produce_relative_env_files(config,
                                            logger,
                                            tmp_working_dir,
-                                           binaries_dir_name)
+                                           binaries_dir_name,
+                                           library_farm=library_farm)
 
     if src.architecture.is_windows():
       filename  = "env_launch.bat"
@@ -849,7 +935,8 @@ WARNING: existing binaries directory from previous detar installation:
                                               logger,
                                               tmp_working_dir,
                                               binaries_dir_name,
-                                              options.exe)
+                                              options.exe,
+                                              library_farm)
             
         if src.architecture.is_windows():
           filename  = os.path.basename(options.exe) + ".bat"
@@ -164,7 +164,8 @@ Use the --force_patch option to overwrite it.
         msg = _("Clean the source directories ...")
         logger.write(msg, 3)
         logger.flush()
-        res_clean = runner.clean(args_clean, batch=True, verbose = 0, logger_add_link = logger)
+        res_clean = runner.clean(args_clean, batch=True, verbose = 0, logger_add_link = logger,
+                                 reuse_config = True)
         if res_clean == 0:
             logger.write('%s\n' % src.printcolors.printc(src.OK_STATUS), 3)
         else:
@@ -172,7 +173,8 @@ Use the --force_patch option to overwrite it.
     if do_source:
         msg = _("Get the sources of the products ...")
         logger.write(msg, 5)
-        res_source = runner.source(args_source, logger_add_link = logger)
+        res_source = runner.source(args_source, logger_add_link = logger,
+                                   reuse_config = True)
         if res_source == 0:
             logger.write('%s\n' % src.printcolors.printc(src.OK_STATUS), 5)
         else:
@@ -180,7 +182,8 @@ Use the --force_patch option to overwrite it.
     if do_patch:
         msg = _("Patch the product sources (if any) ...")
         logger.write(msg, 5)
-        res_patch = runner.patch(args_patch, logger_add_link = logger)
+        res_patch = runner.patch(args_patch, logger_add_link = logger,
+                                 reuse_config = True)
         if res_patch == 0:
             logger.write('%s\n' % src.printcolors.printc(src.OK_STATUS), 5)
         else:
@@ -59,7 +59,7 @@ _show_applications()
             opts2=$(echo --set $opts2)
             ;;
         init)
-            opts2=$(echo --base --workdir --VCS --tag --log_dir --add_project --reset_projects $opts2)
+            opts2=$(echo --base --workdir --VCS --tag --log_dir --binary_cache --add_project --reset_projects $opts2)
             ;;
     esac
 
@@ -107,7 +107,7 @@ _salomeTools_complete()
     # first argument => show available commands
     if [[ ${argc} == 1 ]]
     then
-        opts="config log source patch prepare environ clean configure make makeinstall compile launcher run jobs job shell test package generate find_duplicates application template base check profile script init --help --overwrite --debug --verbose --batch --all_in_terminal --logs_paths_in_file"
+        opts="config log source patch prepare environ clean configure make makeinstall compile launcher run jobs job shell test package generate find_duplicates application template base check profile script init cache --help --overwrite --debug --verbose --batch --all_in_terminal --logs_paths_in_file --no_config_cache"
         COMPREPLY=( $(compgen -W "${opts}" -- ${cur}) )
         return 0
     fi
@@ -157,10 +157,15 @@ _salomeTools_complete()
     # show argument for each command
     case "${command}" in
         config)
-            opts="--value --list --copy --edit --no_label --info --check_system --show_patchs --show_install --show_properties"
+            opts="--value --list --copy --edit --no_label --info --check_system --index_base --show_patchs --show_install --show_properties"
             COMPREPLY=( $(compgen -W "${opts}" -- ${cur}) )
             return 0        
             ;;
+        cache)
+            opts="--stats --list --purge"
+            COMPREPLY=( $(compgen -W "${opts}" -- ${cur}) )
+            return 0
+            ;;
         log)
             opts="--clean --last --terminal --last --last_compile --no_browser"
             COMPREPLY=( $(compgen -W "${opts}" -- ${cur}) )
@@ -207,7 +212,7 @@ _salomeTools_complete()
             return 0
             ;;
         compile)
-            opts="--products --force --properties --with_fathers --with_children --clean_all --clean_make --install_flags --show --stop_first_fail --check --clean_build_after"
+            opts="--products --force --properties --with_fathers --with_children --clean_all --clean_make --install_flags --show --stop_first_fail --check --clean_build_after --jobs --no_binary_cache --report --plan --timeline"
             COMPREPLY=( $(compgen -W "${opts}" -- ${cur}) )
             return 0
             ;;
@@ -282,7 +287,7 @@ _salomeTools_complete()
             return 0
             ;;
         init)
-            opts="--base --workdir --VCS --tag --log_dir --add_project --reset_projects"
+            opts="--base --workdir --VCS --tag --log_dir --binary_cache --add_project --reset_projects"
             COMPREPLY=( $(compgen -W "${opts}" -- ${cur}) )
             return 0
             ;;
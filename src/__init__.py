@@ -25,6 +25,7 @@ import os
 import shutil
 import errno
 import stat
+import time
 import fnmatch
 import pprint as PP
 from ftplib import FTP
@@ -36,9 +37,15 @@ from . import options
 from . import system
 from . import ElementTree
 from . import logger
+from . import dependencyGraph
 from . import product
+from . import sourceFingerprint
+from . import binaryCache
+from . import buildResources
 from . import environment
+from . import environCache
 from . import fileEnviron
+from . import libraryFarm
 from . import compilation
 from . import test_module
 from . import template
@@ -70,6 +77,17 @@ def ensure_path_exists(p):
     """
     if not os.path.exists(p):
         os.makedirs(p)
+
+def get_mtime_ns(st):
+    """Get the modification time of a stat result in nanoseconds
+       (st_mtime_ns is not available in python 2)
+    
+    :param st os.stat_result: The result of os.stat.
+    :rtype: int
+    """
+    if hasattr(st, "st_mtime_ns"):
+        return st.st_mtime_ns
+    return int(st.st_mtime * 1e9)
         
 def check_config_has_application( config, details = None ):
     """check that the config has the key APPLICATION. Else raise an exception.
@@ -429,6 +447,39 @@ class Path:
         except:
             return False
 
+# The names of the files of the directories searched by find_file_in_lpath:
+#   directory -> (modification time of the directory, set of file names)
+_lpath_index = {}
+
+def get_file_names(directory):
+    """\
+    Get the names of the files of a directory, from an index revalidated with 
+    the modification time of the directory (a stat instead of a listdir).
+    A directory modified in the last seconds is not indexed: its modification
+    time may not change if it is modified again (coarse timestamps).
+
+    :param directory str: The directory
+    :return: the names of the files of the directory, None if it is not a
+             directory
+    :rtype: set
+    """
+    try:
+        st = os.stat(directory)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode):
+        return None
+    entry = _lpath_index.get(directory)
+    if entry is not None and entry[0] == get_mtime_ns(st):
+        return entry[1]
+    try:
+        names = set(os.listdir(directory))
+    except OSError:
+        return None
+    if time.time() - st.st_mtime > 2:
+        _lpath_index[directory] = (get_mtime_ns(st), names)
+    return names
+
 def find_file_in_lpath(file_name, lpath, additional_dir = ""):
     """\
     Find in all the directories in lpath list the file that has the same name
@@ -448,12 +499,11 @@ def find_file_in_lpath(file_name, lpath, additional_dir = ""):
     """
     for directory in lpath:
         dir_complete = os.path.join(directory, additional_dir)
-        if not os.path.isdir(directory) or not os.path.isdir(dir_complete):
+        l_files = get_file_names(dir_complete)
+        if l_files is None:
             continue
-        l_files = os.listdir(dir_complete)
-        for file_n in l_files:
-            if file_n == file_name:
-                return os.path.join(dir_complete, file_name)
+        if file_name in l_files:
+            return os.path.join(dir_complete, file_name)
     return False
 
 def find_file_in_ftppath(file_name, ftppath, installation_dir, logger, additional_dir = ""):
@@ -613,3 +663,12 @@ def activate_mesa_property(config):
         config.APPLICATION.addMapping( 'properties', pyconf.Mapping(), None )
     config.APPLICATION.properties.use_mesa="yes"
 
+def activate_library_farm_property(config):
+    """Add library_farm property into application properties
+    
+    :param config Config: The global configuration. It must have an application!
+    """
+    if not 'properties' in config.APPLICATION:
+        config.APPLICATION.addMapping( 'properties', pyconf.Mapping(), None )
+    config.APPLICATION.properties.library_farm="yes"
+
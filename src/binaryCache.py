@@ -0,0 +1,368 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+The binary cache of the compiled products: the install directories of the
+products are stored as archives, content addressed by a key which hashes
+everything the compilation depends on (sources, patches, compile options,
+distribution, dependencies), and restored by sat compile instead of
+compiling again.
+
+The cache is enabled by the directory LOCAL.binary_cache, its size is
+limited by LOCAL.binary_cache_size (in MB), the least recently used
+archives are removed first.
+
+| usage:
+| >> cache = get_binary_cache(config)     # None if not enabled
+| >> key = get_product_key(config, p_info, sources) # None if not cacheable
+| >> cache.restore(key, p_info.install_dir) or cache.store(key, p_info.install_dir)
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tarfile
+import tempfile
+
+import src
+import src.debug as DBG
+import src.sourceFingerprint as SFP
+
+ARCHIVE_EXTENSION = ".tar.gz"
+INFO_EXTENSION = ".json"
+DEFAULT_SIZE = 20000 # MB
+# the variables of the build environment which change the binaries,
+# with src.compilation.C_COMPILE_ENV_LIST
+BUILD_ENV_KEYS = ["CPPFLAGS", "FC", "FFLAGS", "FCFLAGS"]
+# the default compilers, when CC, CXX, FC are not set
+DEFAULT_COMPILERS = [("CC", "cc"), ("CXX", "c++"), ("FC", "gfortran")]
+
+def get_compilers_status():
+    """\
+    Get the status of the compilers of the build environment: their real
+    path, size and modification time, to detect an update of the compilers
+
+    :return: the list of (variable, real path, status)
+    :rtype: list
+    """
+    status = []
+    for key, default in DEFAULT_COMPILERS:
+        command = os.environ.get(key, default).split()
+        if len(command) == 0:
+            continue
+        path = command[0]
+        if not os.path.isabs(path):
+            path = src.find_file_in_lpath(path,
+                              os.environ.get("PATH", "").split(os.pathsep))
+        if not path:
+            status.append((key, command[0], None))
+            continue
+        path = os.path.realpath(path)
+        status.append((key, path, src.environCache.get_path_status(path)))
+    return status
+
+def is_cacheable(p_info):
+    """\
+    Check if a product can be stored in the binary cache: a compiled
+    product, not native, fixed nor installed by pip
+
+    :param p_info Config: The specific config of the product
+    :rtype: boolean
+    """
+    return not (src.product.product_is_native(p_info) or
+                src.product.product_is_fixed(p_info) or
+                not src.product.product_compiles(p_info) or
+                src.product.product_test_property(p_info, "pip", "yes"))
+
+def get_product_key(config, p_info, sources=None):
+    """\
+    Get the key of a product in the binary cache: a hash of its sources,
+    patches, compile options and environment sections, of the build
+    environment (compilers, flags), of the distribution, and of the versions
+    and install directories of its dependencies. The install directories are
+    part of the key: the binaries keep their paths (rpath, cmake files...).
+
+    :param config Config: The global configuration
+    :param p_info Config: The specific config of the product
+    :param sources str: The fingerprint of the sources if it is already
+                        computed, see src.product.get_source_state
+    :return: the key, None if the product cannot be cached
+    :rtype: str
+    """
+    if not is_cacheable(p_info):
+        return None
+    if sources is None:
+        sources = src.product.get_source_state(p_info)[0]
+    if sources is None:
+        return None
+
+    content = {"name": p_info.name,
+               "version": str(p_info.version),
+               "dist": config.VARS.dist,
+               "install_dir": p_info.install_dir,
+               "sources": sources}
+    for key in ["build_source", "cmake_options", "configure_options",
+                "buildconfigure_options", "use_autotools", "debug", "verbose",
+                "hpc", "cmake_generator"]:
+        if key in p_info:
+            content[key] = str(p_info[key])
+    if "cmake_generator" in config.APPLICATION:
+        content["application_cmake_generator"] = str(
+                                        config.APPLICATION.cmake_generator)
+    # the environment sections, of the product and of the application
+    # (env_script is hashed with the files)
+    if "environ" in p_info:
+        content["environ"] = src.environCache.get_config_content(p_info.environ)
+    if "environ" in config.APPLICATION:
+        content["application_environ"] = src.environCache.get_config_content(
+                                                    config.APPLICATION.environ)
+    content["build_env"] = [(key, os.environ.get(key)) for key in
+                   src.compilation.C_COMPILE_ENV_LIST + BUILD_ENV_KEYS]
+    content["compilers"] = get_compilers_status()
+    files = []
+    if src.product.product_has_script(p_info):
+        files.append(p_info.compil_script)
+    if src.product.product_has_patches(p_info):
+        files.extend(p_info.patches)
+    if src.product.product_has_env_script(p_info):
+        files.append(p_info.environ.env_script)
+    content["files"] = [(os.path.basename(f), SFP.get_file_hash(f))
+                        for f in files if os.path.isfile(f)]
+
+    depprod = list(p_info.depend)
+    if "build_depend" in p_info:
+        depprod += list(p_info.build_depend)
+    depends = []
+    for prod_name in sorted(set(depprod)):
+        prod_dep_info = src.product.get_product_config(config, prod_name, False)
+        install_dir = ""
+        if "install_dir" in prod_dep_info:
+            install_dir = prod_dep_info.install_dir
+        depends.append((prod_name, str(prod_dep_info.version), install_dir))
+    content["depend"] = depends
+
+    DBG.write("binary cache key content of %s" % p_info.name, content)
+    data = json.dumps(content, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(data).hexdigest()
+
+def get_binary_cache(config):
+    """\
+    Get the binary cache defined in the configuration
+
+    :param config Config: The global configuration
+    :return: the binary cache, None if it is not enabled
+    :rtype: BinaryCache
+    """
+    if "binary_cache" not in config.LOCAL:
+        return None
+    cache_dir = config.LOCAL.binary_cache
+    if cache_dir in ["", "no", "default"]:
+        return None
+    size = DEFAULT_SIZE
+    if "binary_cache_size" in config.LOCAL:
+        size = int(config.LOCAL.binary_cache_size)
+    return BinaryCache(os.path.abspath(cache_dir), size * 1024 * 1024)
+
+class BinaryCache(object):
+    """\
+    A directory of archives <key>.tar.gz of install directories, with their
+    description <key>.json. The modification time of an archive is its
+    last use, for the eviction of the least recently used ones.
+    """
+    def __init__(self, cache_dir, size_limit):
+        """\
+        Initialization
+
+        :param cache_dir str: The directory of the cache
+        :param size_limit int: The maximal size of the archives, in bytes
+        """
+        self.cache_dir = cache_dir
+        self.size_limit = size_limit
+
+    def __repr__(self):
+        """easy almost exhaustive quick resume for debug print"""
+        return "%s(%s, %i MB)" % (self.__class__.__name__, self.cache_dir,
+                                  self.size_limit // (1024 * 1024))
+
+    def get_archive_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ARCHIVE_EXTENSION)
+
+    def get_info_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + INFO_EXTENSION)
+
+    def has(self, key):
+        """\
+        Check if the cache has an archive for a key
+
+        :param key str: The key
+        :rtype: boolean
+        """
+        return os.path.exists(self.get_archive_path(key))
+
+    def restore(self, key, install_dir):
+        """\
+        Restore an install directory from the cache.
+        The directory is extracted aside, then renamed.
+
+        :param key str: The key
+        :param install_dir str: The install directory to create
+        :return: True if the install directory was restored
+        :rtype: boolean
+        """
+        archive_path = self.get_archive_path(key)
+        if not os.path.exists(archive_path):
+            return False
+        parent = os.path.dirname(os.path.normpath(install_dir))
+        if not os.path.isdir(parent):
+            os.makedirs(parent)
+        tmp_dir = tempfile.mkdtemp(dir=parent, prefix=".sat-restore-")
+        try:
+            with tarfile.open(archive_path, "r:gz") as tar:
+                if hasattr(tarfile, "fully_trusted_filter"):
+                    # the archives of the cache are created by sat
+                    tar.extractall(tmp_dir, filter="fully_trusted")
+                else:
+                    tar.extractall(tmp_dir)
+            if os.path.exists(install_dir):
+                shutil.rmtree(install_dir)
+            os.rename(os.path.join(tmp_dir, "install"), install_dir)
+        except Exception as e:
+            DBG.write("cannot restore %s from the binary cache" % key, str(e))
+            return False
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        # last use, for the eviction
+        os.utime(archive_path, None)
+        return True
+
+    def store(self, key, install_dir, info=None):
+        """\
+        Store an install directory in the cache, then evict the least
+        recently used archives if the cache is too big.
+
+        :param key str: The key
+        :param install_dir str: The install directory
+        :param info dict: A description of the archive (product, version...)
+        """
+        archive_path = self.get_archive_path(key)
+        directory = os.path.dirname(archive_path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp_file = tempfile.mkstemp(dir=directory, prefix=".sat-store-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                with tarfile.open(fileobj=f, mode="w:gz", compresslevel=1) as tar:
+                    tar.add(install_dir, arcname="install")
+            os.chmod(tmp_file, 0o644)
+            os.rename(tmp_file, archive_path)
+        except Exception:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
+        info = dict(info or {})
+        info.update({"key": key,
+                     "install_dir": install_dir,
+                     "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                     "size": os.path.getsize(archive_path)})
+        with open(self.get_info_path(key), "w") as f:
+            json.dump(info, f, indent=1, sort_keys=True)
+        self.evict()
+
+    def get_entries(self):
+        """\
+        Get the archives of the cache, the least recently used first
+
+        :return: the list of (last use, size, key)
+        :rtype: list
+        """
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for sub_dir in os.listdir(self.cache_dir):
+            directory = os.path.join(self.cache_dir, sub_dir)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if not name.endswith(ARCHIVE_EXTENSION) or name.startswith("."):
+                    continue
+                try:
+                    st = os.stat(os.path.join(directory, name))
+                except OSError:
+                    continue  # removed by a concurrent sat
+                entries.append((st.st_mtime, st.st_size,
+                                name[:-len(ARCHIVE_EXTENSION)]))
+        entries.sort()
+        return entries
+
+    def get_info(self, key):
+        """\
+        Get the description of an archive
+
+        :param key str: The key
+        :rtype: dict
+        """
+        try:
+            with open(self.get_info_path(key)) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def remove(self, key):
+        """\
+        Remove an archive from the cache
+
+        :param key str: The key
+        """
+        for path in [self.get_archive_path(key), self.get_info_path(key)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def evict(self):
+        """\
+        Remove the least recently used archives while the cache is too big
+
+        :return: the keys of the removed archives
+        :rtype: list
+        """
+        entries = self.get_entries()
+        total = sum(size for last_use, size, key in entries)
+        removed = []
+        for last_use, size, key in entries:
+            if total <= self.size_limit:
+                break
+            self.remove(key)
+            removed.append(key)
+            total -= size
+        return removed
+
+    def purge(self):
+        """\
+        Remove all the archives of the cache
+
+        :return: the number of removed archives
+        :rtype: int
+        """
+        entries = self.get_entries()
+        for last_use, size, key in entries:
+            self.remove(key)
+        return len(entries)
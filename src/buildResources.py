@@ -0,0 +1,452 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+The resources used by the compilations of the products, and the number of
+jobs of make chosen from them.
+
+The peak memory (RSS) of a job of make is recorded for each product in
+the file ~/.salomeTools/build_history.json. The next compilations run at
+most as many jobs as fit in the available memory (/proc/meminfo). The
+products compiled at the same time (sat compile --jobs) share the cores and
+the memory, and a product starts beside the running ones only if the
+memory available then holds one of its jobs.
+
+The time and the resources of each step of the compilations (cmake, make,
+make install...) are recorded in the timeline of the sat process, written
+by sat compile next to its xml log, and in the timeline of the last
+compilation of each product of the application (used by sat compile --report).
+
+| usage:
+| >> jobs, reason = get_make_jobs(config, p_info, 16)
+| >> res, usage = run_measured("make -j%i" % jobs, shell=True)
+| >> record_build(config, p_info, usage["peak_rss"], jobs, res == 0)
+| >> get_timeline().add_step(p_info.name, "make", usage)
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+
+import src
+import src.debug as DBG
+
+HISTORY_FILENAME = "build_history.json"
+TIMELINE_FILENAME = "compile_timeline.json"
+# the part of the available memory used by the jobs of make
+MEMORY_RATIO = 0.8
+# the memory of a job of make for a product never compiled (in kB)
+DEFAULT_JOB_MEMORY = 512 * 1024
+
+def get_meminfo(meminfo_file="/proc/meminfo"):
+    """\
+    Get the total and the available memory of the machine
+
+    :param meminfo_file str: The file to read
+    :return: (total, available) in kB, (None, None) if unknown
+    :rtype: tuple
+    """
+    values = {}
+    try:
+        with open(meminfo_file) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 2:
+                    values[fields[0].rstrip(":")] = int(fields[1])
+    except (IOError, OSError, ValueError):
+        return None, None
+    total = values.get("MemTotal")
+    available = values.get("MemAvailable")
+    if available is None and "MemFree" in values:
+        # kernels older than 3.14
+        available = (values["MemFree"] + values.get("Buffers", 0) +
+                     values.get("Cached", 0))
+    return total, available
+
+def get_size_str(size):
+    """\
+    Get a readable memory size
+
+    :param size int: the size in kB
+    :rtype: str
+    """
+    if size >= 1024 * 1024:
+        return "%.1f GB" % (size / (1024.0 * 1024.0))
+    return "%.0f MB" % (size / 1024.0)
+
+def run_measured(command, **kwargs):
+    """\
+    Run a command as subprocess.call does, and measure its resources:
+    the wall time, the CPU time and the peak memory of its largest process
+    (the command itself, or one of its descendants)
+
+    :param command str: The command
+    :param kwargs dict: The arguments of subprocess.Popen
+    :return: (the return code, {"start", "wall", "cpu", "peak_rss", "status"})
+             with the times in s and the peak RSS in kB, 
+             cpu and peak_rss are None if unknown
+    :rtype: tuple
+    """
+    start = time.time()
+    cpu = None
+    peak_rss = None
+    if not hasattr(os, "wait4"):
+        returncode = subprocess.call(command, **kwargs)
+    else:
+        p = subprocess.Popen(command, **kwargs)
+        pid, status, rusage = os.wait4(p.pid, 0)
+        if os.WIFSIGNALED(status):
+            p.returncode = -os.WTERMSIG(status)
+        else:
+            p.returncode = os.WEXITSTATUS(status)
+        returncode = p.returncode
+        cpu = rusage.ru_utime + rusage.ru_stime
+        peak_rss = rusage.ru_maxrss
+        if sys.platform == "darwin":
+            peak_rss = peak_rss // 1024  # in bytes on macOS
+    usage = {"start": start,
+             "wall": time.time() - start,
+             "cpu": cpu,
+             "peak_rss": peak_rss,
+             "status": returncode}
+    return returncode, usage
+
+def call_with_rusage(command, **kwargs):
+    """\
+    Run a command as subprocess.call does, and get the peak memory of its
+    largest process, see run_measured
+
+    :param command str: The command
+    :param kwargs dict: The arguments of subprocess.Popen
+    :return: (the return code, the peak RSS in kB or None if unknown)
+    :rtype: tuple
+    """
+    returncode, usage = run_measured(command, **kwargs)
+    return returncode, usage["peak_rss"]
+
+def get_history_file(config):
+    return os.path.join(config.VARS.personalDir, HISTORY_FILENAME)
+
+def read_history(config):
+    """\
+    Read the history of the compilations of the products
+
+    :param config Config: The global configuration
+    :return: {product : {"version", "peak_rss", "jobs", "date"}}
+    :rtype: dict
+    """
+    try:
+        with open(get_history_file(config)) as f:
+            history = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+    if not isinstance(history, dict):
+        return {}
+    return history
+
+def record_build(config, p_info, peak_rss, jobs, success):
+    """\
+    Record the peak memory of a job of make of a product.
+    After a failure (maybe killed for lack of memory), the record
+    is only increased.
+
+    :param config Config: The global configuration
+    :param p_info Config: The specific config of the product
+    :param peak_rss int: The peak RSS in kB, None if unknown
+    :param jobs int: The number of jobs of make
+    :param success boolean: True if the compilation succeeded
+    """
+    if not peak_rss:
+        return
+    history = read_history(config)
+    previous = history.get(p_info.name, {})
+    if not success and previous.get("peak_rss", 0) >= peak_rss:
+        return
+    history[p_info.name] = {"version": str(p_info.version),
+                            "peak_rss": peak_rss,
+                            "jobs": jobs,
+                            "date": time.strftime("%Y-%m-%d %H:%M:%S")}
+    # written in a temporary file renamed, as it can be read
+    # by the concurrent compilations
+    history_file = get_history_file(config)
+    try:
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(history_file),
+                                        prefix=HISTORY_FILENAME)
+        with os.fdopen(fd, "w") as f:
+            json.dump(history, f, indent=1, sort_keys=True)
+        os.rename(tmp_file, history_file)
+    except (IOError, OSError) as e:
+        DBG.write("cannot write the build history", str(e))
+
+def choose_make_jobs(nb_proc, nb_cores, available, job_memory,
+                     concurrent_builds=1):
+    """\
+    Choose the number of jobs of make: at most nb_proc and the number of
+    cores, and as many jobs as fit in the available memory. The cores and
+    the memory are shared by the products compiled at the same time.
+
+    :param nb_proc int: The number of jobs asked by the configuration
+    :param nb_cores int: The number of cores of the machine
+    :param available int: The available memory in kB, None if unknown
+    :param job_memory int: The peak memory of a job in kB
+    :param concurrent_builds int: The number of products compiled at the
+                                  same time (sat compile --jobs)
+    :return: the number of jobs (at least 1)
+    :rtype: int
+    """
+    concurrent_builds = max(concurrent_builds, 1)
+    jobs = min(nb_proc, nb_cores // concurrent_builds)
+    if available is not None and job_memory > 0:
+        jobs = min(jobs, int(available * MEMORY_RATIO) //
+                         concurrent_builds // job_memory)
+    return max(jobs, 1)
+
+def get_job_memory(config, p_info):
+    """\
+    Get the memory of a job of make for a product: the peak memory of its
+    previous compilation, else the default one
+
+    :param config Config: The global configuration
+    :param p_info Config: The specific config of the product
+    :return: (the memory in kB, its origin)
+    :rtype: tuple
+    """
+    record = read_history(config).get(p_info.name)
+    if record is not None and record.get("peak_rss"):
+        return (record["peak_rss"],
+                _("peak of the compilation of %s") % record.get("date", "?"))
+    return DEFAULT_JOB_MEMORY, _("default, no previous compilation")
+
+def has_memory_for_build(config, p_info, available):
+    """\
+    Check if the available memory holds a job of make of a product, before
+    starting its compilation beside the running ones (sat compile --jobs)
+
+    :param config Config: The global configuration
+    :param p_info Config: The specific config of the product
+    :param available int: The available memory in kB, None if unknown
+    :rtype: boolean
+    """
+    if available is None:
+        return True
+    return int(available * MEMORY_RATIO) >= get_job_memory(config, p_info)[0]
+
+def get_make_jobs(config, p_info, nb_proc):
+    """\
+    Get the number of jobs of make for a product, from the memory
+    available now and the peak memory of its previous compilation
+
+    :param config Config: The global configuration
+    :param p_info Config: The specific config of the product
+    :param nb_proc int: The number of jobs asked by the configuration
+    :return: (the number of jobs, the explanation of the choice)
+    :rtype: tuple
+    """
+    nb_cores = src.architecture.get_nb_proc()
+    total, available = get_meminfo()
+    job_memory, origin = get_job_memory(config, p_info)
+    concurrent_builds = get_concurrent_builds()
+    jobs = choose_make_jobs(nb_proc, nb_cores, available, job_memory,
+                            concurrent_builds)
+    if available is None:
+        memory = _("unknown available memory")
+    else:
+        memory = _("%s available") % get_size_str(available)
+    reason = _("%i asked, %i cores, %s, %s per job (%s)") % (
+               nb_proc, nb_cores, memory, get_size_str(job_memory), origin)
+    if concurrent_builds > 1:
+        reason += _(", shared by %i compilations") % concurrent_builds
+    return jobs, reason
+
+# the number of products compiled at the same time by the parent
+# sat compile --jobs, which share the cores and the memory
+_concurrent_builds = [1]
+
+def set_concurrent_builds(nb):
+    """\
+    Set the number of products compiled at the same time, including the
+    one of this process
+
+    :param nb int: The number of concurrent compilations
+    """
+    _concurrent_builds[0] = max(nb, 1)
+
+def get_concurrent_builds():
+    """\
+    Get the number of products compiled at the same time
+
+    :rtype: int
+    """
+    return _concurrent_builds[0]
+
+def get_application_timeline_file(config):
+    """\
+    Get the file of the timeline of the last compilation of each product
+    of the application
+
+    :param config Config: The global configuration
+    :rtype: str
+    """
+    return os.path.join(config.APPLICATION.workdir, "LOGS", TIMELINE_FILENAME)
+
+class BuildTimeline(object):
+    """\
+    The steps of the compilations of the products, in the order of their
+    end. A step is a dict {"product", "step", "start", "wall", "cpu",
+    "peak_rss", "status"}, the step "compile" of a product is its whole
+    compilation.
+    """
+    def __init__(self, steps=None):
+        """\
+        Initialization
+
+        :param steps list: The steps
+        """
+        self.steps = list(steps or [])
+
+    def __repr__(self):
+        """easy almost exhaustive quick resume for debug print"""
+        return "%s(%i steps)" % (self.__class__.__name__, len(self.steps))
+
+    def __len__(self):
+        return len(self.steps)
+
+    @classmethod
+    def read(cls, path):
+        """\
+        Read a timeline written by write
+
+        :param path str: The JSON file
+        :return: the timeline, empty if the file cannot be read
+        :rtype: BuildTimeline
+        """
+        try:
+            with open(path) as f:
+                steps = json.load(f)["steps"]
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return cls()
+        return cls([s for s in steps if isinstance(s, dict)])
+
+    def write(self, path, application=None):
+        """\
+        Write the timeline in a JSON file
+
+        :param path str: The JSON file
+        :param application str: The name of the application, if any
+        """
+        directory = os.path.dirname(path)
+        src.ensure_path_exists(directory)
+        fd, tmp_file = tempfile.mkstemp(dir=directory, prefix=TIMELINE_FILENAME)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"application": application, "steps": self.steps},
+                      f, indent=1, sort_keys=True)
+        os.chmod(tmp_file, 0o644)
+        os.rename(tmp_file, path)
+
+    def add_step(self, product, step, usage):
+        """\
+        Add a step measured by run_measured
+
+        :param product str: The name of the product
+        :param step str: The name of the step (cmake, make...)
+        :param usage dict: The resources of the step, see run_measured
+        """
+        record = {"cpu": None, "peak_rss": None}
+        record.update(usage)
+        record.update({"product": product, "step": step})
+        self.steps.append(record)
+
+    def add_timed_step(self, product, step, start, status):
+        """\
+        Add a step which only the time is known, ended now
+
+        :param product str: The name of the product
+        :param step str: The name of the step
+        :param start float: The start time of the step
+        :param status int: The result of the step, 0 if it succeeded
+        """
+        self.add_step(product, step, {"start": start,
+                                      "wall": time.time() - start,
+                                      "status": status})
+
+    def clear(self):
+        """Remove all the steps"""
+        del self.steps[:]
+
+    def extend(self, timeline):
+        """\
+        Add the steps of another timeline
+
+        :param timeline BuildTimeline: The other timeline
+        """
+        self.steps.extend(timeline.steps)
+
+    def get_products(self):
+        """\
+        Get the names of the products of the timeline, in the order of
+        their first step
+
+        :rtype: list
+        """
+        products = []
+        for s in self.steps:
+            if s["product"] not in products:
+                products.append(s["product"])
+        return products
+
+    def update(self, timeline):
+        """\
+        Replace the steps of the products compiled in another timeline
+
+        :param timeline BuildTimeline: The other timeline
+        """
+        products = set(timeline.get_products())
+        self.steps = [s for s in self.steps if s["product"] not in products]
+        self.steps.extend(timeline.steps)
+
+    def get_durations(self):
+        """\
+        Get the duration of the compilation of each product: its step
+        "compile", or the sum of its steps
+
+        :return: {product : duration in s}
+        :rtype: dict
+        """
+        durations = {}
+        compiled = {}
+        for s in self.steps:
+            if s["step"] == "compile":
+                compiled[s["product"]] = s["wall"]
+            else:
+                durations[s["product"]] = durations.get(s["product"], 0) + s["wall"]
+        durations.update(compiled)
+        return durations
+
+_timeline = BuildTimeline()
+
+def get_timeline():
+    """\
+    Get the timeline of the steps of the compilations run by this process
+
+    :rtype: BuildTimeline
+    """
+    return _timeline
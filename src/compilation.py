@@ -21,6 +21,7 @@ import subprocess
 import sys
 import shutil
 import glob
+import time
 
 import src
 
@@ -32,6 +33,28 @@ C_COMPILE_ENV_LIST = ["CC",
                       "LIBS",
                       "LDFLAGS"]
 
+CMAKE_CACHE_FILE = "CMakeCache.txt"
+NINJA_FILE = "build.ninja"
+# the names of the ninja executable (ninja-build on some distributions)
+NINJA_COMMANDS = ["ninja", "ninja-build"]
+
+def get_cmake_cache_generator(build_dir):
+    """\
+    Get the generator of a build directory already configured by cmake
+
+    :param build_dir str: The build directory
+    :return: the generator, None if the directory was not configured by cmake
+    :rtype: str
+    """
+    try:
+        with open(os.path.join(build_dir, CMAKE_CACHE_FILE)) as f:
+            for line in f:
+                if line.startswith("CMAKE_GENERATOR:INTERNAL="):
+                    return line.split("=", 1)[1].strip()
+    except (IOError, OSError):
+        pass
+    return None
+
 class Builder:
     """Class to handle all construction steps, like cmake, configure, make, ...
     """
@@ -111,6 +134,22 @@ class Builder:
 
         return 0
 
+    ##
+    # Runs the command of a step in the build directory, with its output in
+    # the log file, and records its time and resources in the timeline.
+    def call_step(self, step, command, env=None):
+        if env is None:
+            env = self.build_environ.environ.environ
+        res, usage = src.buildResources.run_measured(command,
+                              shell=True,
+                              cwd=str(self.build_dir),
+                              env=env,
+                              stdout=self.logger.logTxtFile,
+                              stderr=subprocess.STDOUT)
+        src.buildResources.get_timeline().add_step(self.product_name,
+                                                   step, usage)
+        return res, usage
+
     ##
     # Runs cmake with the given options.
     def cmake(self, options=""):
@@ -131,23 +170,20 @@ class Builder:
         if self.verbose_mode:
             cmake_option += " -DCMAKE_VERBOSE_MAKEFILE=ON"
 
-        # In case CMAKE_GENERATOR is defined in environment, 
-        # use it in spite of automatically detect it
-        if 'cmake_generator' in self.config.APPLICATION:
-            cmake_option += " -DCMAKE_GENERATOR=\"%s\"" \
-                                       % self.config.APPLICATION.cmake_generator
+        # In case a generator is defined for the product or the application,
+        # use it in spite of automatically detect it (cmake keeps the
+        # generator of a build directory already configured)
+        generator = self.get_cmake_generator()
+        if (generator is not None and 
+            get_cmake_cache_generator(str(self.build_dir)) is None):
+            cmake_option += " -G \"%s\"" % generator
         command = ("cmake %s -DCMAKE_INSTALL_PREFIX=%s %s" %
                             (cmake_option, self.install_dir, self.source_dir))
 
         self.log_command(command)
         # for key in sorted(self.build_environ.environ.environ.keys()):
             # print key, "  ", self.build_environ.environ.environ[key]
-        res = subprocess.call(command,
-                              shell=True,
-                              cwd=str(self.build_dir),
-                              env=self.build_environ.environ.environ,
-                              stdout=self.logger.logTxtFile,
-                              stderr=subprocess.STDOUT)
+        res, usage = self.call_step("cmake", command)
 
         self.put_txt_log_in_appli_log_dir("cmake")
         if res == 0:
@@ -166,12 +202,7 @@ class Builder:
         command = command + " " + options
         self.log_command(command)
 
-        res = subprocess.call(command,
-                              shell=True,
-                              cwd=str(self.build_dir),
-                              env=self.build_environ.environ.environ,
-                              stdout=self.logger.logTxtFile,
-                              stderr=subprocess.STDOUT)
+        res, usage = self.call_step("build_configure", command)
         self.put_txt_log_in_appli_log_dir("build_configure")
         if res == 0:
             return res
@@ -191,12 +222,7 @@ class Builder:
         command = command + " " + options
         self.log_command(command)
 
-        res = subprocess.call(command,
-                              shell=True,
-                              cwd=str(self.build_dir),
-                              env=self.build_environ.environ.environ,
-                              stdout=self.logger.logTxtFile,
-                              stderr=subprocess.STDOUT)
+        res, usage = self.call_step("configure", command)
         
         self.put_txt_log_in_appli_log_dir("configure")
         if res == 0:
@@ -235,20 +261,66 @@ CC=\\"hack_libtool\\"%g" libtool'''
 
 
     ##
-    # Runs make to build the module.
+    # Gets the number of jobs of make: at most nb_proc, the number of cores,
+    # and the jobs which fit in the available memory (with the peak memory
+    # of the previous compilation of the product).
+    # A number of jobs fixed on the command line is not changed.
+    def get_make_jobs(self, nb_proc, fixed=False):
+        if fixed:
+            self.log(_("make -j%i: fixed by the command line\n") % nb_proc, 5)
+            return nb_proc
+        jobs, reason = src.buildResources.get_make_jobs(self.config,
+                                                        self.product_info,
+                                                        nb_proc)
+        self.log(_("make -j%i: %s\n") % (jobs, reason), 5)
+        return jobs
+
+    ##
+    # Gets the cmake generator: the cmake_generator of the product, else of 
+    # the application, None for the default one of cmake (Unix Makefiles).
+    # The generator of a build directory already configured by cmake is kept
+    # (cmake cannot change it, the build directory has to be cleaned).
+    def get_cmake_generator(self):
+        generator = None
+        if 'cmake_generator' in self.product_info:
+            generator = self.product_info.cmake_generator
+        elif 'cmake_generator' in self.config.APPLICATION:
+            generator = self.config.APPLICATION.cmake_generator
+        cache_generator = get_cmake_cache_generator(str(self.build_dir))
+        if cache_generator is None:
+            return generator
+        if generator is not None and generator != cache_generator:
+            self.log(src.printcolors.printcWarning(_(
+                "WARNING: the build directory was configured for the "
+                "generator %(cache)s, the generator %(generator)s is used "
+                "after a clean of the build directory\n") % 
+                {"cache": cache_generator, "generator": generator}), 3)
+        return cache_generator
+
+    ##
+    # Gets the tool which builds the build directory: ninja if it was 
+    # generated by cmake for Ninja, else make.
+    def get_build_tool(self):
+        if not os.path.exists(os.path.join(str(self.build_dir), NINJA_FILE)):
+            return "make"
+        path = self.build_environ.get("PATH").split(os.pathsep)
+        for ninja in NINJA_COMMANDS:
+            if src.find_file_in_lpath(ninja, path):
+                return ninja
+        return NINJA_COMMANDS[0]
+
+    ##
+    # Runs make (or ninja) to build the module.
     def make(self, nb_proc, make_opt=""):
 
         # make
-        command = 'make'
+        command = self.get_build_tool()
         command = command + " -j" + str(nb_proc)
         command = command + " " + make_opt
         self.log_command(command)
-        res = subprocess.call(command,
-                              shell=True,
-                              cwd=str(self.build_dir),
-                              env=self.build_environ.environ.environ,
-                              stdout=self.logger.logTxtFile,
-                              stderr=subprocess.STDOUT)
+        res, usage = self.call_step("make", command)
+        src.buildResources.record_build(self.config, self.product_info,
+                                        usage["peak_rss"], nb_proc, res == 0)
         self.put_txt_log_in_appli_log_dir("make")
         if res == 0:
             return res
@@ -272,12 +344,7 @@ CC=\\"hack_libtool\\"%g" libtool'''
         command = command + " ALL_BUILD.vcxproj"
 
         self.log_command(command)
-        res = subprocess.call(command,
-                              shell=True,
-                              cwd=str(self.build_dir),
-                              env=self.build_environ.environ.environ,
-                              stdout=self.logger.logTxtFile,
-                              stderr=subprocess.STDOUT)
+        res, usage = self.call_step("make", command)
         
         self.put_txt_log_in_appli_log_dir("make")
         if res == 0:
@@ -286,7 +353,7 @@ CC=\\"hack_libtool\\"%g" libtool'''
             return 1
 
     ##
-    # Runs 'make install'.
+    # Runs 'make install' (or 'ninja install').
     def install(self):
         if src.architecture.is_windows():
             command = 'msbuild INSTALL.vcxproj'
@@ -295,15 +362,10 @@ CC=\\"hack_libtool\\"%g" libtool'''
             else:
                 command = command + " /p:Configuration=Release  /p:Platform=x64 "
         else :
-            command = 'make install'
+            command = self.get_build_tool() + ' install'
         self.log_command(command)
 
-        res = subprocess.call(command,
-                              shell=True,
-                              cwd=str(self.build_dir),
-                              env=self.build_environ.environ.environ,
-                              stdout=self.logger.logTxtFile,
-                              stderr=subprocess.STDOUT)
+        res, usage = self.call_step("install", command)
         
         res_check=self.check_install()
         if res_check > 0 :
@@ -345,7 +407,7 @@ CC=\\"hack_libtool\\"%g" libtool'''
             if self.product_info.build_source=="autotools" :
                 cmd = 'make check'
             else:
-                cmd = 'make test'
+                cmd = self.get_build_tool() + ' test'
         
         if command:
             cmd = command
@@ -353,12 +415,8 @@ CC=\\"hack_libtool\\"%g" libtool'''
         self.log_command(cmd)
         self.log_command("For more detailed logs, see test logs in %s" % self.build_dir)
 
-        res = subprocess.call(cmd,
-                              shell=True,
-                              cwd=str(self.build_dir),
-                              env=self.launch_environ.environ.environ,
-                              stdout=self.logger.logTxtFile,
-                              stderr=subprocess.STDOUT)
+        res, usage = self.call_step("check", cmd,
+                                    env=self.launch_environ.environ.environ)
 
         self.put_txt_log_in_appli_log_dir("makecheck")
         if res == 0:
@@ -439,7 +497,10 @@ CC=\\"hack_libtool\\"%g" libtool'''
             product = self.product_info.name
             pymodule = imp.load_source(product + "_compile_script", script)
             self.nb_proc = nb_proc
+            start = time.time()
             retcode = pymodule.compil(self.config, self, self.logger)
+            src.buildResources.get_timeline().add_timed_step(
+                                      self.product_name, "script", start, retcode)
         except:
             __, exceptionValue, exceptionTraceback = sys.exc_info()
             self.logger.write(str(exceptionValue), 1)
@@ -487,12 +548,9 @@ CC=\\"hack_libtool\\"%g" libtool'''
         self.log_command("  " + _("Run build script %s\n") % script)
         self.complete_environment(make_options)
         
-        res = subprocess.call(script, 
-                              shell=True,
-                              stdout=self.logger.logTxtFile,
-                              stderr=subprocess.STDOUT,
-                              cwd=str(self.build_dir),
-                              env=self.build_environ.environ.environ)
+        res, usage = self.call_step("script", script)
+        src.buildResources.record_build(self.config, self.product_info,
+                                        usage["peak_rss"], nb_proc, res == 0)
 
         res_check=self.check_install()
         if res_check > 0 :
@@ -511,8 +569,10 @@ CC=\\"hack_libtool\\"%g" libtool'''
             nb_proc = src.get_cfg_param(self.product_info,"nb_proc", 0)
             if nb_proc == 0: 
                 nb_proc = self.config.VARS.nb_proc
+            nb_proc = self.get_make_jobs(nb_proc)
         else:
             nb_proc = min(number_of_proc, self.config.VARS.nb_proc)
+            nb_proc = self.get_make_jobs(nb_proc, fixed=True)
             
         extension = script.split('.')[-1]
         if extension in ["bat","sh"]:
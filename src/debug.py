@@ -275,6 +275,11 @@ def _saveConfigRecursiveDbg(config, aStream, indent, path, nb):
     for key in sorted(data): #order): # data as sort alphabetical, order as initial order
       value = data[key]
       strType = str(type(value))
+      if "LazyConfig" in strType: # read the file now
+        if key not in config:
+          continue
+        value = data[key]
+        strType = str(type(value))
       if debug: print('strType %s %s %s' % (path, key, strType))
       if "Config" in strType:
         _saveConfigRecursiveDbg(value, aStream, indentp, path+"."+key, nbp)
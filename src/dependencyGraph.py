@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+The graph of the dependencies of the products of an application,
+shared by the compile, environment, package and launcher commands
+
+| usage:
+| >> graph = DependencyGraph.from_products_infos(products_infos)
+| >> graph.get_sorted_nodes()      # the dependencies first
+| >> graph.get_all_dependencies("GEOM")
+| >> graph.get_all_children(["KERNEL"])
+"""
+
+import src
+
+class DependencyGraph(object):
+    """\
+    The nodes are the products, in the order of the application,
+    the edges go from a product to its dependencies.
+    The algorithms are iterative (no recursion limit for deep graphs),
+    and the recursive dependencies of a node are computed once.
+    """
+    def __init__(self, graph=None):
+        """\
+        Initialization
+
+        :param graph dict: The dependencies of the nodes, as
+                           {node : [dependencies]}
+        """
+        self.nodes = []
+        self.dependencies = {}
+        self.children = None
+        self._all_dependencies = {}
+        self._sorted_nodes = None
+        if graph is not None:
+            for node in graph:
+                self.add_node(node, graph[node])
+
+    @classmethod
+    def from_products_infos(cls, p_infos, compile_time=True):
+        """\
+        Get the graph of the dependencies of a list of products
+
+        :param p_infos list: The list of (product name, product info)
+        :param compile_time boolean: If True, the build dependencies
+                                     (build_depend) are edges of the graph
+        :rtype: DependencyGraph
+        """
+        graph = cls()
+        for p_name, p_info in p_infos:
+            depprod = list(p_info.depend)
+            if compile_time and "build_depend" in p_info:
+                depprod += list(p_info.build_depend)
+            graph.add_node(p_name, depprod)
+        return graph
+
+    def __repr__(self):
+        """easy almost exhaustive quick resume for debug print"""
+        return "%s(%s)" % (self.__class__.__name__,
+                           dict((n, self.dependencies[n]) for n in self.nodes))
+
+    def __contains__(self, node):
+        return node in self.dependencies
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def add_node(self, node, dependencies):
+        """\
+        Add a node and its direct dependencies (given once each, in order)
+
+        :param node str: The node
+        :param dependencies list: The direct dependencies of the node
+        """
+        if node not in self.dependencies:
+            self.nodes.append(node)
+        deps = []
+        seen = set()
+        for d in dependencies:
+            if d not in seen:
+                seen.add(d)
+                deps.append(d)
+        self.dependencies[node] = deps
+        # the reverse edges and the results depend on all the nodes
+        self.children = None
+        self._all_dependencies = {}
+        self._sorted_nodes = None
+
+    def get_dependencies(self, node):
+        """\
+        Get the direct dependencies of a node
+
+        :param node str: The node
+        :rtype: list
+        """
+        self.check_node(node)
+        return self.dependencies[node]
+
+    def get_children(self, node):
+        """\
+        Get the nodes which depend directly on a node (reverse edges)
+
+        :param node str: The node
+        :rtype: list
+        """
+        if self.children is None:
+            self.children = dict((n, []) for n in self.nodes)
+            for n in self.nodes:
+                for d in self.dependencies[n]:
+                    if d in self.children:
+                        self.children[d].append(n)
+        return self.children.get(node, [])
+
+    def check_node(self, node):
+        """\
+        Raise an exception if a node is not in the graph
+
+        :param node str: The node
+        """
+        if node not in self.dependencies:
+            where = [k for k in self.nodes if node in self.dependencies[k]]
+            raise src.SatException(
+                'Error in product dependencies : %s product is referenced in '
+                'products dependencies, but is not present in the application, '
+                'from %s' % (node, where))
+
+    def get_all_dependencies(self, node):
+        """\
+        Get the recursive dependencies of a node, in depth first order.
+        The result is computed once.
+
+        :param node str: The node
+        :return: the dependencies, without the node itself
+        :rtype: list
+        """
+        if node not in self._all_dependencies:
+            self._all_dependencies[node] = self.depth_search([node])[1:]
+        return list(self._all_dependencies[node])
+
+    def depth_search(self, starts):
+        """\
+        Get the given nodes and their recursive dependencies,
+        in depth first order (each node is before its dependencies).
+
+        :param starts list: The nodes to start with
+        :rtype: list
+        """
+        visited = set()
+        result = []
+        for start in starts:
+            if start in visited:
+                continue
+            self.check_node(start)
+            visited.add(start)
+            result.append(start)
+            stack = [iter(self.dependencies[start])]
+            while stack:
+                for node in stack[-1]:
+                    if node not in visited:
+                        self.check_node(node)
+                        visited.add(node)
+                        result.append(node)
+                        stack.append(iter(self.dependencies[node]))
+                        break
+                else:
+                    stack.pop()
+        return result
+
+    def get_all_children(self, nodes):
+        """\
+        Get the nodes which depend recursively on some nodes
+        (the nodes themselves excepted), in the order of the graph
+
+        :param nodes list: The nodes
+        :rtype: list
+        """
+        reached = set()
+        todo = list(nodes)
+        while todo:
+            for child in self.get_children(todo.pop()):
+                if child not in reached:
+                    reached.add(child)
+                    todo.append(child)
+        return [n for n in self.nodes if n in reached and n not in nodes]
+
+    def depends_on(self, node, nodes):
+        """\
+        Check if a node depends recursively on one of some nodes
+
+        :param node str: The node
+        :param nodes list: The nodes
+        :rtype: boolean
+        """
+        if node not in self.dependencies:
+            return False
+        for d in self.get_all_dependencies(node):
+            if d in nodes:
+                return True
+        return False
+
+    def get_sorted_nodes(self):
+        """\
+        Get the nodes sorted topologically: a node is after all its
+        dependencies. The order is the depth first one (the order of the
+        application, each node preceded by its dependencies not yet sorted).
+        An exception reports the dependencies missing in the graph and the
+        cycles.
+
+        :rtype: list
+        """
+        if self._sorted_nodes is not None:
+            return list(self._sorted_nodes)
+        done = set()
+        sorted_nodes = []
+        for start in self.nodes:
+            if start in done:
+                continue
+            path = [start]         # the nodes in progress
+            in_path = set(path)
+            stack = [iter(self.dependencies[start])]
+            while stack:
+                for node in stack[-1]:
+                    if node in done:
+                        continue
+                    if node in in_path:
+                        cycle = path[path.index(node):] + [node]
+                        raise src.SatException(
+                            'Error in product dependencies : cycle detection '
+                            'for node %s and %s : %s' %
+                            (path[-1], node, " -> ".join(cycle)))
+                    self.check_node(node)
+                    path.append(node)
+                    in_path.add(node)
+                    stack.append(iter(self.dependencies[node]))
+                    break
+                else:
+                    stack.pop()
+                    node = path.pop()
+                    in_path.discard(node)
+                    done.add(node)
+                    sorted_nodes.append(node)
+        self._sorted_nodes = sorted_nodes
+        return list(sorted_nodes)
+
+    def get_critical_path(self, weights):
+        """\
+        Get the longest path of the graph, the length of a path being the
+        sum of the weights of its nodes (for example the durations of the
+        compilations: the critical path is the minimal duration of a
+        compilation with unlimited parallelism)
+
+        :param weights dict: The weights of the nodes, 0 if missing
+        :return: (the length, the path from a node without dependencies)
+        :rtype: tuple
+        """
+        length = {}
+        previous = {}
+        for node in self.get_sorted_nodes():
+            best = None
+            for d in self.dependencies[node]:
+                if best is None or length[d] > length[best]:
+                    best = d
+            length[node] = weights.get(node, 0)
+            if best is not None:
+                length[node] += length[best]
+            previous[node] = best
+        if len(length) == 0:
+            return 0, []
+        end = None
+        for node in self.nodes:
+            if end is None or length[node] > length[end]:
+                end = node
+        path = []
+        while end is not None:
+            path.append(end)
+            end = previous[end]
+        path.reverse()
+        return length[path[-1]], path
+
+    def get_parallel_length(self, nodes, weights, jobs):
+        """\
+        Simulate the execution of some nodes by at most jobs workers: a node
+        is started, in the given order, as soon as a worker is free and its
+        dependencies among the nodes are done (as sat compile --jobs does).
+
+        :param nodes list: The nodes to execute, in topological order
+        :param weights dict: The durations of the nodes, 0 if missing
+        :param jobs int: The number of workers
+        :return: the total duration
+        :rtype: float
+        """
+        selected = set(nodes)
+        depends = dict((n, [d for d in self.get_all_dependencies(n) if d in selected])
+                       for n in nodes)
+        pending = list(nodes)
+        running = []  # (end, node)
+        done = set()
+        now = 0
+        while pending or running:
+            for node in list(pending):
+                if len(running) >= jobs:
+                    break
+                if [d for d in depends[node] if d not in done]:
+                    continue
+                pending.remove(node)
+                running.append((now + weights.get(node, 0), node))
+            if len(running) == 0:
+                break  # the dependencies of the pending nodes are not in order
+            running.sort()
+            now, node = running.pop(0)
+            done.add(node)
+        return now
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+The cache of the computed environments of the applications: the environment
+of an application for a mode (launch, build, package), as recorded by an
+EnvironLog, is written in ~/.salomeTools/cache and read by the next sat
+commands (environ, launcher, application, package) instead of running the
+env_script of the products and computing it again.
+
+The key of an environment hashes everything it is computed from: the
+configuration of the application and of its products (evaluated), the
+status of their install directories, of their sat-config files and of
+their licence files (PATHS.LICENCEPATH), and the content of their
+env_script files. When one of them changes, the environment is computed
+again.
+
+The environments which depend on the shell are not cached: an env_script
+which reads the variables of the shell or runs commands, a value evaluated
+by the shell (`command`), a native product with set_nativ_env. An
+env_script which reads other files is not followed: the cache is disabled
+by LOCAL.environ_cache : 'no'.
+
+| usage:
+| >> key = get_environ_key(config, forBuild, for_package, env_info, src_root)
+| >> content = read_environ(config, key)   # None if not cached
+| >> write_environ(config, key, content)
+"""
+
+import os
+import sys
+import json
+import hashlib
+import tempfile
+
+import src
+import src.debug as DBG
+import src.sourceFingerprint as SFP
+
+CACHE_PREFIX = "environ_"
+CACHE_EXTENSION = ".json"
+# the number of environments kept in the cache
+MAX_ENVIRONS = 50
+# the code of an env_script which reads the external environment
+EXTERNAL_ENVIRON_PATTERNS = ["os.environ", "getenv", "subprocess",
+                             "os.popen", "os.system"]
+# the keys of the config set by sat while computing the environments
+# (PRODUCT_ROOT_DIR is always $workdir, install_dir_save is install_dir)
+APPLICATION_SET_KEYS = ["PRODUCT_ROOT_DIR"]
+PRODUCT_SET_KEYS = ["install_dir_save"]
+
+def use_environ_cache(config):
+    """\
+    Check if the computed environments are cached
+
+    :param config Config: The global configuration
+    :rtype: boolean
+    """
+    return ("environ_cache" not in config.LOCAL or
+            config.LOCAL.environ_cache != "no")
+
+def get_config_content(value):
+    """\
+    Get the evaluated content of a config value
+
+    :param value: a Mapping, a Sequence or a value of the config
+    :return: the content as dicts, lists and strings
+    """
+    if isinstance(value, src.pyconf.Mapping):
+        return dict((k, get_config_content(value[k])) for k in value.keys())
+    if isinstance(value, src.pyconf.Sequence):
+        return [get_config_content(v) for v in value]
+    return str(value)
+
+def get_path_status(path):
+    """\
+    Get the modification time and the size of a file or a directory
+
+    :param path str: The path
+    :return: (modification time in ns, size), None if it does not exist
+    :rtype: tuple
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return src.get_mtime_ns(st), st.st_size
+
+def reads_external_environ(env_script):
+    """\
+    Check if an env_script reads the variables of the shell or runs
+    commands: its environment cannot be cached
+
+    :param env_script str: The path of the env_script
+    :rtype: boolean
+    """
+    with open(env_script) as f:
+        code = f.read()
+    return any(pattern in code for pattern in EXTERNAL_ENVIRON_PATTERNS)
+
+def get_environ_key(config, forBuild, for_package=None, env_info=None,
+                    src_root=None):
+    """\
+    Get the key of the environment of an application in the cache
+
+    :param config Config: The global configuration
+    :param forBuild boolean: True for the build environment
+    :param for_package str: If not None, the environment of a package
+    :param env_info list: The products of the environment, None for all
+    :param src_root str: The application working directory
+    :return: the key, None if the environment is not cached
+    :rtype: str
+    """
+    if not use_environ_cache(config):
+        return None
+    try:
+        content = {"mode": [forBuild, for_package,
+                            None if env_info is None else list(env_info),
+                            src_root],
+                   "sat": [str(config.INTERNAL.sat_version),
+                           get_path_status(src.environment.__file__)],
+                   "dist": config.VARS.dist,
+                   "application": get_config_content(config.APPLICATION)}
+        for k in APPLICATION_SET_KEYS:
+            content["application"].get("environ", {}).pop(k, None)
+        licence_path = []
+        if "LICENCEPATH" in config.PATHS:
+            licence_path = config.PATHS.LICENCEPATH
+        content["licence_path"] = get_config_content(licence_path)
+        products = []
+        for p_name, p_info in src.product.get_products_infos(
+                                      config.APPLICATION.products, config):
+            product = {"config": get_config_content(p_info)}
+            for k in PRODUCT_SET_KEYS:
+                product["config"].pop(k, None)
+            if "install_dir" in p_info:
+                install_dir = p_info.install_dir
+                config_file = os.path.join(install_dir,
+                                           src.product.CONFIG_FILENAME +
+                                           p_name + ".pyconf")
+                product["install_dir"] = [get_path_status(install_dir),
+                                          get_path_status(config_file)]
+            licence = src.product.product_has_licence(p_info, licence_path)
+            if licence:
+                product["licence"] = [licence, get_path_status(licence)]
+            if "environ" in p_info and "env_script" in p_info.environ:
+                env_script = p_info.environ.env_script
+                if os.path.isfile(env_script):
+                    if reads_external_environ(env_script):
+                        DBG.write("environment not cached, the env_script "
+                                  "reads the external environment", env_script)
+                        return None
+                    product["env_script"] = SFP.get_file_hash(env_script)
+            products.append((p_name, product))
+        content["products"] = products
+        data = json.dumps(content, sort_keys=True).encode("utf-8")
+    except Exception as e:
+        DBG.write("environment not cached", str(e))
+        return None
+    return hashlib.sha1(data).hexdigest()
+
+def to_str(content):
+    """\
+    Convert the unicode strings read by json with python 2 to str, as
+    the values computed by the environments
+
+    :param content: The content read by json
+    :return: the content with str strings
+    """
+    if sys.version_info[0] >= 3:
+        return content
+    if isinstance(content, unicode):
+        return content.encode("utf-8")
+    if isinstance(content, list):
+        return [to_str(v) for v in content]
+    if isinstance(content, dict):
+        return dict((to_str(k), to_str(v)) for k, v in content.items())
+    return content
+
+def get_environ_path(config, key):
+    return os.path.join(config.VARS.personalDir, "cache",
+                        CACHE_PREFIX + key + CACHE_EXTENSION)
+
+def read_environ(config, key):
+    """\
+    Read an environment from the cache
+
+    :param config Config: The global configuration
+    :param key str: The key of the environment, None if not cached
+    :return: the content written by write_environ, None if not in the cache
+    :rtype: dict
+    """
+    if key is None:
+        return None
+    path = get_environ_path(config, key)
+    try:
+        with open(path) as f:
+            content = to_str(json.load(f))
+    except (IOError, OSError, ValueError) as e:
+        if os.path.exists(path):
+            DBG.write("environment cache unreadable", "%s: %s" % (path, e))
+        return None
+    # last use, for the eviction
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+    DBG.write("environment read from cache", path)
+    return content
+
+def write_environ(config, key, content):
+    """\
+    Write an environment in the cache, then remove the least recently
+    used ones. The file is written in a temporary file renamed, as it can
+    be read by a concurrent sat.
+
+    :param config Config: The global configuration
+    :param key str: The key of the environment, None if not cached
+    :param content dict: The environment, as dicts, lists and strings
+    """
+    if key is None:
+        return
+    path = get_environ_path(config, key)
+    cache_dir = os.path.dirname(path)
+    tmp_path = None
+    try:
+        src.ensure_path_exists(cache_dir)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(content, f)
+        os.rename(tmp_path, path)
+    except Exception as e:
+        # the cache is only an optimization
+        DBG.write("environment cache not written", "%s: %s" % (path, e))
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    evict(cache_dir)
+
+def evict(cache_dir, max_environs=MAX_ENVIRONS):
+    """\
+    Remove the least recently used environments of the cache
+
+    :param cache_dir str: The directory of the cache
+    :param max_environs int: The number of environments to keep
+    :return: the number of removed environments
+    :rtype: int
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.startswith(CACHE_PREFIX) and name.endswith(CACHE_EXTENSION):
+            path = os.path.join(cache_dir, name)
+            status = get_path_status(path)
+            if status is not None:
+                entries.append((status[0], path))
+    entries.sort()
+    removed = 0
+    for last_use, path in entries[:max(len(entries) - max_environs, 0)]:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass  # removed by a concurrent sat
+    return removed
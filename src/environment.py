@@ -17,19 +17,85 @@
 #  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
 
 import os
+import re
 import subprocess
 import string
 import sys
 import copy
+import weakref
+import collections
 
 import src
 import src.debug as DBG
 import pprint as PP
 
+# The environment contributions of the products, for each config:
+#   config -> {(product, forBuild, python_lib): (stamp, operations)}
+# The operations are the calls set/append/prepend done by set_a_product,
+# replayed by the next environments of the config. A contribution is valid
+# as long as the products configurations are not computed again (see 
+# src.product.get_product_config_stamp), and it depends only on the 
+# environment of the dependencies of the product, set before it in all 
+# environments.
+_product_environ_cache = weakref.WeakKeyDictionary()
+
+def clear_product_environ_cache(config=None):
+    """\
+    Clear the environment contributions of the products memoized for a 
+    config, to call when something else than the config changes them
+    (an env_script for example)
 
-class Environ:
+    :param config Config: The global configuration,
+                          if None the cache of all configs is cleared
+    """
+    if config is None:
+        _product_environ_cache.clear()
+    elif config in _product_environ_cache:
+        del _product_environ_cache[config]
+
+# the path variables are held as ordered sets (see Environ)
+_ORDERED_SET_PATHS = True
+
+if hasattr(collections.OrderedDict, "move_to_end"):
+    _OrderedSet = collections.OrderedDict
+else:
+    class _OrderedSet(collections.OrderedDict):
+        """\
+        OrderedDict with the move_to_end method of python 3, for python 2.
+        The python 2 OrderedDict holds its keys in a circular doubly linked
+        list of [previous link, next link, key], from its root link.
+        """
+        def move_to_end(self, key, last=True):
+            """Move an existing key to the end (or to the beginning)"""
+            link = self._OrderedDict__map[key]
+            link_prev, link_next, _ = link
+            link_prev[1] = link_next
+            link_next[0] = link_prev
+            root = self._OrderedDict__root
+            if last:
+                link_last = root[0]
+                link[0] = link_last
+                link[1] = root
+                link_last[1] = root[0] = link
+            else:
+                link_first = root[1]
+                link[0] = root
+                link[1] = link_first
+                root[1] = link_first[0] = link
+
+def _get_delimiter():
+    """The delimiter of the references to the variables in the values"""
+    if src.architecture.is_windows():
+        return "%"
+    return "$"
+
+class Environ(object):
     """\
-    Class to manage the environment context
+    Class to manage the environment context.
+    The values of the path variables (PATH, LD_LIBRARY_PATH...) are held as
+    ordered sets of items while values are appended or prepended, and 
+    joined in the dict of the variables when it is read. In the external
+    environment (os.environ), they are joined at once, for the subprocesses.
     """
     def __init__(self, environ=None):
         """Initialization. If the environ argument is passed, the environment
@@ -38,14 +104,82 @@ class Environ:
         :param environ dict:  
         """
         if environ is not None:
-            self.environ = environ
+            self._environ = environ
         else:
-            self.environ = os.environ
+            self._environ = os.environ
+        # the path variables: key -> [sep, OrderedDict of the items, 
+        # the joined value, None if not yet joined]
+        self._paths = {}
+        self._not_joined = set()
+
+    @property
+    def environ(self):
+        """The dict of the variables"""
+        if self._not_joined:
+            for key in list(self._not_joined):
+                self._join_path(key)
+        return self._environ
+
+    @environ.setter
+    def environ(self, environ):
+        self._environ = environ
+        self._paths = {}
+        self._not_joined = set()
 
     def __repr__(self):
         """easy non exhaustive quick resume for debug print"""
         return "%s(\n%s\n)" % (self.__class__.__name__, PP.pformat(self.environ))
 
+    def _join_path(self, key):
+        """Write the joined value of a path variable in the dict"""
+        entry = self._paths[key]
+        entry[2] = entry[0].join(entry[1])
+        self._environ[key] = entry[2]
+        self._not_joined.discard(key)
+
+    def _path_changed(self, key):
+        """The items of a path variable changed: its joined value is out of
+           date, written at once in os.environ (read by the subprocesses)"""
+        self._paths[key][2] = None
+        if self._environ is os.environ:
+            self._join_path(key)
+        else:
+            self._not_joined.add(key)
+
+    def _get_path_items(self, key, sep):
+        """\
+        Get the items of a path variable, as an ordered set
+
+        :param key str: the environment variable, defined
+        :param sep str: the separator string
+        :return: the OrderedDict of the items, None if the value cannot be
+                 held as an ordered set (repeated items, references to 
+                 other variables)
+        :rtype: OrderedDict
+        """
+        if not _ORDERED_SET_PATHS:
+            return None
+        entry = self._paths.get(key)
+        if entry is not None:
+            if entry[0] == sep:
+                if entry[2] is None:
+                    return entry[1]
+                value = self._environ[key]
+                if value is entry[2] or value == entry[2]:
+                    return entry[1]
+            elif entry[2] is None:
+                self._join_path(key)
+        value = self._environ[key]
+        self._paths.pop(key, None)
+        if _get_delimiter() in value:
+            return None
+        items = value.split(sep)
+        ordered_set = _OrderedSet.fromkeys(items)
+        if len(ordered_set) != len(items):
+            return None
+        self._paths[key] = [sep, ordered_set, value]
+        return ordered_set
+
     def _expandvars(self, value):
         """\
         replace some $VARIABLE into its actual value in the environment
@@ -54,10 +188,7 @@ class Environ:
         :return: the replaced variable
         :rtype: str
         """
-        if src.architecture.is_windows():
-            delim = "%"
-        else:
-            delim = "$"
+        delim = _get_delimiter()
         if delim in value:
             # The string.Template class is a string class 
             # for supporting $-substitutions
@@ -86,8 +217,16 @@ class Environ:
             raise Exception("Environ append key '%s' value '%s' contains forbidden character '%s'" % (key, value, separator))
 
         # check if the key is already in the environment
-        if key in self.environ:
-            value_list = self.environ[key].split(sep)
+        if key in self._environ:
+            items = self._get_path_items(key, sep)
+            if items is not None and _get_delimiter() not in value:
+                if value in items:
+                    items.move_to_end(value)
+                else:
+                    items[value] = None
+                self._path_changed(key)
+                return
+            value_list = self.get(key).split(sep)
             # Check if the value is already in the key value or not
             if not value in value_list:
                 value_list.append(value)
@@ -126,8 +265,15 @@ class Environ:
             raise Exception("Environ append key '%s' value '%s' contains forbidden character '%s'" % (key, value, separator))
 
         # check if the key is already in the environment
-        if key in self.environ:
-            value_list = self.environ[key].split(sep)
+        if key in self._environ:
+            items = self._get_path_items(key, sep)
+            if items is not None and _get_delimiter() not in value:
+                if value not in items:
+                    items[value] = None
+                items.move_to_end(value, last=False)
+                self._path_changed(key)
+                return
+            value_list = self.get(key).split(sep)
             if not value in value_list:
                 value_list.insert(0, value)
             else:
@@ -156,7 +302,23 @@ class Environ:
         
         :param key str: the environment variable to check
         """
-        return key in self.environ.keys()
+        return key in self._environ
+
+    def contains_value(self, key, value, sep=os.pathsep):
+        """\
+        Check if a value is one of the items of the variable "key"
+        
+        :param key str: the environment variable
+        :param value str: the value
+        :param sep str: the separator string
+        :rtype: boolean
+        """
+        if key not in self._environ:
+            return False
+        items = self._get_path_items(key, sep)
+        if items is not None:
+            return value in items
+        return value in self.get(key).split(sep)
 
     def set(self, key, value):
         """\
@@ -165,7 +327,10 @@ class Environ:
         :param key str: the environment variable to set
         :param value str: the value
         """
-        self.environ[key] = self._expandvars(value)
+        value = self._expandvars(value)
+        self._paths.pop(key, None)
+        self._not_joined.discard(key)
+        self._environ[key] = value
 
     def get(self, key):
         """\
@@ -173,8 +338,10 @@ class Environ:
         
         :param key str: the environment variable
         """
-        if key in self.environ:
-            return self.environ[key]
+        if key in self._not_joined:
+            self._join_path(key)
+        if key in self._environ:
+            return self._environ[key]
         else:
             return ""
 
@@ -217,6 +384,14 @@ class SalomeEnviron:
         self.enable_simple_env_script = enable_simple_env_script
         self.silent = False
         self.has_python = False
+        # the contributions of the products are memoized for the
+        # environments of the process, not for the files
+        self.use_cache = (isinstance(environ, Environ) and
+                          not for_package)
+        self.recorded = None
+        # False when a value depends on the shell (a `command` value, 
+        # set_nativ_env): the environment is not cached (see src.environCache)
+        self.cacheable = True
         self.__set_sorted_products_list()
 
     def __repr__(self):
@@ -229,23 +404,11 @@ class SalomeEnviron:
         return "%s(\n%s\n)" % (self.__class__.__name__, PP.pformat(res))
 
     def __set_sorted_products_list(self):
-        all_products_infos = src.product.get_products_infos(
-                                 self.cfg.APPLICATION.products,
-                                 self.cfg)
-        
-        from compile import get_dependencies_graph,depth_first_topo_graph
-        all_products_graph=get_dependencies_graph(all_products_infos, self.forBuild)
-        visited_nodes=[]
-        sorted_nodes=[]
-        for n in all_products_graph:
-            if n not in visited_nodes:
-                visited_nodes,sorted_nodes=depth_first_topo_graph(
-                                               all_products_graph, 
-                                               n, 
-                                               visited_nodes,
-                                               sorted_nodes)
-        self.sorted_product_list=sorted_nodes
-        self.all_products_graph=all_products_graph
+        # the graph is shared by all the environments of the config
+        all_products_graph = src.product.get_dependencies_graph(self.cfg,
+                                                                self.forBuild)
+        self.sorted_product_list = all_products_graph.get_sorted_nodes()
+        self.all_products_graph = all_products_graph
 
 
     def append(self, key, value, sep=os.pathsep):
@@ -256,6 +419,8 @@ class SalomeEnviron:
         :param value str: the value to append to key
         :param sep str: the separator string
         """
+        if self.recorded is not None:
+            self.recorded.append(("append", (key, copy.copy(value), sep)))
         return self.environ.append(key, value, sep)
 
     def prepend(self, key, value, sep=os.pathsep):
@@ -266,6 +431,8 @@ class SalomeEnviron:
         :param value str: the value to prepend to key
         :param sep str: the separator string
         """
+        if self.recorded is not None:
+            self.recorded.append(("prepend", (key, copy.copy(value), sep)))
         return self.environ.prepend(key, value, sep)
 
     def is_defined(self, key):
@@ -307,9 +474,13 @@ class SalomeEnviron:
         if value is not None and value.startswith("`") and value.endswith("`"):
             res = subprocess.Popen("echo %s" % value,
                                    shell=True,
-                                   stdout=subprocess.PIPE).communicate()
+                                   stdout=subprocess.PIPE,
+                                   universal_newlines=True).communicate()
             value = res[0].strip()
+            self.cacheable = False
 
+        if self.recorded is not None:
+            self.recorded.append(("set", (key, value)))
         return self.environ.set(key, value)
 
     def dump(self, out):
@@ -386,7 +557,9 @@ class SalomeEnviron:
            else:
               self.set("PRODUCT_ROOT_DIR", "out_dir_Path")
 
-        else:
+        elif not self.has_product_root_dir_reference():
+           # set once: a modification of the config invalidates 
+           # the products configurations memoized for it
            self.cfg.APPLICATION.environ.PRODUCT_ROOT_DIR = src.pyconf.Reference(self.cfg, src.pyconf.DOLLAR, "workdir")
 
 
@@ -403,6 +576,21 @@ class SalomeEnviron:
             self.add_line(1)
 
 
+    def has_product_root_dir_reference(self):
+        """\
+        Check if APPLICATION.environ.PRODUCT_ROOT_DIR is already 
+        the reference $workdir
+        
+        :rtype: boolean
+        """
+        if "environ" not in self.cfg.APPLICATION:
+            return False
+        data = object.__getattribute__(self.cfg.APPLICATION.environ, 'data')
+        value = data.get("PRODUCT_ROOT_DIR")
+        return (isinstance(value, src.pyconf.Reference) and
+                value.type == src.pyconf.DOLLAR and 
+                value.elements == ["workdir"])
+
     def set_salome_minimal_product_env(self, product_info, logger):
         """\
         Sets the minimal environment for a SALOME product.
@@ -568,6 +756,9 @@ class SalomeEnviron:
     def set_a_product(self, product, logger):
         """\
         Sets the environment of a product. 
+        The contribution of the product (its calls set/append/prepend)
+        is computed once for the config, and replayed by the next 
+        environments of the process.
         
         :param product str: The product name
         :param logger Logger: The logger instance to display messages
@@ -575,6 +766,39 @@ class SalomeEnviron:
 
         # Get the informations corresponding to the product
         pi = src.product.get_product_config(self.cfg, product)
+        if not self.use_cache or self.recorded is not None:
+            self.set_a_product_info(product, pi, logger)
+            return
+
+        if self.has_python:
+            key = (product, self.forBuild, self.python_lib)
+        else:
+            key = (product, self.forBuild, None)
+        stamp = src.product.get_product_config_stamp(self.cfg)
+        cached = _product_environ_cache.setdefault(self.cfg, {})
+        if key in cached and cached[key][0] == stamp:
+            if not self.silent:
+                logger.write(_("Setting environment for %s (cached)\n") % 
+                             product, 4)
+            for method, args in cached[key][1]:
+                getattr(self.environ, method)(*args)
+            return
+
+        self.recorded = []
+        try:
+            self.set_a_product_info(product, pi, logger)
+            cached[key] = (stamp, self.recorded)
+        finally:
+            self.recorded = None
+
+    def set_a_product_info(self, product, pi, logger):
+        """\
+        Computes the environment of a product.
+        
+        :param product str: The product name
+        :param pi Config: The product description
+        :param logger Logger: The logger instance to display messages
+        """
         # skip compile time products at run time 
         if not self.forBuild:
             if src.product.product_is_compile_time(pi):
@@ -725,6 +949,7 @@ class SalomeEnviron:
             else:
                 # not mandatory, if set_nativ_env not defined, we do nothing
                 if "set_nativ_env" in dir(pyproduct):
+                    self.cacheable = False
                     pyproduct.set_nativ_env(self)
         except:
             __, exceptionValue, exceptionTraceback = sys.exc_info()
@@ -769,10 +994,7 @@ class SalomeEnviron:
 
         # use the sorted list of all products to sort the list of products 
         # we have to set
-        visited=[]
-        from compile import depth_search_graph # to get the dependencies
-        for p_name in env_info:
-            visited=depth_search_graph(self.all_products_graph, p_name, visited)
+        visited = set(self.all_products_graph.depth_search(env_info))
         sorted_product_list=[]
         for n in self.sorted_product_list:
             if n in visited:
@@ -788,9 +1010,185 @@ class SalomeEnviron:
                 continue
             self.set_a_product(product, logger)
 
+# the references to the variables in the values recorded by EnvironLog,
+# substituted by the references of each FileEnviron
+_REFERENCE = "\x00%s\x00"
+_REFERENCE_RE = re.compile("\x00([^\x00]*)\x00")
+# the values can be unicode with python 2 (read from the cache for example)
+try:
+    _STRING_TYPES = (str, unicode)
+except NameError:
+    _STRING_TYPES = (str,)
+
+def substitute_references(value, get):
+    """\
+    Substitute the references recorded by EnvironLog in a value
+
+    :param value str or list: the value(s)
+    :param get function: get(key) returns the reference to the variable key
+    :return: the value(s) with the references substituted
+    :rtype: str or list
+    :raise SatException: if a reference is not terminated
+    """
+    if isinstance(value, list):
+        return [substitute_references(v, get) for v in value]
+    if not isinstance(value, _STRING_TYPES) or "\x00" not in value:
+        return value
+    value = _REFERENCE_RE.sub(lambda m: get(m.group(1)), value)
+    if "\x00" in value:
+        raise src.SatException(_("Bad reference to a variable in the "
+                                 "value %r") % value)
+    return value
+
+class EnvironLog(object):
+    """\
+    An environment which records the operations of a SalomeEnviron 
+    (set/append/prepend, comments and warnings), to write them in several 
+    environment files (bash, bat, cfg...) without computing the environment 
+    again: see replay.
+    The values read with get are references to the variables, substituted 
+    by the references of each FileEnviron (${VAR}, %VAR%, %(VAR)s...).
+    """
+    def __init__(self, environ=None):
+        """\
+        Initialization.
+
+        :param environ dict: the initial values of the variables
+        """
+        self.operations = []
+        # the values of the variables, for get_value and is_defined
+        self.environ = Environ(dict(environ or {}))
+
+    def __repr__(self):
+        """easy non exhaustive quick resume for debug print"""
+        return "%s(%i operations)" % (self.__class__.__name__,
+                                      len(self.operations))
+
+    @classmethod
+    def from_content(cls, content):
+        """\
+        Get an EnvironLog from its content (see get_content)
+
+        :param content dict: The content
+        :rtype: EnvironLog
+        """
+        environ_log = cls(content["environ"])
+        environ_log.operations = [(method, tuple(args))
+                                  for method, args in content["operations"]]
+        return environ_log
+
+    def get_content(self):
+        """\
+        Get the operations and the variables, as lists, dicts and strings
+        (to be written in the cache of the environments)
+
+        :rtype: dict
+        """
+        return {"operations": [[method, list(args)]
+                               for method, args in self.operations],
+                "environ": dict(self.environ.environ)}
+
+    def _get_real_value(self, key):
+        if self.environ.is_defined(key):
+            return self.environ.get(key)
+        return "${%s}" % key
+
+    def record(self, method, *args):
+        """\
+        Record an operation
+
+        :param method str: the method of FileEnviron
+        :param args tuple: its arguments
+        """
+        self.operations.append((method, args))
+
+    def add_line(self, number):
+        self.record("add_line", number)
+
+    def add_comment(self, comment):
+        self.record("add_comment", comment)
+
+    def add_echo(self, text):
+        self.record("add_echo", text)
+
+    def add_warning(self, warning):
+        self.record("add_warning", warning)
+
+    def set(self, key, value):
+        """\
+        Set the environment variable "key" to value "value"
+
+        :param key str: the environment variable to set
+        :param value str: the value
+        """
+        self.record("set", key, value)
+        self.environ.set(key, substitute_references(value,
+                                                    self._get_real_value))
+
+    def append(self, key, value, sep=os.pathsep):
+        """\
+        Append value(s) to key using sep
+
+        :param key str: the environment variable to append
+        :param value str or list: the value(s) to append to key
+        :param sep str: the separator string
+        """
+        self.record("append", key, copy.copy(value), sep)
+        self.environ.append(key, substitute_references(value,
+                                                       self._get_real_value),
+                            sep)
+
+    def prepend(self, key, value, sep=os.pathsep):
+        """\
+        Prepend value(s) to key using sep
+
+        :param key str: the environment variable to prepend
+        :param value str or list: the value(s) to prepend to key
+        :param sep str: the separator string
+        """
+        self.record("prepend", key, copy.copy(value), sep)
+        self.environ.prepend(key, substitute_references(value,
+                                                        self._get_real_value),
+                             sep)
+
+    def is_defined(self, key):
+        return self.environ.is_defined(key)
+
+    def get(self, key):
+        """\
+        Get a reference to the environment variable "key", 
+        substituted at replay
+
+        :param key str: the environment variable
+        """
+        return _REFERENCE % key
+
+    def get_value(self, key):
+        """\
+        Get the real value of the environment variable "key"
+
+        :param key str: the environment variable
+        """
+        return self.environ.get_value(key)
+
+    def replay(self, file_environ):
+        """\
+        Write the recorded operations in an environment file
+
+        :param file_environ FileEnviron: the environment file
+        """
+        for method, args in self.operations:
+            if method in ["set", "append", "prepend"]:
+                args = ((args[0], substitute_references(args[1], 
+                                                        file_environ.get)) +
+                        args[2:])
+            getattr(file_environ, method)(*args)
+
 class FileEnvWriter:
     """\
     Class to dump the environment to a file.
+    The environment is computed once for each mode (build, launch, package),
+    and written in the files of each shell.
     """
     def __init__(self, config, logger, out_dir, src_root, env_info=None):
         """\
@@ -808,6 +1206,66 @@ class FileEnvWriter:
         self.src_root= src_root
         self.silent = True
         self.env_info = env_info
+        # the computed environments: (forBuild, for_package) -> EnvironLog
+        self.environ_logs = {}
+        # the library farm of the launch environment, not for a part of
+        # the products (see src.libraryFarm)
+        self.library_farm = None
+        if env_info is None:
+            self.library_farm = src.libraryFarm.get_library_farm(config)
+
+    def get_environ_log(self, forBuild, for_package=None):
+        """\
+        Get the environment of the application (or of the products of 
+        env_info), computed once for each mode, or read from the cache
+        of the environments (see src.environCache)
+        
+        :param forBuild bool: if true, the build environment
+        :param for_package str: If not None, the relative environment
+                                designed for a package
+        :rtype: EnvironLog
+        """
+        key = (forBuild, for_package)
+        if key in self.environ_logs:
+            return self.environ_logs[key]
+        # the environment computed by a previous sat command
+        cache_key = src.environCache.get_environ_key(self.config,
+                                                     forBuild,
+                                                     for_package,
+                                                     self.env_info,
+                                                     self.src_root)
+        content = src.environCache.read_environ(self.config, cache_key)
+        if content is not None:
+            self.environ_logs[key] = EnvironLog.from_content(content)
+        else:
+            environ_log = EnvironLog()
+            env = SalomeEnviron(self.config, 
+                                environ_log, 
+                                forBuild, 
+                                for_package=for_package)
+            env.silent = self.silent
+            if self.env_info is not None:
+                env.set_full_environ(self.logger, self.env_info)
+            else:
+                # set env from the APPLICATION
+                env.set_application_env(self.logger)
+                # set the products
+                env.set_products(self.logger,
+                                 src_root=self.src_root)
+            self.environ_logs[key] = environ_log
+            if env.cacheable:
+                src.environCache.write_environ(self.config, cache_key,
+                                               environ_log.get_content())
+            else:
+                DBG.write("environment not cached, a value depends on "
+                          "the shell", key)
+        # the cache has the environment without the farm, built each time
+        if (not forBuild and self.library_farm is not None and
+                self.library_farm.for_package == for_package):
+            self.environ_logs[key] = self.library_farm.apply(
+                                                   self.environ_logs[key])
+            self.library_farm.write_report(self.logger)
+        return self.environ_logs[key]
 
     def write_tcl_files(self,
                         forBuild, 
@@ -933,22 +1391,15 @@ class FileEnvWriter:
             # path will keep the inherited value, which will be appended with new values.
             file_environ.set_no_init_path()
 
+        # Set the environment
+        self.get_environ_log(forBuild, for_package).replay(file_environ)
+
         env = SalomeEnviron(self.config, 
                             file_environ, 
                             forBuild, 
                             for_package=for_package)
 
         env.silent = self.silent
-
-        # Set the environment
-        if self.env_info is not None:
-            env.set_full_environ(self.logger, self.env_info)
-        else:
-            # set env from the APPLICATION
-            env.set_application_env(self.logger)
-            # set the products
-            env.set_products(self.logger,
-                            src_root=self.src_root)
         # Add the additional environment if it is not empty
         if len(additional_env) != 0:
             env.add_line(1)
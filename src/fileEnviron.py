@@ -17,6 +17,9 @@
 #  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
 
 import os
+import re
+import json
+import collections
 import pprint as PP
 import src.debug as DBG
 import src.architecture
@@ -39,8 +42,12 @@ def get_file_environ(output, shell, environ=None):
         return BatFileEnviron(output, environ)
     if shell == "cfgForPy":
         return LauncherFileEnviron(output, environ)
+    if shell == "cfgForPyFrozen":
+        return FrozenLauncherFileEnviron(output, environ)
     if shell == "cfg":
         return ContextFileEnviron(output, environ)
+    if shell == "cfgFrozen":
+        return FrozenContextFileEnviron(output, environ)
     raise Exception("FileEnviron: Unknown shell = %s" % shell)
 
 class FileEnviron(object):
@@ -126,14 +133,12 @@ class FileEnviron(object):
         if separator in value:
             raise Exception("FileEnviron append key '%s' value '%s' contains forbidden character '%s'" % (key, value, separator))
         do_append=True
-        if self.environ.is_defined(key):
-            value_list = self.environ.get(key).split(sep)
-            if self.environ._expandvars(value) in value_list:
-                do_append=False  # value is already in key path : we don't append it again
+        if self.environ.contains_value(key, self.environ._expandvars(value), sep):
+            do_append=False  # value is already in key path : we don't append it again
             
         if do_append:
             self.environ.append_value(key, value,sep)
-            self.set(key, self.get(key) + sep + value)
+            self.write_set(key, self.get(key) + sep + value)
 
     def append(self, key, value, sep=os.pathsep):
         """\
@@ -164,14 +169,11 @@ class FileEnviron(object):
             raise Exception("FileEnviron append key '%s' value '%s' contains forbidden character '%s'" % (key, value, separator))
 
         do_not_prepend=False
-        if self.environ.is_defined(key):
-            value_list = self.environ.get(key).split(sep)
-            exp_val=self.environ._expandvars(value)
-            if exp_val in value_list:
-                do_not_prepend=True
+        if self.environ.contains_value(key, self.environ._expandvars(value), sep):
+            do_not_prepend=True
         if not do_not_prepend:
             self.environ.prepend_value(key, value,sep)
-            self.set(key, value + sep + self.get(key))
+            self.write_set(key, value + sep + self.get(key))
 
     def prepend(self, key, value, sep=os.pathsep):
         """\
@@ -202,6 +204,18 @@ class FileEnviron(object):
         :param key str: the environment variable to set
         :param value str: the value
         """
+        self.write_set(key, value)
+        self.environ.set(key, value)
+
+    def write_set(self, key, value):
+        """\
+        Write the setting of the environment variable 'key' to value 'value'
+        in the shell file, without changing the environment
+        (append_value and prepend_value update it themselves)
+        
+        :param key str: the environment variable to set
+        :param value str: the value, in the syntax of the shell
+        """
         raise NotImplementedError("set is not implement for this shell!")
 
     def get(self, key):
@@ -271,14 +285,13 @@ class TclFileEnviron(FileEnviron):
             for module_to_load in modules_to_load.split(";"):
                 self.output.write(module_to_load+"\n")
 
-    def set(self, key, value):
-        """Set the environment variable "key" to value "value"
+    def write_set(self, key, value):
+        """Write the setting of the environment variable "key" to value "value"
         
         :param key str: the environment variable to set
         :param value str: the value
         """
         self.output.write('setenv  %s "%s"\n' % (key, value))
-        self.environ.set(key, value)
         
     def get(self, key):
         """\
@@ -326,14 +339,13 @@ class BashFileEnviron(FileEnviron):
         self._do_init(output, environ)
         self.output.write(bash_header)
 
-    def set(self, key, value):
-        """Set the environment variable "key" to value "value"
+    def write_set(self, key, value):
+        """Write the setting of the environment variable "key" to value "value"
         
         :param key str: the environment variable to set
         :param value str: the value
         """
         self.output.write('export %s="%s"\n' % (key, value))
-        self.environ.set(key, value)
         
 
         
@@ -364,14 +376,13 @@ class BatFileEnviron(FileEnviron):
         """
         return '%%%s%%' % key
     
-    def set(self, key, value):
-        """Set the environment variable "key" to value "value"
+    def write_set(self, key, value):
+        """Write the setting of the environment variable "key" to value "value"
         
         :param key str: the environment variable to set
         :param value str: the value
         """
         self.output.write('set %s=%s\n' % (key, self.value_filter(value)))
-        self.environ.set(key, value)
 
 
 class ContextFileEnviron(FileEnviron):
@@ -386,14 +397,13 @@ class ContextFileEnviron(FileEnviron):
         self._do_init(output, environ)
         self.output.write(cfg_header)
 
-    def set(self, key, value):
-        """Set the environment variable "key" to value "value"
+    def write_set(self, key, value):
+        """Write the setting of the environment variable "key" to value "value"
         
         :param key str: the environment variable to set
         :param value str: the value
         """
         self.output.write('%s="%s"\n' % (key, value))
-        self.environ.set(key, value)
 
     def get(self, key):
         """Get the value of the environment variable "key"
@@ -424,15 +434,13 @@ class ContextFileEnviron(FileEnviron):
         :param sep str: the separator string
         """
         do_append=True
-        if self.environ.is_defined(key):
-            value_list = self.environ.get(key).split(sep)
-            #value cannot be expanded (unlike bash/bat case) - but it doesn't matter.
-            if value in value_list:
-                do_append=False  # value is already in key path : we don't append it again
+        #value cannot be expanded (unlike bash/bat case) - but it doesn't matter.
+        if self.environ.contains_value(key, value, sep):
+            do_append=False  # value is already in key path : we don't append it again
             
         if do_append:
             self.environ.append_value(key, value,sep)
-            self.output.write('ADD_TO_%s: %s\n' % (key, value))
+            self.write_add(key, value, sep, False)
 
     def append_value(self, key, value, sep=os.pathsep):
         """append value to key using sep
@@ -443,6 +451,75 @@ class ContextFileEnviron(FileEnviron):
         """
         self.prepend_value(key, value)
 
+    def write_add(self, key, value, sep, append):
+        """Write the addition of value to key using sep
+        (salomeContext always prepends the values)
+        
+        :param key str: the environment variable to add to
+        :param value str: the value to add to key
+        :param sep str: the separator string
+        :param append boolean: True to append the value, False to prepend it
+        """
+        self.output.write('ADD_TO_%s: %s\n' % (key, value))
+
+class FrozenContextFileEnviron(ContextFileEnviron):
+    """\
+    Class for a salome context configuration file with the resolved values
+    of the variables, one line per variable (see EnvironSnapshot)
+    """
+    def __init__(self, output, environ=None):
+        """Initialization
+        
+        :param output file: the output file stream.
+        :param environ dict: a potential additional environment.
+        """
+        ContextFileEnviron.__init__(self, output, environ)
+        self.snapshot = EnvironSnapshot(r"%\((\w+)\)s")
+
+    def add_line(self, number):
+        """No empty lines between the variables of the snapshot
+        
+        :param number int: the number of lines to add
+        """
+        pass
+
+    def add_comment(self, comment):
+        """No comments between the variables of the snapshot
+        
+        :param comment str: the comment to add
+        """
+        pass
+
+    def write_set(self, key, value):
+        """Record the setting of the environment variable "key" in the
+        snapshot, written by finish
+        
+        :param key str: the environment variable to set
+        :param value str: the value
+        """
+        self.snapshot.set(key, value)
+
+    def write_add(self, key, value, sep, append):
+        """Record the addition of value to key in the snapshot, written 
+        by finish (salomeContext always prepends the values)
+        
+        :param key str: the environment variable to add to
+        :param value str: the value to add to key
+        :param sep str: the separator string
+        :param append boolean: True to append the value, False to prepend it
+        """
+        self.snapshot.add(key, value, sep, False)
+
+    def finish(self):
+        """Write the variables of the snapshot"""
+        for key, entry in self.snapshot.get_variables():
+            if "value" in entry:
+                ContextFileEnviron.write_set(self, key, entry["value"])
+            else:
+                ContextFileEnviron.write_add(self, key,
+                                    entry["separator"].join(entry["prepend"]),
+                                    entry["separator"], False)
+
 
 class LauncherFileEnviron(FileEnviron):
     """\
@@ -527,22 +604,13 @@ class LauncherFileEnviron(FileEnviron):
 
         # in all other cases we use append (except if value is already the key
         do_append=True
-        if self.environ.is_defined(key):
-            value_list = self.environ.get(key).split(sep)
-            # rem : value cannot be expanded (unlike bash/bat case) - but it doesn't matter.
-            if value in value_list:
-                do_append=False  # value is already in key path : we don't append it again
+        # rem : value cannot be expanded (unlike bash/bat case) - but it doesn't matter.
+        if self.environ.contains_value(key, value, sep):
+            do_append=False  # value is already in key path : we don't append it again
             
         if do_append:
             self.environ.append_value(key, value,sep) # register value in self.environ
-            if key in self.specialKeys.keys():
-                #for these special keys we use the specific salomeContext function
-                self.output.write(self.begin+'addTo%s(r"%s")\n' % 
-                                  (self.specialKeys[key], self.value_filter(value)))
-            else:
-                # else we use the general salomeContext addToVariable function
-                self.output.write(self.indent+'appendPath(r"%s", r"%s",separator="%s")\n' 
-                                  % (key, self.value_filter(value), sep))
+            self.write_add(key, value, sep, True)
 
     def append(self, key, value, sep=":"):
         """Same as append_value but the value argument can be a list
@@ -579,22 +647,13 @@ class LauncherFileEnviron(FileEnviron):
             return
         # in all other cases we use append (except if value is already the key
         do_append=True
-        if self.environ.is_defined(key):
-            value_list = self.environ.get(key).split(sep)
-            # rem : value cannot be expanded (unlike bash/bat case) - but it doesn't matter.
-            if value in value_list:
-                do_append=False  # value is already in key path : we don't append it again
+        # rem : value cannot be expanded (unlike bash/bat case) - but it doesn't matter.
+        if self.environ.contains_value(key, value, sep):
+            do_append=False  # value is already in key path : we don't append it again
             
         if do_append:
             self.environ.append_value(key, value,sep) # register value in self.environ
-            if key in self.specialKeys.keys():
-                #for these special keys we use the specific salomeContext function
-                self.output.write(self.begin+'addTo%s(r"%s")\n' % 
-                                  (self.specialKeys[key], self.value_filter(value)))
-            else:
-                # else we use the general salomeContext addToVariable function
-                self.output.write(self.begin+'addToVariable(r"%s", r"%s",separator="%s")\n' 
-                                  % (key, self.value_filter(value), sep))
+            self.write_add(key, value, sep, False)
             
 
     def prepend(self, key, value, sep=":"):
@@ -611,8 +670,8 @@ class LauncherFileEnviron(FileEnviron):
             self.prepend_value(key, value, sep)
 
 
-    def set(self, key, value):
-        """Set the environment variable "key" to value "value"
+    def write_set(self, key, value):
+        """Write the setting of the environment variable "key" to value "value"
         
         :param key str: the environment variable to set
         :param value str: the value
@@ -620,7 +679,28 @@ class LauncherFileEnviron(FileEnviron):
         self.output.write(self.begin+self.setVarEnv+
                           '(r"%s", r"%s", overwrite=True)\n' % 
                           (key, self.value_filter(value)))
-        self.environ.set(key,value)
+
+    def write_add(self, key, value, sep, append):
+        """Write the addition of value to key using sep
+        
+        :param key str: the environment variable to add to
+        :param value str: the value to add to key
+        :param sep str: the separator string
+        :param append boolean: True to append the value, False to prepend it
+                               (the special keys are always prepended)
+        """
+        if key in self.specialKeys.keys():
+            #for these special keys we use the specific salomeContext function
+            self.output.write(self.begin+'addTo%s(r"%s")\n' % 
+                              (self.specialKeys[key], self.value_filter(value)))
+        elif append:
+            # salomeContext only prepend variables, we use our own appendPath
+            self.output.write(self.indent+'appendPath(r"%s", r"%s",separator="%s")\n' 
+                              % (key, self.value_filter(value), sep))
+        else:
+            # else we use the general salomeContext addToVariable function
+            self.output.write(self.begin+'addToVariable(r"%s", r"%s",separator="%s")\n' 
+                              % (key, self.value_filter(value), sep))
     
 
     def add_comment(self, comment):
@@ -660,6 +740,195 @@ class LauncherFileEnviron(FileEnviron):
         self.output.write(launcher_tail)
         return
 
+class FrozenLauncherFileEnviron(LauncherFileEnviron):
+    """\
+    Class to generate a launcher file script which loads a frozen
+    environment: the resolved values of the variables are written in a JSON
+    file next to the launcher (<launcher>.env.json, see EnvironSnapshot),
+    and set at once at the start of the launcher instead of a call to
+    salomeContext for each value.
+    """
+    def __init__(self, output, environ=None):
+        """Initialization
+        
+        :param output file: the output file stream (a file with a name).
+        :param environ dict: a potential additional environment.
+        """
+        LauncherFileEnviron.__init__(self, output, environ)
+        self.frozen_file = output.name + FROZEN_EXTENSION
+        self.snapshot = EnvironSnapshot(get_reference_pattern())
+
+    def add_line(self, number):
+        """No empty lines, the variables are in the frozen environment
+        
+        :param number int: the number of lines to add
+        """
+        pass
+
+    def add_echo(self, text):
+        """No echo in the launcher with a frozen environment
+        
+        :param text str: the text to echo
+        """
+        pass
+
+    def add_warning(self, warning):
+        """No warning in the launcher with a frozen environment
+        
+        :param warning str: the text to echo
+        """
+        pass
+
+    def add_comment(self, comment):
+        """Add only the comment of the DISTENE licence section, 
+        which is replaced by sat package
+        
+        :param comment str: the comment to add
+        """
+        if "DISTENE" in comment:
+            LauncherFileEnviron.add_comment(self, comment)
+
+    def write_set(self, key, value):
+        """Record the setting of the environment variable "key" in the
+        frozen environment, written by finish
+        
+        :param key str: the environment variable to set
+        :param value str: the value
+        """
+        self.snapshot.set(key, value)
+
+    def write_add(self, key, value, sep, append):
+        """Record the addition of value to key in the frozen environment,
+        written by finish (salomeContext prepends the values of the 
+        special keys)
+        
+        :param key str: the environment variable to add to
+        :param value str: the value to add to key
+        :param sep str: the separator string
+        :param append boolean: True to append the value, False to prepend it
+        """
+        self.snapshot.add(key, value, sep, 
+                          append and key not in self.specialKeys)
+
+    def finish(self):
+        """\
+        Write the frozen environment, and its loading in the launcher
+        """
+        self.snapshot.write(self.frozen_file)
+        self.output.write(launcher_frozen_environ.replace(
+                          "FROZEN_ENVIRON_FILE", 
+                          os.path.basename(self.frozen_file)))
+        LauncherFileEnviron.finish(self)
+
+def get_reference_pattern():
+    """\
+    Get the pattern of the references to the variables in the values
+    (FileEnviron.get, and the variables expanded by salomeContext)
+
+    :rtype: str
+    """
+    pattern = r"\$\{(\w+)\}|\$(\w+)"
+    if src.architecture.is_windows():
+        pattern += r"|%(\w+)%"
+    return pattern
+
+class EnvironSnapshot(object):
+    """\
+    The values of the variables of an environment file, resolved while the
+    file is written: the references to the variables already set in the
+    file are replaced by their values, only the references to the variables
+    of the user remain. A variable is either set to a value {"value"},
+    or added to the value of the user, with the lists of values
+    {"prepend", "append", "separator"}.
+    """
+    def __init__(self, reference_pattern):
+        """Initialization
+        
+        :param reference_pattern str: The regular expression of a reference
+                                      to a variable, its name in a group
+        """
+        self.reference = re.compile(reference_pattern)
+        self.variables = collections.OrderedDict()
+
+    def __repr__(self):
+        """easy almost exhaustive quick resume for debug print"""
+        return "%s(%i variables)" % (self.__class__.__name__, len(self.variables))
+
+    def resolve(self, value):
+        """\
+        Replace the references to the variables of the snapshot by their
+        values
+
+        :param value str: The value
+        :rtype: str
+        """
+        def replace(match):
+            name = [g for g in match.groups() if g][0]
+            entry = self.variables.get(name)
+            if entry is None:
+                return match.group(0)
+            if "value" in entry:
+                return entry["value"]
+            return entry["separator"].join(entry["prepend"] + [match.group(0)] + 
+                                           entry["append"])
+        return self.reference.sub(replace, value)
+
+    def set(self, key, value):
+        """\
+        Set the variable key to value
+        
+        :param key str: the variable
+        :param value str: the value
+        """
+        self.variables[key] = {"value": self.resolve(value)}
+
+    def add(self, key, value, sep, append):
+        """\
+        Add value to the variable key using sep
+        
+        :param key str: the variable
+        :param value str: the value to add
+        :param sep str: the separator string
+        :param append boolean: True to append the value, False to prepend it
+        """
+        value = self.resolve(value)
+        if value == "":
+            return
+        entry = self.variables.get(key)
+        if entry is None:
+            entry = {"prepend": [], "append": [], "separator": sep}
+            self.variables[key] = entry
+        if "value" in entry:
+            if entry["value"] == "":
+                entry["value"] = value
+            elif append:
+                entry["value"] = entry["value"] + sep + value
+            else:
+                entry["value"] = value + sep + entry["value"]
+        elif append:
+            entry["append"].append(value)
+        else:
+            entry["prepend"].insert(0, value)
+
+    def get_variables(self):
+        """\
+        Get the variables, in the order of their first setting
+
+        :return: the list of (variable, {"value"} or 
+                 {"prepend", "append", "separator"})
+        :rtype: list
+        """
+        return list(self.variables.items())
+
+    def write(self, path):
+        """\
+        Write the snapshot in a JSON file, read by the frozen launchers
+
+        :param path str: The JSON file
+        """
+        with open(path, "w") as f:
+            json.dump({"variables": self.get_variables()}, f)
+
 class ScreenEnviron(FileEnviron):
     def __init__(self, output, environ=None):
         self._do_init(output, environ)
@@ -750,6 +1019,36 @@ cfg_header="""\
 [SALOME Configuration]
 """
 
+# the extension of the frozen environment of a launcher
+FROZEN_EXTENSION = ".env.json"
+
+# the loading of the frozen environment of a launcher (in its main function):
+# the values are computed from the environment of the user, then set at once
+launcher_frozen_environ="""\
+
+    # Load the frozen environment written by salomeTools
+    import json
+    with open(os.path.join(out_dir_Path, r"FROZEN_ENVIRON_FILE")) as f:
+      frozen_environ = json.load(f)
+
+    def frozen_value(value):
+      return os.path.expandvars(value.replace("out_dir_Path", out_dir_Path))
+
+    environ = {}
+    for name, entry in frozen_environ["variables"]:
+      if "value" in entry:
+        environ[name] = frozen_value(entry["value"])
+        continue
+      values = [frozen_value(v) for v in entry["prepend"]]
+      if os.getenv(name):
+        values.append(os.getenv(name))
+      values += [frozen_value(v) for v in entry["append"]]
+      environ[name] = entry["separator"].join(values)
+    for name in environ:
+      os.environ[str(name)] = str(environ[name])
+
+"""
+
 launcher_header2="""\
 #! /usr/bin/env python
 
@@ -0,0 +1,410 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+The library farm of an application: a directory of symbolic links to the
+shared libraries of the products (LIBRARY_FARM/lib), and another one to
+the python modules and packages (LIBRARY_FARM/python). The launch
+environment has the farm in LD_LIBRARY_PATH and PYTHONPATH instead of the
+directories of all the products, and the dynamic loader and python search
+a single directory.
+
+The farm is enabled by the property APPLICATION.properties.library_farm :
+'yes' (sat application --library_farm, sat package --library_farm).
+
+The search is kept: a name is linked to the first directory of the path
+which has it, the other ones are reported as collisions. The launchers
+using the mesa products have their own farm (LIBRARY_FARM_mesa). The directories
+which are not in the install directories of the products stay in the path,
+after the farm, and the names they have before a product are not linked.
+The python packages split in several directories (namespace packages,
+or pkgutil.extend_path) are merged.
+
+| usage:
+| >> farm = get_library_farm(config)   # None if not enabled
+| >> environ_log = farm.apply(environ_log)
+| >> farm.collisions["LD_LIBRARY_PATH"]
+"""
+
+import os
+import re
+import shutil
+import tempfile
+
+import src
+import src.debug as DBG
+
+FARM_DIRNAME = "LIBRARY_FARM"
+# the farmed variables, and their directory in the farm
+FARM_KEYS = [("LD_LIBRARY_PATH", "lib"), ("PYTHONPATH", "python")]
+# the names searched by the dynamic loader
+_SHARED_LIBRARY_RE = re.compile(r"\.so(\.[0-9]+)*$|\.dylib$")
+
+def use_library_farm(config):
+    """\
+    Check if the launch environments of the application use a library farm
+
+    :param config Config: The global configuration
+    :rtype: boolean
+    """
+    return (src.appli_test_property(config, "library_farm", "yes") and
+            hasattr(os, "symlink") and not src.architecture.is_windows())
+
+def get_farm_dirname(config):
+    """\
+    Get the name of the directory of the library farm (the environment with
+    the mesa products has its own farm)
+
+    :param config Config: The global configuration
+    :rtype: str
+    """
+    if src.appli_test_property(config, "use_mesa", "yes"):
+        return FARM_DIRNAME + "_mesa"
+    return FARM_DIRNAME
+
+def get_library_farm(config):
+    """\
+    Get the library farm of the application, in its working directory
+
+    :param config Config: The global configuration
+    :return: the library farm, None if it is not enabled
+    :rtype: LibraryFarm
+    """
+    if not use_library_farm(config):
+        return None
+    roots = {}
+    for p_name, p_info in src.product.get_products_infos(
+                                      config.APPLICATION.products, config):
+        if "install_dir" in p_info and not src.product.product_is_native(p_info):
+            roots[p_info.install_dir] = p_info.install_dir
+    return LibraryFarm(os.path.join(config.APPLICATION.workdir,
+                                    get_farm_dirname(config)),
+                       roots)
+
+def is_shared_library(name):
+    return _SHARED_LIBRARY_RE.search(name) is not None
+
+def is_merged_package(path):
+    """\
+    Check if a python package is merged with the packages of the same name
+    of the next directories of the path
+
+    :param path str: The directory of the package
+    :rtype: boolean
+    """
+    init_file = os.path.join(path, "__init__.py")
+    if not os.path.isfile(init_file):
+        return True  # namespace package
+    try:
+        with open(init_file) as f:
+            return "extend_path" in f.read()
+    except (IOError, OSError, UnicodeDecodeError):
+        return False
+
+class LibraryFarm(object):
+    """\
+    The farm of the directories of LD_LIBRARY_PATH and PYTHONPATH which are
+    in the install directories of the products (the roots). The directories
+    are given as in the environment ("out_dir_Path/..." in a package), the
+    roots give their local directories.
+    """
+    def __init__(self, farm_dir, roots, link_dir=None, for_package=None):
+        """\
+        Initialization
+
+        :param farm_dir str: The local directory of the farm
+        :param roots dict: The install directories of the products in the
+                           environment, and their local directories
+        :param link_dir str: The directory of the farm in the environment,
+                             farm_dir if None. If it is relative, as in a
+                             package, the links are relative.
+        :param for_package str: The package of the environment, None for
+                                the application
+        """
+        self.farm_dir = farm_dir
+        self.roots = roots
+        self.link_dir = link_dir or farm_dir
+        self.for_package = for_package
+        # variable -> list of (name, used directory, hidden directory)
+        self.collisions = {}
+        # variable -> number of links
+        self.nb_links = {}
+        # the farm is reported once, when it is used by several files
+        self.reported = False
+
+    def __repr__(self):
+        """easy almost exhaustive quick resume for debug print"""
+        return "%s(%s, %i roots)" % (self.__class__.__name__, self.farm_dir,
+                                     len(self.roots))
+
+    def get_local_dir(self, directory):
+        """\
+        Get the local directory of a directory of the environment
+
+        :param directory str: The directory, as in the environment
+        :return: the local directory, None if it is not in a root
+        :rtype: str
+        """
+        directory = os.path.normpath(directory)
+        best = None
+        for root in self.roots:
+            root_path = os.path.normpath(root)
+            if directory == root_path or directory.startswith(root_path + os.sep):
+                if best is None or len(root_path) > len(best):
+                    best = root_path
+                    local = os.path.normpath(self.roots[root])
+        if best is None:
+            return None
+        return local + directory[len(best):]
+
+    def get_link_target(self, path, link_dir):
+        """\
+        Get the target of a link of the farm
+
+        :param path str: The linked file, as in the environment
+        :param link_dir str: The directory of the link, as in the environment
+        :rtype: str
+        """
+        if os.path.isabs(self.link_dir):
+            return path
+        return os.path.relpath(path, link_dir)
+
+    def apply(self, environ_log):
+        """\
+        Build the farm of the directories of an environment, and get the
+        environment with the farm in LD_LIBRARY_PATH and PYTHONPATH
+
+        :param environ_log EnvironLog: The environment
+        :return: the environment using the farm
+        :rtype: EnvironLog
+        """
+        operations = list(environ_log.operations)
+        environ = dict(environ_log.environ.environ)
+        if not os.path.isdir(self.farm_dir):
+            os.makedirs(self.farm_dir)
+        for key, sub_dir in FARM_KEYS:
+            indexes = [i for i, (method, args) in enumerate(operations)
+                       if method in ["set", "prepend", "append"] and
+                       args[0] == key]
+            if not indexes:
+                continue
+            if [i for i in indexes if operations[i][0] == "set"]:
+                # the value is not only the directories of the products
+                DBG.write("no library farm for", key)
+                continue
+            sep = operations[indexes[0]][1][2]
+            directories = self.get_directories(environ_log,
+                                               [operations[i] for i in indexes])
+            leftovers = self.build(key, sub_dir, directories)
+            value = [os.path.join(self.link_dir, sub_dir)] + leftovers
+            farm_operation = ("prepend", (key, value, sep))
+            operations = (operations[:indexes[0]] + [farm_operation] +
+                          [op for i, op in enumerate(operations)
+                           if i > indexes[0] and i not in indexes])
+            environ[key] = sep.join(value)
+        farmed = src.environment.EnvironLog(environ)
+        farmed.operations = operations
+        return farmed
+
+    def get_directories(self, environ_log, operations):
+        """\
+        Get the directories of a path variable, in the order of the
+        environment files (a value already in the path is not added again)
+
+        :param environ_log EnvironLog: The environment
+        :param operations list: The operations of the variable
+        :rtype: list
+        """
+        directories = []
+        for method, args in operations:
+            values = src.environment.substitute_references(
+                                    args[1], environ_log._get_real_value)
+            if not isinstance(values, list):
+                values = [values]
+            if method == "prepend":
+                values = reversed(values)
+            for value in values:
+                if value in directories:
+                    continue
+                if method == "prepend":
+                    directories.insert(0, value)
+                else:
+                    directories.append(value)
+        return directories
+
+    def build(self, key, sub_dir, directories):
+        """\
+        Build the farm of the directories of a path variable.
+        The directory of the farm is built aside, then renamed.
+
+        :param key str: The variable
+        :param sub_dir str: The directory of the farm of the variable
+        :param directories list: The directories, as in the environment
+        :return: the directories which are not farmed
+        :rtype: list
+        """
+        self.collisions[key] = []
+        self.nb_links[key] = 0
+        leftovers = []
+        sources = []  # (directory, local directory, previous leftovers)
+        for directory in directories:
+            local_dir = self.get_local_dir(directory)
+            if local_dir is None:
+                leftovers.append(directory)
+            elif os.path.isdir(local_dir):
+                sources.append((directory, local_dir, list(leftovers)))
+
+        tmp_dir = tempfile.mkdtemp(dir=self.farm_dir, prefix="." + sub_dir)
+        os.chmod(tmp_dir, 0o755)
+        link_dir = os.path.join(self.link_dir, sub_dir)
+        if key == "LD_LIBRARY_PATH":
+            self.link_libraries(key, tmp_dir, link_dir, sources)
+        else:
+            self.link_python(key, tmp_dir, link_dir, sources)
+
+        path = os.path.join(self.farm_dir, sub_dir)
+        old_dir = None
+        if os.path.lexists(path):
+            old_dir = tempfile.mkdtemp(dir=self.farm_dir, prefix=".old")
+            os.rename(path, os.path.join(old_dir, sub_dir))
+        os.rename(tmp_dir, path)
+        if old_dir is not None:
+            shutil.rmtree(old_dir)
+        return leftovers
+
+    def is_hidden(self, name, leftovers):
+        """\
+        Check if a name is in a directory not farmed, before in the path
+        (the name is not linked, it is found in this directory)
+
+        :rtype: boolean
+        """
+        for leftover in leftovers:
+            if os.path.lexists(os.path.join(leftover, name)):
+                return True
+        return False
+
+    def add_collision(self, key, name, used, hidden):
+        if os.path.realpath(used) != os.path.realpath(hidden):
+            self.collisions[key].append((name, os.path.dirname(used),
+                                         os.path.dirname(hidden)))
+
+    def link_libraries(self, key, farm_dir, link_dir, sources):
+        """\
+        Link the shared libraries of the directories of LD_LIBRARY_PATH
+
+        :param key str: The variable
+        :param farm_dir str: The local directory of the links
+        :param link_dir str: The directory of the links, as in the environment
+        :param sources list: The farmed directories
+        """
+        linked = {}
+        for directory, local_dir, leftovers in sources:
+            for name in sorted(os.listdir(local_dir)):
+                path = os.path.join(local_dir, name)
+                if not is_shared_library(name) or os.path.isdir(path):
+                    continue
+                if name in linked:
+                    self.add_collision(key, name, linked[name], path)
+                    continue
+                linked[name] = path
+                if self.is_hidden(name, leftovers):
+                    continue
+                os.symlink(self.get_link_target(os.path.join(directory, name),
+                                                link_dir),
+                           os.path.join(farm_dir, name))
+                self.nb_links[key] += 1
+
+    def link_python(self, key, farm_dir, link_dir, sources):
+        """\
+        Link the modules and the packages of the directories of PYTHONPATH,
+        the packages merged with the next ones are merged in directories
+        of the farm
+
+        :param key str: The variable
+        :param farm_dir str: The local directory of the links
+        :param link_dir str: The directory of the links, as in the environment
+        :param sources list: The farmed directories
+        """
+        linked = {}
+        merged = {}  # name -> the merged directories
+        for directory, local_dir, leftovers in sources:
+            for name in sorted(os.listdir(local_dir)):
+                if name == "__pycache__":
+                    continue
+                path = os.path.join(local_dir, name)
+                if name in merged:
+                    if os.path.isdir(path):
+                        merged[name].append((os.path.join(directory, name),
+                                             path,
+                                             [os.path.join(l, name)
+                                              for l in leftovers]))
+                    continue
+                if name in linked:
+                    # the first __init__.py of a merged package is imported
+                    if name != "__init__.py":
+                        self.add_collision(key, name, linked[name], path)
+                    continue
+                linked[name] = path
+                if self.is_hidden(name, leftovers):
+                    continue
+                if os.path.isdir(path) and is_merged_package(path):
+                    merged[name] = [(os.path.join(directory, name), path,
+                                     [os.path.join(l, name)
+                                      for l in leftovers])]
+                    continue
+                os.symlink(self.get_link_target(os.path.join(directory, name),
+                                                link_dir),
+                           os.path.join(farm_dir, name))
+                self.nb_links[key] += 1
+        for name in merged:
+            if len(merged[name]) == 1:
+                directory, path, leftovers = merged[name][0]
+                os.symlink(self.get_link_target(directory, link_dir),
+                           os.path.join(farm_dir, name))
+                self.nb_links[key] += 1
+            else:
+                os.mkdir(os.path.join(farm_dir, name))
+                self.link_python(key,
+                                 os.path.join(farm_dir, name),
+                                 os.path.join(link_dir, name),
+                                 merged[name])
+
+    def write_report(self, logger):
+        """\
+        Write the number of links and the collisions of the farm
+
+        :param logger Logger: The logger instance
+        """
+        if self.reported:
+            return
+        self.reported = True
+        for key, sub_dir in FARM_KEYS:
+            if key not in self.nb_links:
+                continue
+            logger.write(_("Library farm %s: %i links for %s\n") % (
+                         os.path.join(self.farm_dir, sub_dir),
+                         self.nb_links[key], key), 3)
+            collisions = self.collisions[key]
+            if collisions:
+                msg = _("WARNING: %i names of %s are in several directories, "
+                        "the first one is used\n") % (len(collisions), key)
+                logger.write(src.printcolors.printcWarning(msg), 2)
+                for name, used, hidden in collisions:
+                    logger.write(_("  %s: %s (hides %s)\n") % (name, used, hidden), 3)
@@ -22,6 +22,7 @@ Implements the classes and method relative to the logging
 
 import sys
 import os
+import errno
 import stat
 import datetime
 import re
@@ -66,15 +67,9 @@ class Logger(object):
         hour_command_host = (config.VARS.datehour + "_" + 
                              config.VARS.command + "_" + 
                              config.VARS.hostname)
-        logFileName = prefix + hour_command_host + ".xml"
         log_dir = src.get_log_path(config)
-        logFilePath = os.path.join(log_dir, logFileName)
-        # Construct txt file location in order to log 
-        # the external commands calls (cmake, make, git clone, etc...)
-        txtFileName = prefix + hour_command_host + ".txt"
-        txtFilePath = os.path.join(log_dir, "OUT", txtFileName)
 
-        aDirLog = os.path.dirname(logFilePath)
+        aDirLog = log_dir
         if not os.path.exists(aDirLog):
           print("create log dir %s" % aDirLog)
           src.ensure_path_exists(aDirLog)
@@ -89,7 +84,17 @@ class Logger(object):
                    stat.S_IXUSR |
                    stat.S_IXGRP |
                    stat.S_IXOTH)
-        src.ensure_path_exists(os.path.dirname(txtFilePath))
+        src.ensure_path_exists(os.path.join(log_dir, "OUT"))
+
+        # several commands may be launched in the same second 
+        # (sat compile --jobs), each one needs its own log files
+        hour_command_host = reserve_log_name(log_dir, prefix, hour_command_host)
+        logFileName = prefix + hour_command_host + ".xml"
+        logFilePath = os.path.join(log_dir, logFileName)
+        # Construct txt file location in order to log 
+        # the external commands calls (cmake, make, git clone, etc...)
+        txtFileName = prefix + hour_command_host + ".txt"
+        txtFilePath = os.path.join(log_dir, "OUT", txtFileName)
         
         # The path of the log files (one for sat traces, and the other for 
         # the system commands traces)
@@ -339,6 +344,33 @@ class Logger(object):
         except IOError:
             pass
 
+def reserve_log_name(log_dir, prefix, hour_command_host):
+    """\
+    Get a log name that is not used by another command.
+    The txt file of the command is created exclusively to reserve the name,
+    if it already exists a counter is appended to the host name part.
+    
+    :param log_dir str: the directory of the logs
+    :param prefix str: the prefix of the log files ("micro_" or "")
+    :param hour_command_host str: the name as YYYYMMDD_HHMMSS_command_host
+    :return: the reserved name (hour_command_host or hour_command_host-<i>)
+    :rtype: str
+    """
+    name = hour_command_host
+    index = 0
+    while True:
+        txtFilePath = os.path.join(log_dir, "OUT", prefix + name + ".txt")
+        try:
+            fd = os.open(txtFilePath, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.close(fd)
+            return name
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                # not writable, the logger will use a temporary file
+                return name
+        index += 1
+        name = "%s-%i" % (hour_command_host, index)
+
 def date_to_datetime(date):
     """\
     From a string date in format YYYYMMDD_HHMMSS
@@ -23,20 +23,134 @@ relative to the product notion of salomeTools
 
 import os
 import re
+import json
+import bisect
+import hashlib
+import tempfile
+import weakref
 import pprint as PP
 
 import src
 import src.debug as DBG
 import src.versionMinorMajorPatch as VMMP
+import src.dependencyGraph as DEPG
+import src.sourceFingerprint as SFP
 
 AVAILABLE_VCS = ['git', 'svn', 'cvs']
 
 CONFIG_FILENAME = "sat-config-" # trace product depends version(s)
 PRODUCT_FILENAME = "sat-product-" # trace product compile config
-config_expression = "^config-\d+$"
+BASE_INDEX_FILENAME = "sat-base-index.json" # index of the config-<i> in base
+SOURCES_FILENAME = "sat-sources-" # fingerprint of the compiled sources
+
+# The results of get_product_config, memoized for each global config:
+#   config -> (generation, {(product, version, with_install_dir): prod_info},
+#              stamp)
+# The results are valid as long as no pyconf container is modified, except
+# by get_product_config itself (it completes the sections of the products, 
+# and it can read other pyconf files to check the base installations): 
+# the "own" generations are not counted.
+_product_config_cache = weakref.WeakKeyDictionary()
+_product_config_state = {"depth": 0, "own_generations": 0, "generation": None,
+                         "stamp": 0}
 
 def get_product_config(config, product_name, with_install_dir=True):
-    """Get the specific configuration of a product from the global configuration
+    """Get the specific configuration of a product from the global configuration.
+    The result is memoized for the config: it is computed again only if the 
+    config (or any pyconf container) was modified since, or if the cache 
+    was cleared by clear_product_config_cache.
+    Its ProductInfo record (see get_product_info) is computed too.
+    A caller which modifies the result modifies the config, so the next call 
+    computes it again, as before the memoization.
+    
+    :param config Config: The global configuration
+    :param product_name str: The name of the product
+    :param with_install_dir boolean: If false, do not provide an install 
+                                     directory (at false only for internal use 
+                                     of the function check_config_exists)
+    :return: the specific configuration of the product
+    :rtype: Config
+    """
+    # Get the version of the product from the application definition
+    version = config.APPLICATION.products[product_name]
+    key = (product_name, get_version_key(version), with_install_dir)
+
+    state = _product_config_state
+    if state["depth"] == 0:
+        generation = src.pyconf._generation - state["own_generations"]
+    else:
+        # called by get_product_config, the config is not modified
+        generation = state["generation"]
+    cached = _product_config_cache.get(config)
+    if cached is None or cached[0] != generation:
+        state["stamp"] += 1
+        cached = (generation, {}, state["stamp"])
+        _product_config_cache[config] = cached
+    if key in cached[1]:
+        return cached[1][key]
+
+    if state["depth"] == 0:
+        state["generation"] = generation
+    state["depth"] += 1
+    try:
+        prod_info = compute_product_config(config, product_name, with_install_dir)
+    finally:
+        state["depth"] -= 1
+        if state["depth"] == 0:
+            state["own_generations"] = src.pyconf._generation - generation
+    cached[1][key] = prod_info
+    if prod_info is not None and state["depth"] == 0:
+        # the compact view for the predicates
+        get_product_info(prod_info)
+    return prod_info
+
+def get_version_key(version):
+    """Get a hashable value from the version of a product in the application,
+    for the cache of get_product_config
+    
+    :param version str, bool, Mapping or dict: The version of the product 
+                                               in APPLICATION.products
+    :return: the hashable value
+    :rtype: str, bool or tuple
+    """
+    if isinstance(version, src.pyconf.Mapping):
+        return tuple([(k, str(version[k])) for k in version.keys()])
+    if isinstance(version, dict):
+        return tuple(sorted([(k, str(version[k])) for k in version]))
+    return version
+
+def clear_product_config_cache(config=None):
+    """Clear the results of get_product_config memoized for a config.
+    To call when something else than the config changes a result, 
+    for example when installation directories are removed.
+    
+    :param config Config: The global configuration, 
+                          if None the cache of all configs is cleared
+    """
+    if config is None:
+        _product_config_cache.clear()
+    elif config in _product_config_cache:
+        del _product_config_cache[config]
+
+def get_product_config_stamp(config):
+    """Get the stamp of the results of get_product_config memoized for 
+    a config: it changes each time they are computed again (the config was
+    modified or the cache was cleared). For the results memoized from them.
+    
+    :param config Config: The global configuration
+    :return: the stamp, None if no result is memoized
+    :rtype: int
+    """
+    cached = _product_config_cache.get(config)
+    if cached is None:
+        return None
+    return cached[2]
+
+config_expression = "^config-\d+$"
+
+def compute_product_config(config, product_name, with_install_dir=True):
+    """Compute the specific configuration of a product from the global 
+    configuration (get_product_config memoizes its result)
     
     :param config Config: The global configuration
     :param product_name str: The name of the product
@@ -372,6 +486,65 @@ Please provide a 'compil_script' key in its definition.""") % product_name
                 
     return prod_info
 
+class ProductSections(object):
+    """The index of the version range sections of a product definition 
+    (as 'version_1_0_0_to_2_0_0' or '_from_1_0_0_to_2_0_0'), sorted by their 
+    minimal version, to find the ranges of a version with a bisection.
+    The names of the sections are parsed only once.
+    """
+    def __init__(self, aProd):
+        """Initialization
+        
+        :param aProd Config: The product definition (in config.PRODUCTS)
+        """
+        self.keys = list(aProd.keys())
+        ranges = []
+        for position, name in enumerate(self.keys):
+            aRange = VMMP.getRange_majorMinorPatch(name)
+            if aRange is not None:
+                ranges.append((aRange[0].toList(), position, name, aRange))
+        ranges.sort()
+        self.min_versions = [r[0] for r in ranges]
+        self.ranges = [(r[1], r[2], r[3]) for r in ranges]
+
+    def is_valid(self, aProd):
+        """Check that the product definition has the sections indexed
+        
+        :param aProd Config: The product definition
+        :rtype: boolean
+        """
+        return self.keys == aProd.keys()
+
+    def get_ranges(self, versionMMP):
+        """Get the range sections that contain a version
+        
+        :param versionMMP MinorMajorPatch: The version
+        :return: the list of (name, [vmin, vmax]), in the order of the sections
+        :rtype: list
+        """
+        end = bisect.bisect_right(self.min_versions, versionMMP.toList())
+        tagged = [(position, name, aRange) 
+                  for position, name, aRange in self.ranges[:end]
+                  if versionMMP <= aRange[1]]
+        tagged.sort()
+        return [(name, aRange) for position, name, aRange in tagged]
+
+# the ProductSections of the product definitions
+_product_sections = weakref.WeakKeyDictionary()
+
+def get_product_sections(aProd):
+    """Get the index of the version range sections of a product definition,
+    built at first call, and again if the sections change
+    
+    :param aProd Config: The product definition (in config.PRODUCTS)
+    :rtype: ProductSections
+    """
+    sections = _product_sections.get(aProd)
+    if sections is None or not sections.is_valid(aProd):
+        sections = ProductSections(aProd)
+        _product_sections[aProd] = sections
+    return sections
+
 def get_product_section(config, product_name, version, section=None):
     """Build the product description from the configuration
     
@@ -423,18 +596,10 @@ def get_product_section(config, product_name, version, section=None):
 
     # Else, check if there is a description for multiple versions
     else:
-        l_section_names = aProd.keys()
-        l_section_ranges = []
+        sections = get_product_sections(aProd)
         tagged = []
-        for name in l_section_names:
-          aRange = VMMP.getRange_majorMinorPatch(name)
-          if aRange is not None:
-            l_section_ranges.append((name, aRange))
-
-        if versionMMP is not None and len(l_section_ranges) > 0:
-          for name, (vmin, vmax) in l_section_ranges:
-            if versionMMP >= vmin and versionMMP <= vmax:
-              tagged.append((name, [vmin, vmax]))
+        if versionMMP is not None:
+          tagged = sections.get_ranges(versionMMP)
 
         if len(tagged) > 1:
           DBG.write("multiple version ranges tagged for '%s', fix it" % version,
@@ -631,10 +796,20 @@ def add_compile_config_file(p_info, config):
     # Write it in the install directory of the product
     # This file is for automatic reading/checking
     # see check_config_exists method
+    # (written in a temporary file renamed, as it can be read by a 
+    # concurrent build)
     afilename = CONFIG_FILENAME + p_info.name + ".pyconf"
     aFile = os.path.join(p_info.install_dir, afilename)
-    with open(aFile, 'w') as f:
+    fd, tmp_file = tempfile.mkstemp(dir=p_info.install_dir, prefix=afilename)
+    with os.fdopen(fd, 'w') as f:
       res.__save__(f)
+    os.chmod(tmp_file, 0o644)
+    os.rename(tmp_file, aFile)
+
+    # Record it in the index of the base
+    install_dir = os.path.normpath(p_info.install_dir)
+    if re.match(config_expression, os.path.basename(install_dir)):
+      update_base_index(os.path.dirname(install_dir), p_info.name)
 
     # this file is not mandatory, is for human eye reading
     afilename = PRODUCT_FILENAME + p_info.name + ".pyconf"
@@ -648,6 +823,82 @@ def add_compile_config_file(p_info, config):
       DBG.write("Warning : sat was not able to evaluate and write down some information in file %s" % aFile)
   
 
+def get_source_fingerprint_file(p_info):
+    '''Get the path of the file which records the fingerprint of the sources
+       of a product in its install directory
+
+    :param p_info Config: The specific config of the product
+    :rtype: str
+    '''
+    return os.path.join(p_info.install_dir,
+                        SOURCES_FILENAME + p_info.name + ".json")
+
+def read_source_fingerprint(p_info):
+    '''Read the fingerprint of the sources recorded at the installation
+
+    :param p_info Config: The specific config of the product
+    :return: {"fingerprint" : str, "manifest" : dict or None}, 
+             None if there is no fingerprint recorded
+    :rtype: dict
+    '''
+    try:
+      with open(get_source_fingerprint_file(p_info)) as f:
+        record = json.load(f)
+    except (IOError, OSError, ValueError):
+      return None
+    if not isinstance(record, dict) or "fingerprint" not in record:
+      return None
+    return record
+
+def get_source_state(p_info):
+    '''Get the current fingerprint of the sources of a product.
+       The manifest recorded in the install directory is used to compute
+       the sha1 of the modified files only.
+
+    :param p_info Config: The specific config of the product
+    :return: (fingerprint, manifest), see src.sourceFingerprint.get_source_state
+    :rtype: tuple
+    '''
+    record = read_source_fingerprint(p_info)
+    previous = None
+    if record is not None:
+      previous = record.get("manifest")
+    return SFP.get_source_state(p_info.source_dir, previous)
+
+def add_source_fingerprint_file(p_info, source_state):
+    '''Record the fingerprint of the compiled sources in the install 
+       directory of a product (for sat compile --update)
+
+    :param p_info Config: The specific config of the product
+    :param source_state tuple: (fingerprint, manifest) computed before 
+                               the compilation, see get_source_state
+    '''
+    fingerprint, manifest = source_state
+    if fingerprint is None:
+      return
+    afilename = SOURCES_FILENAME + p_info.name + ".json"
+    fd, tmp_file = tempfile.mkstemp(dir=p_info.install_dir, prefix=afilename)
+    with os.fdopen(fd, 'w') as f:
+      json.dump({"fingerprint" : fingerprint, "manifest" : manifest}, f)
+    os.chmod(tmp_file, 0o644)
+    os.rename(tmp_file, get_source_fingerprint_file(p_info))
+
+def check_source_fingerprint(p_info):
+    '''Check if the sources of a product changed since its installation
+
+    :param p_info Config: The specific config of the product
+    :return: True if the sources are the compiled ones, False if they changed,
+             None if no fingerprint was recorded (older installation)
+    :rtype: boolean
+    '''
+    record = read_source_fingerprint(p_info)
+    if record is None:
+      return None
+    fingerprint, manifest = SFP.get_source_state(p_info.source_dir,
+                                                 record.get("manifest"))
+    return fingerprint == record["fingerprint"]
+
+
 def check_config_exists(config, prod_dir, prod_info, verbose=False):
     """\
     Verify that the installation directory of a product in a base exists.
@@ -665,12 +916,9 @@ def check_config_exists(config, prod_dir, prod_info, verbose=False):
     """
     # check if the directories or files of the directory corresponds to the
     # directory installation of the product
-    if os.path.isdir(prod_dir):
-      l_dir_and_files = os.listdir(prod_dir)
-    else:
+    if not os.path.isdir(prod_dir):
       raise Exception("Inexisting directory '%s'" % prod_dir)
 
-    DBG.write("check_config_exists 000",  (prod_dir, l_dir_and_files), verbose)
     DBG.write("check_config_exists 111",  prod_info, verbose)
 
     depend_all=[]
@@ -680,61 +928,247 @@ def check_config_exists(config, prod_dir, prod_info, verbose=False):
     if "build_depend" in prod_info:
         for d in prod_info.build_depend:
             depend_all.append(d)
-    for dir_or_file in l_dir_and_files:
-        oExpr = re.compile(config_expression)
-        if not(oExpr.search(dir_or_file)):
-            # in mode BASE, not config-<i>, not interesting
-            # DBG.write("not interesting", dir_or_file, True)
-            continue
-        # check if there is the file sat-config.pyconf file in the installation
-        # directory    
-        afilename = CONFIG_FILENAME + prod_info.name + ".pyconf"
-        config_file = os.path.join(prod_dir, dir_or_file, afilename)
-        DBG.write("check_config_exists 222", config_file, verbose)
-        if not os.path.exists(config_file):
-            continue
-        
-        # check if there is the config described in the file corresponds the 
-        # dependencies of the product
-        config_corresponds = True    
-        compile_cfg = src.pyconf.Config(config_file)
-        for prod_dep in depend_all:
-            # if the dependency is not in the config, 
-            # the config does not correspond
-            if prod_dep not in compile_cfg:
-                config_corresponds = False
-                break
-            else:
-                prod_dep_info = get_product_config(config, prod_dep, False)
-                # If the version of the dependency does not correspond, 
-                # the config does not correspond
-                if prod_dep_info.version != compile_cfg[prod_dep]:
-                    config_corresponds = False
-                    break
-
-        if config_corresponds:
-          for prod_name in compile_cfg:
-            # assume new compatibility with prod_name in sat-config.pyconf files
-            if prod_name == prod_info.name:
-              if prod_info.version == compile_cfg[prod_name]:
-                DBG.write("check_config_exists OK 333", compile_cfg, verbose)
-                pass
-              else: # no correspondence with newer with prod_name sat-config.pyconf files
-                config_corresponds = False
-                break
-            else:
-              # as old compatibility without prod_name sat-config.pyconf files
-              if prod_name not in depend_all:
-                # here there is an unexpected depend in an old compilation
-                config_corresponds = False
-                break
-        
-        if config_corresponds: # returns (and stops) at first correspondence found
-            DBG.write("check_config_exists OK 444", dir_or_file, verbose)
-            return True, os.path.join(prod_dir, dir_or_file)
+    versions = {}
+    for prod_dep in depend_all:
+        prod_dep_info = get_product_config(config, prod_dep, False)
+        versions[prod_dep] = prod_dep_info.version
+
+    # the config-<i> of the index, with the same versions of the product
+    # and of its dependencies (the older sat-config.pyconf files, without 
+    # the product, correspond to any version of the product)
+    keys = [get_base_index_key(prod_info.name, version, versions)
+            for version in [prod_info.version, None]]
+    index = read_base_index(prod_dir, prod_info.name)
+    if index is not None:
+        for key in keys:
+            dir_name = index["configs"].get(key)
+            if (dir_name is not None and
+                check_base_index_entry(prod_dir, dir_name,
+                                       index["entries"][dir_name])):
+                DBG.write("check_config_exists OK 444", dir_name, verbose)
+                return True, os.path.join(prod_dir, dir_name)
+
+    # not in the index, or an entry not up to date: the config-<i> 
+    # directories are read (the index is written by the installations
+    # and by sat config --index_base, not by this query)
+    index = update_base_index(prod_dir, prod_info.name, write=False)
+    for key in keys:
+        if key in index["configs"]:
+            dir_name = index["configs"][key]
+            DBG.write("check_config_exists OK 444", dir_name, verbose)
+            return True, os.path.join(prod_dir, dir_name)
 
     # no correspondence found
     return False, None
+
+def get_base_index_key(prod_name, version, versions):
+    """\
+    Get the key of the index of a product directory in base: a hash of the 
+    version of the product and of the versions of its dependencies
+    
+    :param prod_name str: The name of the product
+    :param version str: The version of the product (None for any version)
+    :param versions dict: The versions of the dependencies
+    :rtype: str
+    """
+    content = [prod_name, None if version is None else str(version),
+               sorted((str(k), str(v)) for k, v in versions.items())]
+    return hashlib.sha1(json.dumps(content).encode("utf-8")).hexdigest()
+
+def read_base_index_entry(prod_dir, dir_name, prod_name):
+    """\
+    Read the sat-config-<product>.pyconf file of a config-<i> directory 
+    to get its entry in the index of the product directory
+    
+    :param prod_dir str: The product directory in base (without config-<i>)
+    :param dir_name str: The config-<i> directory
+    :param prod_name str: The name of the product
+    :return: the status of the file and the key of the config, 
+             None if there is no file
+    :rtype: dict
+    """
+    afilename = CONFIG_FILENAME + prod_name + ".pyconf"
+    config_file = os.path.join(prod_dir, dir_name, afilename)
+    try:
+        stat = os.stat(config_file)
+    except OSError:
+        return None
+    compile_cfg = src.pyconf.Config(config_file)
+    prod_name = afilename[len(CONFIG_FILENAME):-len(".pyconf")]
+    versions = {}
+    version = None
+    for name in compile_cfg:
+        if name == prod_name:
+            version = compile_cfg[name]
+        else:
+            versions[name] = compile_cfg[name]
+    return {"file": afilename,
+            "status": [src.get_mtime_ns(stat), stat.st_size],
+            "key": get_base_index_key(prod_name, version, versions)}
+
+def read_base_index(prod_dir, prod_name):
+    """\
+    Read the index of the config-<i> directories of a product directory in 
+    base (see update_base_index)
+    
+    :param prod_dir str: The product directory in base (without config-<i>)
+    :param prod_name str: The name of the product
+    :return: the index, None if there is no index of the product
+    :rtype: dict
+    """
+    try:
+        with open(os.path.join(prod_dir, BASE_INDEX_FILENAME)) as f:
+            index = json.load(f)
+        index["entries"], index["configs"]
+    except Exception:
+        return None
+    if index.get("product") != prod_name:
+        return None
+    return index
+
+def check_base_index_entry(prod_dir, dir_name, entry):
+    """\
+    Check that an entry of the index is up to date: its sat-config file 
+    was not modified or removed since it was read
+    
+    :param prod_dir str: The product directory in base (without config-<i>)
+    :param dir_name str: The config-<i> directory
+    :param entry dict: The entry of the index
+    :rtype: boolean
+    """
+    try:
+        stat = os.stat(os.path.join(prod_dir, dir_name, entry["file"]))
+    except (OSError, KeyError):
+        return False
+    return [src.get_mtime_ns(stat), stat.st_size] == entry["status"]
+
+def update_base_index(prod_dir, prod_name, rebuild=False, write=True):
+    """\
+    Get the index of the config-<i> directories of a product directory in 
+    base, stored in its file sat-base-index.json: {"product": prod_name,
+    "entries": {config-<i> : entry}, "configs": {key : config-<i>}}.
+    Only the sat-config-<product>.pyconf files added or modified since the 
+    last update (by another sat, a concurrent build...) are read, 
+    and the file is updated atomically.
+    
+    :param prod_dir str: The product directory in base (without config-<i>)
+    :param prod_name str: The name of the product
+    :param rebuild boolean: If True, read all the sat-config files again
+    :param write boolean: If False, the index file is not updated
+    :return: the index
+    :rtype: dict
+    """
+    index_file = os.path.join(prod_dir, BASE_INDEX_FILENAME)
+    index = None
+    if not rebuild:
+        index = read_base_index(prod_dir, prod_name)
+    if index is None:
+        index = {"entries": {}}
+    old_product = index.get("product")
+    old_entries = index["entries"]
+
+    oExpr = re.compile(config_expression)
+    entries = {}
+    for dir_name in os.listdir(prod_dir):
+        if not oExpr.search(dir_name):
+            # in mode BASE, not config-<i>, not interesting
+            continue
+        entry = old_entries.get(dir_name)
+        if (entry is not None and 
+            not check_base_index_entry(prod_dir, dir_name, entry)):
+            entry = None
+        if entry is None:
+            entry = read_base_index_entry(prod_dir, dir_name, prod_name)
+        if entry is not None:
+            entries[dir_name] = entry
+
+    # the first config-<i> of a key
+    configs = {}
+    for dir_name in sorted(entries, key=lambda d: int(d.split("-")[1])):
+        configs.setdefault(entries[dir_name]["key"], dir_name)
+    index = {"product": prod_name, "entries": entries, "configs": configs}
+
+    if write and (entries != old_entries or old_product != prod_name):
+        try:
+            fd, tmp_file = tempfile.mkstemp(dir=prod_dir, prefix=BASE_INDEX_FILENAME)
+            with os.fdopen(fd, "w") as f:
+                json.dump(index, f, indent=1, sort_keys=True)
+            os.chmod(tmp_file, 0o644)
+            os.rename(tmp_file, index_file)
+        except (OSError, IOError) as e:
+            # a base read only for the user, the index is not stored
+            DBG.write("cannot write the index of the base %s" % prod_dir, str(e))
+    return index
+
+def get_base_product_name(prod_dir):
+    """\
+    Get the name of the product of a product directory in base: the name 
+    recorded in its index, or the name of the sat-config-<product>.pyconf 
+    files of its config-<i> directories
+    
+    :param prod_dir str: The product directory in base (without config-<i>)
+    :return: the name of the product, None if it is not found
+    :rtype: str
+    """
+    try:
+        with open(os.path.join(prod_dir, BASE_INDEX_FILENAME)) as f:
+            prod_name = json.load(f).get("product")
+        if prod_name:
+            return prod_name
+    except Exception:
+        pass
+    oExpr = re.compile(config_expression)
+    names = set()
+    for dir_name in os.listdir(prod_dir):
+        if not oExpr.search(dir_name):
+            continue
+        try:
+            l_files = os.listdir(os.path.join(prod_dir, dir_name))
+        except OSError:
+            continue
+        for afilename in l_files:
+            if (afilename.startswith(CONFIG_FILENAME) and 
+                afilename.endswith(".pyconf")):
+                names.add(afilename[len(CONFIG_FILENAME):-len(".pyconf")])
+    if len(names) == 1:
+        return names.pop()
+    # several products: the one of the directory <product>-<version> 
+    # or apps/<base>/<product>/<version>
+    for name in sorted(names):
+        if (os.path.basename(prod_dir).startswith(name + "-") or
+            os.path.basename(os.path.dirname(prod_dir)) == name):
+            return name
+    return None
+
+def rebuild_base_index(base_path, logger=None):
+    """\
+    Rebuild the index files of all the product directories of a base
+    
+    :param base_path str: The path of the base
+    :param logger Logger: The logger instance to display messages
+    :return: the number of product directories indexed
+    :rtype: int
+    """
+    nb = 0
+    oExpr = re.compile(config_expression)
+    for prod_dir_name in sorted(os.listdir(base_path)):
+        prod_dir = os.path.join(base_path, prod_dir_name)
+        if not os.path.isdir(prod_dir):
+            continue
+        if not [d for d in os.listdir(prod_dir) if oExpr.search(d)]:
+            continue
+        prod_name = get_base_product_name(prod_dir)
+        if prod_name is None:
+            if logger is not None:
+                logger.write("%s: %s\n" % (prod_dir_name, 
+                             _("the product is not found, not indexed")), 3)
+            continue
+        index = update_base_index(prod_dir, prod_name, rebuild=True)
+        nb += 1
+        if logger is not None:
+            logger.write("%s: %d config(s)\n" % 
+                         (prod_dir_name, len(index["entries"])), 3)
+    return nb
             
             
     
@@ -819,6 +1253,39 @@ def get_products_list(options, cfg, logger):
     return res
 
 
+# The dependency graphs of the applications, for each config:
+#   config -> {compile_time: (dependencies, DependencyGraph)}
+_dependencies_graph_cache = weakref.WeakKeyDictionary()
+
+def get_dependencies_graph(config, compile_time=True):
+    """\
+    Get the graph of the dependencies of the products of the application.
+    The graph (and the recursive dependencies it computes) is shared by 
+    the callers as long as the dependencies of the products are the same.
+    
+    :param config Config: The global configuration
+    :param compile_time boolean: If True, the build dependencies 
+                                 (build_depend) are in the graph
+    :rtype: DependencyGraph
+    """
+    all_products_infos = get_products_infos(config.APPLICATION.products,
+                                            config)
+    dependencies = []
+    for p_name, p_info in all_products_infos:
+        depprod = list(p_info.depend)
+        if compile_time and "build_depend" in p_info:
+            depprod += list(p_info.build_depend)
+        dependencies.append((p_name, depprod))
+
+    cached = _dependencies_graph_cache.setdefault(config, {})
+    if compile_time in cached and cached[compile_time][0] == dependencies:
+        return cached[compile_time][1]
+    graph = DEPG.DependencyGraph()
+    for p_name, depprod in dependencies:
+        graph.add_node(p_name, depprod)
+    cached[compile_time] = (dependencies, graph)
+    return graph
+
 def get_product_dependencies(config, product_name, product_info):
     """\
     Get the list of products that are 
@@ -830,14 +1297,7 @@ def get_product_dependencies(config, product_name, product_info):
     :return: the list of products in dependence
     :rtype: list
     """
-    from compile import get_dependencies_graph, depth_search_graph
-    all_products_infos = get_products_infos(
-                             config.APPLICATION.products,
-                             config)
-    all_products_graph=get_dependencies_graph(all_products_infos)
-    res=[]
-    res=depth_search_graph(all_products_graph, product_name, res)
-    return res[1:]  # remove the product himself (in first position)
+    return get_dependencies_graph(config).get_all_dependencies(product_name)
 
 def check_installation(config, product_info):
     """\
@@ -911,6 +1371,237 @@ def check_source(product_info):
                 return False
     return True
 
+# The computation of the flags of ProductInfo from the configuration
+# of a product (the former bodies of the predicates)
+def _compute_salome(product_info):
+    return ("properties" in product_info and
+            "is_SALOME_module" in product_info.properties and
+            product_info.properties.is_SALOME_module == "yes")
+
+def _compute_fixed(product_info):
+    get_src = product_info.get_source
+    return get_src.lower() == 'fixed'
+
+def _compute_native(product_info):
+    get_src = product_info.get_source
+    return get_src.lower() == 'native'
+
+def _compute_dev(product_info):
+    dev = product_info.dev
+    return (dev.lower() == 'yes')
+
+def _compute_hpc(product_info):
+    hpc = product_info.hpc
+    res = (hpc.lower() == 'yes')
+    return res
+
+def _compute_debug(product_info):
+    debug = product_info.debug
+    return debug.lower() == 'yes'
+
+def _compute_verbose(product_info):
+    verbose = product_info.verbose
+    return verbose.lower() == 'yes'
+
+def _compute_autotools(product_info):
+    build_src = product_info.build_source
+    return build_src.lower() == 'autotools'
+
+def _compute_cmake(product_info):
+    build_src = product_info.build_source
+    return build_src.lower() == 'cmake'
+
+def _compute_vcs(product_info):
+    return product_info.get_source in AVAILABLE_VCS
+
+def _compute_smesh_plugin(product_info):
+    return ("properties" in product_info and
+            "smesh_plugin" in product_info.properties and
+            product_info.properties.smesh_plugin == "yes")
+
+def _compute_cpp(product_info):
+    return ("properties" in product_info and
+            "cpp" in product_info.properties and
+            product_info.properties.cpp == "yes")
+
+def _compute_compiles(product_info):
+    return not("properties" in product_info and
+            "compilation" in product_info.properties and
+            product_info.properties.compilation == "no")
+
+def _compute_has_script(product_info):
+    if "build_source" not in product_info:
+        # Native case
+        return False
+    build_src = product_info.build_source
+    return build_src.lower() == 'script'
+
+def _compute_has_env_script(product_info):
+    return "environ" in product_info and "env_script" in product_info.environ
+
+def _compute_logo(product_info):
+    if ("properties" in product_info and
+            "logo" in product_info.properties):
+        return product_info.properties.logo
+    else:
+        return False
+
+def _compute_has_salome_gui(product_info):
+    return ("properties" in product_info and
+            "has_salome_gui" in product_info.properties and
+            product_info.properties.has_salome_gui == "yes")
+
+def _compute_mpi(product_info):
+    return "openmpi" in product_info.depend
+
+def _compute_generated(product_info):
+    return ("properties" in product_info and
+            "generate" in product_info.properties and
+            product_info.properties.generate == "yes")
+
+def _compute_compile_time(product_info):
+    return ("properties" in product_info and
+            "compile_time" in product_info.properties and
+            product_info.properties.compile_time == "yes")
+
+def _compute_compile_and_runtime(product_info):
+    return ("properties" in product_info and
+            "compile_and_runtime" in product_info.properties and
+            product_info.properties.compile_and_runtime == "yes")
+
+def _compute_wheel(product_info):
+    return ("properties" in product_info and
+            "is_wheel" in product_info.properties and
+            product_info.properties.is_wheel == "yes")
+
+_PRODUCT_FLAGS = [
+    ("salome", _compute_salome),
+    ("fixed", _compute_fixed),
+    ("native", _compute_native),
+    ("dev", _compute_dev),
+    ("hpc", _compute_hpc),
+    ("debug", _compute_debug),
+    ("verbose", _compute_verbose),
+    ("autotools", _compute_autotools),
+    ("cmake", _compute_cmake),
+    ("vcs", _compute_vcs),
+    ("smesh_plugin", _compute_smesh_plugin),
+    ("cpp", _compute_cpp),
+    ("compiles", _compute_compiles),
+    ("has_script", _compute_has_script),
+    ("has_env_script", _compute_has_env_script),
+    ("logo", _compute_logo),
+    ("has_salome_gui", _compute_has_salome_gui),
+    ("mpi", _compute_mpi),
+    ("generated", _compute_generated),
+    ("compile_time", _compute_compile_time),
+    ("compile_and_runtime", _compute_compile_and_runtime),
+    ("wheel", _compute_wheel),
+]
+_PRODUCT_FLAG_COMPUTES = dict(_PRODUCT_FLAGS)
+# the flags which keep their value (the path of the logo), not a boolean
+_PRODUCT_VALUE_FLAGS = set(["logo"])
+
+# The ProductInfo records of the product configurations:
+#   id(product_info) -> (weak reference to product_info, ProductInfo)
+# (a dict by id is faster than a WeakKeyDictionary, the predicates are 
+# called very often)
+_product_infos = {}
+
+class ProductInfo(object):
+    """\
+    A compact view of the configuration of a product, for the 
+    product_is_* / product_has_* predicates: the flags are computed once 
+    from the product configuration, with its resolved paths, dependencies 
+    and properties. The record is valid as long as no pyconf container is 
+    modified (a caller which modifies the product configuration gets a new 
+    record at next call).
+    A flag or a field is None if it cannot be computed (as a missing key):
+    the predicate computes it again from the configuration, and raises 
+    the same error as before.
+    """
+    __slots__ = (["generation", "name", "version", "install_dir", 
+                  "source_dir", "build_dir", "depend", "properties"] +
+                 ["is_" + flag for flag, compute in _PRODUCT_FLAGS])
+
+    def __init__(self, product_info):
+        """Initialization
+        
+        :param product_info Config: The configuration specific to 
+                                   the product
+        """
+        self.generation = src.pyconf._generation
+        for flag, compute in _PRODUCT_FLAGS:
+            try:
+                value = compute(product_info)
+                if flag not in _PRODUCT_VALUE_FLAGS:
+                    value = bool(value)
+            except Exception:
+                value = None
+            setattr(self, "is_" + flag, value)
+        for key in ["name", "version", "install_dir", "source_dir", "build_dir"]:
+            try:
+                value = product_info[key] if key in product_info else None
+            except Exception:
+                value = None
+            setattr(self, key, value)
+        try:
+            self.depend = tuple(product_info.depend)
+        except Exception:
+            self.depend = None
+        try:
+            if "properties" in product_info:
+                properties = product_info.properties
+                self.properties = dict((k, properties[k]) for k in properties.keys())
+            else:
+                self.properties = {}
+        except Exception:
+            self.properties = None
+
+    def __repr__(self):
+        """easy almost exhaustive quick resume for debug print"""
+        res = dict((k, getattr(self, k)) for k in self.__slots__)
+        return "%s(\n%s\n)" % (self.__class__.__name__, PP.pformat(res))
+
+def get_product_info(product_info):
+    """\
+    Get the ProductInfo record of a product configuration, 
+    computed again if a pyconf container was modified since
+    
+    :param product_info Config: The configuration specific to 
+                               the product
+    :rtype: ProductInfo
+    """
+    key = id(product_info)
+    entry = _product_infos.get(key)
+    if (entry is not None and entry[0]() is product_info and
+        entry[1].generation == src.pyconf._generation):
+        return entry[1]
+    record = ProductInfo(product_info)
+    try:
+        ref = weakref.ref(product_info, 
+                          lambda r, key=key: _product_infos.pop(key, None))
+    except TypeError:
+        # not a pyconf configuration (no weak reference)
+        return record
+    _product_infos[key] = (ref, record)
+    return record
+
+def _get_product_flag(product_info, flag):
+    """\
+    Get a flag of the ProductInfo record of a product configuration
+    (computed from the configuration if the record cannot)
+    
+    :param product_info Config: The configuration specific to 
+                               the product
+    :param flag str: The flag, as "native"
+    :rtype: boolean (the value of the flags of _PRODUCT_VALUE_FLAGS)
+    """
+    value = getattr(get_product_info(product_info), "is_" + flag)
+    if value is None:
+        return _PRODUCT_FLAG_COMPUTES[flag](product_info)
+    return value
+
 def product_is_salome(product_info):
     """Know if a product is a SALOME module
     
@@ -919,9 +1610,7 @@ def product_is_salome(product_info):
     :return: True if the product is a SALOME module, else False
     :rtype: boolean
     """
-    return ("properties" in product_info and
-            "is_SALOME_module" in product_info.properties and
-            product_info.properties.is_SALOME_module == "yes")
+    return _get_product_flag(product_info, "salome")
 
 def product_is_fixed(product_info):
     """Know if a product is fixed
@@ -931,8 +1620,7 @@ def product_is_fixed(product_info):
     :return: True if the product is fixed, else False
     :rtype: boolean
     """
-    get_src = product_info.get_source
-    return get_src.lower() == 'fixed'
+    return _get_product_flag(product_info, "fixed")
 
 def product_is_native(product_info):
     """Know if a product is native
@@ -942,8 +1630,7 @@ def product_is_native(product_info):
     :return: True if the product is native, else False
     :rtype: boolean
     """
-    get_src = product_info.get_source
-    return get_src.lower() == 'native'
+    return _get_product_flag(product_info, "native")
 
 def product_is_dev(product_info):
     """Know if a product is in dev mode
@@ -953,8 +1640,7 @@ def product_is_dev(product_info):
     :return: True if the product is in dev mode, else False
     :rtype: boolean
     """
-    dev = product_info.dev
-    res = (dev.lower() == 'yes')
+    res = _get_product_flag(product_info, "dev")
     DBG.write('product_is_dev %s' % product_info.name, res)
     # if product_info.name == "XDATA": return True #test #10569
     return res
@@ -967,9 +1653,7 @@ def product_is_hpc(product_info):
     :return: True if the product is in hpc mode, else False
     :rtype: boolean
     """
-    hpc = product_info.hpc
-    res = (hpc.lower() == 'yes')
-    return res
+    return _get_product_flag(product_info, "hpc")
 
 def product_is_debug(product_info):
     """Know if a product is in debug mode
@@ -979,8 +1663,7 @@ def product_is_debug(product_info):
     :return: True if the product is in debug mode, else False
     :rtype: boolean
     """
-    debug = product_info.debug
-    return debug.lower() == 'yes'
+    return _get_product_flag(product_info, "debug")
 
 def product_is_verbose(product_info):
     """Know if a product is in verbose mode
@@ -990,8 +1673,7 @@ def product_is_verbose(product_info):
     :return: True if the product is in verbose mode, else False
     :rtype: boolean
     """
-    verbose = product_info.verbose
-    return verbose.lower() == 'yes'
+    return _get_product_flag(product_info, "verbose")
 
 def product_is_autotools(product_info):
     """Know if a product is compiled using the autotools
@@ -1001,8 +1683,7 @@ def product_is_autotools(product_info):
     :return: True if the product is autotools, else False
     :rtype: boolean
     """
-    build_src = product_info.build_source
-    return build_src.lower() == 'autotools'
+    return _get_product_flag(product_info, "autotools")
 
 def product_is_cmake(product_info):
     """Know if a product is compiled using the cmake
@@ -1012,8 +1693,7 @@ def product_is_cmake(product_info):
     :return: True if the product is cmake, else False
     :rtype: boolean
     """
-    build_src = product_info.build_source
-    return build_src.lower() == 'cmake'
+    return _get_product_flag(product_info, "cmake")
 
 def product_is_vcs(product_info):
     """Know if a product is download using git, svn or cvs (not archive)
@@ -1023,7 +1703,7 @@ def product_is_vcs(product_info):
     :return: True if the product is vcs, else False
     :rtype: boolean
     """
-    return product_info.get_source in AVAILABLE_VCS
+    return _get_product_flag(product_info, "vcs")
 
 def product_is_smesh_plugin(product_info):
     """Know if a product is a SMESH plugin
@@ -1033,9 +1713,7 @@ def product_is_smesh_plugin(product_info):
     :return: True if the product is a SMESH plugin, else False
     :rtype: boolean
     """
-    return ("properties" in product_info and
-            "smesh_plugin" in product_info.properties and
-            product_info.properties.smesh_plugin == "yes")
+    return _get_product_flag(product_info, "smesh_plugin")
 
 def product_is_cpp(product_info):
     """Know if a product is cpp
@@ -1045,9 +1723,7 @@ def product_is_cpp(product_info):
     :return: True if the product is a cpp, else False
     :rtype: boolean
     """
-    return ("properties" in product_info and
-            "cpp" in product_info.properties and
-            product_info.properties.cpp == "yes")
+    return _get_product_flag(product_info, "cpp")
 
 def product_compiles(product_info):
     """\
@@ -1059,9 +1735,7 @@ def product_compiles(product_info):
     :return: True if the product compiles, else False
     :rtype: boolean
     """
-    return not("properties" in product_info and
-            "compilation" in product_info.properties and
-            product_info.properties.compilation == "no")
+    return _get_product_flag(product_info, "compiles")
 
 def product_has_script(product_info):
     """Know if a product has a compilation script
@@ -1071,11 +1745,7 @@ def product_has_script(product_info):
     :return: True if the product it has a compilation script, else False
     :rtype: boolean
     """
-    if "build_source" not in product_info:
-        # Native case
-        return False
-    build_src = product_info.build_source
-    return build_src.lower() == 'script'
+    return _get_product_flag(product_info, "has_script")
 
 def product_has_env_script(product_info):
     """Know if a product has an environment script
@@ -1085,7 +1755,7 @@ def product_has_env_script(product_info):
     :return: True if the product it has an environment script, else False
     :rtype: boolean
     """
-    return "environ" in product_info and "env_script" in product_info.environ
+    return _get_product_flag(product_info, "has_env_script")
 
 def product_has_patches(product_info):
     """Know if a product has one or more patches
@@ -1106,11 +1776,7 @@ def product_has_logo(product_info):
     :return: The path of the logo if the product has a logo, else False
     :rtype: Str
     """
-    if ("properties" in product_info and
-            "logo" in product_info.properties):
-        return product_info.properties.logo
-    else:
-        return False
+    return _get_product_flag(product_info, "logo")
 
 def product_has_licence(product_info, path):
     """Find out if a product has a licence
@@ -1148,9 +1814,7 @@ def product_has_salome_gui(product_info):
     :return: True if the product has a SALOME gui, else False
     :rtype: Boolean
     """
-    return ("properties" in product_info and
-            "has_salome_gui" in product_info.properties and
-            product_info.properties.has_salome_gui == "yes")
+    return _get_product_flag(product_info, "has_salome_gui")
 
 def product_is_mpi(product_info):
     """Know if a product has openmpi in its dependencies
@@ -1160,7 +1824,7 @@ def product_is_mpi(product_info):
     :return: True if the product has openmpi inits dependencies
     :rtype: boolean
     """
-    return "openmpi" in product_info.depend
+    return _get_product_flag(product_info, "mpi")
 
 def product_is_generated(product_info):
     """Know if a product is generated (YACSGEN)
@@ -1170,9 +1834,7 @@ def product_is_generated(product_info):
     :return: True if the product is generated
     :rtype: boolean
     """
-    return ("properties" in product_info and
-            "generate" in product_info.properties and
-            product_info.properties.generate == "yes")
+    return _get_product_flag(product_info, "generated")
 
 def product_is_compile_time(product_info):
     """Know if a product is only used at compile time
@@ -1182,9 +1844,7 @@ def product_is_compile_time(product_info):
     :return: True if the product is only used at compile time
     :rtype: boolean
     """
-    return ("properties" in product_info and
-            "compile_time" in product_info.properties and
-            product_info.properties.compile_time == "yes")
+    return _get_product_flag(product_info, "compile_time")
 
 def product_is_compile_and_runtime(product_info):
     """Know if a product is only used at compile time
@@ -1194,9 +1854,7 @@ def product_is_compile_and_runtime(product_info):
     :return: True if the product is only used at compile time
     :rtype: boolean
     """
-    return ("properties" in product_info and
-            "compile_and_runtime" in product_info.properties and
-            product_info.properties.compile_and_runtime == "yes")
+    return _get_product_flag(product_info, "compile_and_runtime")
 
 
 
@@ -1210,6 +1868,11 @@ def product_test_property(product_info, property_name, property_value):
     :return: True if the product has the property and the property is set to property_value
     :rtype: boolean
     """
+    properties = get_product_info(product_info).properties
+    if properties is not None:
+        return (property_name in properties and 
+                properties[property_name] == property_value)
+
     # first check if product has the property
     if not ("properties" in product_info and
             property_name in product_info.properties):
@@ -1220,15 +1883,15 @@ def product_test_property(product_info, property_name, property_value):
     result = eval(eval_expression)
     return result
 
-def check_system_dep(distrib, check_cmd, product_info):
-    """Search for system dependencies, check if installed
+def get_system_dep(distrib, check_cmd, product_info):
+    """Get the system dependencies of a product
     :param dist : The linux ditribution (CO7,DB10...)
     :param check_cmd Config: The command to use for checking (rpm/apt)
     :param product_info Config: The configuration specific to the product
-    :rtype: two dictionnaries for runtime and compile time dependencies with text status
+    :rtype: two lists of packages for runtime and compile time dependencies
     """
-    runtime_dep={}
-    build_dep={}
+    runtime_dep=[]
+    build_dep=[]
 
     if "system_info" in product_info:
 
@@ -1239,37 +1902,32 @@ def check_system_dep(distrib, check_cmd, product_info):
             if distrib in key :
                 additional_sysinfo = sysinfo[key]
 
-        if check_cmd[0]=="rpm":
-            if "rpm" in sysinfo:
-                for pkg in sysinfo.rpm:
-                    runtime_dep[pkg]=src.system.check_system_pkg(check_cmd,pkg)
-            if "rpm_dev" in sysinfo:
-                for pkg in sysinfo.rpm_dev:
-                    build_dep[pkg]=src.system.check_system_pkg(check_cmd,pkg)
-            if additional_sysinfo :
-                if "rpm" in additional_sysinfo:
-                    for pkg in additional_sysinfo.rpm:
-                        runtime_dep[pkg]=src.system.check_system_pkg(check_cmd,pkg)
-                if "rpm_dev" in additional_sysinfo:
-                    for pkg in additional_sysinfo.rpm_dev:
-                        build_dep[pkg]=src.system.check_system_pkg(check_cmd,pkg)
-        if check_cmd[0]=="apt":
-            if "apt" in sysinfo:
-                for pkg in sysinfo.apt:
-                    runtime_dep[pkg]=src.system.check_system_pkg(check_cmd,pkg)
-            if "apt_dev" in sysinfo:
-                for pkg in sysinfo.apt_dev:
-                    build_dep[pkg]=src.system.check_system_pkg(check_cmd,pkg)
-            if additional_sysinfo :
-                if "apt" in additional_sysinfo:
-                    for pkg in additional_sysinfo.apt:
-                        runtime_dep[pkg]=src.system.check_system_pkg(check_cmd,pkg)
-                if "apt_dev" in additional_sysinfo:
-                    for pkg in additional_sysinfo.apt_dev:
-                        build_dep[pkg]=src.system.check_system_pkg(check_cmd,pkg)
+        pkgmgr=check_cmd[0]
+        if pkgmgr in ["rpm", "apt"]:
+            for info in [sysinfo, additional_sysinfo]:
+                if not info:
+                    continue
+                if pkgmgr in info:
+                    runtime_dep.extend(info[pkgmgr])
+                if pkgmgr + "_dev" in info:
+                    build_dep.extend(info[pkgmgr + "_dev"])
 
     return runtime_dep,build_dep
 
+def check_system_dep(distrib, check_cmd, product_info):
+    """Search for system dependencies, check if installed
+    (with one query of the package manager for the packages not checked yet)
+    :param dist : The linux ditribution (CO7,DB10...)
+    :param check_cmd Config: The command to use for checking (rpm/apt)
+    :param product_info Config: The configuration specific to the product
+    :rtype: two dictionnaries for runtime and compile time dependencies with text status
+    """
+    runtime_pkgs,build_pkgs=get_system_dep(distrib, check_cmd, product_info)
+    status=src.system.check_system_pkgs(check_cmd, runtime_pkgs + build_pkgs)
+    runtime_dep=dict((pkg, status[pkg]) for pkg in runtime_pkgs)
+    build_dep=dict((pkg, status[pkg]) for pkg in build_pkgs)
+    return runtime_dep,build_dep
+
 
 def get_product_components(product_info):
     """Get the component list to generate with the product
@@ -1299,7 +1957,5 @@ def product_is_wheel(product_info):
     :return: True if the product has a wheel, else False
     :rtype: Boolean
     """
-    return ("properties" in product_info and
-            "is_wheel" in product_info.properties and
-            product_info.properties.is_wheel == "yes")
+    return _get_product_flag(product_info, "wheel")
 
@@ -115,6 +115,7 @@ __date__    = "05 October 2007"
 
 import codecs
 import os
+import re
 import sys
 
 WORD = 'a'
@@ -201,32 +202,27 @@ class ConfigInputStream(object):
         self.stream = stream
         self.encoding = encoding
 
-    def read(self, size):
-        if (size == 0) or (self.encoding is None):
+    def read(self, size=-1):
+        if (size <= 0) or (self.encoding is None):
             rv = self.stream.read(size)
         else:
+            # the codecs reader returns at most size characters
             rv = u''
             while size > 0:
-                rv += self.stream.read(1)
-                size -= 1
+                chars = self.stream.read(chars=size)
+                if not chars:
+                    break
+                rv += chars
+                size -= len(chars)
         return rv
 
     def close(self):
         self.stream.close()
 
     def readline(self):
-        if self.encoding is None:
-            line = ''
-        else:
-            line = u''
-        while True:
-            c = self.stream.read(1)
-            if isinstance(c, bytes):
-                c = c.decode()
-            if c:
-                line += c
-            if c == '\n':
-                break
+        line = self.stream.readline()
+        if isinstance(line, bytes):
+            line = line.decode()
         return line
 
 class ConfigOutputStream(object):
@@ -296,6 +292,19 @@ streamOpener = None
 
 __resolveOverwrite__ = True
 
+# The generation of the configurations, incremented each time a container
+# is modified. The values of references and expressions memoized by the
+# containers are valid only for the generation in which they were computed.
+_generation = 0
+
+def nextGeneration():
+    """
+    Invalidate all the values of references and expressions memoized
+    by the containers. Called each time a container is modified.
+    """
+    global _generation
+    _generation += 1
+
 class ConfigError(Exception):
     """
     This is the base class of exceptions raised by this module.
@@ -386,6 +395,17 @@ class Container(object):
         @type parent: A L{Container} instance.
         """
         object.__setattr__(self, 'parent', parent)
+        # the memoized values: key -> (generation, value)
+        object.__setattr__(self, 'resolved', {})
+
+    def __getstate__(self):
+        """
+        Get the state to pickle (the memoized values are dropped,
+        the generations are only meaningful in this process).
+        """
+        state = self.__dict__.copy()
+        state['resolved'] = {}
+        return state
 
     def setPath(self, path):
         """
@@ -396,7 +416,7 @@ class Container(object):
         """
         object.__setattr__(self, 'path', path)
 
-    def evaluate(self, item):
+    def evaluate(self, item, key=None):
         """
         Evaluate items which are instances of L{Reference} or L{Expression}.
 
@@ -404,15 +424,36 @@ class Container(object):
         and L{Expression} instances are evaluated using
         L{Expression.evaluate}.
 
+        If a key is given, the value is memoized until a container
+        is modified (see L{nextGeneration}), except for the backtick
+        references which are evaluated each time.
+
         @param item: The item to be evaluated.
         @type item: any
+        @param key: The key (or index) of the item in this container.
+        @type key: str or int
         @return: If the item is an instance of L{Reference} or L{Expression},
         the evaluated value is returned, otherwise the item is returned
         unchanged.
         """
+        if not isinstance(item, (Reference, Expression)):
+            return item
+        if key is not None and item.memoizable:
+            resolved = object.__getattribute__(self, 'resolved')
+            generation = _generation
+            if key in resolved:
+                rv = resolved[key]
+                if rv[0] == generation:
+                    return rv[1]
+            if isinstance(item, Reference):
+                item = item.resolve(self)
+            else:
+                item = item.evaluate(self)
+            resolved[key] = (generation, item)
+            return item
         if isinstance(item, Reference):
             item = item.resolve(self)
-        elif isinstance(item, Expression):
+        else:
             item = item.evaluate(self)
         return item
 
@@ -477,13 +518,16 @@ class Mapping(Container):
         del data[key]
         order.remove(key)
         del comments[key]
+        nextGeneration()
 
     def __getitem__(self, key):
         data = object.__getattribute__(self, 'data')
         if key not in data:
             raise AttributeError("Unknown pyconf key: '%s'" % key)
         rv = data[key]
-        return self.evaluate(rv)
+        if isinstance(rv, LazyConfig):
+            rv = self.loadLazyConfig(key, rv)
+        return self.evaluate(rv, key)
 
     __getattr__ = __getitem__
     
@@ -513,7 +557,42 @@ class Mapping(Container):
 
     def __contains__(self, item):
         order = object.__getattribute__(self, 'order')
-        return item in order
+        if item not in order:
+            return False
+        data = object.__getattribute__(self, 'data')
+        if isinstance(data[item], LazyConfig):
+            # a file in error is removed when it is read
+            try:
+                self.loadLazyConfig(item, data[item])
+            except AttributeError:
+                return False
+        return True
+
+    def loadLazyConfig(self, key, lazy):
+        """
+        Read the file of a L{LazyConfig} value and replace the value
+        by the configuration read. If the file is in error, a warning
+        is written and the key is removed.
+
+        @param key: The key of the value.
+        @type key: str
+        @param lazy: The value.
+        @type lazy: L{LazyConfig}
+        @return: the configuration read.
+        @rtype: L{Config}
+        @raise AttributeError: If the file is in error.
+        """
+        data = object.__getattribute__(self, 'data')
+        try:
+            cfg = lazy.load()
+        except Exception as e:
+            sys.stdout.write(lazy.error_message + str(e))
+            self.__delitem__(key)
+            raise AttributeError("Unknown pyconf key: '%s'" % key)
+        object.__setattr__(cfg, 'parent', self)
+        data[key] = cfg
+        nextGeneration()
+        return cfg
 
     def addMapping(self, key, value, comment, setting=False):
         """
@@ -540,6 +619,7 @@ class Mapping(Container):
         elif not setting:
             raise ConfigFormatError("repeated key: %s" % key)
         comments[key] = comment
+        nextGeneration()
 
     def __setattr__(self, name, value):
         self.addMapping(name, value, None, True)
@@ -611,7 +691,10 @@ class Mapping(Container):
         order = object.__getattribute__(self, 'order')
         data = object.__getattribute__(self, 'data')
         maxlen = 0 # max(map(lambda x: len(x), order))
-        for key in order:
+        for key in list(order):
+            if key not in self:
+                # LazyConfig in error
+                continue
             comment = self.comments[key]
             if isWord(key):
                 skey = key
@@ -628,21 +711,35 @@ class Mapping(Container):
             else:
                 self.writeValue(value, stream, indent, evaluated=evaluated)
 
+class Namespace(object):
+    """
+    This internal class is used for implementing default namespaces.
+
+    An instance acts as a namespace. The class is defined at module level,
+    to be pickled with python 2 (see Config.Namespace).
+    """
+    def __init__(self):
+        self.sys = sys
+        self.os = os
+
+    def __getstate__(self):
+        # modules can't be pickled, __setstate__ sets them again
+        state = self.__dict__.copy()
+        del state['sys']
+        del state['os']
+        return state
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.__dict__.update(state)
+
 class Config(Mapping):
     """
     This class represents a configuration, and is the only one which clients
     need to interface to, under normal circumstances.
     """
 
-    class Namespace(object):
-        """
-        This internal class is used for implementing default namespaces.
-
-        An instance acts as a namespace.
-        """
-        def __init__(self):
-            self.sys = sys
-            self.os = os
+    Namespace = Namespace
 
     def __init__(self, streamOrFile=None, parent=None, PWD = None):
         """
@@ -712,6 +809,7 @@ class Config(Mapping):
             namespaces.append(ns)
         else:
             setattr(namespaces[0], name, ns)
+        nextGeneration()
 
     def removeNamespace(self, ns, name=None):
         """
@@ -726,6 +824,7 @@ class Config(Mapping):
             namespaces.remove(ns)
         else:
             delattr(namespaces[0], name)
+        nextGeneration()
 
     def __save__(self, stream, indent=0, no_close=False, evaluated=False):
         """
@@ -756,6 +855,44 @@ class Config(Mapping):
         except Exception as e:
             raise ConfigError(str(e))
 
+class LazyConfig(object):
+    """
+    This class implements a value which is a configuration read from a file
+    only when it is first accessed (specific to salomeTools, for the
+    products configurations). The L{Mapping} which contains it replaces it
+    with the configuration read.
+    """
+    def __init__(self, path, PWD=None, error_message=""):
+        """
+        Initialize an instance.
+
+        @param path: The path of the file to read.
+        @type path: str
+        @param PWD: The PWD argument of L{Config}.
+        @type PWD: tuple
+        @param error_message: The beginning of the warning written
+        if the file is in error (the error is appended).
+        @type error_message: str
+        """
+        self.path = path
+        self.PWD = PWD
+        self.error_message = error_message
+
+    def load(self):
+        """
+        Read the file.
+
+        @return: The configuration read, with the path of the file
+        in its from_file key.
+        @rtype: L{Config}
+        """
+        cfg = Config(open(self.path), PWD=self.PWD)
+        cfg.from_file = self.path
+        return cfg
+
+    def __repr__(self):
+        return "<LazyConfig %s>" % self.path
+
 class Sequence(Container):
     """
     This internal class implements a value which is a sequence of other values.
@@ -811,6 +948,7 @@ class Sequence(Container):
         comments = object.__getattribute__(self, 'comments')
         data.append(item)
         comments.append(comment)
+        nextGeneration()
 
     def __getitem__(self, index):
         data = object.__getattribute__(self, 'data')
@@ -819,7 +957,7 @@ class Sequence(Container):
         except (IndexError, KeyError, TypeError):
             raise ConfigResolutionError('Invalid pyconf index %r for %r' % (index, object.__getattribute__(self, 'path')))
         if not isinstance(rv, list):
-            rv = self.evaluate(rv)
+            rv = self.evaluate(rv, index)
         else:
             # deal with a slice
             result = []
@@ -904,6 +1042,10 @@ class Reference(object):
         self.config = config
         self.type = type
         self.elements = [ident]
+        # a backtick reference is evaluated in python namespaces,
+        # its value can change without any modification of the config
+        self.memoizable = (type != BACKTICK)
+        self.code = None
 
     def addElement(self, type, ident):
         """
@@ -915,6 +1057,26 @@ class Reference(object):
         @type ident: str
         """
         self.elements.append((type, ident))
+        self.code = None
+
+    def getCode(self):
+        """
+        Get the code object of a backtick reference, compiled once.
+
+        @return: The compiled expression.
+        @rtype: code
+        """
+        if self.code is None:
+            self.code = compile(str(self)[1:-1], '<pyconf>', 'eval')
+        return self.code
+
+    def __getstate__(self):
+        """
+        Get the state to pickle (code objects can't be pickled).
+        """
+        state = self.__dict__.copy()
+        state['code'] = None
+        return state
 
     def findConfig(self, container):
         """
@@ -948,7 +1110,7 @@ class Reference(object):
                 found = False
                 for ns in namespaces:
                     try:
-                        rv = eval(str(self)[1:-1], vars(ns))
+                        rv = eval(self.getCode(), vars(ns))
                         found = True
                         break
                     except:
@@ -1004,6 +1166,11 @@ class Expression(object):
         self.op = op
         self.lhs = lhs
         self.rhs = rhs
+        self.memoizable = True
+        for operand in (lhs, rhs):
+            if isinstance(operand, (Reference, Expression)) and \
+               not operand.memoizable:
+                self.memoizable = False
 
     def __str__(self):
         return '%r %s %r' % (self.lhs, self.op, self.rhs)
@@ -1069,6 +1236,21 @@ class ConfigReader(object):
         self.pbchars = []
         self.pbtokens = []
         self.comment = None
+        # the stream is read at once in buffer, these expressions 
+        # get several characters of a token from buffer in one call
+        self.buffer = ''
+        self.pos = 0
+        # the buffer holds the non ASCII bytes of a byte stream as chars,
+        # checked when they are got (see checkChars)
+        self.raw_bytes = False
+        self.raw_comments = True
+        self.whitespace_re = re.compile('[%s]+' % re.escape(self.whitespace))
+        self.identchars_re = re.compile('[%s]*' % re.escape(self.identchars))
+        self.string_re = {}
+        for quote in self.quotes:
+            # the end of a string on one line: an unescaped quote
+            self.string_re[quote] = re.compile(r'(?:[^%s\\]|\\.)*%s' % (quote, quote),
+                                               re.DOTALL)
 
     def location(self):
         """
@@ -1092,18 +1274,85 @@ class ConfigReader(object):
         """
         if self.pbchars:
             c = self.pbchars.pop()
-            if isinstance(c,bytes):
-                c = c.decode()
         else:
-            c = self.stream.read(1)
-            if isinstance(c,bytes):
-                c = c.decode()
+            c = self.buffer[self.pos:self.pos + 1]
+            if self.raw_bytes:
+                self.checkChars(c)
+            self.pos += len(c)
             self.colno += 1
             if c == '\n':
                 self.lineno += 1
                 self.colno = 1
         return c
 
+    def getChars(self, end):
+        """
+        Get the chars of the buffer up to the specified position. Update line
+        and column numbers as if the chars were got one by one with getChar.
+        The pushed back chars must have been got before.
+
+        @param end: The position in the buffer after the last char to get.
+        @type end: int
+        @return: The chars.
+        @rtype: str
+        """
+        chars = self.buffer[self.pos:end]
+        if self.raw_bytes:
+            self.checkChars(chars)
+        self.pos = end
+        nb_newlines = chars.count('\n')
+        if nb_newlines:
+            self.lineno += nb_newlines
+            self.colno = len(chars) - chars.rfind('\n')
+        else:
+            self.colno += len(chars)
+        return chars
+
+    def getLine(self):
+        """
+        Get the end of the current line from the buffer, including the
+        newline character. Line and column numbers are not updated.
+
+        @return: The end of the line.
+        @rtype: str
+        """
+        end = self.buffer.find('\n', self.pos)
+        if end < 0:
+            end = len(self.buffer)
+        else:
+            end += 1
+        line = self.buffer[self.pos:end]
+        if self.raw_bytes:
+            if self.raw_comments:
+                line = line.encode('latin-1')
+            else:
+                self.checkChars(line)
+        self.pos = end
+        return line
+
+    def checkChars(self, chars):
+        """
+        Check the chars got from the buffer of a byte stream: the bytes
+        were decoded one by one, a non ASCII byte is an error.
+
+        @param chars: The chars, the bytes of the stream.
+        @type chars: str
+        @raise UnicodeDecodeError: If a byte is not ASCII.
+        """
+        for c in chars:
+            if ord(c) > 127:
+                c.encode('latin-1').decode()
+
+    def __getstate__(self):
+        """
+        Get the state to pickle (the stream being read can't be pickled).
+        """
+        state = self.__dict__.copy()
+        state['stream'] = None
+        state['buffer'] = ''
+        state['pos'] = 0
+        return state
+
     def __repr__(self):
         return "<ConfigReader at 0x%08x>" % id(self)
 
@@ -1122,25 +1371,35 @@ class ConfigReader(object):
         """
         if self.pbtokens:
             return self.pbtokens.pop()
-        stream = self.stream
         self.comment = None
         token = ''
         tt = EOF
         while True:
+            if not self.pbchars:
+                # skip the whitespaces at once
+                m = self.whitespace_re.match(self.buffer, self.pos)
+                if m:
+                    self.lastc = self.getChars(m.end())[-1]
             c = self.getChar()
             if not c:
                 break
             elif c == '#':
                 if self.comment :
-                    self.comment += '#' + stream.readline()
+                    self.comment += '#' + self.getLine()
                 else :
-                    self.comment = stream.readline()
+                    self.comment = self.getLine()
                 self.lineno += 1
                 continue
             if c in self.quotes:
                 token = c
                 quote = c
                 tt = STRING
+                if not (self.pbchars or self.buffer.startswith(quote, self.pos)):
+                    # not an empty or multiline string: get it at once
+                    m = self.string_re[quote].match(self.buffer, self.pos)
+                    if m:
+                        token += self.getChars(m.end())
+                        break
                 escaped = False
                 multiline = False
                 c1 = self.getChar()
@@ -1201,6 +1460,9 @@ class ConfigReader(object):
             elif c in self.wordchars:
                 token = c
                 tt = WORD
+                if not self.pbchars:
+                    m = self.identchars_re.match(self.buffer, self.pos)
+                    token += self.getChars(m.end())
                 c = self.getChar()
                 while c and (c in self.identchars):
                     token += c
@@ -1267,6 +1529,22 @@ class ConfigReader(object):
         self.filename = filename
         self.lineno = 1
         self.colno = 1
+        # read the stream at once, reading it char by char is slow
+        buffer = stream.read()
+        self.raw_bytes = False
+        if isinstance(buffer, bytes):
+            try:
+                buffer = buffer.decode('ascii')
+            except UnicodeDecodeError:
+                # the bytes were decoded one by one when they were got: a non
+                # ASCII byte is an error when it is got, it is kept in the
+                # comments of a raw stream (read without ConfigInputStream)
+                buffer = buffer.decode('latin-1')
+                self.raw_bytes = True
+                self.raw_comments = not isinstance(stream, ConfigInputStream)
+        self.buffer = buffer
+        self.pos = 0
+        self.pbchars = []
 
     def match(self, t):
         """
@@ -1624,6 +1902,7 @@ class ConfigMerger(object):
         overwrite_list = object.__getattribute__(seq2, 'data')
         for overwrite_instruction in overwrite_list:
             object.__setattr__(overwrite_instruction, 'parent', map1)
+            nextGeneration()
             if "__condition__" in overwrite_instruction.keys():
                 overwrite_condition = overwrite_instruction["__condition__"]
                 if eval(overwrite_condition, globals(), map1):
@@ -1651,16 +1930,21 @@ class ConfigMerger(object):
         @param map2: The mapping to merge.
         @type map2: L{Mapping}.
         """
-        keys = map1.keys()
+        data2 = object.__getattribute__(map2, 'data')
         global __resolveOverwrite__
-        for key in map2.keys():
+        for key in list(map2.keys()):
             if __resolveOverwrite__ and key == "__overwrite__":
                 self.overwriteKeys(map1,map2[key])
 
-            elif key not in keys:
-                map1[key] = map2[key]
-                if isinstance(map1[key], Container) :
-                    object.__setattr__(map1[key], 'parent', map1)
+            elif key not in map1:
+                if isinstance(data2[key], LazyConfig):
+                    # still read on first access
+                    map1[key] = data2[key]
+                else:
+                    map1[key] = map2[key]
+                    if isinstance(map1[key], Container) :
+                        object.__setattr__(map1[key], 'parent', map1)
+                        nextGeneration()
             else:
                 obj1 = map1[key]
                 obj2 = map2[key]
@@ -1673,6 +1957,7 @@ class ConfigMerger(object):
                     map1[key] = obj2
                     if isinstance(map1[key], Container):
                         object.__setattr__(map1[key], 'parent', map1)
+                        nextGeneration()
                 elif decision == "mismatch":
                     self.handleMismatch(obj1, obj2)
                 else:
@@ -1698,6 +1983,7 @@ class ConfigMerger(object):
         comment2 = object.__getattribute__(seq2, 'comments')
         for obj in comment2:
             comment1.append(obj)
+        nextGeneration()
 
     def handleMismatch(self, obj1, obj2):
         """
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+The fingerprints of the sources of the products, used by the binary cache
+and by sat compile --update to detect the modified sources.
+
+For a git repository, the fingerprint is the commit of HEAD and the content
+of the modified and untracked files. Else it is a hash of a manifest of
+the files: {relative path : [size, modification time, sha1]}. The sha1 of
+a file is only computed again if its size or its modification time changed
+since a previous manifest.
+
+| usage:
+| >> fingerprint, manifest = get_source_state(source_dir)
+| >> # later
+| >> fingerprint2, manifest = get_source_state(source_dir, manifest)
+"""
+
+import os
+import hashlib
+import subprocess
+
+# the directories of the version control systems are not sources
+VCS_DIRECTORIES = [".git", ".svn", "CVS"]
+
+def get_file_hash(path):
+    """\
+    Get the sha1 of the content of a file
+
+    :param path str: The path of the file
+    :rtype: str
+    """
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+def get_tree_manifest(directory, previous=None):
+    """\
+    Get the manifest of the files of a directory tree.
+    The sha1 of the files unchanged since a previous manifest (same size
+    and modification time) are not computed again.
+
+    :param directory str: The directory
+    :param previous dict: A previous manifest of the directory, or None
+    :return: the manifest {relative path : [size, mtime, sha1]},
+             the sha1 of a link is "link:<target>"
+    :rtype: dict
+    """
+    if previous is None:
+        previous = {}
+    manifest = {}
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d not in VCS_DIRECTORIES]
+        for name in files:
+            path = os.path.join(root, name)
+            rel_path = os.path.relpath(path, directory)
+            if os.path.islink(path):
+                manifest[rel_path] = [0, 0, "link:" + os.readlink(path)]
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue  # a broken file, not a source
+            entry = previous.get(rel_path)
+            if entry is not None and entry[0] == st.st_size and \
+               entry[1] == st.st_mtime:
+                manifest[rel_path] = entry
+            else:
+                manifest[rel_path] = [st.st_size, st.st_mtime, get_file_hash(path)]
+    return manifest
+
+def get_manifest_fingerprint(manifest):
+    """\
+    Get a hash of the content of a manifest (the names and the sha1
+    of the files, not their modification times)
+
+    :param manifest dict: The manifest, see get_tree_manifest
+    :rtype: str
+    """
+    sha = hashlib.sha1()
+    for rel_path in sorted(manifest):
+        sha.update(("%s %s\n" % (rel_path, manifest[rel_path][2])).encode("utf-8"))
+    return sha.hexdigest()
+
+def get_tree_fingerprint(directory):
+    """\
+    Get a hash of the content of a directory tree (names, links, files)
+
+    :param directory str: The directory
+    :rtype: str
+    """
+    return get_manifest_fingerprint(get_tree_manifest(directory))
+
+def get_git_output(command, directory):
+    """\
+    Run a git command in a directory
+
+    :param command list: The git command arguments
+    :param directory str: The directory
+    :return: the output of the command, None if it fails
+    :rtype: str
+    """
+    try:
+        with open(os.devnull, "w") as devnull:
+            p = subprocess.Popen(["git"] + command, cwd=directory,
+                                 stdout=subprocess.PIPE, stderr=devnull)
+            output, err = p.communicate()
+    except OSError:
+        return None # git is not installed
+    if p.returncode != 0:
+        return None
+    if isinstance(output, bytes):
+        output = output.decode("utf-8", "ignore")
+    return output
+
+def get_git_fingerprint(source_dir):
+    """\
+    Get the fingerprint of a git repository: the commit of HEAD and the
+    content of the modified and untracked files
+
+    :param source_dir str: The directory of the repository
+    :return: the fingerprint, None if git fails
+    :rtype: str
+    """
+    head = get_git_output(["rev-parse", "HEAD"], source_dir)
+    if head is None:
+        return None
+    status = get_git_output(["status", "--porcelain", "--untracked-files=all"],
+                            source_dir)
+    if status is None:
+        return None
+    sha = hashlib.sha1(("git:%s" % head.strip()).encode("utf-8"))
+    for line in sorted(status.splitlines()):
+        path = os.path.join(source_dir, line[3:].split(" -> ")[-1])
+        content = ""
+        if os.path.isfile(path) and not os.path.islink(path):
+            content = get_file_hash(path)
+        sha.update(("%s %s\n" % (line, content)).encode("utf-8"))
+    return sha.hexdigest()
+
+def get_source_state(source_dir, previous_manifest=None):
+    """\
+    Get the fingerprint of the sources of a product, and the manifest of
+    its files if the sources are not a git repository
+
+    :param source_dir str: The source directory of the product
+    :param previous_manifest dict: A previous manifest of the sources,
+                                   to compute the sha1 of the modified files only
+    :return: (fingerprint, manifest or None), (None, None) if there is
+             no source directory
+    :rtype: tuple
+    """
+    if not os.path.isdir(source_dir):
+        return None, None
+    if os.path.exists(os.path.join(source_dir, ".git")):
+        fingerprint = get_git_fingerprint(source_dir)
+        if fingerprint is not None:
+            return fingerprint, None
+    manifest = get_tree_manifest(source_dir, previous_manifest)
+    return "tree:" + get_manifest_fingerprint(manifest), manifest
+
+def get_source_fingerprint(source_dir):
+    """\
+    Get the fingerprint of the sources of a product, see get_source_state
+
+    :param source_dir str: The source directory of the product
+    :return: the fingerprint, None if there is no source directory
+    :rtype: str
+    """
+    return get_source_state(source_dir)[0]
@@ -383,8 +383,163 @@ def svn_extract(user,
                           stderr=subprocess.STDOUT)
     return (res == 0)
 
+class PackageManager(object):
+    """\
+    Query the system package manager for installed packages.
+    The packages are queried in one batch, and their status is kept for 
+    the process (the packages are not installed during a sat command).
+    A subclass implements query() for a package manager (or a fake one 
+    for tests).
+    """
+    name = None
+    check_cmd = None
+
+    def __init__(self):
+        self.status = {}  # pkg -> (installed, info)
+        self.nb_queries = 0
+
+    def query(self, pkgs):
+        """\
+        Query the status of packages
+        
+        :param pkgs list: the package names
+        :return: for each package, (installed, information)
+        :rtype: dict
+        """
+        raise NotImplementedError()
+
+    def get_status(self, pkgs):
+        """\
+        Get the status of packages, querying only the unknown ones
+        
+        :param pkgs list: the package names
+        :return: for each package, (installed, information)
+        :rtype: dict
+        """
+        unknown = []
+        for pkg in pkgs:
+            if pkg not in self.status and pkg not in unknown:
+                unknown.append(pkg)
+        if unknown:
+            self.nb_queries += 1
+            self.status.update(self.query(unknown))
+        return dict((pkg, self.status[pkg]) for pkg in pkgs)
+
+    def check_packages(self, pkgs):
+        """\
+        Check if packages are installed
+        
+        :param pkgs list: the package names
+        :return: for each package, a string with status message
+        :rtype: dict
+        """
+        res = {}
+        for pkg, (installed, info) in self.get_status(pkgs).items():
+            if installed:
+                msg_status=src.printcolors.printcSuccess("OK")
+                if info:
+                    msg_status+=" (" + info + ")"
+                msg_status+="\n"
+            else:
+                msg_status=src.printcolors.printcError("KO")
+                msg_status+=" (package is not installed!)\n"
+            res[pkg] = msg_status
+        return res
+
+class RpmPackageManager(PackageManager):
+    """\
+    Query rpm: one 'rpm -q pkg1 pkg2 ...' for all the packages
+    """
+    name = "rpm"
+    check_cmd = ["rpm", "-q"]
+
+    def run_query(self, pkgs):
+        """\
+        Run rpm -q on packages
+        
+        :param pkgs list: the package names
+        :return: the return code and the lines of the output
+        :rtype: (int, list)
+        """
+        with open(os.devnull, 'w') as FNULL:
+            p=subprocess.Popen(self.check_cmd + list(pkgs),
+                               stdout=subprocess.PIPE,
+                               stderr=FNULL)
+            output, err = p.communicate()
+        # in python3 output is a byte and should be decoded
+        if isinstance(output, bytes):
+            output = output.decode("utf-8", "ignore")
+        return p.returncode, output.splitlines()
+
+    def query(self, pkgs):
+        res = {}
+        rc, lines = self.run_query(pkgs)
+        if len(lines) != len(pkgs):
+            # a package installed in several versions or architectures: 
+            # the lines of a package are known only with a query per package
+            for pkg in pkgs:
+                rc, lines = self.run_query([pkg])
+                res[pkg] = (rc == 0, " ".join(lines) + " ")
+            return res
+        for pkg, line in zip(pkgs, lines):
+            installed = line.strip() != "package %s is not installed" % pkg
+            res[pkg] = (installed, line + " ")
+        return res
+
+class AptPackageManager(PackageManager):
+    """\
+    Query apt: one apt cache for all the packages
+    """
+    name = "apt"
+    check_cmd = ["apt", "list", "--installed"]
+
+    def __init__(self):
+        super(AptPackageManager, self).__init__()
+        self.cache = None
+
+    def query(self, pkgs):
+        if self.cache is None:
+            import apt
+            self.cache = apt.Cache()
+        # as before, a package known by apt is reported as installed
+        return dict((pkg, (pkg in self.cache, "")) for pkg in pkgs)
+
+# the package managers of the process, by name
+_package_managers = {}
+# the name of the package manager found for each distribution
+_package_manager_names = {}
+
+def set_package_manager(manager, dist_name=None):
+    """\
+    Set the package manager to use for its name (and for a distribution)
+    
+    :param manager PackageManager: the package manager
+    :param dist_name str: the distribution using it, if any
+    """
+    _package_managers[manager.name] = manager
+    if dist_name is not None:
+        _package_manager_names[dist_name] = manager.name
+
+def get_package_manager(name):
+    """\
+    Get the package manager of the process for a name
+    
+    :param name str: 'rpm' or 'apt'
+    :rtype: PackageManager
+    """
+    if name not in _package_managers:
+        if name == "rpm":
+            set_package_manager(RpmPackageManager())
+        else:
+            set_package_manager(AptPackageManager())
+    return _package_managers[name]
+
 def get_pkg_check_cmd(dist_name):
-    '''Build the command to use for checking if a linux package is installed or not.'''
+    '''Build the command to use for checking if a linux package is installed or not.
+    The package manager is searched once per process.'''
+
+    if dist_name in _package_manager_names:
+        return get_package_manager(_package_manager_names[dist_name]).check_cmd
 
     if dist_name in ["CO","FD","MG","MD","CO","OS"]: # linux using rpm
         linux="RH"  
@@ -400,16 +555,27 @@ def get_pkg_check_cmd(dist_name):
         # 1) we search for apt (debian based systems)
         completed=subprocess.call(cmd_which_apt,stdout=devnull, stderr=subprocess.STDOUT)
         if completed==0 and linux=="DB":
-            cmd_is_package_installed=["apt", "list", "--installed"]
+            name="apt"
         else:
             # 2) if apt not found search for rpm (redhat)
             completed=subprocess.call(cmd_which_rpm,stdout=devnull, stderr=subprocess.STDOUT) # only 3.8! ,capture_output=True)
             if completed==0 and linux=="RH":
-                cmd_is_package_installed=["rpm", "-q"]
+                name="rpm"
             else:
                 # no package manager was found corresponding to dist_name
                 raise src.SatException(manager_msg_err)
-    return cmd_is_package_installed
+    _package_manager_names[dist_name] = name
+    return get_package_manager(name).check_cmd
+
+def check_system_pkgs(check_cmd, pkgs):
+    '''Check if packages are installed, with one query of the package manager
+    for the packages not checked yet
+    :param check_cmd list: the list of command to use system package manager
+    :param pkgs list: the pkg names to check
+    :rtype: dict
+    :return: for each package, a string with status message
+    '''
+    return get_package_manager(check_cmd[0]).check_packages(pkgs)
 
 def check_system_pkg(check_cmd,pkg):
     '''Check if a package is installed
@@ -418,40 +584,4 @@ def check_system_pkg(check_cmd,pkg):
     :rtype: str
     :return: a string with package name with status un message
     '''
-    # build command
-    FNULL = open(os.devnull, 'w')
-    cmd_is_package_installed=[]
-    for cmd in check_cmd:
-        cmd_is_package_installed.append(cmd)
-    cmd_is_package_installed.append(pkg)
-
-
-    if check_cmd[0]=="apt":
-        import apt
-        cache = apt.Cache()
-        package_installed = False
-        if pkg in cache:
-            package_installed = cache[pkg].is_installed
-            # print("cache[%s]=" % pkg, cache[pkg])
-            msg_status=src.printcolors.printcSuccess("OK")
-            msg_status+="\n"
-        else:
-            msg_status=src.printcolors.printcError("KO")
-            msg_status+=" (package is not installed!)\n"
-    else:
-        p=subprocess.Popen(cmd_is_package_installed,
-                           stdout=subprocess.PIPE,
-                           stderr=FNULL)
-        output, err = p.communicate()
-        rc = p.returncode
-        if rc==0:
-            msg_status=src.printcolors.printcSuccess("OK")
-            # in python3 output is a byte and should be decoded
-            if isinstance(output, bytes):
-                output = output.decode("utf-8", "ignore")
-            msg_status+=" (" + output.replace('\n',' ') + ")\n" # remove output trailing \n
-        else:
-            msg_status=src.printcolors.printcError("KO")
-            msg_status+=" (package is not installed!)\n"
-
-    return msg_status
+    return check_system_pkgs(check_cmd, [pkg])[pkg]
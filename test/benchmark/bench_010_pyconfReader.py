@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+micro-benchmark of the pyconf reader:
+tokenize, then parse, all the pyconf files of the PRODUCTPATH of a project
+
+| usage:
+| >> python bench_010_pyconfReader.py [-n <repeat>] [<directory> ...]
+| without directory, the PRODUCTPATH of the sat configuration is used
+"""
+
+import os
+import sys
+import glob
+import time
+import getopt
+
+# get path to salomeTools sources directory parent
+satdir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+if satdir not in sys.path:
+  sys.path.insert(0, satdir)
+  sys.path.insert(0, os.path.join(satdir, "src"))
+
+import src
+import src.pyconf as PYF
+
+
+def get_product_path():
+  """get the PRODUCTPATH directories of the sat configuration"""
+  import commands.config as CONFIG
+  cfg = CONFIG.ConfigManager().get_config()
+  return [d for d in cfg.PATHS.PRODUCTPATH if os.path.isdir(d)]
+
+def tokenize(fileName):
+  """get all the tokens of a pyconf file, return the number of tokens"""
+  reader = PYF.ConfigReader(None)
+  stream = PYF.defaultStreamOpener(fileName)
+  reader.setStream(stream)
+  nb = 0
+  while reader.getToken()[0] != PYF.EOF:
+    nb += 1
+  stream.close()
+  return nb
+
+def parse(fileName):
+  """load a pyconf file as sat does"""
+  PYF.Config(open(fileName), PWD=("", os.path.dirname(fileName)))
+
+def bench(func, files, repeat):
+  """return the best time of repeat calls of func on all files"""
+  best = None
+  for i in range(repeat):
+    t0 = time.time()
+    for f in files:
+      func(f)
+    t = time.time() - t0
+    if best is None or t < best:
+      best = t
+  return best
+
+def main(args):
+  opts, dirs = getopt.getopt(args, "n:")
+  repeat = 5
+  for opt, value in opts:
+    if opt == "-n":
+      repeat = int(value)
+  if len(dirs) == 0:
+    dirs = get_product_path()
+
+  files = []
+  for d in dirs:
+    files.extend(sorted(glob.glob(os.path.join(d, "*.pyconf"))))
+  if len(files) == 0:
+    print("no pyconf file found in %s" % dirs)
+    return 1
+
+  nb_tokens = sum([tokenize(f) for f in files])
+  nb_bytes = sum([os.path.getsize(f) for f in files])
+  print("%i pyconf files, %i tokens, %i bytes, best of %i" % \
+        (len(files), nb_tokens, nb_bytes, repeat))
+  t = bench(tokenize, files, repeat)
+  print("tokenize : %8.3f s  %10.0f tokens/s" % (t, nb_tokens / t))
+  t = bench(parse, files, repeat)
+  print("parse    : %8.3f s  %10.0f files/s" % (t, len(files) / t))
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+micro-benchmark of src.product.get_products_infos on a large application,
+and of the reading of the products paths, as done in the compile, environ
+and package loops.
+
+A synthetic application of <nb> products is written in a temporary
+personal directory (~/.salomeTools is a temporary directory).
+
+| usage:
+| >> python bench_020_productsInfos.py [-n <repeat>] [-p <nb products>]
+"""
+
+import os
+import sys
+import time
+import shutil
+import getopt
+import tempfile
+
+# get path to salomeTools sources directory parent
+satdir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+if satdir not in sys.path:
+  sys.path.insert(0, satdir)
+  sys.path.insert(0, os.path.join(satdir, "src"))
+
+import src
+import src.product
+
+
+PRODUCT_PYCONF = """\
+default :
+{
+    name : "%(name)s"
+    build_source : "cmake"
+    cmake_options : "-DCMAKE_BUILD_TYPE=Release -DSALOME_BUILD_TESTS=ON"
+    get_source : "git"
+    git_info:
+    {
+        repo : "https://git.salome-platform.org/gitpub/modules/%(name)s.git"
+        repo_dev : $repo
+    }
+    environ :
+    {
+        _%(name)s_ROOT_DIR : $install_dir
+    }
+    depend : [ %(depend)s ]
+    build_depend : []
+    opt_depend : []
+    source_dir : $APPLICATION.workdir + $VARS.sep + 'SOURCES' + $VARS.sep + $name
+    build_dir : $APPLICATION.workdir + $VARS.sep + 'BUILD' + $VARS.sep + $name
+    install_dir : 'base'
+    check_install : ["bin/salome/%(name)s"]
+    properties:
+    {
+        is_SALOME_module : "yes"
+        has_unit_tests : "yes"
+    }
+}
+
+version_1_0_0 :
+{
+    name : "%(name)s"
+    get_source : "archive"
+    archive_info : { archive_name : $name + "-1.0.0.tar.gz" }
+    environ : { _%(name)s_ROOT_DIR : $install_dir }
+    depend : []
+    source_dir : $APPLICATION.workdir + $VARS.sep + 'SOURCES' + $VARS.sep + $name
+    build_dir : $APPLICATION.workdir + $VARS.sep + 'BUILD' + $VARS.sep + $name
+    install_dir : 'base'
+}
+"""
+
+APPLICATION_PYCONF = """\
+APPLICATION :
+{
+    name : 'BENCH'
+    workdir : $VARS.personalDir + $VARS.sep + 'BENCH-' + $VARS.dist
+    tag : 'master'
+    base : 'no'
+    environ : { }
+    products :
+    {
+%(products)s
+    }
+}
+"""
+
+def write_application(personal_dir, nb):
+  """write BENCH.pyconf and the pyconf files of its nb products"""
+  names = ["PROD%i" % i for i in range(nb)]
+  for i, name in enumerate(names):
+    depend = ", ".join(['"%s"' % d for d in names[max(0, i-3):i]])
+    with open(os.path.join(personal_dir, "products", name + ".pyconf"), "w") as f:
+      f.write(PRODUCT_PYCONF % {"name": name, "depend": depend})
+  products = "\n".join(["        %s : %s" % (n, "'1.0.0'" if i % 2 else "'master'")
+                        for i, n in enumerate(names)])
+  with open(os.path.join(personal_dir, "Applications", "BENCH.pyconf"), "w") as f:
+    f.write(APPLICATION_PYCONF % {"products": products})
+
+def read_paths(products_infos):
+  """read the keys read by the compile, environ and package loops"""
+  for name, p_info in products_infos:
+    p_info.source_dir
+    p_info.build_dir
+    p_info.install_dir
+    p_info.environ["_%s_ROOT_DIR" % name]
+    for d in p_info.depend:
+      pass
+
+def bench(func, repeat):
+  """return the best time of repeat calls of func"""
+  best = None
+  for i in range(repeat):
+    t0 = time.time()
+    func()
+    t = time.time() - t0
+    if best is None or t < best:
+      best = t
+  return best
+
+def main(args):
+  opts, args = getopt.getopt(args, "n:p:")
+  repeat = 5
+  nb = 300
+  for opt, value in opts:
+    if opt == "-n":
+      repeat = int(value)
+    if opt == "-p":
+      nb = int(value)
+
+  home = tempfile.mkdtemp(prefix="sat_bench_020_")
+  os.environ["HOME"] = home
+  try:
+    import commands.config as CONFIG
+    # creates the personal directories
+    CONFIG.ConfigManager()._create_vars()
+    write_application(os.path.join(home, ".salomeTools"), nb)
+    cfg = CONFIG.ConfigManager().get_config(application="BENCH")
+    products = list(cfg.APPLICATION.products.keys())
+
+    print("%i products, best of %i" % (len(products), repeat))
+    t = bench(lambda: src.product.get_products_infos(products, cfg), repeat)
+    print("get_products_infos : %8.3f s" % t)
+    products_infos = src.product.get_products_infos(products, cfg)
+    t = bench(lambda: read_paths(products_infos), repeat)
+    print("read paths         : %8.3f s" % t)
+  finally:
+    shutil.rmtree(home)
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+micro-benchmark of src.dependencyGraph.DependencyGraph on synthetic graphs,
+compared to the former recursive list based functions of commands/compile.py
+(copied here), for the operations of sat compile:
+topological sort, --with_fathers, --with_children and depend_all.
+
+Each node of the synthetic graph depends on <nb deps> random previous nodes.
+The former functions are run only up to 200 nodes: their search of
+the children is exponential in the worst case.
+
+| usage:
+| >> python bench_030_dependencyGraph.py [-n <repeat>] [-p <nb nodes>] [-d <nb deps>]
+"""
+
+import os
+import sys
+import time
+import random
+import getopt
+
+# get path to salomeTools sources directory parent
+satdir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+if satdir not in sys.path:
+  sys.path.insert(0, satdir)
+  sys.path.insert(0, os.path.join(satdir, "src"))
+
+from src.dependencyGraph import DependencyGraph
+
+
+# the former functions of commands/compile.py
+def depth_search_graph(graph, start, visited=[]):
+    visited= visited+ [start]
+    for node in graph[start]:  # for all nodes in start dependencies
+        if node not in visited:
+            visited=depth_search_graph(graph, node, visited)
+    return visited
+
+def find_path_graph(graph, start, end, path=[]):
+    path = path + [start]
+    if start in end:
+        return path
+    if start not in graph:
+        return None
+    for node in graph[start]:
+        if node not in path:
+            newpath = find_path_graph(graph, node, end, path)
+            if newpath: return newpath
+    return None
+
+def depth_first_topo_graph(graph, start, visited=[], sorted_nodes=[]):
+    visited = visited + [start]
+    for node in graph[start]:
+        if node not in visited:
+            visited,sorted_nodes=depth_first_topo_graph(graph, node, visited,sorted_nodes)
+        else:
+            if node not in sorted_nodes:
+                raise Exception('cycle detection for node %s and %s' % (start,node))
+    sorted_nodes = sorted_nodes + [start]
+    return visited, sorted_nodes
+
+def old_compile(graph, products_list):
+  """the graph operations of the former sat compile --with_fathers --with_children"""
+  visited=[]
+  for p_name in products_list:
+    visited=depth_search_graph(graph, p_name, visited)
+  children=[]
+  for n in graph:
+    if (n not in children) and (n not in products_list):
+      if find_path_graph(graph, n, products_list):
+        children = children + [n]
+  visited_nodes=[]
+  sorted_nodes=[]
+  for n in graph:
+    if n not in visited_nodes:
+      visited_nodes,sorted_nodes=depth_first_topo_graph(graph, n, visited_nodes,sorted_nodes)
+  depend_all = [depth_search_graph(graph, n, [])[1:] for n in sorted_nodes]
+  return visited, children, sorted_nodes, depend_all
+
+def new_compile(graph, products_list):
+  """the same operations with DependencyGraph"""
+  dgraph = DependencyGraph(graph)
+  visited = dgraph.depth_search(products_list)
+  children = dgraph.get_all_children(products_list)
+  sorted_nodes = dgraph.get_sorted_nodes()
+  depend_all = [dgraph.get_all_dependencies(n) for n in sorted_nodes]
+  return visited, children, sorted_nodes, depend_all
+
+def synthetic_graph(nb, nb_deps):
+  """a random graph without cycle, in a random order"""
+  rand = random.Random(nb)
+  names = ["P%i" % i for i in range(nb)]
+  graph = {}
+  for i, name in enumerate(names):
+    graph[name] = rand.sample(names[:i], min(i, nb_deps))
+  order = list(names)
+  rand.shuffle(order)
+  return dict((n, graph[n]) for n in order)
+
+def bench(func, repeat):
+  """return the best time of repeat calls of func"""
+  best = None
+  for i in range(repeat):
+    t0 = time.time()
+    func()
+    t = time.time() - t0
+    if best is None or t < best:
+      best = t
+  return best
+
+def main(args):
+  opts, args = getopt.getopt(args, "n:p:d:")
+  repeat = 3
+  sizes = [100, 200, 1000, 5000]
+  nb_deps = 3
+  for opt, value in opts:
+    if opt == "-n":
+      repeat = int(value)
+    if opt == "-p":
+      sizes = [int(value)]
+    if opt == "-d":
+      nb_deps = int(value)
+
+  sys.setrecursionlimit(100000)
+  print("%i dependencies per node, best of %i" % (nb_deps, repeat))
+  for nb in sizes:
+    graph = synthetic_graph(nb, nb_deps)
+    products_list = ["P%i" % (nb // 2)]
+    t_new = bench(lambda: new_compile(graph, products_list), repeat)
+    if nb <= 200:
+      t_old = bench(lambda: old_compile(graph, products_list), repeat)
+      assert old_compile(graph, products_list) == new_compile(graph, products_list)
+      print("%6i nodes : former %8.3f s  DependencyGraph %8.3f s" % (nb, t_old, t_new))
+    else:
+      print("%6i nodes : former %8s    DependencyGraph %8.3f s" % (nb, "-", t_new))
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+micro-benchmark of the product_is_* / product_has_* predicates of
+src.product, called for all the products of a large application as in
+the loops of the compile, environ, package and clean commands.
+
+The synthetic application of bench_020_productsInfos.py is written in a
+temporary personal directory (~/.salomeTools is a temporary directory).
+
+| usage:
+| >> python bench_040_productPredicates.py [-n <repeat>] [-p <nb products>]
+"""
+
+import os
+import sys
+import shutil
+import getopt
+import tempfile
+
+# get path to salomeTools sources directory parent
+satdir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+if satdir not in sys.path:
+  sys.path.insert(0, satdir)
+  sys.path.insert(0, os.path.join(satdir, "src"))
+
+import src
+import src.product as PROD
+from bench_020_productsInfos import write_application, bench
+
+def call_predicates(products_infos):
+  """call the predicates of a compile/environ/package loop on all the products"""
+  for name, p_info in products_infos:
+    PROD.product_compiles(p_info)
+    PROD.product_is_native(p_info)
+    PROD.product_is_fixed(p_info)
+    PROD.product_is_salome(p_info)
+    PROD.product_is_vcs(p_info)
+    PROD.product_is_dev(p_info)
+    PROD.product_is_debug(p_info)
+    PROD.product_is_verbose(p_info)
+    PROD.product_is_hpc(p_info)
+    PROD.product_has_script(p_info)
+    if PROD.product_is_vcs(p_info):
+      PROD.product_is_cmake(p_info)
+      PROD.product_is_autotools(p_info)
+    PROD.product_has_env_script(p_info)
+    PROD.product_has_patches(p_info)
+    PROD.product_has_salome_gui(p_info)
+    PROD.product_is_mpi(p_info)
+    PROD.product_is_generated(p_info)
+    PROD.product_is_compile_time(p_info)
+    PROD.product_is_compile_and_runtime(p_info)
+    PROD.product_is_wheel(p_info)
+    PROD.product_test_property(p_info, "pip", "yes")
+    PROD.product_test_property(p_info, "has_unit_tests", "yes")
+
+NB_PREDICATES = 22
+
+def main(args):
+  opts, args = getopt.getopt(args, "n:p:")
+  repeat = 5
+  nb = 300
+  for opt, value in opts:
+    if opt == "-n":
+      repeat = int(value)
+    if opt == "-p":
+      nb = int(value)
+
+  home = tempfile.mkdtemp(prefix="sat_bench_040_")
+  os.environ["HOME"] = home
+  try:
+    import commands.config as CONFIG
+    # creates the personal directories
+    CONFIG.ConfigManager()._create_vars()
+    write_application(os.path.join(home, ".salomeTools"), nb)
+    cfg = CONFIG.ConfigManager().get_config(application="BENCH")
+    products = list(cfg.APPLICATION.products.keys())
+    products_infos = PROD.get_products_infos(products, cfg)
+
+    print("%i products, %i predicates, best of %i" % (len(products), NB_PREDICATES, repeat))
+    t = bench(lambda: call_predicates(products_infos), repeat)
+    print("predicates : %8.3f s  %8.1f us per product" % (t, t * 1e6 / len(products)))
+  finally:
+    shutil.rmtree(home)
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+micro-benchmark of the fingerprints of the sources computed by
+sat compile --update for each product: a synthetic source tree is
+written in a temporary directory.
+
+| usage:
+| >> python bench_050_sourceFingerprint.py [-n <repeat>] [-f <nb files>] [-s <file size in KB>]
+"""
+
+import os
+import sys
+import shutil
+import getopt
+import tempfile
+
+# get path to salomeTools sources directory parent
+satdir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+if satdir not in sys.path:
+  sys.path.insert(0, satdir)
+  sys.path.insert(0, os.path.join(satdir, "src"))
+
+import src.sourceFingerprint as SFP
+from bench_020_productsInfos import bench
+
+def write_tree(directory, nb, size):
+  """write nb files of size KB in sub directories of 100 files"""
+  content = ("x" * 1023 + "\n") * size
+  for i in range(nb):
+    sub_dir = os.path.join(directory, "dir_%03i" % (i // 100))
+    if not os.path.isdir(sub_dir):
+      os.makedirs(sub_dir)
+    with open(os.path.join(sub_dir, "file_%05i.cxx" % i), "w") as f:
+      f.write("// %i\n" % i + content)
+
+def main(args):
+  opts, args = getopt.getopt(args, "n:f:s:")
+  repeat = 5
+  nb = 5000
+  size = 10
+  for opt, value in opts:
+    if opt == "-n":
+      repeat = int(value)
+    if opt == "-f":
+      nb = int(value)
+    if opt == "-s":
+      size = int(value)
+
+  directory = tempfile.mkdtemp(prefix="sat_bench_050_")
+  try:
+    write_tree(directory, nb, size)
+    print("%i files of %i KB, best of %i" % (nb, size, repeat))
+    t = bench(lambda: SFP.get_tree_manifest(directory), repeat)
+    print("manifest, all files hashed   : %8.3f s" % t)
+    manifest = SFP.get_tree_manifest(directory)
+    t = bench(lambda: SFP.get_tree_manifest(directory, manifest), repeat)
+    print("manifest, unchanged files    : %8.3f s" % t)
+    if os.system("cd %s && git init -q && git add -A && "
+                 "git -c user.name=sat -c user.email=sat@bench commit -q -m bench"
+                 % directory) == 0:
+      t = bench(lambda: SFP.get_git_fingerprint(directory), repeat)
+      print("git HEAD + modified files    : %8.3f s" % t)
+  finally:
+    shutil.rmtree(directory)
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
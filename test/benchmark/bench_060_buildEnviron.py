@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+micro-benchmark of the build environments created by sat compile for 
+each product of a large application (as Builder.prepare does), with the
+environment contributions of the products computed for each environment
+or memoized for the config.
+
+The synthetic application of bench_020_productsInfos is used.
+
+| usage:
+| >> python bench_060_buildEnviron.py [-n <repeat>] [-p <nb products>]
+"""
+
+import os
+import sys
+import shutil
+import getopt
+import tempfile
+
+# get path to salomeTools sources directory parent
+satdir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+if satdir not in sys.path:
+  sys.path.insert(0, satdir)
+  sys.path.insert(0, os.path.join(satdir, "src"))
+
+import src
+import src.product
+import src.environment
+from bench_020_productsInfos import bench, write_application
+
+class SilentLogger(object):
+  def write(self, *args, **kwargs):
+    pass
+
+def build_environs(cfg, products, clear):
+  """create the build environment of each product"""
+  for name in products:
+    if clear:
+      src.environment.clear_product_environ_cache(cfg)
+    env = src.environment.SalomeEnviron(cfg,
+                                        src.environment.Environ(dict(os.environ)),
+                                        True)
+    env.silent = True
+    env.set_full_environ(SilentLogger(),
+                         src.product.get_product_dependencies(cfg, name, None))
+
+def main(args):
+  opts, args = getopt.getopt(args, "n:p:")
+  repeat = 3
+  nb = 150
+  for opt, value in opts:
+    if opt == "-n":
+      repeat = int(value)
+    if opt == "-p":
+      nb = int(value)
+
+  home = tempfile.mkdtemp(prefix="sat_bench_060_")
+  os.environ["HOME"] = home
+  try:
+    import src.salomeTools  # installs _ for the messages
+    import commands.config as CONFIG
+    # creates the personal directories
+    CONFIG.ConfigManager()._create_vars()
+    write_application(os.path.join(home, ".salomeTools"), nb)
+    cfg = CONFIG.ConfigManager().get_config(application="BENCH")
+    products = list(cfg.APPLICATION.products.keys())
+
+    print("%i products, best of %i" % (len(products), repeat))
+    t = bench(lambda: build_environs(cfg, products, True), repeat)
+    print("contributions computed : %8.3f s" % t)
+    t = bench(lambda: build_environs(cfg, products, False), repeat)
+    print("contributions replayed : %8.3f s" % t)
+  finally:
+    shutil.rmtree(home)
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+micro-benchmark of the environment files written by sat environ --shell all
+(bash, bat and cfg, for launch and build) for a large application: the
+environment computed for each file, or once for each mode and written in
+the files of each shell.
+
+The synthetic application of bench_020_productsInfos is used.
+
+| usage:
+| >> python bench_070_environFiles.py [-n <repeat>] [-p <nb products>]
+"""
+
+import os
+import sys
+import shutil
+import getopt
+import tempfile
+
+# get path to salomeTools sources directory parent
+satdir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+if satdir not in sys.path:
+  sys.path.insert(0, satdir)
+  sys.path.insert(0, os.path.join(satdir, "src"))
+
+import src
+import src.environment
+from bench_020_productsInfos import bench, write_application
+from bench_060_buildEnviron import SilentLogger
+
+SHELLS = [("bash", "sh"), ("bat", "bat"), ("cfg", "cfg")]
+
+def write_files(cfg, out_dir, one_writer):
+  """write the environment files of all the shells"""
+  writer = None
+  for shell, extension in SHELLS:
+    for mode, forBuild in [("launch", False), ("build", True)]:
+      if writer is None or not one_writer:
+        writer = src.environment.FileEnvWriter(cfg, SilentLogger(), out_dir, None)
+      writer.write_env_file("env_%s.%s" % (mode, extension), forBuild, shell)
+
+def main(args):
+  opts, args = getopt.getopt(args, "n:p:")
+  repeat = 3
+  nb = 300
+  for opt, value in opts:
+    if opt == "-n":
+      repeat = int(value)
+    if opt == "-p":
+      nb = int(value)
+
+  home = tempfile.mkdtemp(prefix="sat_bench_070_")
+  os.environ["HOME"] = home
+  stdout = sys.stdout
+  try:
+    import src.salomeTools  # installs _ for the messages
+    import commands.config as CONFIG
+    # creates the personal directories
+    CONFIG.ConfigManager()._create_vars()
+    write_application(os.path.join(home, ".salomeTools"), nb)
+    cfg = CONFIG.ConfigManager().get_config(application="BENCH")
+
+    print("%i products, %i files, best of %i" % (nb, 2 * len(SHELLS), repeat))
+    # write_env_file prints the distribution
+    sys.stdout = open(os.devnull, "w")
+    t_each = bench(lambda: write_files(cfg, home, False), repeat)
+    t_once = bench(lambda: write_files(cfg, home, True), repeat)
+    sys.stdout = stdout
+    print("environment computed for each file : %8.3f s" % t_each)
+    print("environment computed once per mode : %8.3f s" % t_once)
+  finally:
+    sys.stdout = stdout
+    shutil.rmtree(home)
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+micro-benchmark of the path variables (PATH, LD_LIBRARY_PATH...) of a large
+environment: each product appends or prepends its directories to 5 path
+variables, in the environment and in a bash file. The paths are held as
+ordered sets, or as strings split and joined at each call as before.
+
+| usage:
+| >> python bench_080_pathVariables.py [-n <repeat>] [-p <nb products>]
+"""
+
+import os
+import sys
+import getopt
+
+# get path to salomeTools sources directory parent
+satdir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+if satdir not in sys.path:
+  sys.path.insert(0, satdir)
+  sys.path.insert(0, os.path.join(satdir, "src"))
+
+import src
+import src.environment
+import src.fileEnviron
+import src.debug as DBG
+from bench_020_productsInfos import bench
+
+PATHS = [("PATH", "bin"), ("LD_LIBRARY_PATH", "lib"),
+         ("PYTHONPATH", "lib/python3/site-packages"),
+         ("SALOMEPATH", ""), ("PV_PLUGIN_PATH", "lib/paraview")]
+
+def set_products(env, nb):
+  """set the paths of nb products, and read them as a launcher does"""
+  for i in range(nb):
+    root = "/opt/products/PRODUCT_%04i" % i
+    for key, sub_dir in PATHS:
+      env.prepend(key, os.path.join(root, sub_dir))
+    # a directory shared by the products
+    env.append("PATH", "/usr/local/bin")
+  for key, sub_dir in PATHS:
+    env.get_value(key)
+
+def run(nb, in_file):
+  if in_file:
+    set_products(src.fileEnviron.get_file_environ(DBG.OutStream(), "bash"), nb)
+  else:
+    set_products(src.environment.Environ({}), nb)
+
+def main(args):
+  opts, args = getopt.getopt(args, "n:p:")
+  repeat = 3
+  nb = 150
+  for opt, value in opts:
+    if opt == "-n":
+      repeat = int(value)
+    if opt == "-p":
+      nb = int(value)
+
+  print("%i products, %i path variables, best of %i" % (nb, len(PATHS), repeat))
+  for in_file, title in [(False, "environment"), (True, "bash file")]:
+    src.environment._ORDERED_SET_PATHS = False
+    t_list = bench(lambda: run(nb, in_file), repeat)
+    src.environment._ORDERED_SET_PATHS = True
+    t_set = bench(lambda: run(nb, in_file), repeat)
+    print("%-11s : strings %8.3f s, ordered sets %8.3f s" % (title, t_list, t_set))
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
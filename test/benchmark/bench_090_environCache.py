@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+micro-benchmark of the launch environment file written by a new sat
+command (sat environ, sat launcher...) for a large application whose
+products have an env_script: the environment computed, or read from the
+cache of the environments.
+
+The synthetic application of bench_020_productsInfos is used, each product
+gets an env_script.
+
+| usage:
+| >> python bench_090_environCache.py [-n <repeat>] [-p <nb products>]
+"""
+
+import os
+import sys
+import shutil
+import getopt
+import tempfile
+
+# get path to salomeTools sources directory parent
+satdir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+if satdir not in sys.path:
+  sys.path.insert(0, satdir)
+  sys.path.insert(0, os.path.join(satdir, "src"))
+
+import src
+import src.product
+import src.environment
+from bench_020_productsInfos import bench, write_application
+from bench_060_buildEnviron import SilentLogger
+
+ENV_SCRIPT = """\
+import os
+
+def set_env(env, prereq_dir, version):
+    env.set("%(name)s_HOME", prereq_dir)
+    env.prepend("PATH", os.path.join(prereq_dir, "bin"))
+    env.prepend("LD_LIBRARY_PATH", os.path.join(prereq_dir, "lib"))
+"""
+
+def add_env_scripts(personal_dir, nb):
+  """add an env_script to the nb products of the application"""
+  for i in range(nb):
+    name = "PROD%i" % i
+    env_script = os.path.join(personal_dir, "env_%s.py" % name)
+    with open(env_script, "w") as f:
+      f.write(ENV_SCRIPT % {"name": name})
+    pyconf = os.path.join(personal_dir, "products", name + ".pyconf")
+    with open(pyconf) as f:
+      content = f.read()
+    root_dir = "_%s_ROOT_DIR : $install_dir" % name
+    content = content.replace(root_dir,
+                              "%s env_script : %r" % (root_dir, env_script))
+    with open(pyconf, "w") as f:
+      f.write(content)
+
+def write_file(cfg, out_dir):
+  """write the launch file as a new sat command does"""
+  src.product.clear_product_config_cache(cfg)
+  src.environment.clear_product_environ_cache(cfg)
+  writer = src.environment.FileEnvWriter(cfg, SilentLogger(), out_dir, None)
+  writer.write_env_file("env_launch.sh", False, "bash")
+
+def main(args):
+  opts, args = getopt.getopt(args, "n:p:")
+  repeat = 3
+  nb = 300
+  for opt, value in opts:
+    if opt == "-n":
+      repeat = int(value)
+    if opt == "-p":
+      nb = int(value)
+
+  home = tempfile.mkdtemp(prefix="sat_bench_090_")
+  os.environ["HOME"] = home
+  stdout = sys.stdout
+  try:
+    import src.salomeTools  # installs _ for the messages
+    import commands.config as CONFIG
+    # creates the personal directories
+    CONFIG.ConfigManager()._create_vars()
+    personal_dir = os.path.join(home, ".salomeTools")
+    write_application(personal_dir, nb)
+    add_env_scripts(personal_dir, nb)
+    cfg = CONFIG.ConfigManager().get_config(application="BENCH")
+    print("%i products with an env_script, best of %i" % (nb, repeat))
+    # write_env_file prints the distribution
+    sys.stdout = open(os.devnull, "w")
+    cfg.LOCAL.addMapping("environ_cache", "no", "")
+    t_computed = bench(lambda: write_file(cfg, home), repeat)
+    cfg.LOCAL.environ_cache = "yes"
+    write_file(cfg, home)
+    t_cached = bench(lambda: write_file(cfg, home), repeat)
+    sys.stdout = stdout
+    print("environment computed       : %8.3f s" % t_computed)
+    print("environment read from cache: %8.3f s" % t_cached)
+  finally:
+    sys.stdout = stdout
+    shutil.rmtree(home)
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+micro-benchmark of the start of a salome launcher for a large application:
+the launcher calls salomeContext for each value of the environment, or
+loads the frozen environment (sat launcher --frozen).
+
+The salomeContext API of KERNEL is replaced by a module which sets the
+variables as it does, and runSalome returns at once: the time measured is
+the start of python and the setting of the environment.
+
+| usage:
+| >> python bench_100_frozenLauncher.py [-n <repeat>] [-p <nb products>]
+"""
+
+import os
+import sys
+import shutil
+import getopt
+import tempfile
+import subprocess
+
+# get path to salomeTools sources directory parent
+satdir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+if satdir not in sys.path:
+  sys.path.insert(0, satdir)
+  sys.path.insert(0, os.path.join(satdir, "src"))
+
+import src
+import src.environment
+import src.fileEnviron
+from bench_020_productsInfos import bench
+from bench_080_pathVariables import PATHS
+
+SALOME_CONTEXT = """\
+import os
+class SalomeContextException(Exception): pass
+class Logger(object):
+  def setLevel(self, level): pass
+class SalomeContext(object):
+  def __init__(self, config): pass
+  def getLogger(self): return Logger()
+  def setVariable(self, name, value, overwrite=False):
+    value = os.path.expandvars(value)
+    if overwrite or name not in os.environ:
+      os.environ[name] = value
+  def addToVariable(self, name, value, separator=os.pathsep):
+    if value == '': return
+    value = os.path.expandvars(value)
+    env = os.getenv(name, None)
+    os.environ[name] = value if env is None else value + separator + env
+  def addToPath(self, value): self.addToVariable("PATH", value)
+  def addToLdLibraryPath(self, value): self.addToVariable("LD_LIBRARY_PATH", value)
+  def addToPythonPath(self, value): self.addToVariable("PYTHONPATH", value)
+  def runSalome(self, args):
+    return None, None, 0
+"""
+
+def write_launcher(out_dir, bin_dir, name, shell, nb):
+  """write the launcher of nb products"""
+  environ = src.environment.Environ({"sat_python_version": 3,
+                                     "sat_bin_kernel_install_dir": bin_dir})
+  path = os.path.join(out_dir, name)
+  with open(path, "w") as output:
+    env = src.fileEnviron.get_file_environ(output, shell, environ)
+    for i in range(nb):
+      root = "PRODUCT_%04i_ROOT_DIR" % i
+      env.set(root, "/opt/products/PRODUCT_%04i" % i)
+      env.set("PRODUCT_%04i_VERSION" % i, "1.0")
+      for key, sub_dir in PATHS:
+        env.prepend(key, os.path.join(env.get(root), sub_dir))
+    env.finish()
+  return path
+
+def main(args):
+  opts, args = getopt.getopt(args, "n:p:")
+  repeat = 10
+  nb = 300
+  for opt, value in opts:
+    if opt == "-n":
+      repeat = int(value)
+    if opt == "-p":
+      nb = int(value)
+
+  out_dir = tempfile.mkdtemp(prefix="sat_bench_100_")
+  try:
+    bin_dir = os.path.join(out_dir, "bin")
+    os.makedirs(bin_dir)
+    with open(os.path.join(bin_dir, "salomeContext.py"), "w") as f:
+      f.write(SALOME_CONTEXT)
+    with open(os.path.join(bin_dir, "salomeContextUtils.py"), "w") as f:
+      f.write("def setOmniOrbUserPath(): pass\n")
+    print("%i products, %i path variables, best of %i" % (nb, len(PATHS), repeat))
+    for name, shell in [("salome", "cfgForPy"),
+                        ("frozen_salome", "cfgForPyFrozen")]:
+      launcher = write_launcher(out_dir, bin_dir, name, shell, nb)
+      t = bench(lambda: subprocess.check_call([sys.executable, launcher]),
+                repeat)
+      print("%-13s : %8.3f s" % (name, t))
+    # the start of python alone
+    t = bench(lambda: subprocess.check_call([sys.executable, "-c", "pass"]),
+              repeat)
+    print("%-13s : %8.3f s" % ("python", t))
+  finally:
+    shutil.rmtree(out_dir)
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
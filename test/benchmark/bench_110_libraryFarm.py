@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+"""\
+micro-benchmark of the start of a process in a large application: python
+loads shared libraries (ctypes) and imports modules of the products, with
+the directories of all the products in LD_LIBRARY_PATH and PYTHONPATH, or
+with the library farm (sat launcher --library_farm).
+
+The shared libraries are compiled with the C compiler (cc), without it
+only the modules are imported.
+
+| usage:
+| >> python bench_110_libraryFarm.py [-n <repeat>] [-p <nb products>]
+"""
+
+import os
+import sys
+import shutil
+import getopt
+import tempfile
+import subprocess
+
+# get path to salomeTools sources directory parent
+satdir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+if satdir not in sys.path:
+  sys.path.insert(0, satdir)
+  sys.path.insert(0, os.path.join(satdir, "src"))
+
+import src
+import src.environment
+import src.libraryFarm
+from bench_020_productsInfos import bench
+
+# the number of products whose libraries and modules are loaded
+NB_LOADED = 20
+
+def write_products(out_dir, nb):
+  """write the libraries and the modules of nb products"""
+  library = None
+  c_file = os.path.join(out_dir, "lib.c")
+  with open(c_file, "w") as f:
+    f.write("int product(void) { return 0; }\n")
+  try:
+    library = os.path.join(out_dir, "lib.so")
+    subprocess.check_call(["cc", "-shared", "-fPIC", "-o", library, c_file])
+  except (OSError, subprocess.CalledProcessError):
+    library = None
+  root = os.path.join(out_dir, "products")
+  for i in range(nb):
+    lib_dir = os.path.join(root, "PRODUCT_%04i" % i, "lib")
+    python_dir = os.path.join(root, "PRODUCT_%04i" % i, "python")
+    os.makedirs(lib_dir)
+    os.makedirs(python_dir)
+    if library is not None:
+      shutil.copy(library, os.path.join(lib_dir, "libproduct%04i.so" % i))
+    with open(os.path.join(python_dir, "product%04i.py" % i), "w") as f:
+      f.write("VERSION = '1.0'\n")
+  return root, library is not None
+
+def get_environ_log(root, nb):
+  env = src.environment.EnvironLog()
+  for i in range(nb):
+    root_dir = "PRODUCT_%04i_ROOT_DIR" % i
+    env.set(root_dir, os.path.join(root, "PRODUCT_%04i" % i))
+    env.prepend("LD_LIBRARY_PATH", os.path.join(env.get(root_dir), "lib"))
+    env.prepend("PYTHONPATH", os.path.join(env.get(root_dir), "python"))
+  return env
+
+def get_command(nb, with_libraries):
+  """python loads the libraries and imports the modules of the products
+  spread in the paths"""
+  products = [i * nb // NB_LOADED for i in range(NB_LOADED)]
+  code = ["import ctypes"]
+  for i in products:
+    if with_libraries:
+      code.append("ctypes.CDLL('libproduct%04i.so')" % i)
+    code.append("import product%04i" % i)
+  return [sys.executable, "-c", "; ".join(code)]
+
+def main(args):
+  opts, args = getopt.getopt(args, "n:p:")
+  repeat = 10
+  nb = 300
+  for opt, value in opts:
+    if opt == "-n":
+      repeat = int(value)
+    if opt == "-p":
+      nb = int(value)
+
+  out_dir = tempfile.mkdtemp(prefix="sat_bench_110_")
+  try:
+    root, with_libraries = write_products(out_dir, nb)
+    environ_log = get_environ_log(root, nb)
+    farm = src.libraryFarm.LibraryFarm(os.path.join(out_dir, "LIBRARY_FARM"),
+                                       {root: root})
+    farmed_log = farm.apply(environ_log)
+    command = get_command(nb, with_libraries)
+    print("%i products, %i loaded%s, best of %i" % (
+          nb, NB_LOADED, "" if with_libraries else " (modules only)", repeat))
+    for name, env in [("paths", environ_log), ("library farm", farmed_log)]:
+      environ = dict(os.environ)
+      for key in ["LD_LIBRARY_PATH", "PYTHONPATH"]:
+        environ[key] = env.get_value(key)
+      t = bench(lambda: subprocess.check_call(command, env=environ), repeat)
+      print("%-13s : %8.3f s" % (name, t))
+  finally:
+    shutil.rmtree(out_dir)
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -19,6 +19,8 @@
 
 import os
 import sys
+import shutil
+import tempfile
 import unittest
 
 import initializeTest # set PATH etc for test
@@ -255,6 +257,98 @@ Bienvenue, Yves
     res = cfg.cc
     DBG.write("test_120 cfg.cc debug", res)
     
+  def test_130(self):
+    # tokens and locations of the buffered reader
+    inStream = DBG.InStream("""\
+aa: "it\\"s" # comment
+bb : [1, 2.5, $aa]
+cc: \"\"\"multi
+line\"\"\"
+dd: aa[0]
+""")
+    reader = PYF.ConfigReader(None)
+    reader.setStream(inStream)
+    res = []
+    while True:
+      token = reader.getToken()
+      res.append((token, reader.lineno, reader.colno))
+      if token[0] == PYF.EOF:
+        break
+    DBG.write("test_130 tokens", res)
+    tokens = [t[0] for t in res]
+    self.assertEqual(tokens[:4], [(PYF.WORD, 'aa'), (PYF.COLON, ':'),
+                                  (PYF.STRING, '"it\\"s"'), (PYF.WORD, 'bb')])
+    self.assertEqual(tokens[6:9], [(PYF.NUMBER, '1'), (PYF.COMMA, ','),
+                                   (PYF.NUMBER, '2.5')])
+    self.assertEqual(tokens[15], (PYF.STRING, '"""multi\nline"""'))
+    self.assertEqual(tokens[18:20], [(PYF.WORD, 'aa'), (PYF.LBRACK2, '[')])
+    self.assertEqual(res[2][1:], (1, 12))
+    self.assertEqual(res[3][1:], (2, 17))
+    self.assertEqual(res[15][1:], (4, 8))
+    self.assertEqual(res[-1], ((PYF.EOF, ''), 6, 2))
+
+  def test_140(self):
+    # error location of the buffered reader
+    inStream = DBG.InStream("""\
+aa: 1
+bb: "unterminated
+""")
+    with self.assertRaises(PYF.ConfigFormatError) as cm:
+      cfg = PYF.Config(inStream)
+    self.assertIn("(3,2): Unterminated quoted string", str(cm.exception))
+
+  def test_150(self):
+    # file read on first access
+    tmpdir = tempfile.mkdtemp(prefix="sat_test_035_")
+    try:
+      with open(os.path.join(tmpdir, "good.pyconf"), "w") as f:
+        f.write("aa: 1\nbb: $aa + 1\n")
+      with open(os.path.join(tmpdir, "bad.pyconf"), "w") as f:
+        f.write("aa: 'unterminated\n")
+      cfg = PYF.Config()
+      cfg.good = PYF.LazyConfig(os.path.join(tmpdir, "good.pyconf"))
+      cfg.bad = PYF.LazyConfig(os.path.join(tmpdir, "bad.pyconf"),
+                               error_message="ERROR bad: ")
+      data = object.__getattribute__(cfg, 'data')
+      self.assertIsInstance(data["good"], PYF.LazyConfig)
+      self.assertEqual(sorted(cfg.keys()), ["bad", "good"])
+      self.assertEqual(cfg.good.bb, 2)
+      self.assertIsInstance(data["good"], PYF.Config)
+      self.assertEqual(cfg.good.from_file, os.path.join(tmpdir, "good.pyconf"))
+      self.assertFalse("bad" in cfg)
+      self.assertEqual(cfg.keys(), ["good"])
+    finally:
+      shutil.rmtree(tmpdir)
+
+  def test_160(self):
+    # memoized references, invalidated by any modification
+    inStream = DBG.InStream("""\
+aa: 1
+bb: $aa + 1
+cc: [$bb, $dd.ee]
+dd: { ee: $aa }
+ff: `ns.value`
+""")
+    class Namespace(object):
+      value = "a"
+    ns = Namespace()
+    cfg = PYF.Config(inStream)
+    cfg.addNamespace(ns, "ns")
+    self.assertEqual(cfg.bb, 2)
+    self.assertEqual(cfg.cc[0], 2)
+    self.assertEqual(cfg.cc[1], 1)
+    self.assertEqual(cfg.ff, "a")
+    cfg.aa = 5
+    self.assertEqual(cfg.bb, 6)
+    self.assertEqual(cfg.cc[0], 6)
+    self.assertEqual(cfg.dd.ee, 5)
+    self.assertEqual(cfg.cc[1], 5)
+    cfg.dd.ee = 7
+    self.assertEqual(cfg.cc[1], 7)
+    # backtick references are evaluated each time
+    ns.value = "b"
+    self.assertEqual(cfg.ff, "b")
+
   def test_999(self):
     # one shot tearDown() for this TestCase
     # SAT.setLocale() # end test english
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src.debug as DBG # Easy print stderr (for DEBUG only)
+import src.salomeTools as SAT
+import commands.config as CONFIG
+
+class TestCase(unittest.TestCase):
+  "Test the cache of the merged configuration in ~/.salomeTools/cache"""
+
+  TRG = "APPLI_TEST"
+
+  def setUp(self):
+    # a personal directory ~/.salomeTools only for the test
+    self.home = tempfile.mkdtemp(prefix="sat_test_040_")
+    self.home_save = os.environ.get("HOME")
+    os.environ["HOME"] = self.home
+
+  def tearDown(self):
+    if self.home_save is None:
+      del os.environ["HOME"]
+    else:
+      os.environ["HOME"] = self.home_save
+    shutil.rmtree(self.home)
+
+  def get_cache_files(self):
+    cache_dir = os.path.join(self.home, ".salomeTools", "cache")
+    if not os.path.isdir(cache_dir):
+      return []
+    return os.listdir(cache_dir)
+
+  def test_010(self):
+    # same config read from the files and from the cache
+    cfg1 = CONFIG.ConfigManager().get_config(application=self.TRG, command="config")
+    self.assertEqual(len(self.get_cache_files()), 1)
+    cfg2 = CONFIG.ConfigManager().get_config(application=self.TRG, command="compile")
+    self.assertEqual(cfg2.VARS.command, "compile")
+    cfg2.VARS.command = "config"
+    cfg2.VARS.datehour = cfg1.VARS.datehour
+    cfg2.VARS.date = cfg1.VARS.date
+    cfg2.VARS.hour = cfg1.VARS.hour
+    self.assertEqual(DBG.getStrConfigDbg(cfg1), DBG.getStrConfigDbg(cfg2))
+
+  def test_020(self):
+    # a modified pyconf file is read again
+    cfgManager = CONFIG.ConfigManager()
+    cfg = cfgManager.get_config(application=self.TRG)
+    self.assertEqual(cfg.USER.editor, "vi")
+    user_cfg_file = cfgManager.get_user_config_file()
+    with open(user_cfg_file) as f:
+      content = f.read()
+    with open(user_cfg_file, "w") as f:
+      f.write(content.replace("'vi'", "'emacs'"))
+    cfg = CONFIG.ConfigManager().get_config(application=self.TRG)
+    self.assertEqual(cfg.USER.editor, "emacs")
+
+  def test_030(self):
+    # the overwrites of the command line are not mixed
+    cfg = CONFIG.ConfigManager().get_config(application=self.TRG)
+    options, _ = SAT.parser.parse_args(["-o", "USER.editor='nano'"])
+    cfg = CONFIG.ConfigManager().get_config(application=self.TRG, options=options)
+    self.assertEqual(cfg.USER.editor, "nano")
+    self.assertEqual(len(self.get_cache_files()), 2)
+    cfg = CONFIG.ConfigManager().get_config(application=self.TRG)
+    self.assertEqual(cfg.USER.editor, "vi")
+    # no cache at all
+    options, _ = SAT.parser.parse_args(["--no_config_cache"])
+    shutil.rmtree(os.path.join(self.home, ".salomeTools", "cache"))
+    cfg = CONFIG.ConfigManager().get_config(application=self.TRG, options=options)
+    self.assertEqual(self.get_cache_files(), [])
+
+  def test_040(self):
+    # the products files are read on first access, also from the cache
+    products_dir = os.path.join(self.home, ".salomeTools", "products")
+    os.makedirs(products_dir)
+    with open(os.path.join(products_dir, "KERNEL.pyconf"), "w") as f:
+      f.write("default : { name : 'KERNEL' application : $APPLICATION.name }\n")
+    with open(os.path.join(products_dir, "GEOM.pyconf"), "w") as f:
+      f.write("default : { name : 'GEOM' \n")
+    for i in range(2):
+      cfg = CONFIG.ConfigManager().get_config(application=self.TRG)
+      data = object.__getattribute__(cfg.PRODUCTS, 'data')
+      self.assertEqual(sorted(data.keys()), ["GEOM", "KERNEL"])
+      self.assertIsInstance(data["KERNEL"], CONFIG.src.pyconf.LazyConfig)
+      self.assertEqual(cfg.PRODUCTS.KERNEL.default.name, "KERNEL")
+      self.assertEqual(cfg.PRODUCTS.KERNEL.default.application, self.TRG)
+      self.assertIsInstance(data["KERNEL"], CONFIG.src.pyconf.Config)
+      self.assertFalse("GEOM" in cfg.PRODUCTS)
+      self.assertEqual(list(cfg.PRODUCTS.keys()), ["KERNEL"])
+
+  def test_050(self):
+    # the least recently used configurations are removed from the cache
+    cache_dir = os.path.join(self.home, ".salomeTools", "cache")
+    os.makedirs(cache_dir)
+    for i in range(5):
+      path = os.path.join(cache_dir, "config_%i.pickle" % i)
+      open(path, "w").close()
+      os.utime(path, (1000 + i, 1000 + i))
+    self.assertEqual(CONFIG.evict_cached_configs(cache_dir, 3), 2)
+    self.assertEqual(sorted(self.get_cache_files()),
+                     ["config_2.pickle", "config_3.pickle", "config_4.pickle"])
+    # an error while writing the cache does not stop the command
+    cfgManager = CONFIG.ConfigManager()
+    def get_files_status(files):
+      raise OSError("status")
+    cfgManager.get_files_status = get_files_status
+    cfg = cfgManager.get_config(application=self.TRG)
+    self.assertEqual(cfg.VARS.application, self.TRG)
+    self.assertFalse([f for f in self.get_cache_files() if f.endswith(".tmp")])
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
+    pass
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src.product
+import src.pyconf
+import src.salomeTools as SAT
+import commands.config as CONFIG
+
+_APPLICATION = """\
+APPLICATION :
+{
+    name : 'TEST_045'
+    workdir : $VARS.personalDir + $VARS.sep + 'TEST_045'
+    tag : 'master'
+    base : 'yes'
+    products : { AA : 'master' BB : 'master' }
+}
+"""
+
+_PRODUCT = """\
+default :
+{
+    name : "%s"
+    get_source : "archive"
+    depend : [ %s ]
+    source_dir : $APPLICATION.workdir + $VARS.sep + 'SOURCES' + $VARS.sep + $name
+}
+"""
+
+class TestCase(unittest.TestCase):
+  "Test the memoization of src.product.get_product_config"""
+
+  def setUp(self):
+    # a personal directory ~/.salomeTools only for the test
+    self.home = tempfile.mkdtemp(prefix="sat_test_045_")
+    self.home_save = os.environ.get("HOME")
+    os.environ["HOME"] = self.home
+    CONFIG.ConfigManager()._create_vars()
+    personal_dir = os.path.join(self.home, ".salomeTools")
+    with open(os.path.join(personal_dir, "Applications", "TEST_045.pyconf"), "w") as f:
+      f.write(_APPLICATION)
+    for name, depend in [("AA", ""), ("BB", '"AA"')]:
+      with open(os.path.join(personal_dir, "products", name + ".pyconf"), "w") as f:
+        f.write(_PRODUCT % (name, depend))
+    self.base = os.path.join(self.home, "BASE")
+    options, _ = SAT.parser.parse_args(["-o", "LOCAL.base='%s'" % self.base])
+    self.cfg = CONFIG.ConfigManager().get_config(application="TEST_045", options=options)
+
+  def tearDown(self):
+    src.product.clear_product_config_cache()
+    if self.home_save is None:
+      del os.environ["HOME"]
+    else:
+      os.environ["HOME"] = self.home_save
+    shutil.rmtree(self.home)
+
+  def test_010(self):
+    # memoized result
+    p_info = src.product.get_product_config(self.cfg, "BB")
+    self.assertEqual(p_info.install_dir, os.path.join(self.base, "BB-master", "config-1"))
+    self.assertIs(src.product.get_product_config(self.cfg, "BB"), p_info)
+    self.assertIs(src.product.get_product_config(self.cfg, "BB", False),
+                  src.product.get_product_config(self.cfg, "BB", False))
+
+  def test_020(self):
+    # the result is computed again if the config is modified
+    p_info = src.product.get_product_config(self.cfg, "BB")
+    p_info.install_dir = "/tmp/somewhere"
+    p_info = src.product.get_product_config(self.cfg, "BB")
+    self.assertEqual(p_info.install_dir, os.path.join(self.base, "BB-master", "config-1"))
+
+  def test_030(self):
+    # the result is computed again if the cache is cleared
+    p_info = src.product.get_product_config(self.cfg, "BB")
+    install_dir = p_info.install_dir
+    os.makedirs(install_dir)
+    self.assertEqual(src.product.get_product_config(self.cfg, "BB").install_dir, install_dir)
+    src.product.clear_product_config_cache(self.cfg)
+    self.assertEqual(src.product.get_product_config(self.cfg, "BB").install_dir,
+                     os.path.join(self.base, "BB-master", "config-2"))
+
+  def test_040(self):
+    # the version range sections are found with the index of the sections
+    aProd = src.pyconf.Config()
+    for name in ["default", "version_1_0_0_to_2_0_0", "_from_3_0_0_to_4_0_0", "version_5_0_0"]:
+      aProd[name] = src.pyconf.Mapping(aProd)
+    aProd.from_file = "CC.pyconf"
+    self.cfg.PRODUCTS["CC"] = aProd
+    for version, section in [("1.5.0", "version_1_0_0_to_2_0_0"), ("2.0.0", "version_1_0_0_to_2_0_0"),
+                             ("3.0.0", "_from_3_0_0_to_4_0_0"), ("2.5.0", "default"),
+                             ("5_0_0", "version_5_0_0"), ("master", "default")]:
+      self.assertEqual(src.product.get_product_section(self.cfg, "CC", version).section, section)
+    # the index is built again if the sections change
+    aProd["version_2_1_0_to_2_9_0"] = src.pyconf.Mapping(aProd)
+    self.assertEqual(src.product.get_product_section(self.cfg, "CC", "2.5.0").section,
+                     "version_2_1_0_to_2_9_0")
+    # ambiguous ranges
+    aProd["version_1_5_0_to_1_6_0"] = src.pyconf.Mapping(aProd)
+    self.assertIsNone(src.product.get_product_section(self.cfg, "CC", "1.5.0"))
+
+  def test_050(self):
+    # the config-<i> directories of the base are found with the index file
+    p_info = src.product.get_product_config(self.cfg, "BB")
+    os.makedirs(p_info.install_dir)
+    src.product.add_compile_config_file(p_info, self.cfg)
+    prod_dir = os.path.dirname(p_info.install_dir)
+    index_file = os.path.join(prod_dir, src.product.BASE_INDEX_FILENAME)
+    self.assertTrue(os.path.exists(index_file))
+    src.product.clear_product_config_cache(self.cfg)
+    self.assertEqual(src.product.get_product_config(self.cfg, "BB").install_dir,
+                     os.path.join(prod_dir, "config-1"))
+    # another version of a dependency
+    self.cfg.APPLICATION.products.AA = "v2"
+    p_info = src.product.get_product_config(self.cfg, "BB")
+    self.assertEqual(p_info.install_dir, os.path.join(prod_dir, "config-2"))
+    os.makedirs(p_info.install_dir)
+    src.product.add_compile_config_file(p_info, self.cfg)
+    # a base without index file (or an index not up to date)
+    os.remove(index_file)
+    self.cfg.APPLICATION.products.AA = "master"
+    self.assertEqual(src.product.get_product_config(self.cfg, "BB").install_dir,
+                     os.path.join(prod_dir, "config-1"))
+    # a query does not write the index
+    self.assertFalse(os.path.exists(index_file))
+    self.assertEqual(src.product.rebuild_base_index(self.base), 1)
+    with open(index_file) as f:
+      self.assertEqual(sorted(json.load(f)["entries"].keys()), ["config-1", "config-2"])
+    # the entry found in the index is used without reading the base
+    src.product.clear_product_config_cache(self.cfg)
+    listdir = os.listdir
+    def no_listdir(path):
+      if path == prod_dir:
+        raise AssertionError("the base is read")
+      return listdir(path)
+    os.listdir = no_listdir
+    try:
+      install_dir = src.product.get_product_config(self.cfg, "BB").install_dir
+    finally:
+      os.listdir = listdir
+    self.assertEqual(install_dir, os.path.join(prod_dir, "config-1"))
+    # the sat-config file of another product in a config-<i> is not read
+    with open(os.path.join(prod_dir, "config-1", src.product.CONFIG_FILENAME + "AA.pyconf"), "w") as f:
+      f.write("AA : 'v3'\n")
+    self.assertEqual(src.product.rebuild_base_index(self.base), 1)
+    src.product.clear_product_config_cache(self.cfg)
+    self.assertEqual(src.product.get_product_config(self.cfg, "BB").install_dir,
+                     os.path.join(prod_dir, "config-1"))
+
+  def test_060(self):
+    # the predicates read the ProductInfo record, computed again after a modification
+    p_info = src.product.get_product_config(self.cfg, "BB")
+    record = src.product.get_product_info(p_info)
+    self.assertIs(src.product.get_product_info(p_info), record)
+    self.assertEqual(record.depend, ("AA",))
+    self.assertEqual(record.install_dir, p_info.install_dir)
+    self.assertFalse(src.product.product_is_native(p_info))
+    self.assertFalse(src.product.product_is_vcs(p_info))
+    self.assertTrue(src.product.product_compiles(p_info))
+    self.assertFalse(src.product.product_test_property(p_info, "pip", "yes"))
+    p_info.get_source = "native"
+    p_info.addMapping("properties", src.pyconf.Mapping(p_info), "")
+    p_info.properties.pip = "yes"
+    self.assertTrue(src.product.product_is_native(p_info))
+    self.assertTrue(src.product.product_test_property(p_info, "pip", "yes"))
+    self.assertIsNot(src.product.get_product_info(p_info), record)
+    # the logo is a path
+    self.assertFalse(src.product.product_has_logo(p_info))
+    p_info.properties.logo = "/path/to/logo.png"
+    self.assertEqual(src.product.product_has_logo(p_info), "/path/to/logo.png")
+    # a missing key raises the same error as before
+    self.assertIsNone(src.product.get_product_info(p_info).is_cmake)
+    with self.assertRaises(AttributeError):
+      src.product.product_is_cmake(p_info)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
+    pass
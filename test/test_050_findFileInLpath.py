@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src
+
+class TestCase(unittest.TestCase):
+  "Test src.find_file_in_lpath and its index of the directories"""
+
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp(prefix="sat_test_050_")
+    self.dirs = [os.path.join(self.tmpdir, d) for d in ["d1", "d2", "d3"]]
+    for d in self.dirs:
+      os.makedirs(os.path.join(d, "patches"))
+    self.touch(self.dirs[1], "a.pyconf")
+    self.touch(self.dirs[2], "a.pyconf")
+    self.touch(os.path.join(self.dirs[2], "patches"), "a.patch")
+
+  def tearDown(self):
+    shutil.rmtree(self.tmpdir)
+
+  def touch(self, directory, name):
+    open(os.path.join(directory, name), "w").close()
+    # an old directory, that is indexed
+    os.utime(directory, (time.time() - 100, time.time() - 100))
+
+  def test_010(self):
+    # first match wins
+    lpath = [os.path.join(self.tmpdir, "none")] + self.dirs
+    self.assertEqual(src.find_file_in_lpath("a.pyconf", lpath),
+                     os.path.join(self.dirs[1], "a.pyconf"))
+    self.assertEqual(src.find_file_in_lpath("a.patch", lpath, "patches"),
+                     os.path.join(self.dirs[2], "patches", "a.patch"))
+    self.assertFalse(src.find_file_in_lpath("b.pyconf", lpath))
+    self.assertFalse(src.find_file_in_lpath("patches", lpath, "a.pyconf"))
+
+  def test_020(self):
+    # the index is revalidated with the modification time of the directories
+    self.assertEqual(src.find_file_in_lpath("a.pyconf", self.dirs),
+                     os.path.join(self.dirs[1], "a.pyconf"))
+    self.touch(self.dirs[0], "a.pyconf")
+    self.assertEqual(src.find_file_in_lpath("a.pyconf", self.dirs),
+                     os.path.join(self.dirs[0], "a.pyconf"))
+    os.remove(os.path.join(self.dirs[0], "a.pyconf"))
+    self.assertEqual(src.find_file_in_lpath("a.pyconf", self.dirs),
+                     os.path.join(self.dirs[1], "a.pyconf"))
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
+    pass
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import os
+import sys
+import collections
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src
+from src.dependencyGraph import DependencyGraph
+
+# GUI and GEOM depend on KERNEL, SMESH on GEOM, KERNEL on Python and boost
+_GRAPH = collections.OrderedDict([
+  ("GUI", ["KERNEL", "Qt"]),
+  ("SMESH", ["GEOM", "KERNEL"]),
+  ("GEOM", ["KERNEL", "GUI"]),
+  ("KERNEL", ["Python", "boost"]),
+  ("Python", []),
+  ("boost", ["Python"]),
+  ("Qt", []),
+  ])
+
+class TestCase(unittest.TestCase):
+  "Test the graph of the dependencies of the products"""
+
+  def test_010(self):
+    # topological sort, in depth first order
+    graph = DependencyGraph(_GRAPH)
+    self.assertEqual(graph.get_sorted_nodes(),
+                     ["Python", "boost", "KERNEL", "Qt", "GUI", "GEOM", "SMESH"])
+
+  def test_020(self):
+    # recursive dependencies and children
+    graph = DependencyGraph(_GRAPH)
+    self.assertEqual(graph.get_all_dependencies("GEOM"),
+                     ["KERNEL", "Python", "boost", "GUI", "Qt"])
+    self.assertEqual(graph.get_all_dependencies("Python"), [])
+    self.assertEqual(graph.depth_search(["GUI", "boost", "Qt"]),
+                     ["GUI", "KERNEL", "Python", "boost", "Qt"])
+    self.assertEqual(graph.get_children("KERNEL"), ["GUI", "SMESH", "GEOM"])
+    self.assertEqual(graph.get_all_children(["GUI"]), ["SMESH", "GEOM"])
+    self.assertEqual(graph.get_all_children(["boost", "Qt"]), ["GUI", "SMESH", "GEOM", "KERNEL"])
+    self.assertTrue(graph.depends_on("SMESH", ["Qt"]))
+    self.assertFalse(graph.depends_on("KERNEL", ["Qt"]))
+
+  def test_030(self):
+    # errors : a missing product, a cycle
+    graph = DependencyGraph(_GRAPH)
+    graph.add_node("PARAVIS", ["ParaView"])
+    with self.assertRaises(src.SatException) as cm:
+      graph.get_sorted_nodes()
+    self.assertIn("ParaView product is referenced", str(cm.exception))
+    self.assertIn("['PARAVIS']", str(cm.exception))
+    graph = DependencyGraph(_GRAPH)
+    graph.add_node("Python", ["GEOM"])
+    with self.assertRaises(src.SatException) as cm:
+      graph.get_sorted_nodes()
+    self.assertIn("KERNEL -> Python -> GEOM -> KERNEL", str(cm.exception))
+
+  def test_040(self):
+    # a deep graph, beyond the recursion limit
+    nb = sys.getrecursionlimit() + 100
+    graph = DependencyGraph()
+    for i in range(nb):
+      graph.add_node("P%i" % i, ["P%i" % (i + 1)] if i + 1 < nb else [])
+    sorted_nodes = graph.get_sorted_nodes()
+    self.assertEqual(sorted_nodes[0], "P%i" % (nb - 1))
+    self.assertEqual(len(graph.get_all_dependencies("P0")), nb - 1)
+    self.assertEqual(len(graph.get_all_children(["P%i" % (nb - 1)])), nb - 1)
+
+  def test_050(self):
+    # the critical path, the durations being the weights of the nodes
+    graph = DependencyGraph(_GRAPH)
+    durations = {"Python": 10, "boost": 30, "Qt": 50, "KERNEL": 20, "GUI": 40, "GEOM": 5, "SMESH": 15}
+    self.assertEqual(graph.get_critical_path(durations), (120, ["Python", "boost", "KERNEL", "GUI", "GEOM", "SMESH"]))
+    durations["Qt"] = 100
+    self.assertEqual(graph.get_critical_path(durations), (160, ["Qt", "GUI", "GEOM", "SMESH"]))
+    self.assertEqual(graph.get_critical_path({})[0], 0)
+    self.assertEqual(DependencyGraph().get_critical_path({}), (0, []))
+
+  def test_060(self):
+    # the simulation of sat compile --jobs
+    graph = DependencyGraph(_GRAPH)
+    durations = {"Python": 10, "boost": 30, "Qt": 50, "KERNEL": 20, "GUI": 40, "GEOM": 5, "SMESH": 15}
+    nodes = graph.get_sorted_nodes()
+    self.assertEqual(graph.get_parallel_length(nodes, durations, 1), sum(durations.values()))
+    # Qt is compiled during Python, boost and KERNEL
+    self.assertEqual(graph.get_parallel_length(nodes, durations, 2), 120)
+    self.assertEqual(graph.get_parallel_length(nodes, durations, 8),
+                     graph.get_critical_path(durations)[0])
+    # the products already installed are not waited for
+    self.assertEqual(graph.get_parallel_length(["GUI", "GEOM", "SMESH"], durations, 2), 60)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
+    pass
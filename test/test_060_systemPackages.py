@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import os
+import sys
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src
+import src.system
+import src.product
+import src.pyconf
+import src.debug as DBG
+
+_PRODUCT = """\
+system_info :
+{
+    rpm : ["zlib", "libpng"]
+    rpm_dev : ["zlib-devel"]
+    CO7 : { rpm : ["libXext"] rpm_dev : ["libpng-devel"] }
+    apt : ["zlib1g"]
+}
+"""
+
+class FakeRpm(src.system.PackageManager):
+  """a fake rpm, with the packages installed, which records the queries"""
+  name = "rpm"
+  check_cmd = ["rpm", "-q"]
+
+  def __init__(self, installed):
+    super(FakeRpm, self).__init__()
+    self.installed = installed
+    self.queries = []
+
+  def query(self, pkgs):
+    self.queries.append(list(pkgs))
+    return dict((p, (p in self.installed, p + "-1.0.x86_64 ")) for p in pkgs)
+
+class FakeRpmCommand(src.system.RpmPackageManager):
+  """rpm with a fake output of rpm -q"""
+  def __init__(self, output):
+    super(FakeRpmCommand, self).__init__()
+    self.output = output
+    self.queries = []
+
+  def run_query(self, pkgs):
+    self.queries.append(list(pkgs))
+    lines = []
+    for p in pkgs:
+      lines += self.output.get(p, ["package %s is not installed" % p])
+    return (0 if lines else 1), lines
+
+class TestCase(unittest.TestCase):
+  "Test the queries of the system package manager"""
+
+  def setUp(self):
+    self.managers = dict(src.system._package_managers)
+    self.names = dict(src.system._package_manager_names)
+
+  def tearDown(self):
+    src.system._package_managers.clear()
+    src.system._package_managers.update(self.managers)
+    src.system._package_manager_names.clear()
+    src.system._package_manager_names.update(self.names)
+
+  def test_010(self):
+    # one query for the packages of a product, then the process cache
+    fake = FakeRpm(["zlib", "zlib-devel", "libXext"])
+    src.system.set_package_manager(fake, "CO")
+    check_cmd = src.system.get_pkg_check_cmd("CO")
+    self.assertEqual(check_cmd, ["rpm", "-q"])
+    product_info = src.pyconf.Config(DBG.InStream(_PRODUCT))
+    run_pkg, build_pkg = src.product.check_system_dep("CO7", check_cmd, product_info)
+    self.assertEqual(fake.queries, [["zlib", "libpng", "libXext", "zlib-devel", "libpng-devel"]])
+    self.assertEqual(sorted(run_pkg.keys()), ["libXext", "libpng", "zlib"])
+    self.assertEqual(sorted(build_pkg.keys()), ["libpng-devel", "zlib-devel"])
+    self.assertIn("OK", run_pkg["zlib"])
+    self.assertIn("zlib-1.0.x86_64", run_pkg["zlib"])
+    self.assertIn("KO", run_pkg["libpng"])
+    self.assertIn("KO", build_pkg["libpng-devel"])
+    src.product.check_system_dep("CO7", check_cmd, product_info)
+    self.assertIn("OK", src.system.check_system_pkg(check_cmd, "zlib-devel"))
+    self.assertEqual(len(fake.queries), 1)
+
+  def test_020(self):
+    # parsing of the output of rpm -q, one line per package or one query per package
+    rpm = FakeRpmCommand({"zlib": ["zlib-1.2.7-18.el7.x86_64"],
+                          "glibc": ["glibc-2.17-317.el7.x86_64", "glibc-2.17-317.el7.i686"]})
+    src.system.set_package_manager(rpm)
+    status = src.system.check_system_pkgs(["rpm", "-q"], ["zlib", "libpng"])
+    self.assertEqual(rpm.queries, [["zlib", "libpng"]])
+    self.assertIn("OK", status["zlib"])
+    self.assertIn("(zlib-1.2.7-18.el7.x86_64 )", status["zlib"])
+    self.assertIn("KO", status["libpng"])
+    status = src.system.check_system_pkgs(["rpm", "-q"], ["zlib", "glibc", "tcl"])
+    self.assertEqual(rpm.queries[1:], [["glibc", "tcl"], ["glibc"], ["tcl"]])
+    self.assertIn("glibc-2.17-317.el7.x86_64 glibc-2.17-317.el7.i686", status["glibc"])
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
+    pass
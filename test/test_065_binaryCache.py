@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src.product
+import src.binaryCache
+import src.sourceFingerprint
+import src.salomeTools as SAT
+import commands.config as CONFIG
+
+_APPLICATION = """\
+APPLICATION :
+{
+    name : 'TEST_065'
+    workdir : $VARS.personalDir + $VARS.sep + 'TEST_065'
+    tag : 'master'
+    products : { AA : 'master' BB : 'master' }
+}
+"""
+
+_PRODUCT = """\
+default :
+{
+    name : "%s"
+    get_source : "archive"
+    build_source : "cmake"
+    cmake_options : ""
+    depend : [ %s ]
+    source_dir : $APPLICATION.workdir + $VARS.sep + 'SOURCES' + $VARS.sep + $name
+    build_dir : $APPLICATION.workdir + $VARS.sep + 'BUILD' + $VARS.sep + $name
+    install_dir : $APPLICATION.workdir + $VARS.sep + 'INSTALL' + $VARS.sep + $name
+}
+"""
+
+class TestCase(unittest.TestCase):
+  "Test the binary cache of the compiled products"""
+
+  def setUp(self):
+    # a personal directory ~/.salomeTools only for the test
+    self.home = tempfile.mkdtemp(prefix="sat_test_065_")
+    self.home_save = os.environ.get("HOME")
+    os.environ["HOME"] = self.home
+    CONFIG.ConfigManager()._create_vars()
+    personal_dir = os.path.join(self.home, ".salomeTools")
+    with open(os.path.join(personal_dir, "Applications", "TEST_065.pyconf"), "w") as f:
+      f.write(_APPLICATION)
+    for name, depend in [("AA", ""), ("BB", '"AA"')]:
+      with open(os.path.join(personal_dir, "products", name + ".pyconf"), "w") as f:
+        f.write(_PRODUCT % (name, depend))
+    self.cache_dir = os.path.join(self.home, "CACHE")
+    options, _ = SAT.parser.parse_args(["-o", "LOCAL.binary_cache='%s'" % self.cache_dir])
+    self.cfg = CONFIG.ConfigManager().get_config(application="TEST_065", options=options)
+
+  def tearDown(self):
+    src.product.clear_product_config_cache()
+    if self.home_save is None:
+      del os.environ["HOME"]
+    else:
+      os.environ["HOME"] = self.home_save
+    shutil.rmtree(self.home)
+
+  def write_file(self, path, content):
+    if not os.path.isdir(os.path.dirname(path)):
+      os.makedirs(os.path.dirname(path))
+    with open(path, "w") as f:
+      f.write(content)
+
+  def test_010(self):
+    # the key changes with the sources, the options and the dependencies
+    p_info = src.product.get_product_config(self.cfg, "BB")
+    self.assertIsNone(src.binaryCache.get_product_key(self.cfg, p_info))  # no sources
+    self.write_file(os.path.join(p_info.source_dir, "CMakeLists.txt"), "project(BB)\n")
+    key = src.binaryCache.get_product_key(self.cfg, p_info)
+    self.assertIsNotNone(key)
+    self.assertEqual(src.binaryCache.get_product_key(self.cfg, p_info), key)
+    self.write_file(os.path.join(p_info.source_dir, "CMakeLists.txt"), "project(BB CXX)\n")
+    key2 = src.binaryCache.get_product_key(self.cfg, p_info)
+    self.assertNotEqual(key2, key)
+    p_info.cmake_options = "-DWITH_X=ON"
+    key3 = src.binaryCache.get_product_key(self.cfg, p_info)
+    self.assertNotIn(key3, [key, key2])
+    # the fingerprint of the sources already computed is used
+    sources = src.product.get_source_state(p_info)[0]
+    self.assertEqual(src.binaryCache.get_product_key(self.cfg, p_info, sources), key3)
+    self.assertNotEqual(src.binaryCache.get_product_key(self.cfg, p_info, "tree:0"), key3)
+    # the build environment and the cmake generator
+    cflags = os.environ.get("CFLAGS")
+    os.environ["CFLAGS"] = "-O0 -g"
+    try:
+      key4 = src.binaryCache.get_product_key(self.cfg, p_info)
+    finally:
+      if cflags is None:
+        del os.environ["CFLAGS"]
+      else:
+        os.environ["CFLAGS"] = cflags
+    self.assertNotIn(key4, [key, key2, key3])
+    self.assertEqual(src.binaryCache.get_product_key(self.cfg, p_info), key3)
+    p_info.cmake_generator = "Ninja"
+    self.assertNotIn(src.binaryCache.get_product_key(self.cfg, p_info), [key, key2, key3, key4])
+    self.cfg.APPLICATION.products.AA = "v2"
+    p_info = src.product.get_product_config(self.cfg, "BB")
+    self.assertNotIn(src.binaryCache.get_product_key(self.cfg, p_info), [key, key2, key3])
+    # the native products are not cached
+    p_info.get_source = "native"
+    self.assertIsNone(src.binaryCache.get_product_key(self.cfg, p_info))
+
+  def test_020(self):
+    # store and restore an install directory
+    cache = src.binaryCache.get_binary_cache(self.cfg)
+    self.assertEqual(cache.cache_dir, self.cache_dir)
+    install_dir = os.path.join(self.home, "INSTALL", "AA")
+    self.write_file(os.path.join(install_dir, "lib", "libAA.so"), "binary")
+    os.symlink("libAA.so", os.path.join(install_dir, "lib", "libAA.so.1"))
+    key = "ab" * 20
+    self.assertFalse(cache.has(key))
+    self.assertFalse(cache.restore(key, install_dir))
+    cache.store(key, install_dir, {"product": "AA"})
+    self.assertTrue(cache.has(key))
+    self.assertEqual(cache.get_info(key)["product"], "AA")
+    shutil.rmtree(install_dir)
+    self.assertTrue(cache.restore(key, install_dir))
+    with open(os.path.join(install_dir, "lib", "libAA.so")) as f:
+      self.assertEqual(f.read(), "binary")
+    self.assertEqual(os.readlink(os.path.join(install_dir, "lib", "libAA.so.1")), "libAA.so")
+    self.assertEqual(os.listdir(os.path.dirname(install_dir)), ["AA"])
+    self.assertEqual(cache.purge(), 1)
+    self.assertFalse(cache.has(key))
+
+  def test_030(self):
+    # the least recently used archives are evicted
+    cache = src.binaryCache.BinaryCache(self.cache_dir, 10 ** 9)
+    install_dir = os.path.join(self.home, "INSTALL", "AA")
+    self.write_file(os.path.join(install_dir, "data"), "0123456789" * 500)
+    now = time.time()
+    for i, key in enumerate(["a1" * 20, "b2" * 20, "c3" * 20]):
+      cache.store(key, install_dir)
+      os.utime(cache.get_archive_path(key), (now - 100 + i, now - 100 + i))
+    self.assertTrue(cache.restore("a1" * 20, install_dir))  # the most recently used
+    size = cache.get_entries()[0][1]
+    cache.size_limit = 2 * size
+    self.assertEqual(cache.evict(), ["b2" * 20])
+    self.assertEqual([key for last_use, size, key in cache.get_entries()], ["c3" * 20, "a1" * 20])
+
+  def test_040(self):
+    # the fingerprint of a git repository: the commit and the modified files
+    source_dir = os.path.join(self.home, "SRC")
+    self.write_file(os.path.join(source_dir, "a.txt"), "a\n")
+    git = ["git", "-c", "user.name=sat", "-c", "user.email=sat@test", "-C", source_dir]
+    if os.system("git init -q %s" % source_dir) != 0:
+      self.skipTest("git is not available")
+    os.system(" ".join(git + ["add", "a.txt"]))
+    os.system(" ".join(git + ["commit", "-q", "-m", "first"]))
+    fingerprint = src.sourceFingerprint.get_source_fingerprint(source_dir)
+    self.assertFalse(fingerprint.startswith("tree:"))
+    self.write_file(os.path.join(source_dir, "a.txt"), "b\n")
+    fingerprint2 = src.sourceFingerprint.get_source_fingerprint(source_dir)
+    self.assertNotEqual(fingerprint2, fingerprint)
+    self.write_file(os.path.join(source_dir, "a.txt"), "a\n")
+    self.assertEqual(src.sourceFingerprint.get_source_fingerprint(source_dir), fingerprint)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
+    pass
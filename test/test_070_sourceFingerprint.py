@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src.pyconf
+import src.product
+import src.sourceFingerprint as SFP
+
+class TestCase(unittest.TestCase):
+  "Test the fingerprints of the sources, for sat compile --update"""
+
+  def setUp(self):
+    self.home = tempfile.mkdtemp(prefix="sat_test_070_")
+    self.source_dir = os.path.join(self.home, "SOURCES", "AA")
+    self.install_dir = os.path.join(self.home, "INSTALL", "AA")
+    os.makedirs(self.install_dir)
+    self.write_file("CMakeLists.txt", "project(AA)\n")
+    self.write_file(os.path.join("src", "a.cxx"), "int a;\n")
+    self.p_info = src.pyconf.Config()
+    self.p_info.name = "AA"
+    self.p_info.source_dir = self.source_dir
+    self.p_info.install_dir = self.install_dir
+
+  def tearDown(self):
+    shutil.rmtree(self.home)
+
+  def write_file(self, name, content):
+    path = os.path.join(self.source_dir, name)
+    if not os.path.isdir(os.path.dirname(path)):
+      os.makedirs(os.path.dirname(path))
+    with open(path, "w") as f:
+      f.write(content)
+    return path
+
+  def test_010(self):
+    # the sha1 of the unchanged files are not computed again
+    manifest = SFP.get_tree_manifest(self.source_dir)
+    self.assertEqual(sorted(manifest.keys()), ["CMakeLists.txt", os.path.join("src", "a.cxx")])
+    hashed = []
+    get_file_hash = SFP.get_file_hash
+    def counting_hash(path):
+      hashed.append(os.path.basename(path))
+      return get_file_hash(path)
+    SFP.get_file_hash = counting_hash
+    try:
+      self.assertEqual(SFP.get_tree_manifest(self.source_dir, manifest), manifest)
+      self.assertEqual(hashed, [])
+      path = self.write_file(os.path.join("src", "a.cxx"), "int b;\n")
+      os.utime(path, (1, 1))
+      manifest2 = SFP.get_tree_manifest(self.source_dir, manifest)
+      self.assertEqual(hashed, ["a.cxx"])
+    finally:
+      SFP.get_file_hash = get_file_hash
+    self.assertNotEqual(SFP.get_manifest_fingerprint(manifest2),
+                        SFP.get_manifest_fingerprint(manifest))
+    # the dates are not part of the fingerprint
+    os.utime(path, (2, 2))
+    self.assertEqual(SFP.get_tree_fingerprint(self.source_dir),
+                     SFP.get_manifest_fingerprint(manifest2))
+
+  def test_020(self):
+    # the fingerprint recorded in the install directory
+    self.assertIsNone(src.product.check_source_fingerprint(self.p_info))
+    state = src.product.get_source_state(self.p_info)
+    src.product.add_source_fingerprint_file(self.p_info, state)
+    self.assertTrue(os.path.exists(src.product.get_source_fingerprint_file(self.p_info)))
+    self.assertTrue(src.product.check_source_fingerprint(self.p_info))
+    # a touch is not a modification
+    os.utime(self.source_dir, None)
+    os.utime(os.path.join(self.source_dir, "CMakeLists.txt"), None)
+    self.assertTrue(src.product.check_source_fingerprint(self.p_info))
+    self.write_file("CMakeLists.txt", "project(AA CXX)\n")
+    self.assertFalse(src.product.check_source_fingerprint(self.p_info))
+    self.write_file("CMakeLists.txt", "project(AA)\n")
+    self.assertTrue(src.product.check_source_fingerprint(self.p_info))
+    self.write_file("new.txt", "")
+    self.assertFalse(src.product.check_source_fingerprint(self.p_info))
+
+  def test_030(self):
+    # a git repository: the commit and the modified files
+    git = "git -c user.name=sat -c user.email=sat@test -C %s " % self.source_dir
+    if os.system(git + "init -q") != 0:
+      self.skipTest("git is not available")
+    os.system(git + "add -A")
+    os.system(git + "commit -q -m first")
+    state = src.product.get_source_state(self.p_info)
+    self.assertIsNone(state[1])
+    src.product.add_source_fingerprint_file(self.p_info, state)
+    self.assertTrue(src.product.check_source_fingerprint(self.p_info))
+    self.write_file("CMakeLists.txt", "project(AA CXX)\n")
+    self.assertFalse(src.product.check_source_fingerprint(self.p_info))
+    os.system(git + "commit -q -a -m second")
+    self.assertFalse(src.product.check_source_fingerprint(self.p_info))
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
+    pass
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src.pyconf
+import src.buildResources as BRES
+import src.salomeTools # for the messages (gettext)
+
+_MEMINFO = """\
+MemTotal:       32000000 kB
+MemFree:         1000000 kB
+%sBuffers:          500000 kB
+Cached:          2500000 kB
+"""
+
+class TestCase(unittest.TestCase):
+  "Test the number of jobs of make adapted to the memory"""
+
+  def setUp(self):
+    self.home = tempfile.mkdtemp(prefix="sat_test_075_")
+    self.config = src.pyconf.Config()
+    self.config.addMapping("VARS", src.pyconf.Mapping(self.config), "")
+    self.config.VARS.personalDir = self.home
+    self.p_info = src.pyconf.Config()
+    self.p_info.name = "AA"
+    self.p_info.version = "1.0"
+
+  def tearDown(self):
+    shutil.rmtree(self.home)
+
+  def test_010(self):
+    # /proc/meminfo, with or without MemAvailable
+    meminfo = os.path.join(self.home, "meminfo")
+    with open(meminfo, "w") as f:
+      f.write(_MEMINFO % "MemAvailable:    8000000 kB\n")
+    self.assertEqual(BRES.get_meminfo(meminfo), (32000000, 8000000))
+    with open(meminfo, "w") as f:
+      f.write(_MEMINFO % "")
+    self.assertEqual(BRES.get_meminfo(meminfo), (32000000, 4000000))
+    self.assertEqual(BRES.get_meminfo(os.path.join(self.home, "none")), (None, None))
+
+  def test_020(self):
+    # the jobs are limited by the cores and the memory
+    self.assertEqual(BRES.choose_make_jobs(16, 8, None, 1024), 8)
+    self.assertEqual(BRES.choose_make_jobs(4, 8, 10 ** 8, 1024), 4)
+    self.assertEqual(BRES.choose_make_jobs(16, 16, 10 * 1024 * 1024, 2 * 1024 * 1024), 4)
+    # under memory pressure, one job
+    self.assertEqual(BRES.choose_make_jobs(16, 16, 100 * 1024, 2 * 1024 * 1024), 1)
+    # the cores and the memory are shared by the concurrent compilations
+    self.assertEqual(BRES.choose_make_jobs(16, 16, None, 1024, 4), 4)
+    self.assertEqual(BRES.choose_make_jobs(16, 16, 10 * 1024 * 1024, 2 * 1024 * 1024, 2), 2)
+    self.assertEqual(BRES.choose_make_jobs(16, 2, None, 1024, 4), 1)
+
+  def test_030(self):
+    # the peak memory of the descendants of the command
+    code = "import sys; b = bytearray(64 * 1024 * 1024); sys.exit(3)"
+    res, peak_rss = BRES.call_with_rusage('"%s" -c "%s"' % (sys.executable, code), shell=True)
+    self.assertEqual(res, 3)
+    if peak_rss is not None:
+      self.assertGreater(peak_rss, 64 * 1024)
+
+  def test_040(self):
+    # the history of the compilations
+    self.assertEqual(BRES.read_history(self.config), {})
+    BRES.record_build(self.config, self.p_info, 2000000, 8, True)
+    self.assertEqual(BRES.read_history(self.config)["AA"]["peak_rss"], 2000000)
+    jobs, reason = BRES.get_make_jobs(self.config, self.p_info, 1)
+    self.assertEqual(jobs, 1)
+    self.assertIn("1.9 GB per job", reason)
+    BRES.set_concurrent_builds(3)
+    try:
+      jobs, reason = BRES.get_make_jobs(self.config, self.p_info, 1)
+    finally:
+      BRES.set_concurrent_builds(1)
+    self.assertEqual(jobs, 1)
+    self.assertIn("shared by 3 compilations", reason)
+    # a compilation starts beside the others if a job fits in the memory
+    self.assertTrue(BRES.has_memory_for_build(self.config, self.p_info, None))
+    self.assertTrue(BRES.has_memory_for_build(self.config, self.p_info, 4000000))
+    self.assertFalse(BRES.has_memory_for_build(self.config, self.p_info, 2000000))
+    # a failure only increases the peak
+    BRES.record_build(self.config, self.p_info, 1000000, 8, False)
+    self.assertEqual(BRES.read_history(self.config)["AA"]["peak_rss"], 2000000)
+    BRES.record_build(self.config, self.p_info, 3000000, 8, False)
+    self.assertEqual(BRES.read_history(self.config)["AA"]["peak_rss"], 3000000)
+    BRES.record_build(self.config, self.p_info, 1000000, 4, True)
+    self.assertEqual(BRES.read_history(self.config)["AA"]["peak_rss"], 1000000)
+
+  def test_050(self):
+    # the timeline of the steps
+    code = "sum(range(10 ** 6))"
+    res, usage = BRES.run_measured('"%s" -c "%s"' % (sys.executable, code), shell=True)
+    self.assertEqual(res, 0)
+    self.assertEqual(usage["status"], 0)
+    self.assertGreater(usage["wall"], 0)
+    timeline = BRES.BuildTimeline()
+    timeline.add_step("AA", "cmake", usage)
+    timeline.add_step("AA", "make", {"start": 0, "wall": 20.0, "status": 0})
+    timeline.add_step("BB", "make", {"start": 0, "wall": 5.0, "status": 1})
+    timeline.add_step("BB", "compile", {"start": 0, "wall": 7.0, "status": 1})
+    self.assertEqual(timeline.get_products(), ["AA", "BB"])
+    durations = timeline.get_durations()
+    self.assertAlmostEqual(durations["AA"], 20.0 + usage["wall"])
+    self.assertEqual(durations["BB"], 7.0)
+    path = os.path.join(self.home, "LOGS", "timeline.json")
+    timeline.write(path, "APPLI")
+    read = BRES.BuildTimeline.read(path)
+    self.assertEqual(read.steps, timeline.steps)
+    self.assertEqual(len(BRES.BuildTimeline.read(os.path.join(self.home, "none.json"))), 0)
+    # the last compilation of each product
+    other = BRES.BuildTimeline()
+    other.add_timed_step("BB", "compile", 0, 0)
+    read.update(other)
+    self.assertEqual([(s["product"], s["step"]) for s in read.steps],
+                     [("AA", "cmake"), ("AA", "make"), ("BB", "compile")])
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
+    pass
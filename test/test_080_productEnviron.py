@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src.product
+import src.environment
+import src.salomeTools as SAT
+import commands.config as CONFIG
+
+_APPLICATION = """\
+APPLICATION :
+{
+    name : 'TEST_080'
+    workdir : $VARS.personalDir + $VARS.sep + 'TEST_080'
+    tag : 'master'
+    base : 'no'
+    environ : { }
+    products : { AA : 'master' BB : 'master' CC : 'master' }
+}
+"""
+
+_PRODUCT = """\
+default :
+{
+    name : "%s"
+    get_source : "archive"
+    depend : [ %s ]
+    source_dir : $APPLICATION.workdir + $VARS.sep + 'SOURCES' + $VARS.sep + $name
+    environ : { %s }
+}
+"""
+
+_ENV_SCRIPT = """\
+def set_env(env, prereq_dir, version):
+    with open(%r, "a") as f:
+        f.write("run\\n")
+    env.set("AA_SCRIPT", prereq_dir)
+    env.prepend("PATH", prereq_dir + "/bin")
+"""
+
+class Logger(object):
+  def write(self, *args, **kwargs):
+    pass
+
+class TestCase(unittest.TestCase):
+  "Test the environment contributions of the products memoized for the config"""
+
+  def setUp(self):
+    # a personal directory ~/.salomeTools only for the test
+    self.home = tempfile.mkdtemp(prefix="sat_test_080_")
+    self.home_save = os.environ.get("HOME")
+    os.environ["HOME"] = self.home
+    CONFIG.ConfigManager()._create_vars()
+    personal_dir = os.path.join(self.home, ".salomeTools")
+    with open(os.path.join(personal_dir, "Applications", "TEST_080.pyconf"), "w") as f:
+      f.write(_APPLICATION)
+    self.runs = os.path.join(self.home, "runs")
+    env_script = os.path.join(self.home, "AA_env.py")
+    with open(env_script, "w") as f:
+      f.write(_ENV_SCRIPT % self.runs)
+    for name, depend, environ in [("AA", "", "env_script : %r" % env_script),
+                                  ("BB", '"AA"', "_PATH : $install_dir + '/bin'"),
+                                  ("CC", '"BB"', "CC_VAR : $name + '_' + $version")]:
+      with open(os.path.join(personal_dir, "products", name + ".pyconf"), "w") as f:
+        f.write(_PRODUCT % (name, depend, environ))
+    self.cfg = CONFIG.ConfigManager().get_config(application="TEST_080")
+
+  def tearDown(self):
+    src.product.clear_product_config_cache()
+    src.environment.clear_product_environ_cache()
+    if self.home_save is None:
+      del os.environ["HOME"]
+    else:
+      os.environ["HOME"] = self.home_save
+    shutil.rmtree(self.home)
+
+  def get_environ(self, products, forBuild=True):
+    env = src.environment.SalomeEnviron(self.cfg,
+                                        src.environment.Environ({"PATH": "/usr/bin"}),
+                                        forBuild)
+    env.silent = True
+    env.set_full_environ(Logger(), products)
+    return env.environ.environ
+
+  def get_nb_runs(self):
+    if not os.path.exists(self.runs):
+      return 0
+    with open(self.runs) as f:
+      return len(f.readlines())
+
+  def test_010(self):
+    # the env_script is run once, the contributions are replayed
+    env_CC = self.get_environ(["CC"])
+    self.assertEqual(self.get_nb_runs(), 1)
+    aa_dir = src.product.get_product_config(self.cfg, "AA").install_dir
+    bb_dir = src.product.get_product_config(self.cfg, "BB").install_dir
+    self.assertEqual(env_CC["AA_SCRIPT"], aa_dir)
+    self.assertEqual(env_CC["PATH"], "%s/bin:%s/bin:/usr/bin" % (bb_dir, aa_dir))
+    self.assertEqual(env_CC["CC_VAR"], "CC_master")
+    self.assertEqual(self.get_environ(["CC"]), env_CC)
+    env_BB = self.get_environ(["BB"])
+    self.assertNotIn("CC_VAR", env_BB)
+    self.assertEqual(env_BB["PATH"], env_CC["PATH"])
+    self.assertEqual(self.get_nb_runs(), 1)
+    # the launch environment has its own contributions
+    self.get_environ(["BB"], False)
+    self.assertEqual(self.get_nb_runs(), 2)
+    # the same environment without the cache
+    src.environment.clear_product_environ_cache(self.cfg)
+    self.assertEqual(self.get_environ(["CC"]), env_CC)
+    self.assertEqual(self.get_nb_runs(), 3)
+
+  def test_020(self):
+    # the environments do not modify the config, the products
+    # configurations stay memoized
+    p_info = src.product.get_product_config(self.cfg, "CC")
+    self.get_environ(["CC"])
+    self.get_environ(["BB"])
+    self.assertIs(src.product.get_product_config(self.cfg, "CC"), p_info)
+
+  def test_030(self):
+    # the contributions are computed again if the config is modified
+    self.get_environ(["CC"])
+    self.cfg.APPLICATION.products.CC = "v2"
+    self.assertEqual(self.get_environ(["CC"])["CC_VAR"], "CC_v2")
+    self.assertEqual(self.get_nb_runs(), 2)
+
+  def test_040(self):
+    # the environments written in files are not memoized
+    env = src.environment.SalomeEnviron(self.cfg,
+                                        src.environment.Environ({}), True,
+                                        for_package="BINARIES")
+    self.assertFalse(env.use_cache)
+    self.assertTrue(src.environment.SalomeEnviron(self.cfg,
+                                        src.environment.Environ({}), True).use_cache)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
+    pass
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src.pyconf
+import src.compilation
+import src.environment
+import src.salomeTools # for the messages (gettext)
+import src.debug as DBG
+
+class Logger(object):
+  def __init__(self):
+    self.logTxtFile = DBG.OutStream()
+  def write(self, *args, **kwargs):
+    pass
+  def flush(self):
+    pass
+
+class TestCase(unittest.TestCase):
+  "Test the cmake generator and the build tool of the Builder"""
+
+  def setUp(self):
+    self.tmp = tempfile.mkdtemp(prefix="sat_test_085_")
+    self.config = src.pyconf.Config()
+    self.config.addMapping("APPLICATION", src.pyconf.Mapping(self.config), "")
+    self.p_info = src.pyconf.Config()
+    self.p_info.name = "AA"
+    self.p_info.build_source = "cmake"
+    for key in ["build_dir", "source_dir", "install_dir"]:
+      self.p_info[key] = os.path.join(self.tmp, key)
+    os.makedirs(self.p_info.build_dir)
+    # a ninja executable in the PATH of the build environment
+    self.bin_dir = os.path.join(self.tmp, "bin")
+    os.makedirs(self.bin_dir)
+    with open(os.path.join(self.bin_dir, "ninja-build"), "w") as f:
+      f.write("#!/bin/sh\n")
+
+  def tearDown(self):
+    shutil.rmtree(self.tmp)
+
+  def get_builder(self):
+    builder = src.compilation.Builder(self.config, Logger(), "AA", self.p_info)
+    builder.build_environ = src.environment.Environ({"PATH": self.bin_dir})
+    return builder
+
+  def write_cmake_cache(self, generator):
+    with open(os.path.join(self.p_info.build_dir, "CMakeCache.txt"), "w") as f:
+      f.write("CMAKE_BUILD_TYPE:STRING=Release\n")
+      f.write("CMAKE_GENERATOR:INTERNAL=%s\n" % generator)
+
+  def test_010(self):
+    # the generator of the product, else of the application
+    self.assertIsNone(self.get_builder().get_cmake_generator())
+    self.config.APPLICATION.cmake_generator = "Unix Makefiles"
+    self.assertEqual(self.get_builder().get_cmake_generator(), "Unix Makefiles")
+    self.p_info.cmake_generator = "Ninja"
+    self.assertEqual(self.get_builder().get_cmake_generator(), "Ninja")
+
+  def test_020(self):
+    # the generator of a build directory already configured is kept
+    self.assertIsNone(src.compilation.get_cmake_cache_generator(self.p_info.build_dir))
+    self.write_cmake_cache("Ninja")
+    self.assertEqual(src.compilation.get_cmake_cache_generator(self.p_info.build_dir), "Ninja")
+    self.assertEqual(self.get_builder().get_cmake_generator(), "Ninja")
+    self.p_info.cmake_generator = "Unix Makefiles"
+    self.assertEqual(self.get_builder().get_cmake_generator(), "Ninja")
+
+  def test_030(self):
+    # the build tool depends on the files generated by cmake
+    builder = self.get_builder()
+    self.assertEqual(builder.get_build_tool(), "make")
+    with open(os.path.join(self.p_info.build_dir, "build.ninja"), "w") as f:
+      f.write("\n")
+    self.assertEqual(builder.get_build_tool(), "ninja-build")
+    with open(os.path.join(self.bin_dir, "ninja"), "w") as f:
+      f.write("#!/bin/sh\n")
+    self.assertEqual(builder.get_build_tool(), "ninja")
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
+    pass
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src.product
+import src.environment
+import src.fileEnviron
+import src.debug as DBG
+import src.salomeTools as SAT
+import commands.config as CONFIG
+
+_APPLICATION = """\
+APPLICATION :
+{
+    name : 'TEST_090'
+    workdir : $VARS.personalDir + $VARS.sep + 'TEST_090'
+    tag : 'master'
+    base : 'no'
+    environ : { }
+    products : { AA : 'master' BB : 'master' }
+}
+"""
+
+_PRODUCT = """\
+default :
+{
+    name : "%s"
+    get_source : "archive"
+    depend : [ %s ]
+    source_dir : $APPLICATION.workdir + $VARS.sep + 'SOURCES' + $VARS.sep + $name
+    properties : { is_SALOME_module : "yes" }
+    environ : { %s }
+}
+"""
+
+_ENV_SCRIPT = """\
+def set_env(env, prereq_dir, version):
+    with open(%r, "a") as f:
+        f.write("run\\n")
+    env.set("AA_HOME", prereq_dir)
+    env.prepend("PATH", env.get("AA_HOME") + "/bin")
+"""
+
+class Logger(object):
+  def write(self, *args, **kwargs):
+    pass
+
+def set_environ(env):
+  env.add_comment("setting environ for AA")
+  env.set("AA_ROOT_DIR", "/opt/AA")
+  env.prepend("PATH", [env.get("AA_ROOT_DIR") + "/bin", "/opt/bin"])
+  env.append("PV_PLUGIN_PATH", "plugins", ";")
+  env.prepend("PATH", "/opt/bin")
+  env.set("AA_LIB", env.get("AA_ROOT_DIR") + "/lib")
+  env.add_line(1)
+  env.add_warning("no licence")
+
+class TestCase(unittest.TestCase):
+  "Test the environment computed once and written for each shell"""
+
+  def setUp(self):
+    # a personal directory ~/.salomeTools only for the test
+    self.home = tempfile.mkdtemp(prefix="sat_test_090_")
+    self.home_save = os.environ.get("HOME")
+    os.environ["HOME"] = self.home
+    CONFIG.ConfigManager()._create_vars()
+    personal_dir = os.path.join(self.home, ".salomeTools")
+    with open(os.path.join(personal_dir, "Applications", "TEST_090.pyconf"), "w") as f:
+      f.write(_APPLICATION)
+    self.runs = os.path.join(self.home, "runs")
+    env_script = os.path.join(self.home, "AA_env.py")
+    with open(env_script, "w") as f:
+      f.write(_ENV_SCRIPT % self.runs)
+    for name, depend, environ in [("AA", "", "env_script : %r" % env_script),
+                                  ("BB", '"AA"', "_PYTHONPATH : $install_dir + '/lib/py'")]:
+      with open(os.path.join(personal_dir, "products", name + ".pyconf"), "w") as f:
+        f.write(_PRODUCT % (name, depend, environ))
+    self.cfg = CONFIG.ConfigManager().get_config(application="TEST_090")
+
+  def tearDown(self):
+    src.product.clear_product_config_cache()
+    src.environment.clear_product_environ_cache()
+    if self.home_save is None:
+      del os.environ["HOME"]
+    else:
+      os.environ["HOME"] = self.home_save
+    shutil.rmtree(self.home)
+
+  def test_010(self):
+    # the replay writes the same file as the direct calls, for each shell
+    log = src.environment.EnvironLog()
+    set_environ(log)
+    self.assertEqual(log.get_value("AA_LIB"), "/opt/AA/lib")
+    self.assertEqual(log.get_value("PATH"), "/opt/bin:/opt/AA/bin")
+    for shell in ["bash", "bat", "cfg"]:
+      direct = DBG.OutStream()
+      set_environ(src.fileEnviron.get_file_environ(direct, shell))
+      replayed = DBG.OutStream()
+      log.replay(src.fileEnviron.get_file_environ(replayed, shell))
+      self.assertEqual(replayed.getvalue(), direct.getvalue())
+      self.assertNotIn("\x00", replayed.getvalue())
+
+  def test_015(self):
+    # the references are substituted in the unicode values (python 2),
+    # a reference not terminated is an error
+    get = lambda key: "${%s}" % key
+    self.assertEqual(src.environment.substitute_references(
+                       u"\x00AA_ROOT_DIR\x00/lib", get), "${AA_ROOT_DIR}/lib")
+    self.assertEqual(src.environment.substitute_references(
+                       ["\x00A\x00", 1], get), ["${A}", 1])
+    with self.assertRaises(src.SatException):
+      src.environment.substitute_references("\x00AA_ROOT_DIR/lib", get)
+
+  def test_020(self):
+    # the environment is computed once for each mode
+    writer = src.environment.FileEnvWriter(self.cfg, Logger(), self.home, None)
+    files = {}
+    for shell, extension in [("bash", "sh"), ("bat", "bat"), ("cfg", "cfg")]:
+      for mode, forBuild in [("launch", False), ("build", True)]:
+        filename = "env_%s.%s" % (mode, extension)
+        writer.write_env_file(filename, forBuild, shell)
+        with open(os.path.join(self.home, filename)) as f:
+          files[filename] = f.read()
+    with open(self.runs) as f:
+      self.assertEqual(len(f.readlines()), 2)
+    self.assertIn('export PATH="${AA_HOME}/bin:${PATH}"', files["env_launch.sh"])
+    self.assertIn('ADD_TO_PATH: %(AA_HOME)s/bin', files["env_launch.cfg"])
+    self.assertIn('set PATH=%%AA_HOME%%/bin%s%%PATH%%' % os.pathsep, files["env_build.bat"])
+    bb_dir = src.product.get_product_config(self.cfg, "BB").install_dir
+    self.assertIn('export PYTHONPATH="%s/lib/py:${PYTHONPATH}"' % bb_dir, files["env_build.sh"])
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
+    pass
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import os
+import sys
+import unittest
+import subprocess
+
+import initializeTest # set PATH etc for test
+
+import src.environment
+import src.fileEnviron
+import src.debug as DBG
+
+class TestCase(unittest.TestCase):
+  "Test the path variables held as ordered sets"""
+
+  def test_010(self):
+    # append and prepend move the values already in the path
+    env = src.environment.Environ({})
+    env.append("PATH", ["/a", "/b", "/c"])
+    env.prepend("PATH", "/c")
+    env.append("PATH", "/a")
+    env.prepend("PATH", ["/d", "/b"])
+    self.assertEqual(env.get("PATH"), os.pathsep.join(["/d", "/b", "/c", "/a"]))
+    self.assertTrue(env.contains_value("PATH", "/c"))
+    self.assertFalse(env.contains_value("PATH", "/e"))
+    self.assertFalse(env.contains_value("LD_LIBRARY_PATH", "/c"))
+    # another separator
+    env.append("PV_PLUGIN_PATH", ["p1", "p2"], ";")
+    env.prepend("PV_PLUGIN_PATH", "p2", ";")
+    self.assertEqual(env.environ["PV_PLUGIN_PATH"], "p2;p1")
+    # set replaces the path
+    env.set("PATH", "/e")
+    env.append("PATH", "/a")
+    self.assertEqual(env.environ["PATH"], os.pathsep.join(["/e", "/a"]))
+
+  def test_020(self):
+    # the values with repeated items or references are kept as before
+    sep = os.pathsep
+    env = src.environment.Environ({"PATH": sep.join(["/a", "/b", "/a"]),
+                                   "ROOT": "/r"})
+    env.append("PATH", "/a")
+    self.assertEqual(env.get("PATH"), sep.join(["/b", "/a", "/a"]))
+    env.set("LD_LIBRARY_PATH", "/l")
+    env.prepend("LD_LIBRARY_PATH", "${ROOT}/lib")
+    self.assertEqual(env.get("LD_LIBRARY_PATH"), sep.join(["/r/lib", "/l"]))
+
+  def test_030(self):
+    # the dict of the variables is up to date when it is read or modified
+    sep = os.pathsep
+    variables = {}
+    env = src.environment.Environ(variables)
+    env.append("PATH", ["/a", "/b"])
+    self.assertEqual(env.environ["PATH"], sep.join(["/a", "/b"]))
+    self.assertIs(env.environ, variables)
+    env.environ["PATH"] = "/c"
+    env.append("PATH", "/a")
+    self.assertEqual(env.get("PATH"), sep.join(["/c", "/a"]))
+    env.prepend("PATH", "/d")
+    self.assertEqual(env.environ, {"PATH": sep.join(["/d", "/c", "/a"])})
+
+  def test_040(self):
+    # the shell files are not changed, the environment has no repeated items
+    env = src.environment.Environ({})
+    output = DBG.OutStream()
+    file_environ = src.fileEnviron.get_file_environ(output, "bash", env)
+    file_environ.set("AA_ROOT_DIR", "/opt/AA")
+    file_environ.prepend("PATH", [file_environ.get("AA_ROOT_DIR") + "/bin", "/opt/bin"])
+    file_environ.append("PATH", "/opt/bin")
+    self.assertIn('export PATH="${AA_ROOT_DIR}/bin:${PATH}"\n', output.getvalue())
+    self.assertEqual(output.getvalue().count("PATH="), 2)
+    self.assertEqual(env.get("PATH"), os.pathsep.join(["/opt/AA/bin", "/opt/bin"]))
+
+  def test_050(self):
+    # the external environment is written at once, for the subprocesses
+    name = "SAT_TEST_095_PATH"
+    os.environ[name] = "/a"
+    try:
+      env = src.environment.Environ()
+      env.prepend(name, "/b")
+      env.append(name, "/c")
+      self.assertEqual(os.environ[name], os.pathsep.join(["/b", "/a", "/c"]))
+      output = subprocess.check_output([sys.executable, "-c",
+                 "import os; print(os.environ['%s'])" % name])
+      self.assertEqual(output.decode().strip(), os.environ[name])
+    finally:
+      del os.environ[name]
+
+  def test_060(self):
+    # the ordered sets, also with python 2
+    items = src.environment._OrderedSet.fromkeys(["a", "b", "c", "d"])
+    items.move_to_end("b")
+    items.move_to_end("c", last=False)
+    items["e"] = None
+    items.move_to_end("e", last=False)
+    items.move_to_end("d")
+    self.assertEqual(list(items), ["e", "c", "a", "b", "d"])
+    del items["a"]
+    self.assertEqual(list(reversed(items)), ["d", "b", "c", "e"])
+    # the path variables are held as ordered sets
+    env = src.environment.Environ({"PATH": "/a"})
+    env.prepend("PATH", "/b")
+    self.assertIn("PATH", env._paths)
+    self.assertEqual(env.get("PATH"), os.pathsep.join(["/b", "/a"]))
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
+    pass
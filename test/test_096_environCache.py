@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src.product
+import src.environment
+import src.environCache
+import src.salomeTools as SAT
+import commands.config as CONFIG
+
+_APPLICATION = """\
+APPLICATION :
+{
+    name : 'TEST_096'
+    workdir : $VARS.personalDir + $VARS.sep + 'TEST_096'
+    tag : 'master'
+    base : 'no'
+    environ : { }
+    products : { AA : 'master' BB : 'master' }
+}
+"""
+
+_PRODUCT = """\
+default :
+{
+    name : "%s"
+    get_source : "archive"
+    depend : [ %s ]
+    source_dir : $APPLICATION.workdir + $VARS.sep + 'SOURCES' + $VARS.sep + $name
+    properties : { is_SALOME_module : "yes" }
+    environ : { %s }
+}
+"""
+
+_ENV_SCRIPT = """\
+def set_env(env, prereq_dir, version):
+    with open(%r, "a") as f:
+        f.write("run\\n")
+    env.set("AA_HOME", prereq_dir)
+    env.prepend("PATH", env.get("AA_HOME") + "/bin")
+"""
+
+class Logger(object):
+  def write(self, *args, **kwargs):
+    pass
+
+class TestCase(unittest.TestCase):
+  "Test the cache of the computed environments"""
+
+  def setUp(self):
+    # a personal directory ~/.salomeTools only for the test
+    self.home = tempfile.mkdtemp(prefix="sat_test_096_")
+    self.home_save = os.environ.get("HOME")
+    os.environ["HOME"] = self.home
+    CONFIG.ConfigManager()._create_vars()
+    personal_dir = os.path.join(self.home, ".salomeTools")
+    with open(os.path.join(personal_dir, "Applications", "TEST_096.pyconf"), "w") as f:
+      f.write(_APPLICATION)
+    self.runs = os.path.join(self.home, "runs")
+    self.env_script = os.path.join(self.home, "AA_env.py")
+    with open(self.env_script, "w") as f:
+      f.write(_ENV_SCRIPT % self.runs)
+    for name, depend, environ in [("AA", "", "env_script : %r" % self.env_script),
+                                  ("BB", '"AA"', "_PYTHONPATH : $install_dir + '/lib/py'")]:
+      with open(os.path.join(personal_dir, "products", name + ".pyconf"), "w") as f:
+        f.write(_PRODUCT % (name, depend, environ))
+    self.cfg = CONFIG.ConfigManager().get_config(application="TEST_096")
+
+  def tearDown(self):
+    src.product.clear_product_config_cache()
+    src.environment.clear_product_environ_cache()
+    if self.home_save is None:
+      del os.environ["HOME"]
+    else:
+      os.environ["HOME"] = self.home_save
+    shutil.rmtree(self.home)
+
+  def write_file(self):
+    """write the launch environment with a new writer, return the file content"""
+    writer = src.environment.FileEnvWriter(self.cfg, Logger(), self.home, None)
+    writer.write_env_file("env_launch.sh", False, "bash")
+    with open(os.path.join(self.home, "env_launch.sh")) as f:
+      return f.read()
+
+  def get_runs(self):
+    """the number of runs of the env_script"""
+    with open(self.runs) as f:
+      return len(f.readlines())
+
+  def test_010(self):
+    # the environment is read from the cache by the next writers
+    content = self.write_file()
+    self.assertIn('export PATH="${AA_HOME}/bin:${PATH}"', content)
+    self.assertEqual(self.write_file(), content)
+    self.assertEqual(self.get_runs(), 1)
+    # another mode is another environment
+    writer = src.environment.FileEnvWriter(self.cfg, Logger(), self.home, None)
+    writer.write_env_file("env_build.sh", True, "bash")
+    self.assertEqual(self.get_runs(), 2)
+
+  def test_015(self):
+    # the environment read from the cache has str values, as computed
+    src.environCache.write_environ(self.cfg, "key", {"environ": {"AA": "/opt/AA"},
+                                                     "operations": [["set", ["AA", "\x00AA\x00"]]]})
+    content = src.environCache.read_environ(self.cfg, "key")
+    self.assertEqual(type(content["environ"]["AA"]), str)
+    self.assertEqual(type(content["operations"][0][1][1]), str)
+    content = self.write_file()
+    self.assertNotIn("\x00", self.write_file())
+    self.assertEqual(self.write_file(), content)
+    self.assertEqual(self.get_runs(), 1)
+
+  def test_020(self):
+    # the environment is computed again if one of its inputs changes
+    self.write_file()
+    # the env_script
+    with open(self.env_script, "a") as f:
+      f.write('    env.set("AA_NEW", "yes")\n')
+    self.assertIn('export AA_NEW="yes"', self.write_file())
+    self.assertEqual(self.get_runs(), 2)
+    # the install directory of a product and its sat-config file
+    bb_info = src.product.get_product_config(self.cfg, "BB")
+    os.makedirs(bb_info.install_dir)
+    self.write_file()
+    self.assertEqual(self.get_runs(), 3)
+    src.product.add_compile_config_file(bb_info, self.cfg)
+    self.write_file()
+    self.assertEqual(self.get_runs(), 4)
+    self.write_file()
+    self.assertEqual(self.get_runs(), 4)
+    # the config
+    self.cfg.APPLICATION.environ.addMapping("APPLI_VAR", "value", "")
+    self.assertIn('export APPLI_VAR="value"', self.write_file())
+    self.assertEqual(self.get_runs(), 5)
+
+  def test_030(self):
+    # the cache can be disabled
+    self.cfg.LOCAL.addMapping("environ_cache", "no", "")
+    self.assertIsNone(src.environCache.get_environ_key(self.cfg, False))
+    self.write_file()
+    self.write_file()
+    self.assertEqual(self.get_runs(), 2)
+
+  def test_040(self):
+    # the least recently used environments are removed
+    for i in range(5):
+      src.environCache.write_environ(self.cfg, "key%i" % i, {"index": i})
+      path = src.environCache.get_environ_path(self.cfg, "key%i" % i)
+      os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+    self.assertEqual(src.environCache.read_environ(self.cfg, "key0"), {"index": 0})
+    cache_dir = os.path.dirname(path)
+    self.assertEqual(src.environCache.evict(cache_dir, 3), 2)
+    self.assertIsNotNone(src.environCache.read_environ(self.cfg, "key0"))
+    for i, cached in [(1, False), (2, False), (3, True), (4, True)]:
+      self.assertEqual(src.environCache.read_environ(self.cfg, "key%i" % i) is not None, cached)
+
+  def test_050(self):
+    # the licence files are in the key
+    key = src.environCache.get_environ_key(self.cfg, False)
+    self.cfg.PRODUCTS.AA.default.properties.addMapping("licence", "AA.lic", "")
+    src.product.clear_product_config_cache()
+    key2 = src.environCache.get_environ_key(self.cfg, False)
+    self.assertNotEqual(key2, key)
+    self.cfg.PATHS.LICENCEPATH.append(self.home, "")
+    key3 = src.environCache.get_environ_key(self.cfg, False)
+    self.assertNotIn(key3, [key, key2])
+    with open(os.path.join(self.home, "AA.lic"), "w") as f:
+      f.write("licence")
+    self.assertNotIn(src.environCache.get_environ_key(self.cfg, False),
+                     [key, key2, key3])
+
+  def test_060(self):
+    # the environments which depend on the shell are not cached
+    with open(self.env_script, "a") as f:
+      f.write('    env.set("AA_USER", "`whoami`")\n')
+    self.write_file()
+    self.write_file()
+    self.assertEqual(self.get_runs(), 2)
+    with open(self.env_script, "a") as f:
+      f.write('    env.set("AA_SHELL", os.environ.get("SHELL", ""))\n')
+    self.assertIsNone(src.environCache.get_environ_key(self.cfg, False))
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
+    pass
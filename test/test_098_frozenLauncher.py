@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+import initializeTest # set PATH etc for test
+
+import src.environment
+import src.fileEnviron
+import src.debug as DBG
+
+# the salomeContext API used by the launchers (the values are expanded,
+# and prepended to the variables), runSalome writes the environment
+SALOME_CONTEXT = """\
+import os, json
+class SalomeContextException(Exception): pass
+class Logger(object):
+  def setLevel(self, level): pass
+class SalomeContext(object):
+  def __init__(self, config): pass
+  def getLogger(self): return Logger()
+  def setVariable(self, name, value, overwrite=False):
+    value = os.path.expandvars(value)
+    if overwrite or name not in os.environ:
+      os.environ[name] = value
+  def addToVariable(self, name, value, separator=os.pathsep):
+    if value == '': return
+    value = os.path.expandvars(value)
+    env = os.getenv(name, None)
+    os.environ[name] = value if env is None else value + separator + env
+  def addToPath(self, value): self.addToVariable("PATH", value)
+  def addToLdLibraryPath(self, value): self.addToVariable("LD_LIBRARY_PATH", value)
+  def addToPythonPath(self, value): self.addToVariable("PYTHONPATH", value)
+  def runSalome(self, args):
+    with open(args[0], "w") as f:
+      json.dump(dict(os.environ), f)
+    return None, None, 0
+"""
+
+def set_environ(env, root):
+  """the calls of SalomeEnviron for two products"""
+  env.set("A_ROOT_DIR", root + "/A")
+  env.prepend("PATH", env.get("A_ROOT_DIR") + "/bin")
+  env.prepend("LD_LIBRARY_PATH", env.get("A_ROOT_DIR") + "/lib")
+  env.append("A_LIST", ["one", "two"])
+  env.set("B_ROOT_DIR", root + "/B")
+  env.prepend("PATH", env.get("B_ROOT_DIR") + "/bin")
+  env.prepend("LD_LIBRARY_PATH", env.get("B_ROOT_DIR") + "/lib")
+  env.prepend("PYTHONPATH", env.get("B_ROOT_DIR") + "/lib/python")
+  env.set("B_DATA", env.get("A_ROOT_DIR") + "/data:" + env.get("HOME") + "/data")
+
+class TestCase(unittest.TestCase):
+  "Test the launchers which load a frozen environment"""
+
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp(prefix="sat_frozen_")
+    self.bin_dir = os.path.join(self.tmp_dir, "bin")
+    os.makedirs(self.bin_dir)
+    with open(os.path.join(self.bin_dir, "salomeContext.py"), "w") as f:
+      f.write(SALOME_CONTEXT)
+    with open(os.path.join(self.bin_dir, "salomeContextUtils.py"), "w") as f:
+      f.write("def setOmniOrbUserPath(): pass\n")
+
+  def tearDown(self):
+    shutil.rmtree(self.tmp_dir)
+
+  def write_launcher(self, directory, name, shell, root):
+    if not os.path.isdir(directory):
+      os.makedirs(directory)
+    path = os.path.join(directory, name)
+    environ = src.environment.Environ({"sat_python_version": 3,
+                                       "sat_bin_kernel_install_dir": self.bin_dir})
+    with open(path, "w") as output:
+      env = src.fileEnviron.get_file_environ(output, shell, environ)
+      set_environ(env, root)
+      env.finish()
+    return path
+
+  def run_launcher(self, path, environ):
+    result = os.path.join(self.tmp_dir, "environ.json")
+    subprocess.check_call([sys.executable, path, result], env=environ)
+    with open(result) as f:
+      return json.load(f)
+
+  def test_010(self):
+    # the references to the variables already set are resolved
+    sep = os.pathsep
+    snapshot = src.fileEnviron.EnvironSnapshot(
+                 src.fileEnviron.get_reference_pattern())
+    snapshot.set("ROOT", "/r")
+    snapshot.add("PATH", "${ROOT}/bin", sep, False)
+    snapshot.add("PATH", "$ROOT/sbin", sep, False)
+    snapshot.add("PATH", "/usr/local/bin", sep, True)
+    snapshot.set("MY_PATH", "${PATH}" + sep + "${HOME}/bin")
+    snapshot.add("ROOT", "/s", sep, True)
+    self.assertEqual(snapshot.get_variables(), [
+      ("ROOT", {"value": "/r" + sep + "/s"}),
+      ("PATH", {"prepend": ["/r/sbin", "/r/bin"], "append": ["/usr/local/bin"],
+                "separator": sep}),
+      ("MY_PATH", {"value": sep.join(["/r/sbin", "/r/bin", "${PATH}",
+                                      "/usr/local/bin", "${HOME}/bin"])})])
+
+  def test_020(self):
+    # the frozen launcher sets the environment of the launcher
+    root = os.path.join(self.tmp_dir, "products")
+    launcher = self.write_launcher(self.tmp_dir, "salome", "cfgForPy", root)
+    frozen = self.write_launcher(self.tmp_dir, "frozen_salome",
+                                 "cfgForPyFrozen", root)
+    self.assertTrue(os.path.isfile(frozen + ".env.json"))
+    self.assertNotIn("context.addToPath(r", open(frozen).read())
+    for environ in [{"PATH": os.environ["PATH"]},
+                    {"PATH": os.environ["PATH"], "HOME": "/home/user",
+                     "LD_LIBRARY_PATH": "/usr/lib", "A_LIST": "zero"}]:
+      self.assertEqual(self.run_launcher(frozen, environ),
+                       self.run_launcher(launcher, environ))
+
+  def test_030(self):
+    # a package launcher is relocatable
+    directory = os.path.join(self.tmp_dir, "package")
+    frozen = self.write_launcher(directory, "salome", "cfgForPyFrozen",
+                                 "out_dir_Path/BINARIES")
+    moved = os.path.join(self.tmp_dir, "moved")
+    os.rename(directory, moved)
+    environ = self.run_launcher(os.path.join(moved, "salome"),
+                                {"PATH": os.environ["PATH"]})
+    self.assertEqual(environ["A_ROOT_DIR"], moved + "/BINARIES/A")
+    self.assertEqual(environ["PATH"].split(os.pathsep)[:2],
+                     [moved + "/BINARIES/B/bin", moved + "/BINARIES/A/bin"])
+
+  def test_040(self):
+    # a frozen salome context file has one line per variable
+    output = DBG.OutStream()
+    env = src.fileEnviron.get_file_environ(output, "cfgFrozen")
+    set_environ(env, "/r")
+    env.finish()
+    lines = output.getvalue().splitlines()
+    self.assertEqual(lines[0], "[SALOME Configuration]")
+    self.assertIn('ADD_TO_PATH: /r/B/bin%s/r/A/bin' % os.pathsep, lines)
+    self.assertIn('B_DATA="/r/A/data:%(HOME)s/data"', lines)
+    self.assertEqual(len(lines), 8)
+
+# test launch
+if __name__ == '__main__':
+    unittest.main()
+    pass
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+#  Copyright (C) 2010-2018  CEA/DEN
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2.1 of the License.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307 USA
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import initializeTest # set PATH etc for test
+
+import src.environment
+import src.fileEnviron
+import src.libraryFarm
+import src.debug as DBG
+
+class TestCase(unittest.TestCase):
+  "Test the library farm of the launch environments"""
+
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp(prefix="sat_farm_")
+    self.root = os.path.join(self.tmp_dir, "products")
+
+  def tearDown(self):
+    shutil.rmtree(self.tmp_dir)
+
+  def touch(self, *names):
+    path = os.path.join(self.root, *names)
+    if not os.path.isdir(os.path.dirname(path)):
+      os.makedirs(os.path.dirname(path))
+    with open(path, "w") as f:
+      f.write(path)
+    return path
+
+  def get_environ_log(self, root):
+    """the environment of two products, and of a directory not farmed"""
+    env = src.environment.EnvironLog()
+    for name in ["A", "B"]:
+      env.set(name + "_ROOT_DIR", os.path.join(root, name))
+      env.prepend("LD_LIBRARY_PATH", os.path.join(env.get(name + "_ROOT_DIR"), "lib"))
+      env.prepend("PYTHONPATH", os.path.join(env.get(name + "_ROOT_DIR"), "python"))
+    env.append("LD_LIBRARY_PATH", os.path.join(self.tmp_dir, "usr", "lib"))
+    env.set("PATH_DATA", os.path.join(env.get("A_ROOT_DIR"), "data"))
+    return env
+
+  def get_farm(self, **kwargs):
+    roots = dict((os.path.join(self.root, name), os.path.join(self.root, name))
+                 for name in ["A", "B"])
+    return src.libraryFarm.LibraryFarm(os.path.join(self.tmp_dir, "FARM"),
+                                       roots, **kwargs)
+
+  def write_bash(self, environ_log):
+    output = DBG.OutStream()
+    environ_log.replay(src.fileEnviron.get_file_environ(output, "bash"))
+    return output.getvalue()
+
+  def test_010(self):
+    # the libraries are linked in the farm, the first one of the path is used
+    self.touch("A", "lib", "libA.so")
+    self.touch("A", "lib", "libcommon.so.1")
+    self.touch("A", "lib", "README")
+    self.touch("B", "lib", "libB.so.2.0")
+    self.touch("B", "lib", "libcommon.so.1")
+    farm = self.get_farm()
+    env = farm.apply(self.get_environ_log(self.root))
+    lib_dir = os.path.join(farm.farm_dir, "lib")
+    self.assertEqual(sorted(os.listdir(lib_dir)),
+                     ["libA.so", "libB.so.2.0", "libcommon.so.1"])
+    # B is prepended after A: B is the first one
+    self.assertEqual(os.readlink(os.path.join(lib_dir, "libcommon.so.1")),
+                     os.path.join(self.root, "B", "lib", "libcommon.so.1"))
+    self.assertEqual(farm.collisions["LD_LIBRARY_PATH"],
+                     [("libcommon.so.1", os.path.join(self.root, "B", "lib"),
+                       os.path.join(self.root, "A", "lib"))])
+    # the directories not in the products stay in the path
+    self.assertEqual(env.get_value("LD_LIBRARY_PATH"),
+                     os.pathsep.join([lib_dir,
+                                      os.path.join(self.tmp_dir, "usr", "lib")]))
+    bash = self.write_bash(env)
+    self.assertIn('export LD_LIBRARY_PATH="%s:${LD_LIBRARY_PATH}"' % lib_dir, bash)
+    self.assertEqual(bash.count("export LD_LIBRARY_PATH="), 2)
+    self.assertIn('export PATH_DATA="${A_ROOT_DIR}/data"', bash)
+
+  def test_020(self):
+    # a library of a directory before the products is not linked
+    self.touch("A", "lib", "libA.so")
+    self.touch("B", "lib", "libz.so")
+    usr_lib = os.path.join(self.tmp_dir, "usr", "lib")
+    os.makedirs(usr_lib)
+    open(os.path.join(usr_lib, "libz.so"), "w").close()
+    env = src.environment.EnvironLog()
+    env.prepend("LD_LIBRARY_PATH", os.path.join(self.root, "A", "lib"))
+    env.prepend("LD_LIBRARY_PATH", usr_lib)
+    env.append("LD_LIBRARY_PATH", os.path.join(self.root, "B", "lib"))
+    farm = self.get_farm()
+    env = farm.apply(env)
+    self.assertEqual(sorted(os.listdir(os.path.join(farm.farm_dir, "lib"))),
+                     ["libA.so"])
+    self.assertEqual(env.get_value("LD_LIBRARY_PATH").split(os.pathsep)[1:],
+                     [usr_lib])
+    # the farm is built again, without the old links
+    os.remove(os.path.join(self.root, "A", "lib", "libA.so"))
+    farm.apply(self.get_environ_log(self.root))
+    self.assertEqual(sorted(os.listdir(os.path.join(farm.farm_dir, "lib"))),
+                     ["libz.so"])
+    self.assertEqual(sorted(os.listdir(farm.farm_dir)), ["lib", "python"])
+
+  def test_030(self):
+    # the python packages: a namespace package is merged, not a package
+    self.touch("A", "python", "moda.py")
+    self.touch("A", "python", "pkg", "__init__.py")
+    self.touch("A", "python", "pkg", "a.py")
+    self.touch("A", "python", "ns", "a.py")
+    self.touch("A", "python", "__pycache__", "moda.cpython-36.pyc")
+    self.touch("B", "python", "pkg", "__init__.py")
+    self.touch("B", "python", "pkg", "b.py")
+    self.touch("B", "python", "ns", "b.py")
+    farm = self.get_farm()
+    farm.apply(self.get_environ_log(self.root))
+    python_dir = os.path.join(farm.farm_dir, "python")
+    self.assertEqual(sorted(os.listdir(python_dir)), ["moda.py", "ns", "pkg"])
+    self.assertTrue(os.path.islink(os.path.join(python_dir, "pkg")))
+    self.assertEqual(os.readlink(os.path.join(python_dir, "pkg")),
+                     os.path.join(self.root, "B", "python", "pkg"))
+    self.assertFalse(os.path.islink(os.path.join(python_dir, "ns")))
+    self.assertEqual(sorted(os.listdir(os.path.join(python_dir, "ns"))),
+                     ["a.py", "b.py"])
+    self.assertEqual([c[0] for c in farm.collisions["PYTHONPATH"]], ["pkg"])
+
+  def test_040(self):
+    # the farm of a package has relative links
+    self.touch("A", "lib", "libA.so")
+    self.touch("B", "python", "modb.py")
+    roots = dict((os.path.join("out_dir_Path", "BINARIES", name),
+                  os.path.join(self.root, name)) for name in ["A", "B"])
+    farm_dir = os.path.join(self.tmp_dir, "LIBRARY_FARM")
+    farm = src.libraryFarm.LibraryFarm(farm_dir, roots,
+                                       link_dir="out_dir_Path/LIBRARY_FARM",
+                                       for_package="BINARIES")
+    env = farm.apply(self.get_environ_log("out_dir_Path/BINARIES"))
+    self.assertEqual(os.readlink(os.path.join(farm_dir, "lib", "libA.so")),
+                     os.path.join("..", "..", "BINARIES", "A", "lib", "libA.so"))
+    self.assertEqual(env.get_value("PYTHONPATH"), "out_dir_Path/LIBRARY_FARM/python")
+    # the links are valid when the package is extracted
+    os.makedirs(os.path.join(self.tmp_dir, "package"))
+    shutil.move(farm_dir, os.path.join(self.tmp_dir, "package"))
+    shutil.move(self.root, os.path.join(self.tmp_dir, "package", "BINARIES"))
+    self.assertTrue(os.path.isfile(os.path.join(self.tmp_dir, "package",
+                                   "LIBRARY_FARM", "python", "modb.py")))
+
+# test launch
+if __name__ == '__main__':
+    unittest.main()
+    pass